@@ -0,0 +1,179 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .point_ops import PointPipeline
+
+# An adjustment builds the point operation pipeline of its parameters
+# (see :mod:`point_ops`); opacity is applied by the layer.
+AdjustmentBuilder = Callable[..., PointPipeline]
+
+ADJUSTMENTS: Dict[str, AdjustmentBuilder] = {}
+
+
+def register_adjustment(kind: str) -> Callable[[AdjustmentBuilder], AdjustmentBuilder]:
+    """
+    Decorator registering a pipeline builder under an adjustment kind.
+
+    The builder is called with the layer's parameters as keyword arguments.
+
+    Args:
+        kind (str): Identifier stored in ``AdjustmentLayer.kind`` and .epigimp files.
+    """
+    def decorator(builder: AdjustmentBuilder) -> AdjustmentBuilder:
+        ADJUSTMENTS[kind] = builder
+        return builder
+    return decorator
+
+
+def get_adjustment(kind: str) -> AdjustmentBuilder:
+    """
+    Look up a registered adjustment builder.
+
+    Raises:
+        ValueError: If no adjustment is registered under this kind.
+    """
+    try:
+        return ADJUSTMENTS[kind]
+    except KeyError:
+        raise ValueError(f"Unknown adjustment: {kind}") from None
+
+
+def adjustment_kinds() -> List[str]:
+    """Kinds of all registered adjustments, in registration order."""
+    return list(ADJUSTMENTS)
+
+
+@register_adjustment('color_temperature')
+def color_temperature(original_temp: float = 6500, target_temp: float = 6500) -> PointPipeline:
+    return PointPipeline().color_temperature(original_temp, target_temp)
+
+
+@register_adjustment('brightness_contrast')
+def brightness_contrast(brightness: float = 0.0, contrast: float = 0.0) -> PointPipeline:
+    return PointPipeline().brightness_contrast(brightness, contrast)
+
+
+@register_adjustment('levels')
+def levels(in_low: float = 0, in_high: float = 255, gamma: float = 1.0, out_low: float = 0, out_high: float = 255) -> PointPipeline:
+    return PointPipeline().levels(in_low, in_high, gamma, out_low, out_high)
+
+
+@register_adjustment('curves')
+def curves(points: Sequence[Sequence[float]] = ((0, 0), (255, 255))) -> PointPipeline:
+    return PointPipeline().curves([tuple(point) for point in points])
+
+
+@register_adjustment('hue_saturation')
+def hue_saturation(hue: float = 0.0, saturation: float = 1.0, lightness: float = 0.0) -> PointPipeline:
+    return PointPipeline().hue_saturation(hue, saturation, lightness)
+
+
+@register_adjustment('invert')
+def invert() -> PointPipeline:
+    return PointPipeline().invert()
+
+
+class AdjustmentLayer:
+    """
+    A non-destructive adjustment in the layer stack.
+
+    It holds parameters instead of pixels: the compositor applies it to the
+    image formed by the layers below it, so changing the parameters never
+    touches layer data and only costs one pipeline pass (usually a single
+    lookup table) over the tiles being displayed.
+
+    It exposes the same stacking properties as :class:`Layer` (name,
+    visibility, opacity, version) but has no pixels; code editing pixels
+    should check :attr:`is_adjustment` first.
+    """
+
+    is_adjustment = True
+    is_group = False
+
+    def __init__(self, kind: str = 'color_temperature', params: Optional[Dict[str, Any]] = None, name: str = "Adjustment") -> None:
+        """
+        Initialize an AdjustmentLayer.
+
+        Args:
+            kind (str): A registered adjustment kind.
+            params (Optional[Dict[str, Any]]): Keyword arguments of the adjustment.
+            name (str): The display name of the layer.
+
+        Raises:
+            ValueError: If the kind is not registered.
+        """
+        get_adjustment(kind)
+        self.kind = kind
+        self.params: Dict[str, Any] = dict(params or {})
+        self.name: str = name
+        self.visibility: bool = True
+        self.opacity: float = 1.0
+        self.blend_mode: str = 'normal'
+        self.position: Tuple[int, int] = (0, 0)
+
+        # Incremented on every parameter change; part of the compositor cache keys
+        self.version: int = 0
+        self._pipeline: Optional[Tuple[int, PointPipeline]] = None
+
+    def set_visibility(self, state: bool) -> None:
+        self.visibility = state
+
+    def set_name(self, name: str) -> None:
+        self.name = name
+
+    def toggle_visibility(self) -> None:
+        self.visibility = not self.visibility
+
+    def set_opacity(self, opacity: float) -> None:
+        """Set how strongly the adjustment applies, clamped to the 0.0 - 1.0 range."""
+        self.opacity = max(0.0, min(1.0, float(opacity)))
+
+    def set_params(self, **params: Any) -> None:
+        """
+        Update some of the adjustment parameters.
+
+        Args:
+            **params: Parameters to change; the others are kept.
+        """
+        self.params.update(params)
+        self.version += 1
+
+    def pipeline(self) -> PointPipeline:
+        """
+        Get the compiled point operation pipeline of the current parameters.
+
+        Returns:
+            PointPipeline: Rebuilt only after a parameter change.
+        """
+        if self._pipeline is None or self._pipeline[0] != self.version:
+            pipeline = get_adjustment(self.kind)(**self.params)
+            pipeline.compile()
+            self._pipeline = (self.version, pipeline)
+        return self._pipeline[1]
+
+    def apply(self, pixels: np.ndarray) -> None:
+        """
+        Adjust straight RGBA uint8 pixels in place, honoring the layer opacity.
+
+        Args:
+            pixels (np.ndarray): (H, W, 4) uint8 array, typically a tile of the
+                image below the layer.
+        """
+        if self.opacity > 0:
+            self.pipeline().apply(pixels, out=pixels, opacity=self.opacity)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The adjustment definition, as stored in project files."""
+        return {'kind': self.kind, 'params': dict(self.params)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], name: str = "Adjustment") -> 'AdjustmentLayer':
+        """
+        Create an adjustment layer from :meth:`to_dict` output.
+
+        Args:
+            data (Dict[str, Any]): {'kind': ..., 'params': {...}}.
+            name (str): The display name of the layer.
+        """
+        return cls(data['kind'], data.get('params'), name=name)
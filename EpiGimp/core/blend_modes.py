@@ -0,0 +1,90 @@
+from typing import Callable, Dict, List
+
+import numpy as np
+
+# A kernel takes the backdrop and source colors as straight (non premultiplied)
+# float32 RGB tiles in [0, 1] of identical shape (H, W, 3) and returns the
+# mixed color B(Cb, Cs) as defined by the W3C Compositing and Blending spec.
+BlendKernel = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+BLEND_MODES: Dict[str, BlendKernel] = {}
+
+
+def register_blend_mode(name: str) -> Callable[[BlendKernel], BlendKernel]:
+    """
+    Decorator registering a vectorized blend kernel under a mode name.
+
+    Args:
+        name (str): Mode identifier as stored in ``Layer.blend_mode`` and .epigimp files.
+    """
+    def decorator(kernel: BlendKernel) -> BlendKernel:
+        BLEND_MODES[name] = kernel
+        return kernel
+    return decorator
+
+
+def get_blend_mode(name: str) -> BlendKernel:
+    """
+    Look up a registered blend kernel.
+
+    Raises:
+        ValueError: If no kernel is registered under this name.
+    """
+    try:
+        return BLEND_MODES[name]
+    except KeyError:
+        raise ValueError(f"Unknown blend mode: {name}") from None
+
+
+def blend_mode_names() -> List[str]:
+    """Names of all registered blend modes, in registration order."""
+    return list(BLEND_MODES)
+
+
+# =========================================================================
+# Kernels
+# =========================================================================
+
+@register_blend_mode('normal')
+def normal(backdrop: np.ndarray, source: np.ndarray) -> np.ndarray:
+    return source
+
+
+@register_blend_mode('multiply')
+def multiply(backdrop: np.ndarray, source: np.ndarray) -> np.ndarray:
+    return backdrop * source
+
+
+@register_blend_mode('screen')
+def screen(backdrop: np.ndarray, source: np.ndarray) -> np.ndarray:
+    return backdrop + source - backdrop * source
+
+
+@register_blend_mode('overlay')
+def overlay(backdrop: np.ndarray, source: np.ndarray) -> np.ndarray:
+    # Hard light with the layers swapped: the backdrop picks multiply or screen
+    return np.where(
+        backdrop <= 0.5,
+        2.0 * backdrop * source,
+        1.0 - 2.0 * (1.0 - backdrop) * (1.0 - source)
+    ).astype(np.float32, copy=False)
+
+
+@register_blend_mode('darken')
+def darken(backdrop: np.ndarray, source: np.ndarray) -> np.ndarray:
+    return np.minimum(backdrop, source)
+
+
+@register_blend_mode('lighten')
+def lighten(backdrop: np.ndarray, source: np.ndarray) -> np.ndarray:
+    return np.maximum(backdrop, source)
+
+
+@register_blend_mode('add')
+def add(backdrop: np.ndarray, source: np.ndarray) -> np.ndarray:
+    return np.minimum(backdrop + source, 1.0)
+
+
+@register_blend_mode('difference')
+def difference(backdrop: np.ndarray, source: np.ndarray) -> np.ndarray:
+    return np.abs(backdrop - source)
@@ -1,20 +1,176 @@
 import typing
-from typing import List, Dict, Any, Tuple, Optional, Union
-from functools import reduce
+from typing import Callable, Iterator, List, Dict, Any, NamedTuple, Sequence, Tuple, Optional, Union
 from datetime import datetime
 
 import cv2 as cv
 import numpy as np
 from PIL import Image
+from PySide6.QtCore import QPoint, QRect
 
 from EpiGimp.core.fileio.loader_png import LoaderPng
 # Assuming 'from .layer import Layer' refers to a sibling file
 from .layer import Layer 
+from .layer_group import LayerGroup, iter_layers
+from .layer_mask import LayerMask
+from .adjustment_layer import AdjustmentLayer
+from .clipboard import Clipboard
+from .compositor import Compositor, PixelFilter, get_executor
+from .floating import FloatingSelection
+from .flood_fill import DEFAULT_TOLERANCE, color_region
+from .filters import apply_filter as filter_region
+from .histogram import ImageStatistics, Statistics
+from .mipmap import MAX_LEVEL
+from .resample import resample
+from .selection import SelectionMask
+from .thumbnails import thumbnail_level
+from .tiles import rect_to_bounds
+from .transform import PREVIEW_SIZE, TransformPreview, preview_level
+from .white_balance import estimate_temperature
 
 # Import strictly for type checking to avoid circular imports at runtime
 if typing.TYPE_CHECKING:
     pass
 
+#: Operations accepted by :meth:`Canva.transform_image`.
+IMAGE_TRANSFORMS = (
+    'flip_horizontal', 'flip_vertical', 'rotate_90_clockwise', 'rotate_90_counterclockwise',
+    'rotate_180', 'crop', 'resize',
+)
+
+# cv.flip code of the image transforms that are flips
+_FLIP_CODES = {'flip_horizontal': 1, 'flip_vertical': 0, 'rotate_180': -1}
+
+#: Kinds of :class:`LayerEvent`.
+LAYER_EVENTS = ('inserted', 'removed', 'moved', 'renamed', 'visibility')
+
+
+class LayerEvent(NamedTuple):
+    """
+    A change of the layer stack, as published to :meth:`Canva.subscribe` listeners.
+
+    Applying the events in order to a copy of the stack keeps it in sync:
+    'moved' means popping the layer at previous_index and inserting it back
+    at index.
+    """
+    kind: str  # One of LAYER_EVENTS
+    layer: Union[Layer, AdjustmentLayer]
+    index: int  # Index after the change ('removed': before it)
+    previous_index: Optional[int] = None  # 'moved' only
+
+
+def _layer_records(layers: Sequence) -> List[Dict[str, Any]]:
+    """
+    Flatten a layer stack into project file records, bottom first.
+
+    A group is stored as a record holding its number of children, directly
+    followed by the records of its children. Layer masks are stored compressed.
+    """
+    records = []
+    for layer in layers:
+        is_pixel_layer = not (layer.is_adjustment or layer.is_group)
+        records.append({
+            'name': layer.name,
+            'visible': layer.visibility,
+            'opacity': layer.opacity,
+            'blend_mode': layer.blend_mode,
+            'position': layer.position if is_pixel_layer else (0, 0),
+            # Adjustment layers and groups have no pixels: an empty array keeps the layout
+            'data': layer.pixels if is_pixel_layer else np.zeros((0, 0, 4), dtype=np.uint8),
+            'adjustment': layer.to_dict() if layer.is_adjustment else None,
+            'group': {'size': len(layer.layers)} if layer.is_group else None,
+            'mask': layer.mask.to_bytes() if is_pixel_layer and layer.mask is not None else None,
+        })
+        if layer.is_group:
+            records.extend(_layer_records(layer.layers))
+    return records
+
+
+def _layer_from_record(layer_dict: Dict[str, Any], records: Iterator[Dict[str, Any]]) -> Union[Layer, AdjustmentLayer, LayerGroup]:
+    """
+    Rebuild a layer from a project file record (see :func:`_layer_records`).
+
+    Args:
+        layer_dict (Dict[str, Any]): The record.
+        records (Iterator[Dict[str, Any]]): The records after it, from which
+            the children of a group are read.
+    """
+    if layer_dict.get('group'):
+        children = [_layer_from_record(next(records), records) for _ in range(layer_dict['group']['size'])]
+        group = LayerGroup(children, name=layer_dict.get('name', 'Group'))
+        group.visibility = layer_dict.get('visible', True)
+        group.set_opacity(layer_dict.get('opacity', 1.0))
+        group.set_blend_mode(layer_dict.get('blend_mode', 'normal'))
+        return group
+
+    if layer_dict.get('adjustment'):
+        adjustment = AdjustmentLayer.from_dict(layer_dict['adjustment'], name=layer_dict.get('name', 'Adjustment'))
+        adjustment.visibility = layer_dict.get('visible', True)
+        adjustment.set_opacity(layer_dict.get('opacity', 1.0))
+        return adjustment
+
+    layer = Layer(
+            pixels=layer_dict['data'], 
+            shape=layer_dict['data'].shape, 
+            name=layer_dict.get('name', 'Layer')
+            )
+    layer.visibility = layer_dict.get('visible', True)
+    layer.set_opacity(layer_dict.get('opacity', 1.0))
+    layer.set_blend_mode(layer_dict.get('blend_mode', 'normal'))
+    layer.position = layer_dict.get('position', (0, 0))
+    if layer_dict.get('mask') is not None:
+        layer.mask = LayerMask.from_bytes(layer, layer_dict['mask'])
+    return layer
+
+
+def _transform_layer(
+    layer: Layer, operation: str, shape: Tuple[int, int], new_shape: Tuple[int, int], params: Dict[str, Any]
+) -> Tuple[np.ndarray, Optional[np.ndarray], Tuple[int, int]]:
+    """
+    Transform one layer for :meth:`Canva.transform_image`. Runs on a worker thread.
+
+    The layer is only read: the new pixels, and the new mask of a masked
+    layer, are returned for the caller to swap in.
+
+    Returns:
+        Tuple[np.ndarray, Optional[np.ndarray], Tuple[int, int]]: New pixels,
+        new mask (None if there is none to replace) and new (x, y) position on
+        the canvas.
+    """
+    height, width = shape
+    h, w = layer.pixels.shape[:2]
+    x, y = layer.position
+    mask = None if layer.mask is None else layer.mask.pixels
+    if operation in _FLIP_CODES:
+        code = _FLIP_CODES[operation]
+        position = {
+            'flip_horizontal': (width - x - w, y),
+            'flip_vertical': (x, height - y - h),
+            'rotate_180': (width - x - w, height - y - h),
+        }[operation]
+        return cv.flip(layer.pixels, code), None if mask is None else cv.flip(mask, code), position
+    if operation in ('rotate_90_clockwise', 'rotate_90_counterclockwise'):
+        clockwise = operation == 'rotate_90_clockwise'
+        code = cv.ROTATE_90_CLOCKWISE if clockwise else cv.ROTATE_90_COUNTERCLOCKWISE
+        position = (height - y - h, x) if clockwise else (y, width - x - w)
+        return cv.rotate(layer.pixels, code), None if mask is None else cv.rotate(mask, code), position
+    if operation == 'crop':
+        left, top, crop_w, crop_h = params['rect']
+        # Part of the layer inside the crop rectangle, in layer coordinates
+        ly0, ly1 = max(top - y, 0), min(top + crop_h - y, h)
+        lx0, lx1 = max(left - x, 0), min(left + crop_w - x, w)
+        if ly0 >= ly1 or lx0 >= lx1:
+            empty_mask = None if mask is None else np.full((crop_h, crop_w), 255, dtype=np.uint8)
+            return np.zeros((crop_h, crop_w, 4), dtype=np.uint8), empty_mask, (0, 0)
+        cropped_mask = None if mask is None else mask[ly0:ly1, lx0:lx1].copy()
+        return layer.pixels[ly0:ly1, lx0:lx1].copy(), cropped_mask, (x + lx0 - left, y + ly0 - top)
+    # resize
+    scale_y, scale_x = new_shape[0] / height, new_shape[1] / width
+    size = (max(1, round(h * scale_y)), max(1, round(w * scale_x)))
+    resized_mask = None if mask is None else layer.mask.resized(size)
+    pixels = resample(layer.pixels, size, params.get('method', 'auto'))
+    return pixels, resized_mask, (round(x * scale_x), round(y * scale_y))
+
+
 class Canva:
     """
     The core Canvas class representing an image project.
@@ -26,6 +182,13 @@ class Canva:
     # Class-level counter default, can be overridden per instance
     _global_count = 0
 
+    # Shared tiled compositor; can be overridden per instance.
+    # Fixed point blending stays within +-1 of the float path at a fraction of the cost.
+    compositor = Compositor(fixed_point=True)
+
+    # Copied pixels, shared by every canvas so copy and paste work across tabs
+    clipboard = Clipboard()
+
     def __init__(self, shape: Tuple[int, int] = (600, 800), background: Tuple[int, int, int, int] = (0, 0, 0, 255)) -> None:
         """
         Initialize a new Canvas.
@@ -37,14 +200,20 @@ class Canva:
         self.shape = shape  # (height, width) usually, but code usage suggests (height, width)
         self.layers: List[Layer] = []
         self.active_layer: Optional[Layer] = None
+        self._listeners: List[Callable[[LayerEvent], None]] = []
 
         # Instance specific counter for layer naming
         self.layer_count = 0
 
         # Selection state
-        self.selection_rect = None  # QRect or None
-        self.selection_type = None  # 'rectangle', 'ellipse', or None
-        self.clipboard = None  # Stores copied pixel data
+        self.selection: Optional[SelectionMask] = None  # In canvas coordinates
+        self.floating: Optional[FloatingSelection] = None  # Pixels being moved
+
+        # Painting tools draw on the mask of the active layer instead of its pixels
+        self.editing_mask: bool = False
+
+        # Histograms cached per tile, for layers and the composite
+        self.statistics = Statistics(self.compositor)
 
         # Initialize background
         self.add_layer(name='Background', color=background)
@@ -85,8 +254,14 @@ class Canva:
             fst (int): Index of the first layer.
             snd (int): Index of the second layer.
         """
-        if 0 <= fst < len(self.layers) and 0 <= snd < len(self.layers):
-            self.layers[fst], self.layers[snd] = self.layers[snd], self.layers[fst]
+        if 0 <= fst < len(self.layers) and 0 <= snd < len(self.layers) and fst != snd:
+            low, high = min(fst, snd), max(fst, snd)
+            self.layers[low], self.layers[high] = self.layers[high], self.layers[low]
+            # As moves: the upper layer goes down to low, pushing the lower
+            # one to low + 1, which then goes up to high
+            self._notify('moved', self.layers[low], low, high)
+            if high - low > 1:
+                self._notify('moved', self.layers[high], high, low + 1)
 
     def del_layer(self, idx: int) -> None:
         """
@@ -98,7 +273,7 @@ class Canva:
         if not (0 <= idx < len(self.layers)):
             return
 
-        del self.layers[idx]
+        layer = self.layers.pop(idx)
 
         if not self.layers:
             self.active_layer = None
@@ -108,6 +283,7 @@ class Canva:
         else:
             # If we deleted the last layer, select the new last layer
             self.active_layer = self.layers[idx - 1]
+        self._notify('removed', layer, idx)
 
     def add_layer(self, name: Optional[str] = None, color: Tuple[int, int, int, int] = (0, 0, 0, 0)) -> Layer:
         """
@@ -124,9 +300,7 @@ class Canva:
             name = self.default_name()
 
         layer = Layer(self.shape, color, name=name)
-        self.layers.append(layer)
-        self.active_layer = layer
-        return layer
+        return self.add_layer_from_layer(layer)
 
     def add_layer_from_layer(self, layer: Layer) -> Layer:
         """
@@ -140,6 +314,7 @@ class Canva:
         """
         self.layers.append(layer)
         self.active_layer = layer
+        self._notify('inserted', layer, len(self.layers) - 1)
         return layer
 
     def add_img_layer(self, img: Union[np.ndarray, Image.Image], name: Optional[str] = None) -> Layer:
@@ -161,6 +336,197 @@ class Canva:
         self.add_layer_from_layer(layer)
         return layer
 
+    def add_adjustment_layer(self, kind: str = 'color_temperature', params: Optional[Dict[str, Any]] = None, name: Optional[str] = None) -> AdjustmentLayer:
+        """
+        Add a non-destructive adjustment on top of the stack.
+
+        Args:
+            kind (str): A registered adjustment kind (see :mod:`adjustment_layer`).
+            params (Optional[Dict[str, Any]]): Parameters of the adjustment.
+            name (Optional[str]): Name of the layer. Defaults to auto-generated.
+
+        Returns:
+            AdjustmentLayer: The newly created layer.
+        """
+        if not name:
+            name = self.default_name()
+
+        layer = AdjustmentLayer(kind, params, name=name)
+        self.layers.append(layer)
+        self.active_layer = layer
+        self._notify('inserted', layer, len(self.layers) - 1)
+        return layer
+
+    def rename_layer(self, layer: Union[Layer, AdjustmentLayer], name: str) -> None:
+        """
+        Rename a layer of the stack.
+
+        Args:
+            layer: The layer, which must be in :attr:`layers`.
+            name (str): Its new name.
+        """
+        if layer.name != name:
+            layer.set_name(name)
+            self._notify('renamed', layer, self.layers.index(layer))
+
+    def set_layer_visibility(self, layer: Union[Layer, AdjustmentLayer], visible: bool) -> None:
+        """
+        Show or hide a layer of the stack.
+
+        Args:
+            layer: The layer, which must be in :attr:`layers`.
+            visible (bool): Whether it is composited.
+        """
+        if layer.visibility != visible:
+            layer.set_visibility(visible)
+            self._notify('visibility', layer, self.layers.index(layer))
+
+    def group_layers(self, start: int, end: int, name: Optional[str] = None) -> Optional[LayerGroup]:
+        """
+        Move the layers from index start to end (excluded) into a new group, in their place.
+
+        Args:
+            start (int): Index of the bottom layer to group.
+            end (int): Index after the top layer to group.
+            name (Optional[str]): Name of the group. Defaults to auto-generated.
+
+        Returns:
+            Optional[LayerGroup]: The new group, which becomes active, or None
+            if the range is empty.
+        """
+        start, end = max(start, 0), min(end, len(self.layers))
+        if start >= end:
+            return None
+        group = LayerGroup(self.layers[start:end], name=name or f"Group #{self.layer_count}")
+        if not name:
+            self.layer_count += 1
+        self.layers[start:end] = [group]
+        self.active_layer = group
+        for index in range(end - 1, start - 1, -1):
+            self._notify('removed', group.layers[index - start], index)
+        self._notify('inserted', group, start)
+        return group
+
+    def ungroup_layer(self, idx: int) -> bool:
+        """
+        Replace a group by its children.
+
+        Args:
+            idx (int): Index of the group.
+
+        Returns:
+            bool: False if there is no group at idx.
+        """
+        if not (0 <= idx < len(self.layers)) or not self.layers[idx].is_group:
+            return False
+        group = self.layers[idx]
+        self.layers[idx:idx + 1] = group.layers
+        if group.layers:
+            self.active_layer = group.layers[-1]
+        else:
+            self.active_layer = self.layers[min(idx, len(self.layers) - 1)] if self.layers else None
+        self._notify('removed', group, idx)
+        for offset, layer in enumerate(group.layers):
+            self._notify('inserted', layer, idx + offset)
+        return True
+
+    def add_layer_mask(self, layer: Optional[Layer] = None, value: int = 255) -> Optional[LayerMask]:
+        """
+        Give a layer a mask, unless it has one.
+
+        Args:
+            layer (Optional[Layer]): Layer to mask; defaults to the active pixel layer.
+            value (int): Fill of a new mask: 255 shows the whole layer, 0 hides it.
+
+        Returns:
+            Optional[LayerMask]: The layer's mask, or None if there is no pixel layer.
+        """
+        layer = layer or self.pixel_layer
+        if layer is None or layer.is_adjustment or layer.is_group:
+            return None
+        return layer.add_mask(value)
+
+    def remove_layer_mask(self, layer: Optional[Layer] = None, apply: bool = False) -> bool:
+        """
+        Drop the mask of a layer, and stop editing it.
+
+        Args:
+            layer (Optional[Layer]): Masked layer; defaults to the active pixel layer.
+            apply (bool): Multiply the mask into the layer's alpha channel first.
+
+        Returns:
+            bool: False if the layer has no mask.
+        """
+        layer = layer or self.pixel_layer
+        if layer is None or layer.is_adjustment or layer.is_group or not layer.remove_mask(apply):
+            return False
+        if layer is self.active_layer:
+            self.editing_mask = False
+        return True
+
+    @property
+    def paint_target(self) -> Optional[Union[Layer, LayerMask]]:
+        """
+        What the painting tools draw on: the active pixel layer, or its mask
+        while :attr:`editing_mask` is set. None if there is no pixel layer.
+        """
+        layer = self.pixel_layer
+        if layer is not None and self.editing_mask and layer.mask is not None:
+            return layer.mask
+        return layer
+
+    def apply_tool(self, tool, pos: QPoint) -> Optional[QRect]:
+        """
+        Apply a painting tool (brush, eraser) to :attr:`paint_target`.
+
+        Tools paint in the coordinates of the layer they are given, while pos
+        is on the canvas: layers placed away from the origin (pasted or
+        transformed ones) are painted under the pointer, not at pos.
+
+        Args:
+            tool: A tool whose apply(pos, layer) paints and returns the dirty QRect.
+            pos (QPoint): Canvas position.
+
+        Returns:
+            Optional[QRect]: The modified area, in canvas coordinates; None if
+            there is no pixel layer.
+        """
+        target = self.paint_target
+        if target is None:
+            return None
+        x, y = int(self.pixel_layer.position[0]), int(self.pixel_layer.position[1])
+        dirty = tool.apply(pos - QPoint(x, y), target)
+        return None if dirty is None else dirty.translated(x, y)
+
+    # =========================================================================
+    # Layer Events
+    # =========================================================================
+
+    def subscribe(self, callback: Callable[[LayerEvent], None]) -> None:
+        """
+        Call callback with a :class:`LayerEvent` after every change of the layer stack.
+
+        Layers inserted, removed, moved, renamed or shown/hidden through the
+        Canva methods are reported; pixel edits are not (see Layer.version).
+        """
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback: Callable[[LayerEvent], None]) -> None:
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, kind: str, layer: Union[Layer, AdjustmentLayer], index: int, previous_index: Optional[int] = None) -> None:
+        event = LayerEvent(kind, layer, index, previous_index)
+        for callback in list(self._listeners):
+            callback(event)
+
+    @property
+    def pixel_layer(self) -> Optional[Layer]:
+        """The active layer if it holds pixels (not an adjustment layer or a group), else None."""
+        if self.active_layer is None or self.active_layer.is_adjustment or self.active_layer.is_group:
+            return None
+        return self.active_layer
+
     # =========================================================================
     # Factory Methods & I/O
     # =========================================================================
@@ -218,22 +584,19 @@ class Canva:
         canva = cls.__new__(cls)
         canva.shape = shape
         canva.layers = []
+        canva._listeners = []
         canva.layer_count = 0 
         canva.project_path = filename
         canva.metadata = metadata.get('metadata', {})
+        canva.selection = None
+        canva.floating = None
+        canva.editing_mask = False
+        canva.statistics = Statistics(canva.compositor)
 
-        # Reconstruct layers
-        for layer_dict in layers_data:
-            layer = Layer(
-                    pixels=layer_dict['data'], 
-                    shape=layer_dict['data'].shape, 
-                    name=layer_dict.get('name', 'Layer')
-                    )
-            layer.visible = layer_dict.get('visible', True)
-            layer.opacity = layer_dict.get('opacity', 1.0)
-            layer.blend_mode = layer_dict.get('blend_mode', 'normal')
-            layer.position = layer_dict.get('position', (0, 0))
-            canva.layers.append(layer)
+        # Reconstruct layers; a group record is followed by its children
+        records = iter(layers_data)
+        for layer_dict in records:
+            canva.layers.append(_layer_from_record(layer_dict, records))
 
             # Update internal counter to avoid name collisions on new layers
             # Simple heuristic: if name contains "Layer #", try to parse max index
@@ -255,17 +618,7 @@ class Canva:
         self.update_metadata_datetime()
         file_saver = FileSaver(filename)
 
-        layers_data = [
-                {
-                    'name': layer.name,
-                    'visible': getattr(layer, 'visible', True),
-                    'opacity': getattr(layer, 'opacity', 1.0),
-                    'blend_mode': getattr(layer, 'blend_mode', 'normal'),
-                    'position': getattr(layer, 'position', (0, 0)),
-                    'data': layer.pixels
-                    }
-                for layer in self.layers
-                ]
+        layers_data = _layer_records(self.layers)
 
         metadata_export = {
                 'canvas_shape': self.shape,
@@ -284,119 +637,256 @@ class Canva:
     # Compositing & Rendering
     # =========================================================================
 
-    def composite_different_sizes(self, layer: Layer, position: Tuple[int, int] = (0, 0)) -> Image.Image:
-        """
-        Helper: Composites a layer (potentially smaller) onto a transparent 
-        canvas matching the main canvas size.
-        """
-        # "RGBA" ensures transparency. (0, 0, 0, 0) is fully transparent.
-        print("shape", self.shape)
-        layer_h, layer_w = self.shape[0], self.shape[1]
-        layer_canvas = Image.new("RGBA", (layer_w, layer_h), (0, 0, 0, 0))
-        layer_canvas.paste(layer.get_pil(), position)
-        return layer_canvas
-
-    def get_image_for_compisition(self, layer: Layer) -> Image.Image:
-        """
-        Prepares a single layer for composition (handling visibility and resizing).
-        """
-        if not getattr(layer, 'visible', True):
-            # Return fully transparent layer if hidden
-            return Image.new("RGBA", (self.shape[1], self.shape[0]), (0, 0, 0, 0))
-
-        layer_h, layer_w = layer.shape[0], layer.shape[1]
-
-        # If sizes differ, expand the layer to match canvas bounds
-        if (layer_h, layer_w) != self.shape:
-            # Note: composite_different_sizes expects PIL image logic
-            print("compositing")
-            return self.composite_different_sizes(layer, getattr(layer, 'position', (0,0)))
-
-        return layer.get_pil()
+    def render_stack(self) -> List[Layer]:
+        """The layers to composite: :attr:`layers`, plus the floating selection above its layer."""
+        if self.floating is None or self.floating.layer not in self.layers:
+            return self.layers
+        index = self.layers.index(self.floating.layer)
+        return self.layers[:index + 1] + [self.floating.pixels_layer] + self.layers[index + 1:]
 
     def get_img(self) -> Layer:
         """
-        Render the final image using PIL's Alpha Composite.
+        Render the final image over a transparent base.
         Returns the result as a flattened Layer object.
+
+        Layers smaller than the canvas are placed at their ``position`` and only
+        their overlap with the canvas is blended; nothing is padded or resized.
         """
         if not self.layers:
             return Layer(self.shape)
-
-        # Reduce stack: Composite Layer 0 + Layer 1 -> Result + Layer 2 -> ...
-        final_pil = reduce(
-                lambda bottom, top: Image.alpha_composite(bottom, self.get_image_for_compisition(top)), 
-                [self.get_image_for_compisition(self.layers[0])] + self.layers[1:]
-                )
-
-        # final_pil.show()
-        return Layer(pixels=np.array(final_pil))
+        return Layer(pixels=self.compositor.composite(self.render_stack(), self.shape))
 
     def composite(self) -> np.ndarray:
         """
-        Render the final image using NumPy-based manual alpha blending.
+        Render the final image over an opaque black base.
+
+        Blending is done tile by tile on a thread pool by :attr:`compositor`.
 
         Returns:
             np.ndarray: The flattened image as a numpy array (uint8).
         """
-        # Initialize output buffer (transparent)
-        out = np.zeros((self.shape[0], self.shape[1], 4), dtype=np.uint8)
+        return self.compositor.composite(self.render_stack(), self.shape, background=(0, 0, 0, 255))
+
+    def composite_region(
+        self,
+        rect: Tuple[int, int, int, int],
+        level: int = 0,
+        filters: Optional[Dict[Layer, PixelFilter]] = None
+    ) -> np.ndarray:
+        """
+        Render part of the image over a transparent base, for display.
 
-        # Initialize base to opaque white or transparent? 
-        # Original code sets alpha to 255 (Opaque Black effectively if RGB is 0)
-        out[..., 3] = 255 
+        Only the tiles intersecting rect are blended, and when zoomed out the
+        layers are read from their mipmap pyramid instead of full resolution.
 
-        for layer in self.layers:
-            if not getattr(layer, 'visible', True):
-                continue
+        Args:
+            rect (Tuple[int, int, int, int]): (x, y, width, height) in canvas pixels.
+            level (int): Mipmap level; the result is 1 / 2**level of rect's size.
+            filters (Optional[Dict[Layer, PixelFilter]]): Filters previewed on some
+                layers, applied to the rendered pixels only.
 
-            # Resize if necessary
-            if layer.shape != self.shape:
-                # cv.resize expects (width, height)
-                resized = cv.resize(layer.pixels, (self.shape[1], self.shape[0]))
-            else:
-                resized = layer.pixels
+        Returns:
+            np.ndarray: The flattened region as a numpy array (uint8).
+        """
+        return self.compositor.composite(self.render_stack(), self.shape, rect=rect, level=level, filters=filters)
 
-            # Normalize to 0-1 float for blending math
-            src = resized.astype(np.float32) / 255.0
-            dst = out.astype(np.float32) / 255.0
+    def image_statistics(self, layer: Optional[Layer] = None, rect=None) -> ImageStatistics:
+        """
+        Histograms and statistics of a layer or of the flattened image.
 
-            # Extract Alpha channel
-            alpha = src[..., 3:4]
+        Results are cached per tile, so after an edit only the modified tiles
+        are read again.
 
-            # Standard "Source Over" composition
-            # Out = Src * Alpha + Dst * (1 - Alpha)
-            out_float = (src * alpha + dst * (1.0 - alpha)) * 255.0
-            out = out_float.astype(np.uint8)
+        Args:
+            layer (Optional[Layer]): Pixel layer to measure; None for the composite.
+            rect: Optional QRect or (x, y, width, height) restricting the area,
+                in canvas coordinates.
 
-        return out
+        Returns:
+            ImageStatistics: Per-channel histograms, min / max / mean and alpha coverage.
+        """
+        if layer is None:
+            return self.statistics.composite_stats(self.layers, self.shape, rect)
+        if rect is not None:
+            x, y, w, h = (rect.x(), rect.y(), rect.width(), rect.height()) if hasattr(rect, 'x') else rect
+            rect = (x - layer.position[0], y - layer.position[1], w, h)
+        return self.statistics.layer_stats(layer, rect)
 
     # =========================================================================
     # Transformations
     # =========================================================================
 
     def flip_horizontal(self) -> None:
-        """Apply horizontal flip to all layers."""
-        self.active_layer.flip_horizontal()
+        """Flip the active layer horizontally."""
+        if self.pixel_layer:
+            self.pixel_layer.flip_horizontal()
 
     def flip_vertical(self) -> None:
-        """Apply vertical flip to all layers."""
-        self.active_layer.flip_vertical()
+        """Flip the active layer vertically."""
+        if self.pixel_layer:
+            self.pixel_layer.flip_vertical()
 
     def rotate_90_clockwise(self) -> None:
-        """Rotate the canvas and all layers 90 degrees clockwise."""
-        self.active_layer.rotate_90_clockwise()
-        # Swap canvas dimensions
-        # self.shape = (self.shape[1], self.shape[0])
+        """Rotate the active layer 90 degrees clockwise; see :meth:`transform_image` for the whole image."""
+        if self.pixel_layer:
+            self.pixel_layer.rotate_90_clockwise()
 
     def rotate_90_counterclockwise(self) -> None:
-        """Rotate the canvas and all layers 90 degrees counter-clockwise."""
-        self.active_layer.rotate_90_counterclockwise()
-        # Swap canvas dimensions
-        # self.shape = (self.shape[1], self.shape[0])
+        """Rotate the active layer 90 degrees counter-clockwise."""
+        if self.pixel_layer:
+            self.pixel_layer.rotate_90_counterclockwise()
 
     def rotate_180(self) -> None:
-        """Rotate the canvas and all layers 180 degrees."""
-        self.active_layer.rotate_180()
+        """Rotate the active layer 180 degrees."""
+        if self.pixel_layer:
+            self.pixel_layer.rotate_180()
+
+    def transform_image(self, operation: str, **params: Any) -> None:
+        """
+        Transform the whole document: every layer, the canvas size and the metadata.
+
+        Layers are processed in parallel on the shared worker pool and their
+        positions are mapped to the new canvas, so the stack stays aligned and
+        the compositor never has to resize anything. New pixel arrays are only
+        swapped in, and the shape and metadata updated, once every layer is done.
+
+        Args:
+            operation (str): One of IMAGE_TRANSFORMS:
+                'flip_horizontal', 'flip_vertical', 'rotate_90_clockwise',
+                'rotate_90_counterclockwise', 'rotate_180',
+                'crop' (params: rect, a QRect or (x, y, width, height)),
+                'resize' (params: shape (height, width), optional method,
+                see :func:`resample.resample`).
+            **params: Parameters of the operation.
+
+        Raises:
+            ValueError: On an unknown operation or an empty target size.
+        """
+        if operation not in IMAGE_TRANSFORMS:
+            raise ValueError(f"Unknown image transform: {operation}")
+        height, width = self.shape
+        if operation in ('rotate_90_clockwise', 'rotate_90_counterclockwise'):
+            new_shape = (width, height)
+        elif operation == 'crop':
+            top, bottom, left, right = rect_to_bounds(params['rect'])
+            top, left = max(top, 0), max(left, 0)
+            bottom, right = min(bottom, height), min(right, width)
+            params['rect'] = (left, top, right - left, bottom - top)
+            new_shape = (bottom - top, right - left)
+        elif operation == 'resize':
+            new_shape = (int(params['shape'][0]), int(params['shape'][1]))
+        else:
+            new_shape = self.shape
+        if new_shape[0] <= 0 or new_shape[1] <= 0:
+            raise ValueError(f"Empty image size: {new_shape}")
+
+        layers = [layer for layer in iter_layers(self.layers) if not layer.is_adjustment]
+        for layer in layers:
+            # Apply deferred flips here: the workers must only read the layers
+            layer.pixels
+        if operation == 'resize':
+            # Resampling already splits each layer into tiles on the pool, which
+            # a pool task cannot wait for: run the layers one after the other
+            results = [_transform_layer(layer, operation, self.shape, new_shape, params) for layer in layers]
+        else:
+            results = list(get_executor().map(
+                lambda layer: _transform_layer(layer, operation, self.shape, new_shape, params), layers
+            ))
+
+        # Commit everything at once
+        for layer, (pixels, mask, position) in zip(layers, results):
+            layer.set_pixels(pixels, mask)
+            layer.position = position
+        self.shape = new_shape
+        self.metadata['width'], self.metadata['height'] = new_shape[1], new_shape[0]
+        self.clear_selection()
+
+    def transform_layer(self, matrix: np.ndarray, interpolation: str = 'linear', layer: Optional[Layer] = None) -> bool:
+        """
+        Apply an affine or perspective transform to a layer at full resolution.
+
+        The layer grows or shrinks to fit the result and its position moves by
+        the offset of the new top-left corner, so nothing is cropped.
+
+        Args:
+            matrix (np.ndarray): 2x3 or 3x3 matrix in layer pixel coordinates.
+            interpolation (str): See :data:`transform.INTERPOLATIONS`.
+            layer (Optional[Layer]): Layer to transform; defaults to the active pixel layer.
+
+        Returns:
+            bool: False if there is no pixel layer to transform.
+
+        Raises:
+            ValueError: On an unknown interpolation or a non-invertible matrix.
+        """
+        layer = layer or self.pixel_layer
+        if layer is None or layer.is_adjustment or layer.is_group:
+            return False
+        layer.transform(matrix, interpolation=interpolation)
+        return True
+
+    def scale_layer(self, shape: Tuple[int, int], method: str = 'auto', layer: Optional[Layer] = None) -> bool:
+        """
+        Resample a layer to a new size, keeping its top-left corner in place.
+
+        Args:
+            shape (Tuple[int, int]): New (height, width) of the layer.
+            method (str): See :func:`resample.resample`.
+            layer (Optional[Layer]): Layer to scale; defaults to the active pixel layer.
+
+        Returns:
+            bool: False if there is no pixel layer to scale.
+
+        Raises:
+            ValueError: On an unknown method or an empty shape.
+        """
+        layer = layer or self.pixel_layer
+        if layer is None or layer.is_adjustment or layer.is_group:
+            return False
+        layer.set_pixels(resample(layer.pixels, shape, method))
+        return True
+
+    def transform_preview(self, layer: Optional[Layer] = None, max_size: int = PREVIEW_SIZE) -> Optional[TransformPreview]:
+        """
+        Low resolution proxy of a layer for previewing transforms interactively.
+
+        The proxy is read from the layer's mipmap pyramid, so it is only built
+        once per layer version.
+
+        Args:
+            layer (Optional[Layer]): Layer to preview; defaults to the active pixel layer.
+            max_size (int): Longest side of the proxy.
+
+        Returns:
+            Optional[TransformPreview]: None if there is no pixel layer.
+        """
+        layer = layer or self.pixel_layer
+        if layer is None or layer.is_adjustment or layer.is_group:
+            return None
+        width = layer.pixels.shape[1]
+        level = min(preview_level(layer.pixels.shape[:2], max_size), MAX_LEVEL)
+        # Copied: pyramid levels are updated in place by later edits
+        proxy = self.compositor.pyramid(layer).level(level).copy()
+        return TransformPreview(proxy, proxy.shape[1] / width)
+
+    def thumbnail_source(self, layer: Layer, size: int) -> np.ndarray:
+        """
+        Reduced copy of a layer to render its size x size thumbnail from.
+
+        It is read from the layer's mipmap pyramid, where an edit only reduces
+        the tiles it touched again, so refreshing a thumbnail never converts
+        the full resolution pixels.
+
+        Args:
+            layer (Layer): Pixel layer or layer group.
+            size (int): Thumbnail edge.
+
+        Returns:
+            np.ndarray: A copy, safe to read from another thread.
+        """
+        level = thumbnail_level(layer.pixels.shape[:2], size)
+        # Copied: pyramid levels are updated in place by later edits
+        return self.compositor.pyramid(layer).level(level).copy()
 
     def adjust_color_temperature(self, original_temp: int = 6500, target_temp: int = 6500, opacity: float = 1.0, layer_idx: Optional[int] = None) -> None:
         """
@@ -409,11 +899,73 @@ class Canva:
             layer_idx (Optional[int]): Index of layer to modify. If None, applies to all.
         """
         if layer_idx is not None:
-            if 0 <= layer_idx < len(self.layers):
-                self.layers[layer_idx].adjust_color_temperature(original_temp, target_temp, opacity)
+            if 0 <= layer_idx < len(self.layers) and not self.layers[layer_idx].is_adjustment:
+                for layer in iter_layers([self.layers[layer_idx]]):
+                    if not layer.is_adjustment:
+                        layer.adjust_color_temperature(original_temp, target_temp, opacity)
         else:
-            for layer in self.layers:
-                layer.adjust_color_temperature(original_temp, target_temp, opacity)
+            for layer in iter_layers(self.layers):
+                if not layer.is_adjustment:
+                    layer.adjust_color_temperature(original_temp, target_temp, opacity)
+
+    def apply_filter(self, name: str, **params: Any) -> bool:
+        """
+        Run a filter (see :mod:`filters`) on the active layer, within the selection if any.
+
+        Only the tiles covering the selection bounding box are processed, and
+        the selection mask blends the result inside it.
+
+        Args:
+            name (str): A registered filter.
+            **params: Parameters of the filter.
+
+        Returns:
+            bool: False if there is no pixel layer or the selection misses it.
+
+        Raises:
+            ValueError: If the filter is not registered.
+        """
+        layer = self.pixel_layer
+        if layer is None:
+            return False
+
+        height, width = layer.pixels.shape[:2]
+        y0, y1, x0, x1 = 0, height, 0, width
+        mask = None
+        if self.has_selection():
+            clipped = self._layer_selection(layer).clip(height, width)
+            if clipped is None:
+                return False
+            (y0, y1, x0, x1), mask = clipped
+            if self.selection.shape == 'rectangle':
+                mask = None
+
+        layer.pixels[y0:y1, x0:x1] = filter_region(layer.pixels, name, params, (y0, y1, x0, x1), mask)
+        layer.mark_dirty((x0, y0, x1 - x0, y1 - y0))
+        return True
+
+    def estimate_temperature(self, reference: float = 6500) -> Optional[float]:
+        """
+        Estimate the light temperature of the active layer, within the selection if any.
+
+        See :func:`white_balance.estimate_temperature`; only a bounded number of
+        pixels is read.
+
+        Args:
+            reference (float): Temperature the image is meant to be corrected to.
+
+        Returns:
+            Optional[float]: Kelvin value to use as original temperature, or None
+            if there is no pixel layer or no usable pixel.
+        """
+        layer = self.pixel_layer
+        if layer is None:
+            return None
+        bounds = None
+        if self.has_selection():
+            left, top, width, height = self._layer_selection(layer).bounds
+            bounds = (top, top + height, left, left + width)
+        return estimate_temperature(layer.pixels, bounds, reference=reference)
 
     # =========================================================================
     # Metadata Handling
@@ -563,16 +1115,146 @@ class Canva:
     # Selection Management
     # =========================================================================
 
-    def set_selection(self, rect, selection_type='rectangle'):
+    @property
+    def selection_rect(self):
+        """Bounding box of the selection as a QRect, or None."""
+        if self.selection is None:
+            return None
+        return QRect(*self.selection.bounds)
+
+    @property
+    def selection_type(self) -> Optional[str]:
+        """'rectangle', 'ellipse' or 'mask' (any other shape), or None."""
+        return self.selection.shape if self.selection is not None else None
+
+    def set_selection(self, rect, selection_type='rectangle', mode='replace'):
         """
-        Set the current selection region.
+        Select a rectangle or an ellipse, combined with the current selection.
 
         Args:
             rect: QRect defining the selection bounds
             selection_type (str): Type of selection ('rectangle' or 'ellipse')
+            mode (str): See :data:`selection.SELECTION_MODES`.
+        """
+        self.set_selection_mask(SelectionMask.from_shape(rect, selection_type), mode)
+
+    def set_selection_mask(self, selection: SelectionMask, mode: str = 'replace') -> None:
+        """
+        Set the selection from a mask, combined with the current selection.
+
+        Args:
+            selection (SelectionMask): New selection, in canvas coordinates.
+            mode (str): See :data:`selection.SELECTION_MODES`.
+
+        Raises:
+            ValueError: On an unknown mode.
+        """
+        if self.selection is not None:
+            selection = self.selection.combine(selection, mode)
+        elif mode in ('subtract', 'intersect'):
+            selection = None
+        self.selection = None if selection is None or selection.is_empty() else selection
+
+    def feather_selection(self, radius: float) -> bool:
+        """
+        Soften the selection edges.
+
+        Args:
+            radius (float): Feather radius in pixels.
+
+        Returns:
+            bool: False if there is no selection.
+        """
+        if not self.has_selection():
+            return False
+        self.selection = self.selection.feather(radius)
+        return True
+
+    def invert_selection(self) -> None:
+        """Select everything of the canvas that is not selected (everything if nothing is)."""
+        if self.selection is None:
+            self.selection = SelectionMask.rectangle((0, 0, self.shape[1], self.shape[0]))
+            return
+        inverted = self.selection.invert(*self.shape)
+        self.selection = None if inverted.is_empty() else inverted
+
+    def color_region(
+        self, x: int, y: int, tolerance: int = DEFAULT_TOLERANCE, contiguous: bool = True,
+        sample_merged: bool = False
+    ) -> Optional[SelectionMask]:
+        """
+        Region of colors similar to the one at a canvas point, see :func:`flood_fill.color_region`.
+
+        Args:
+            x (int): Canvas column of the seed pixel.
+            y (int): Canvas row of the seed pixel.
+            tolerance (int): Largest channel difference still selected, 0-255.
+            contiguous (bool): Only the area connected to the seed.
+            sample_merged (bool): Match the colors of the composite image
+                instead of the active layer.
+
+        Returns:
+            Optional[SelectionMask]: The region in canvas coordinates, or None if
+            there is nothing to sample or the point misses it.
+        """
+        if sample_merged:
+            pixels = self.composite_region((0, 0, self.shape[1], self.shape[0]))
+            left, top = 0, 0
+        elif self.pixel_layer is not None:
+            pixels = self.pixel_layer.pixels
+            left, top = int(self.pixel_layer.position[0]), int(self.pixel_layer.position[1])
+        else:
+            return None
+        region = color_region(pixels, (x - left, y - top), tolerance, contiguous)
+        if region.is_empty():
+            return None
+        return region.translated(left, top)
+
+    def select_by_color(
+        self, x: int, y: int, tolerance: int = DEFAULT_TOLERANCE, contiguous: bool = True,
+        sample_merged: bool = False, mode: str = 'replace'
+    ) -> bool:
         """
-        self.selection_rect = rect
-        self.selection_type = selection_type
+        Select the colors similar to the one at a canvas point (magic wand).
+
+        See :meth:`color_region` for the arguments; mode combines the region
+        with the current selection, see :data:`selection.SELECTION_MODES`.
+
+        Returns:
+            bool: False if nothing could be sampled at the point.
+        """
+        region = self.color_region(x, y, tolerance, contiguous, sample_merged)
+        if region is None:
+            return False
+        self.set_selection_mask(region, mode)
+        return True
+
+    def bucket_fill(
+        self, x: int, y: int, color: Tuple[int, int, int, int], tolerance: int = DEFAULT_TOLERANCE,
+        contiguous: bool = True, sample_merged: bool = False
+    ) -> bool:
+        """
+        Fill the colors similar to the one at a canvas point on the active layer.
+
+        The fill stays inside the current selection, if any. See
+        :meth:`color_region` for the other arguments.
+
+        Args:
+            color: RGBA color tuple (0-255)
+
+        Returns:
+            bool: False if there is no pixel layer or nothing to fill.
+        """
+        layer = self.pixel_layer
+        if layer is None:
+            return False
+        region = self.color_region(x, y, tolerance, contiguous, sample_merged)
+        if region is not None and self.has_selection():
+            region = region.intersect(self.selection)
+        if region is None or region.is_empty():
+            return False
+        layer.fill_selection(region.translated(-int(layer.position[0]), -int(layer.position[1])), color)
+        return True
 
     def get_selection(self):
         """
@@ -585,12 +1267,80 @@ class Canva:
 
     def has_selection(self):
         """Check if there's an active selection."""
-        return self.selection_rect is not None
+        return self.selection is not None
 
     def clear_selection(self):
         """Clear the current selection."""
-        self.selection_rect = None
-        self.selection_type = None
+        self.selection = None
+
+    def _layer_selection(self, layer: Layer) -> SelectionMask:
+        """The selection in the pixel coordinates of layer."""
+        return self.selection.translated(-int(layer.position[0]), -int(layer.position[1]))
+
+    def move_selection(self, dx: int, dy: int) -> bool:
+        """
+        Move the selected pixels of the active layer, and the selection with them.
+
+        Args:
+            dx (int): Horizontal offset in pixels.
+            dy (int): Vertical offset in pixels.
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not self.has_selection() or not self.pixel_layer:
+            return False
+
+        if not self.float_selection():
+            return False
+        self.floating.move_to(dx, dy)
+        self.anchor_selection()
+        return True
+
+    def float_selection(self) -> bool:
+        """
+        Lift the selected pixels of the active layer into a floating selection.
+
+        The floating pixels are composited above their layer until
+        :meth:`anchor_selection` or :meth:`cancel_floating`; move them with
+        ``floating.move_to``.
+
+        Returns:
+            bool: False if there is nothing to lift (or something already floats).
+        """
+        if self.floating is not None or not self.has_selection() or not self.pixel_layer:
+            return False
+        try:
+            self.floating = FloatingSelection(self.pixel_layer, self.selection)
+        except ValueError:
+            return False
+        return True
+
+    def anchor_selection(self) -> bool:
+        """
+        Merge the floating selection into its layer where it was moved; the selection follows.
+
+        Returns:
+            bool: False if nothing floats.
+        """
+        if self.floating is None:
+            return False
+        self.selection = self.floating.anchor()
+        self.floating = None
+        return True
+
+    def cancel_floating(self) -> bool:
+        """
+        Put the floating pixels back where they were lifted from.
+
+        Returns:
+            bool: False if nothing floats.
+        """
+        if self.floating is None:
+            return False
+        self.floating.cancel()
+        self.floating = None
+        return True
 
     def get_selected_layers(self):
         """
@@ -605,23 +1355,27 @@ class Canva:
         # For now, return all visible layers
         # In a more advanced implementation, this would check which layers
         # actually have pixels within the selection bounds
-        return [layer for layer in self.layers if layer.visibility]
+        return [layer for layer in iter_layers(self.layers, visible_only=True) if not layer.is_adjustment]
 
     def copy_selection(self) -> bool:
         """
-        Copy the current selection to clipboard.
+        Copy the current selection to the shared :attr:`clipboard`, with its position.
 
         Returns:
             bool: True if successful, False otherwise
         """
-        if not self.has_selection() or not self.active_layer:
+        layer = self.pixel_layer
+        if not self.has_selection() or not layer:
             return False
 
-        copied_data = self.active_layer.copy_selection(self.selection_rect)
-        if copied_data is not None:
-            self.clipboard = copied_data
-            return True
-        return False
+        selection = self._layer_selection(layer)
+        clipped = selection.clip(*layer.pixels.shape[:2])
+        copied_data = layer.copy_selection(selection)
+        if copied_data is None or clipped is None:
+            return False
+        y0, _, x0, _ = clipped[0]
+        self.clipboard.set_pixels(copied_data, (int(layer.position[0]) + x0, int(layer.position[1]) + y0))
+        return True
 
     def cut_selection(self) -> bool:
         """
@@ -630,13 +1384,13 @@ class Canva:
         Returns:
             bool: True if successful, False otherwise
         """
-        if not self.has_selection() or not self.active_layer:
+        if not self.has_selection() or not self.pixel_layer:
             return False
 
         # Copy first
         if self.copy_selection():
             # Then delete
-            self.active_layer.delete_selection(self.selection_rect, self.selection_type)
+            self.pixel_layer.delete_selection(self._layer_selection(self.pixel_layer))
             return True
         return False
 
@@ -647,27 +1401,39 @@ class Canva:
         Returns:
             bool: True if successful, False otherwise
         """
-        if not self.has_selection() or not self.active_layer:
+        if not self.has_selection() or not self.pixel_layer:
             return False
 
-        self.active_layer.delete_selection(self.selection_rect, self.selection_type)
+        self.pixel_layer.delete_selection(self._layer_selection(self.pixel_layer))
         return True
 
-    def paste_selection(self) -> bool:
+    def paste_selection(self, position: Optional[Tuple[int, int]] = None) -> bool:
         """
-        Paste clipboard content as a new layer.
+        Paste the clipboard content as a new layer of its own size.
+
+        Args:
+            position (Optional[Tuple[int, int]]): (x, y) of the new layer. Defaults
+                to where the pixels were copied from, or the canvas center if that
+                is outside this canvas.
 
         Returns:
             bool: True if successful, False otherwise
         """
-        if self.clipboard is None:
+        pixels = self.clipboard.pixels()
+        if pixels is None:
             return False
 
-        # Create a new layer from clipboard data
+        height, width = pixels.shape[:2]
+        if position is None:
+            position = self.clipboard.position
+        if position is None or not QRect(*position, width, height).intersects(QRect(0, 0, self.shape[1], self.shape[0])):
+            position = ((self.shape[1] - width) // 2, (self.shape[0] - height) // 2)
+
+        # The clipboard hands out a new array: the layer can own it
         layer_name = self.default_name()
-        new_layer = Layer(pixels=self.clipboard.copy(), name=f"Pasted {layer_name}")
-        self.layers.append(new_layer)
-        self.active_layer = new_layer
+        new_layer = Layer(pixels=pixels, name=f"Pasted {layer_name}")
+        new_layer.position = (int(position[0]), int(position[1]))
+        self.add_layer_from_layer(new_layer)
         return True
 
     def fill_selection(self, color: Tuple[int, int, int, int]) -> bool:
@@ -680,8 +1446,8 @@ class Canva:
         Returns:
             bool: True if successful, False otherwise
         """
-        if not self.has_selection() or not self.active_layer:
+        if not self.has_selection() or not self.pixel_layer:
             return False
 
-        self.active_layer.fill_selection(self.selection_rect, color, self.selection_type)
+        self.pixel_layer.fill_selection(self._layer_selection(self.pixel_layer), color)
         return True
@@ -0,0 +1,162 @@
+import threading
+import zlib
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from .compositor import get_executor
+from .tiles import TILE_SIZE
+
+#: Payloads larger than this (bytes) are stored compressed.
+COMPRESS_THRESHOLD = 16 * 1024 * 1024
+
+# zlib level: the fastest one, the delta filter does most of the work
+_LEVEL = 1
+
+# Payloads whose first band does not shrink below this ratio are kept raw:
+# noisy photos barely compress and would only cost time
+_MAX_RATIO = 0.6
+
+
+def _deflate(band: np.ndarray) -> bytes:
+    """Compress a band of rows, stored as differences between horizontal neighbours (PNG's Sub filter)."""
+    delta = band.copy()
+    delta[:, 1:] -= band[:, :-1]  # uint8 arithmetic wraps around
+    return zlib.compress(memoryview(delta), _LEVEL)
+
+
+def _inflate(data: bytes, out: np.ndarray) -> None:
+    """Decompress a band written by :func:`_deflate` into out."""
+    delta = np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(out.shape)
+    np.cumsum(delta, axis=1, dtype=np.uint8, out=out)
+
+
+class Clipboard:
+    """
+    Application-wide store for copied pixels, shared by every open canvas.
+
+    Small payloads are kept as they are. Large ones are compressed with zlib
+    after a horizontal delta filter, in bands of rows processed in parallel
+    on the shared pool, and only decompressed when pasted: a copied 8K
+    selection of flat artwork or gradients then holds a few MB instead of
+    256 MB. Payloads that do not compress well (noisy photos) are kept raw
+    rather than paying for compression. The clipboard owns what it is given
+    and every :meth:`pixels` call returns a new array, so pasting never
+    copies twice.
+
+    Listeners registered with :meth:`subscribe` are called after each change,
+    e.g. to announce the content to the system clipboard.
+    """
+
+    def __init__(self, compress_threshold: int = COMPRESS_THRESHOLD, band_rows: int = TILE_SIZE) -> None:
+        """
+        Initialize an empty clipboard.
+
+        Args:
+            compress_threshold (int): Size in bytes above which payloads are compressed.
+            band_rows (int): Rows per compressed band.
+        """
+        self.compress_threshold = compress_threshold
+        self.band_rows = band_rows
+        self._lock = threading.Lock()
+        self._raw: Optional[np.ndarray] = None
+        self._bands: Optional[List[bytes]] = None
+        self.shape: Optional[Tuple[int, int, int]] = None
+        #: (x, y) canvas position the pixels were copied from, if any
+        self.position: Optional[Tuple[int, int]] = None
+        #: Incremented on every change
+        self.serial = 0
+        self._listeners: List[Callable[[], None]] = []
+
+    # =========================================================================
+    # Content
+    # =========================================================================
+
+    def set_pixels(self, pixels: np.ndarray, position: Optional[Tuple[int, int]] = None) -> None:
+        """
+        Replace the content. The clipboard takes ownership of pixels: don't modify them afterwards.
+
+        Args:
+            pixels (np.ndarray): (H, W, 4) RGBA uint8 pixels.
+            position (Optional[Tuple[int, int]]): (x, y) they were copied from.
+        """
+        pixels = np.ascontiguousarray(pixels)
+        raw, bands = pixels, None
+        if pixels.nbytes > self.compress_threshold:
+            # Probe the first band before compressing the rest
+            first_band = pixels[:self.band_rows]
+            first = _deflate(first_band)
+            if len(first) <= _MAX_RATIO * first_band.nbytes:
+                starts = range(self.band_rows, pixels.shape[0], self.band_rows)
+                bands = [first] + list(get_executor().map(
+                    lambda start: _deflate(pixels[start:start + self.band_rows]), starts
+                ))
+                raw = None
+        with self._lock:
+            self._raw, self._bands = raw, bands
+            self.shape = pixels.shape
+            self.position = None if position is None else (int(position[0]), int(position[1]))
+            self.serial += 1
+        self._notify()
+
+    def pixels(self) -> Optional[np.ndarray]:
+        """
+        The copied pixels, as a new array the caller owns.
+
+        Returns:
+            Optional[np.ndarray]: (H, W, 4) RGBA uint8, or None if the clipboard is empty.
+        """
+        with self._lock:
+            raw, bands, shape = self._raw, self._bands, self.shape
+        if raw is not None:
+            return raw.copy()
+        if bands is None:
+            return None
+
+        out = np.empty(shape, dtype=np.uint8)
+        rows = self.band_rows
+
+        def inflate(index: int) -> None:
+            _inflate(bands[index], out[index * rows:(index + 1) * rows])
+
+        list(get_executor().map(inflate, range(len(bands))))
+        return out
+
+    def clear(self) -> None:
+        """Drop the content."""
+        with self._lock:
+            self._raw, self._bands = None, None
+            self.shape, self.position = None, None
+            self.serial += 1
+        self._notify()
+
+    def is_empty(self) -> bool:
+        return self.shape is None
+
+    @property
+    def is_compressed(self) -> bool:
+        return self._bands is not None
+
+    @property
+    def stored_bytes(self) -> int:
+        """Memory held by the content."""
+        raw, bands = self._raw, self._bands
+        if raw is not None:
+            return raw.nbytes
+        return sum(len(band) for band in bands) if bands is not None else 0
+
+    # =========================================================================
+    # Listeners
+    # =========================================================================
+
+    def subscribe(self, callback: Callable[[], None]) -> None:
+        """Call callback (without arguments) after every change."""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback: Callable[[], None]) -> None:
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self) -> None:
+        for callback in list(self._listeners):
+            callback()
@@ -0,0 +1,727 @@
+import itertools
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import cv2 as cv
+import numpy as np
+
+from .blend_modes import BlendKernel, get_blend_mode
+from .layer import Layer
+from .layer_group import iter_layers
+from .mipmap import MipmapPyramid, level_shape
+from .tiles import TILE_SIZE, TileCache, grid_shape, iter_tiles, iter_tiles_in, tile_span
+
+# Process-wide worker pool, created on first use
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# A filter maps straight RGBA uint8 pixels to new pixels of the same shape
+PixelFilter = Callable[[np.ndarray], np.ndarray]
+
+
+class _Source(NamedTuple):
+    """What a tile worker needs to blend one stack entry."""
+    pixels: Optional[np.ndarray]
+    # Fixed point normal mode only: (cache key of the pixels, copy of their
+    # tile_versions), under which premultiplied tiles are cached
+    premultiplied: Optional[Tuple[Hashable, np.ndarray]]
+    position: Tuple[int, int]
+    opacity: float
+    kernel: Optional[BlendKernel]
+    # Set for adjustment layers, which have no pixels: adjusts a straight
+    # uint8 tile in place
+    adjust: Optional[Callable[[np.ndarray], None]]
+    # Layer mask at the rendered level; None without a mask or with an all
+    # white one. white_tiles flags its all-white TILE_SIZE tiles (None: unknown)
+    mask: Optional[np.ndarray] = None
+    white_tiles: Optional[np.ndarray] = None
+
+
+# Per-thread scratch storage, reused across tiles to avoid re-allocation
+_thread_local = threading.local()
+
+
+def default_worker_count() -> int:
+    """Number of worker threads used by the shared pool (one per CPU core)."""
+    return os.cpu_count() or 1
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Return the shared thread pool used for tiled image processing.
+
+    NumPy and OpenCV release the GIL inside their kernels, so plain threads
+    scale across cores without copying tiles between processes.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=default_worker_count(),
+                thread_name_prefix="epigimp-worker"
+            )
+        return _executor
+
+
+def scratch_buffer(name: str, shape: Tuple[int, ...], dtype=np.float32) -> np.ndarray:
+    """
+    Get a thread-local scratch array of at least the requested size.
+
+    The returned array is a view into a buffer owned by the calling thread and
+    is only valid until the next call with the same name on that thread.
+
+    Args:
+        name (str): Key identifying the buffer (one buffer per name and thread).
+        shape (Tuple[int, ...]): Required shape.
+        dtype: Required dtype.
+
+    Returns:
+        np.ndarray: An uninitialized array of the given shape.
+    """
+    buffers = getattr(_thread_local, 'buffers', None)
+    if buffers is None:
+        buffers = _thread_local.buffers = {}
+
+    size = int(np.prod(shape))
+    buf = buffers.get(name)
+    if buf is None or buf.dtype != dtype or buf.size < size:
+        buf = np.empty(size, dtype=dtype)
+        buffers[name] = buf
+    return buf[:size].reshape(shape)
+
+
+class Compositor:
+    """
+    Flattens a stack of layers into a single RGBA image.
+
+    The output is split into square tiles that are blended independently on a
+    thread pool. Each worker blends its tile through every layer in a
+    tile-local premultiplied buffer, so no full-frame temporaries are
+    allocated and the work scales with the number of cores.
+
+    Two blending paths are available:
+
+    * float: premultiplied float32 accumulator, exact to rounding.
+    Layers are blended with their ``opacity`` and ``blend_mode``. Normal mode at
+    full opacity takes a dedicated fast path; every other combination runs the
+    mode's vectorized kernel from :mod:`blend_modes` on the tile.
+
+    * fixed point: 16-bit unsigned normalized (0-65535) premultiplied
+      accumulator fed by premultiplied layer tiles. It matches the float path
+      within +-1 while moving half the bytes per pixel. The premultiplied
+      tiles are kept in a bounded cache keyed by :attr:`Layer.tile_versions`,
+      so the premultiplication and 1/255 normalization are only redone for
+      the visible tiles a stroke touched.
+
+    Layer masks (see :class:`LayerMask`) are multiplied into the source alpha
+    per tile, on both paths. Tiles where the mask is all white skip that
+    step, and an all-white mask is not read at all.
+    """
+
+    def __init__(self, tile_size: int = TILE_SIZE, max_workers: Optional[int] = None, fixed_point: bool = False) -> None:
+        """
+        Initialize a Compositor.
+
+        Args:
+            tile_size (int): Edge length of the tiles processed by each worker.
+            max_workers (Optional[int]): Number of threads to use. None uses the
+                shared pool sized to the machine, 1 renders on the calling thread.
+            fixed_point (bool): Blend in uint16 fixed point instead of float32.
+        """
+        self.tile_size = tile_size
+        self.max_workers = max_workers
+        self.fixed_point = fixed_point
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # Premultiplied uint16 tiles of layers, and a key per layer for them
+        # (ids of dead layers can be reused, these tokens are not)
+        self._premultiplied_tiles = TileCache()
+        self._layer_tokens: 'weakref.WeakKeyDictionary[Layer, int]' = weakref.WeakKeyDictionary()
+        self._next_token = itertools.count()
+        # Layer -> reduced resolution copies used when rendering zoomed out
+        self._pyramids: 'weakref.WeakKeyDictionary[Layer, MipmapPyramid]' = weakref.WeakKeyDictionary()
+        # Accumulated tiles below adjustment layers
+        self._tile_cache = TileCache()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self.max_workers is None:
+            return get_executor()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _run(self, func, tiles: Sequence[Tuple[int, int, int, int]]) -> None:
+        """Run func over every tile, in parallel when more than one worker is available."""
+        if self.max_workers == 1 or len(tiles) <= 1:
+            for tile in tiles:
+                func(tile)
+            return
+        # Consume the iterator so worker exceptions are raised here
+        for _ in self._get_executor().map(func, tiles):
+            pass
+
+    # =========================================================================
+    # Public API
+    # =========================================================================
+
+    def composite(
+        self,
+        layers: Sequence[Layer],
+        shape: Tuple[int, int],
+        background: Optional[Tuple[int, int, int, int]] = None,
+        rect: Optional[Tuple[int, int, int, int]] = None,
+        level: int = 0,
+        filters: Optional[Dict[Layer, PixelFilter]] = None
+    ) -> np.ndarray:
+        """
+        Blend the visible layers bottom to top using each layer's opacity and blend mode.
+
+        Layer groups are blended as one layer, from their cached flattened
+        pixels (see :class:`LayerGroup`), which are refreshed first.
+
+        Args:
+            layers (Sequence[Layer]): Layer stack, bottom first.
+            shape (Tuple[int, int]): Canvas size (height, width).
+            background (Optional[Tuple[int, int, int, int]]): RGBA color below the
+                first layer. Defaults to fully transparent.
+            rect (Optional[Tuple[int, int, int, int]]): (x, y, width, height) area of
+                the canvas to render, in full resolution coordinates. Defaults to
+                the whole canvas. Tiles outside of it are never touched.
+            level (int): Mipmap level to read layers from; the result is
+                1 / 2**level of the full resolution size.
+            filters (Optional[Dict[Layer, PixelFilter]]): Point filters applied on
+                the fly to some layers, without modifying them. Only the part of
+                the layer inside the rendered region is filtered, which makes
+                this cheap enough for live previews. A group with filtered
+                children is flattened again over the region instead of being
+                read from its cache.
+
+        Returns:
+            np.ndarray: The flattened region (H, W, 4) as uint8, straight alpha.
+        """
+        region = self._region(shape, rect, level)
+        ry0, ry1, rx0, rx1 = region
+        out = np.empty((ry1 - ry0, rx1 - rx0, 4), dtype=np.uint8)
+        # Sources are resolved here, before dispatching, so caches and mipmap
+        # levels are refreshed on the calling thread only
+        filters = filters or {}
+        self.update_groups(layers, shape)
+        stack = [
+            layer for layer in layers
+            if layer.visibility and layer.opacity > 0 and not (layer.is_group and layer.pixels.size == 0)
+        ]
+        sources = [
+            self._adjustment_source(layer) if layer.is_adjustment
+            else self._filtered_group_source(layer, shape, region, level, filters) if self._has_filtered_children(layer, filters)
+            else self._source(layer, level, region, filters.get(layer))
+            for layer in stack
+        ]
+        prefix_keys = self._prefix_keys(stack, filters, background, level)
+
+        if self.fixed_point:
+            base = np.rint(self._premultiplied_color(background) * 65535.0).astype(np.uint16)
+
+            def render(tile: Tuple[int, int, int, int]) -> None:
+                y0, y1, x0, x1 = tile
+                acc = scratch_buffer('acc_fixed', (y1 - y0, x1 - x0, 4), np.uint16)
+                start = self._restore_prefix(acc, tile, prefix_keys, base)
+                for index in range(start, len(sources)):
+                    pixels, premultiplied, position, opacity, kernel, adjust, mask, white_tiles = sources[index]
+                    if adjust is not None:
+                        self._save_prefix(acc, tile, prefix_keys, index, start)
+                        self._adjust_fixed(acc, adjust)
+                        continue
+                    overlap = self._overlap(tile, position, pixels.shape)
+                    if overlap is None:
+                        continue
+                    dst_view, src_view = overlap
+                    target = acc[dst_view]
+                    mask_view = self._mask_view(mask, white_tiles, src_view, level)
+                    if kernel is None:
+                        for piece, src in self._premultiplied_pieces(pixels, src_view, premultiplied, level):
+                            if mask_view is not None:
+                                src = cv.multiply(src, cv.merge([mask_view[piece]] * 4), scale=1.0 / 255.0, dtype=cv.CV_16U)
+                            if opacity < 1.0:
+                                src = cv.multiply(src, (opacity,) * 4)
+                            self._blend_over_fixed(target[piece], src)
+                    else:
+                        src = pixels[src_view] if mask_view is None else self._apply_mask(pixels[src_view], mask_view)
+                        # Blend modes need straight colors: round-trip the overlap through float
+                        acc_f = target.astype(np.float32) * np.float32(1.0 / 65535.0)
+                        self._blend_mode(acc_f, src, kernel, opacity)
+                        target[:] = np.clip(acc_f * 65535.0 + 0.5, 0, 65535)
+                self._store_fixed(acc, out[y0 - ry0:y1 - ry0, x0 - rx0:x1 - rx0])
+        else:
+            base = self._premultiplied_color(background)
+
+            def render(tile: Tuple[int, int, int, int]) -> None:
+                y0, y1, x0, x1 = tile
+                acc = scratch_buffer('acc', (y1 - y0, x1 - x0, 4))
+                start = self._restore_prefix(acc, tile, prefix_keys, base)
+                for index in range(start, len(sources)):
+                    pixels, _, position, opacity, kernel, adjust, mask, white_tiles = sources[index]
+                    if adjust is not None:
+                        self._save_prefix(acc, tile, prefix_keys, index, start)
+                        self._adjust(acc, adjust)
+                        continue
+                    overlap = self._overlap(tile, position, pixels.shape)
+                    if overlap is None:
+                        continue
+                    dst_view, src_view = overlap
+                    src = pixels[src_view]
+                    mask_view = self._mask_view(mask, white_tiles, src_view, level)
+                    if mask_view is not None:
+                        src = self._apply_mask(src, mask_view)
+                    if kernel is None and opacity >= 1.0:
+                        self._blend_over(acc[dst_view], src)
+                    else:
+                        self._blend_mode(acc[dst_view], src, kernel or get_blend_mode('normal'), opacity)
+                self._store(acc, out[y0 - ry0:y1 - ry0, x0 - rx0:x1 - rx0])
+
+        self._run(render, iter_tiles_in(region, self.tile_size))
+        return out
+
+    def update_groups(self, layers: Sequence, shape: Tuple[int, int]) -> None:
+        """
+        Flatten the visible layer groups of a stack again where their children changed.
+
+        Args:
+            layers (Sequence): Layer stack, bottom first.
+            shape (Tuple[int, int]): Canvas size (height, width).
+        """
+        for layer in layers:
+            if layer.is_group and layer.visibility and layer.opacity > 0:
+                layer.update(self, shape)
+
+    def pyramid(self, layer: Layer) -> MipmapPyramid:
+        """
+        Get the mipmap pyramid of a layer, created on first use.
+
+        Args:
+            layer (Layer): Source layer.
+
+        Returns:
+            MipmapPyramid: Pyramid kept for as long as the layer is alive.
+        """
+        pyramid = self._pyramids.get(layer)
+        if pyramid is None:
+            pyramid = self._pyramids[layer] = MipmapPyramid(layer)
+        return pyramid
+
+    def _premultiplied_key(self, layer: Layer, level: int = 0) -> Tuple[Hashable, np.ndarray]:
+        """
+        Cache key of the premultiplied tiles of a layer, and its tile versions.
+
+        Must run on the thread calling the compositor: it may reset stale
+        tile versions.
+
+        Args:
+            layer (Layer): Source layer.
+            level (int): Mipmap level the tiles are read from.
+
+        Returns:
+            Tuple[Hashable, np.ndarray]: Key identifying the layer and its pixel
+            buffer, and a copy of :attr:`Layer.tile_versions`.
+        """
+        if layer.tile_versions is None or layer.tile_versions.shape != grid_shape(*layer.pixels.shape[:2]):
+            layer.mark_dirty()
+        # id(pixels) guards against the buffer being swapped without a version bump
+        return (self._layer_token(layer), id(layer.pixels), level), layer.tile_versions.copy()
+
+    def _layer_token(self, layer) -> int:
+        """
+        Number identifying a layer in cache keys, never reused by this compositor.
+
+        Unlike id(layer), it cannot be taken over by a new layer once the
+        layer is garbage collected, so cached tiles never outlive their layer.
+        """
+        token = self._layer_tokens.get(layer)
+        if token is None:
+            token = self._layer_tokens[layer] = next(self._next_token)
+        return token
+
+    def _premultiplied_pieces(
+        self,
+        pixels: np.ndarray,
+        src_view: Tuple[slice, slice],
+        premultiplied: Optional[Tuple[Hashable, np.ndarray]],
+        level: int = 0
+    ) -> Iterator[Tuple[Tuple[slice, slice], np.ndarray]]:
+        """
+        Premultiplied fixed point form of pixels[src_view], from the tile cache when possible.
+
+        Entries are tiles of the layer's own tile_size grid, whatever part of
+        them is rendered, so a viewport or a group refreshing a small area
+        reuses them. An entry is keyed by the newest version of the level-0
+        tiles it covers: painting only invalidates the entries painted on.
+
+        Yields:
+            Tuple[Tuple[slice, slice], np.ndarray]: Slices into pixels[src_view]
+            and the premultiplied pixels under them; together they cover it.
+        """
+        if premultiplied is None:
+            yield (slice(None), slice(None)), self._premultiply(pixels[src_view])
+            return
+        key, tile_versions = premultiplied
+        rows, cols = src_view
+        size = self.tile_size
+        height, width = pixels.shape[:2]
+        for top in range(rows.start - rows.start % size, rows.stop, size):
+            bottom = min(top + size, height)
+            for left in range(cols.start - cols.start % size, cols.stop, size):
+                right = min(left + size, width)
+                span = tile_span((top << level, bottom << level, left << level, right << level))
+                tile_key = (key, top, left, int(tile_versions[span].max()))
+                tile = self._premultiplied_tiles.get(tile_key)
+                if tile is None:
+                    tile = self._premultiply(pixels[top:bottom, left:right])
+                    self._premultiplied_tiles.put(tile_key, tile)
+                y0, y1 = max(top, rows.start), min(bottom, rows.stop)
+                x0, x1 = max(left, cols.start), min(right, cols.stop)
+                piece = (slice(y0 - rows.start, y1 - rows.start), slice(x0 - cols.start, x1 - cols.start))
+                yield piece, tile[y0 - top:y1 - top, x0 - left:x1 - left]
+
+    # =========================================================================
+    # Internals
+    # =========================================================================
+
+    def _source(
+        self,
+        layer: Layer,
+        level: int = 0,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        pixel_filter: Optional[PixelFilter] = None
+    ) -> '_Source':
+        """
+        Gather what the tile workers need to blend a layer.
+
+        Args:
+            layer (Layer): Layer to blend.
+            level (int): Mipmap level being rendered.
+            region (Optional[Tuple[int, int, int, int]]): (y0, y1, x0, x1) area being
+                rendered, in level coordinates. Only this part of the level is refreshed.
+            pixel_filter (Optional[PixelFilter]): Filter applied to the part of
+                the layer inside region.
+
+        Returns:
+            _Source: Straight pixels, premultiplied tile cache key or None, (x, y)
+            position, opacity, blend kernel (None for normal mode) and mask.
+        """
+        kernel = None if layer.blend_mode == 'normal' else get_blend_mode(layer.blend_mode)
+        x, y = int(layer.position[0]), int(layer.position[1])
+        opacity = min(float(layer.opacity), 1.0)
+        mask, white_tiles = layer.mask, None
+        if mask is not None:
+            white_tiles = mask.white_tiles()
+            if white_tiles.all():
+                mask = None
+        # Every level is premultiplied tile by tile in the workers, so a frame
+        # only touches the tiles it shows. Filtered pixels are short-lived
+        # and not cached.
+        cached = self.fixed_point and kernel is None and pixel_filter is None
+        premultiplied = self._premultiplied_key(layer, level) if cached else None
+        if level == 0 and pixel_filter is None:
+            mask_pixels = None if mask is None else mask.pixels
+            return _Source(layer.pixels, premultiplied, (x, y), opacity, kernel, None, mask_pixels, white_tiles)
+
+        x, y = x >> level, y >> level
+        bounds = None
+        if region is not None:
+            y0, y1, x0, x1 = region
+            bounds = (y0 - y, y1 - y, x0 - x, x1 - x)
+        layer_bounds = bounds
+        if bounds is not None and premultiplied is not None:
+            # Whole cached tiles are premultiplied: refresh all of them
+            size = self.tile_size
+            y0, y1, x0, x1 = bounds
+            layer_bounds = (y0 // size * size, -(-y1 // size) * size, x0 // size * size, -(-x1 // size) * size)
+        pixels = self.pyramid(layer).level(level, layer_bounds)
+        mask_pixels = None if mask is None else self.pyramid(mask).level(level, bounds)
+        if pixel_filter is not None:
+            # Crop to the rendered region first, then filter the crop only
+            height, width = pixels.shape[:2]
+            y0, y1, x0, x1 = bounds if bounds is not None else (0, height, 0, width)
+            y0, x0 = min(max(y0, 0), height), min(max(x0, 0), width)
+            y1, x1 = max(min(y1, height), y0), max(min(x1, width), x0)
+            pixels = pixel_filter(pixels[y0:y1, x0:x1])
+            x, y = x + x0, y + y0
+            if mask_pixels is not None:
+                # The tile flags no longer line up with the crop
+                mask_pixels, white_tiles = mask_pixels[y0:y1, x0:x1], None
+        return _Source(pixels, premultiplied, (x, y), opacity, kernel, None, mask_pixels, white_tiles)
+
+    @staticmethod
+    def _has_filtered_children(layer, filters: Dict[Layer, PixelFilter]) -> bool:
+        """Whether layer is a group containing, at any depth, a layer of filters."""
+        return bool(filters) and layer.is_group and any(child in filters for child in iter_layers(layer.layers))
+
+    def _filtered_group_source(
+        self,
+        group,
+        shape: Tuple[int, int],
+        region: Tuple[int, int, int, int],
+        level: int,
+        filters: Dict[Layer, PixelFilter]
+    ) -> _Source:
+        """
+        Source entry of a group flattened again over region from its filtered children.
+
+        The children are blended over transparency, as in the group's cache,
+        so the result is what the group would be with the filtered layers
+        edited.
+        """
+        y0, y1, x0, x1 = region
+        step = 1 << level
+        rect = (x0 * step, y0 * step, (x1 - x0) * step, (y1 - y0) * step)
+        pixels = self.composite(group.layers, shape, rect=rect, level=level, filters=filters)
+        kernel = None if group.blend_mode == 'normal' else get_blend_mode(group.blend_mode)
+        return _Source(pixels, None, (x0, y0), min(float(group.opacity), 1.0), kernel, None)
+
+    @staticmethod
+    def _adjustment_source(layer) -> _Source:
+        """Source entry of an adjustment layer; its pipeline is compiled here, not in the workers."""
+        layer.pipeline()
+        return _Source(None, None, (0, 0), layer.opacity, None, layer.apply)
+
+    @staticmethod
+    def _region(
+        shape: Tuple[int, int],
+        rect: Optional[Tuple[int, int, int, int]],
+        level: int
+    ) -> Tuple[int, int, int, int]:
+        """
+        Convert a full resolution (x, y, width, height) rect to (y0, y1, x0, x1)
+        bounds at a mipmap level, clipped to the canvas.
+        """
+        height, width = level_shape(shape, level)
+        if rect is None:
+            return (0, height, 0, width)
+        x, y, w, h = rect
+        step = 1 << level
+        y0, x0 = max(y // step, 0), max(x // step, 0)
+        y1, x1 = min(-(-(y + h) // step), height), min(-(-(x + w) // step), width)
+        return (y0, max(y1, y0), x0, max(x1, x0))
+
+    def _prefix_keys(
+        self,
+        stack: Sequence,
+        filters: Dict[Layer, PixelFilter],
+        background: Optional[Tuple[int, int, int, int]],
+        level: int
+    ) -> List[Optional[tuple]]:
+        """
+        Cache keys of the accumulator state right below each adjustment layer.
+
+        The state below an adjustment only depends on the layers under it, so
+        it is cached per tile: changing the adjustment, or anything above it,
+        then restarts from the cached tile instead of re-blending the layers
+        below. Filtered (previewed) layers are never cached.
+
+        Returns:
+            List[Optional[tuple]]: One entry per stack entry; None where nothing
+            is cached (pixel layers, or adjustments above a filtered layer).
+        """
+        keys: List[Optional[tuple]] = []
+        signature: List[tuple] = []
+        cacheable = True
+        for layer in stack:
+            if layer.is_adjustment:
+                keys.append((self.fixed_point, level, background, tuple(signature)) if cacheable else None)
+                signature.append(('adjustment', self._layer_token(layer), layer.version, layer.opacity))
+                continue
+            keys.append(None)
+            if layer in filters or self._has_filtered_children(layer, filters):
+                cacheable = False
+            signature.append((
+                self._layer_token(layer), layer.version, id(layer.pixels),
+                layer.opacity, layer.blend_mode, tuple(layer.position)
+            ))
+        return keys
+
+    def _restore_prefix(self, acc: np.ndarray, tile: Tuple[int, int, int, int], keys: List[Optional[tuple]], base: np.ndarray) -> int:
+        """
+        Initialize a tile accumulator from the highest cached adjustment prefix.
+
+        Returns:
+            int: Index of the first stack entry left to process.
+        """
+        for index in range(len(keys) - 1, -1, -1):
+            if keys[index] is None:
+                continue
+            cached = self._tile_cache.get((keys[index], tile))
+            if cached is not None:
+                acc[:] = cached
+                return index
+        acc[:] = base
+        return 0
+
+    def _save_prefix(self, acc: np.ndarray, tile: Tuple[int, int, int, int], keys: List[Optional[tuple]], index: int, start: int) -> None:
+        """Cache the accumulator below the adjustment at index (unless it was just restored)."""
+        if keys[index] is not None and index != start:
+            self._tile_cache.put((keys[index], tile), acc.copy())
+
+    @staticmethod
+    def _overlap(
+        tile: Tuple[int, int, int, int],
+        position: Tuple[int, int],
+        layer_shape: Tuple[int, ...]
+    ) -> Optional[Tuple[Tuple[slice, slice], Tuple[slice, slice]]]:
+        """
+        Intersect a tile with a layer placed at position.
+
+        Args:
+            tile: (y0, y1, x0, x1) tile bounds in canvas coordinates.
+            position: (x, y) of the layer's top-left corner on the canvas.
+            layer_shape: Shape of the layer's pixel array.
+
+        Returns:
+            Optional[Tuple]: (slices into the tile, slices into the layer), or
+            None when they do not overlap.
+        """
+        y0, y1, x0, x1 = tile
+        px, py = position
+        top, bottom = max(y0, py), min(y1, py + layer_shape[0])
+        left, right = max(x0, px), min(x1, px + layer_shape[1])
+        if top >= bottom or left >= right:
+            return None
+        return (
+            (slice(top - y0, bottom - y0), slice(left - x0, right - x0)),
+            (slice(top - py, bottom - py), slice(left - px, right - px)),
+        )
+
+    @staticmethod
+    def _mask_view(
+        mask: Optional[np.ndarray],
+        white_tiles: Optional[np.ndarray],
+        src_view: Tuple[slice, slice],
+        level: int
+    ) -> Optional[np.ndarray]:
+        """
+        The part of a source's mask under src_view, or None if it hides nothing.
+
+        src_view is in level coordinates; white_tiles is a level-0 TILE_SIZE grid.
+        """
+        if mask is None:
+            return None
+        if white_tiles is not None:
+            rows, cols = src_view
+            span = tile_span((rows.start << level, rows.stop << level, cols.start << level, cols.stop << level))
+            if white_tiles[span].all():
+                return None
+        return mask[src_view]
+
+    @staticmethod
+    def _apply_mask(src: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """Copy of a straight uint8 tile with its alpha multiplied by a uint8 mask."""
+        masked = src.copy()
+        masked[..., 3] = cv.multiply(np.ascontiguousarray(src[..., 3]), mask, scale=1.0 / 255.0)
+        return masked
+
+    @staticmethod
+    def _premultiply(pixels: np.ndarray) -> np.ndarray:
+        """Premultiply straight uint8 RGBA pixels into 0-65535 uint16."""
+        weights = cv.cvtColor(np.ascontiguousarray(pixels[..., 3]), cv.COLOR_GRAY2BGRA)
+        # c * a / 255 rescaled from 0-255 to 0-65535 (x 257)
+        return cv.multiply(pixels, weights, scale=257.0 / 255.0, dtype=cv.CV_16U)
+
+    @staticmethod
+    def _premultiplied_color(color: Optional[Tuple[int, int, int, int]]) -> np.ndarray:
+        """Convert a straight RGBA tuple (0-255) to a premultiplied float pixel."""
+        if color is None:
+            return np.zeros(4, dtype=np.float32)
+        rgba = np.asarray(color, dtype=np.float32) / 255.0
+        rgba[:3] *= rgba[3]
+        return rgba
+
+    @staticmethod
+    def _blend_over(acc: np.ndarray, src: np.ndarray) -> None:
+        """
+        Blend a straight-alpha uint8 tile over a premultiplied float accumulator in place.
+
+        acc = src_rgb * src_a + acc * (1 - src_a). The math is done with OpenCV
+        arithmetic straight from the uint8 data, which avoids converting the
+        whole source tile to float and broadcasting over the 4-wide channel axis.
+        """
+        alpha = cv.extractChannel(src, 3)
+        cv.multiply(acc, cv.merge([255 - alpha] * 4), dst=acc, scale=1.0 / 255.0, dtype=cv.CV_32F)
+        # (a, a, a, 255): premultiplies RGB and leaves alpha as a / 255 after scaling
+        weights = cv.cvtColor(alpha, cv.COLOR_GRAY2BGRA)
+        cv.add(acc, cv.multiply(src, weights, scale=1.0 / 65025.0, dtype=cv.CV_32F), dst=acc)
+
+    @staticmethod
+    def _blend_mode(acc: np.ndarray, src: np.ndarray, kernel: BlendKernel, opacity: float) -> None:
+        """
+        Blend a straight-alpha uint8 tile over a premultiplied float accumulator
+        with an arbitrary blend kernel, in place.
+
+        Follows the W3C compositing model: the source color is first mixed with
+        the backdrop as (1 - ab) * Cs + ab * B(Cb, Cs), then composited with
+        "source over" using the source alpha scaled by opacity.
+        """
+        src_f = src.astype(np.float32) * np.float32(1.0 / 255.0)
+        color_s = src_f[..., :3]
+        alpha_s = src_f[..., 3:4] * np.float32(opacity)
+        alpha_b = acc[..., 3:4].copy()
+
+        backdrop = np.divide(acc[..., :3], alpha_b, out=np.zeros_like(color_s), where=alpha_b > 0)
+        np.minimum(backdrop, 1.0, out=backdrop)
+        mixed = (1.0 - alpha_b) * color_s + alpha_b * kernel(backdrop, color_s)
+
+        acc[..., :3] = alpha_s * mixed + (1.0 - alpha_s) * acc[..., :3]
+        acc[..., 3:4] = alpha_s + alpha_b * (1.0 - alpha_s)
+
+    @classmethod
+    def _adjust(cls, acc: np.ndarray, adjust: Callable[[np.ndarray], None]) -> None:
+        """
+        Run an adjustment over the premultiplied float accumulator in place.
+
+        The tile is un-premultiplied to uint8, adjusted, and premultiplied back.
+        """
+        straight = scratch_buffer('adjust', acc.shape, np.uint8)
+        cls._store(acc, straight)
+        adjust(straight)
+        weights = cv.cvtColor(np.ascontiguousarray(straight[..., 3]), cv.COLOR_GRAY2BGRA)
+        cv.multiply(straight, weights, dst=acc, scale=1.0 / 65025.0, dtype=cv.CV_32F)
+
+    @classmethod
+    def _adjust_fixed(cls, acc: np.ndarray, adjust: Callable[[np.ndarray], None]) -> None:
+        """Run an adjustment over the fixed point accumulator in place."""
+        straight = scratch_buffer('adjust', acc.shape, np.uint8)
+        cls._store_fixed(acc, straight)
+        adjust(straight)
+        acc[:] = cls._premultiply(straight)
+
+    @staticmethod
+    def _store(acc: np.ndarray, out: np.ndarray) -> None:
+        """Un-premultiply the accumulator and write it as uint8 into out."""
+        alpha = acc[..., 3]
+        # OpenCV yields 0 where alpha is 0, which is what we want for empty pixels
+        straight = cv.divide(acc, cv.merge([alpha, alpha, alpha, np.ones_like(alpha)]))
+        out[:] = cv.convertScaleAbs(straight, alpha=255.0)
+
+    @staticmethod
+    def _blend_over_fixed(acc: np.ndarray, src: np.ndarray) -> None:
+        """
+        Blend a premultiplied uint16 tile over the uint16 accumulator in place.
+
+        acc = src + acc * (65535 - src_a) / 65535, with OpenCV's rounding and
+        saturation. Both operands are in 0-65535, so no re-normalization is needed.
+        """
+        inverse = 65535 - cv.extractChannel(src, 3)
+        cv.multiply(acc, cv.merge([inverse] * 4), dst=acc, scale=1.0 / 65535.0)
+        cv.add(acc, src, dst=acc)
+
+    @staticmethod
+    def _store_fixed(acc: np.ndarray, out: np.ndarray) -> None:
+        """Un-premultiply the fixed point accumulator and write it as uint8 into out."""
+        alpha = cv.extractChannel(acc, 3)
+        if cv.countNonZero(65535 - alpha) == 0:
+            # Fully opaque tile: only the 0-65535 -> 0-255 rescale is needed
+            out[:] = cv.convertScaleAbs(acc, alpha=1.0 / 257.0)
+            return
+        # RGB * 255 / a and alpha * 255 / 65535. OpenCV yields 0 where a is 0.
+        divisor = cv.cvtColor(alpha, cv.COLOR_GRAY2BGRA)
+        out[:] = cv.divide(acc, divisor, scale=255.0, dtype=cv.CV_8U)
@@ -42,6 +42,11 @@ class FileLoader:
         data_len = struct.unpack('<I', file.read(4))[0]
         serialized_data = file.read(data_len)
         layer_data = self.deserialize_layer(serialized_data)
+
+        mask = None
+        if layer_meta.get('mask'):
+            mask_len = struct.unpack('<I', file.read(4))[0]
+            mask = file.read(mask_len)
         
         return {
             'name': layer_meta['name'],
@@ -49,6 +54,9 @@ class FileLoader:
             'opacity': layer_meta['opacity'],
             'blend_mode': layer_meta['blend_mode'],
             'position': tuple(layer_meta['position']),
+            'adjustment': layer_meta.get('adjustment'),
+            'group': layer_meta.get('group'),
+            'mask': mask,
             'data': layer_data
         }
 
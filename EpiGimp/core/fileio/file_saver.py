@@ -40,6 +40,14 @@ class FileSaver:
             'blend_mode': layer.get('blend_mode', 'normal'),
             'position': layer.get('position', (0, 0))
         }
+        if layer.get('adjustment'):
+            layer_meta['adjustment'] = layer['adjustment']
+        if layer.get('group'):
+            layer_meta['group'] = layer['group']
+        # Compressed mask bytes, written after the pixel data
+        mask = layer.get('mask')
+        if mask is not None:
+            layer_meta['mask'] = {'encoding': 'zlib-sub'}
         meta_json = json.dumps(layer_meta).encode('utf-8')
         file.write(struct.pack('<I', len(meta_json)))
         file.write(meta_json)
@@ -49,6 +57,10 @@ class FileSaver:
         file.write(struct.pack('<I', len(serialized_data)))
         file.write(serialized_data)
 
+        if mask is not None:
+            file.write(struct.pack('<I', len(mask)))
+            file.write(mask)
+
     def serialize_layer(self, layer: np.ndarray) -> bytes:
         shape = layer.shape
         dtype = str(layer.dtype)
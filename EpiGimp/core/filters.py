@@ -0,0 +1,256 @@
+import math
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import cv2 as cv
+import numpy as np
+
+from .compositor import get_executor
+from .tiles import TILE_SIZE, iter_tiles_in
+
+# A filter kernel maps a premultiplied float32 RGBA tile (0-255, halo
+# included) to a new tile of the same shape. Keyword arguments are the
+# filter parameters.
+FilterKernel = Callable[..., np.ndarray]
+
+# Returns how many pixels of context around a tile a kernel reads, for the
+# same parameters as the kernel
+HaloFunction = Callable[..., int]
+
+
+class Filter(NamedTuple):
+    """A registered filter: its kernel and the halo it needs around each tile."""
+    kernel: FilterKernel
+    halo: HaloFunction
+
+
+FILTERS: Dict[str, Filter] = {}
+
+# Image borders are extended by mirroring, without repeating the edge pixel
+_BORDER = cv.BORDER_REFLECT_101
+
+
+def register_filter(name: str, halo: HaloFunction) -> Callable[[FilterKernel], FilterKernel]:
+    """
+    Decorator registering a filter kernel under a name.
+
+    Args:
+        name (str): Identifier used by :func:`apply_filter` and the UI.
+        halo (HaloFunction): Called with the filter parameters, returns the
+            radius of the neighbourhood the kernel reads. Tiles are extended by
+            this many pixels so tiled results match a whole-image pass.
+    """
+    def decorator(kernel: FilterKernel) -> FilterKernel:
+        FILTERS[name] = Filter(kernel, halo)
+        return kernel
+    return decorator
+
+
+def get_filter(name: str) -> Filter:
+    """
+    Look up a registered filter.
+
+    Raises:
+        ValueError: If no filter is registered under this name.
+    """
+    try:
+        return FILTERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown filter: {name}") from None
+
+
+def filter_names() -> List[str]:
+    """Names of all registered filters, in registration order."""
+    return list(FILTERS)
+
+
+# =========================================================================
+# Filters
+# =========================================================================
+
+def gaussian_radius(sigma: float) -> int:
+    """Radius of the gaussian kernel used for a standard deviation (3 sigma)."""
+    return max(1, math.ceil(3.0 * sigma))
+
+
+def _gaussian(tile: np.ndarray, sigma: float) -> np.ndarray:
+    size = 2 * gaussian_radius(sigma) + 1
+    return cv.GaussianBlur(tile, (size, size), sigma, borderType=_BORDER)
+
+
+@register_filter('gaussian_blur', halo=lambda sigma=2.0: gaussian_radius(sigma))
+def gaussian_blur(tile: np.ndarray, sigma: float = 2.0) -> np.ndarray:
+    """Gaussian blur of standard deviation sigma (pixels)."""
+    return _gaussian(tile, sigma)
+
+
+@register_filter('box_blur', halo=lambda radius=2: int(radius))
+def box_blur(tile: np.ndarray, radius: int = 2) -> np.ndarray:
+    """Mean of the (2 * radius + 1) square around each pixel."""
+    size = 2 * int(radius) + 1
+    return cv.blur(tile, (size, size), borderType=_BORDER)
+
+
+@register_filter('unsharp_mask', halo=lambda sigma=2.0, amount=0.5, threshold=0: gaussian_radius(sigma))
+def unsharp_mask(tile: np.ndarray, sigma: float = 2.0, amount: float = 0.5, threshold: float = 0) -> np.ndarray:
+    """
+    Sharpen by adding back the difference with a gaussian blur.
+
+    Differences smaller than threshold (0-255) are left alone, which avoids
+    sharpening noise in flat areas.
+    """
+    detail = cv.subtract(tile, _gaussian(tile, sigma))
+    if threshold > 0:
+        detail[np.abs(detail) < threshold] = 0
+    return cv.scaleAdd(detail, amount, tile)
+
+
+@register_filter('median', halo=lambda radius=2: max(1, int(radius)))
+def median(tile: np.ndarray, radius: int = 2) -> np.ndarray:
+    """Per-channel median of the (2 * radius + 1) square around each pixel."""
+    # cv.medianBlur only takes float data for 3x3 and 5x5 windows, uint8 for any size
+    radius = max(1, int(radius))
+    padded = cv.copyMakeBorder(np.rint(tile).astype(np.uint8), radius, radius, radius, radius, _BORDER)
+    return cv.medianBlur(padded, 2 * radius + 1)[radius:-radius, radius:-radius].astype(np.float32)
+
+
+@register_filter('edge_detect', halo=lambda method='sobel': 1)
+def edge_detect(tile: np.ndarray, method: str = 'sobel') -> np.ndarray:
+    """
+    Replace colors with the strength of their local gradient; alpha is kept.
+
+    Args:
+        method (str): 'sobel' (gradient magnitude) or 'laplacian'.
+
+    Raises:
+        ValueError: On an unknown method.
+    """
+    if method == 'sobel':
+        magnitude = cv.magnitude(
+            cv.Sobel(tile, cv.CV_32F, 1, 0, ksize=3, borderType=_BORDER),
+            cv.Sobel(tile, cv.CV_32F, 0, 1, ksize=3, borderType=_BORDER),
+        )
+    elif method == 'laplacian':
+        magnitude = np.abs(cv.Laplacian(tile, cv.CV_32F, ksize=1, borderType=_BORDER))
+    else:
+        raise ValueError(f"Unknown edge detection method: {method}")
+    magnitude[..., 3] = tile[..., 3]
+    return magnitude
+
+
+def _kernel_halo(kernel: Sequence[Sequence[float]], divisor: Optional[float] = None, offset: float = 0) -> int:
+    return max(np.asarray(kernel).shape) // 2
+
+
+@register_filter('convolve', halo=_kernel_halo)
+def convolve(tile: np.ndarray, kernel: Sequence[Sequence[float]], divisor: Optional[float] = None, offset: float = 0) -> np.ndarray:
+    """
+    Convolve with a custom kernel (GIMP's convolution matrix).
+
+    All four premultiplied channels are convolved, so transparent pixels do not
+    contribute color.
+
+    Args:
+        kernel (Sequence[Sequence[float]]): 2D weights, centred on the pixel.
+        divisor (Optional[float]): Weights are divided by it; defaults to their
+            sum, or 1 if they sum to 0.
+        offset (float): Added to the color channels after the convolution.
+    """
+    weights = np.asarray(kernel, dtype=np.float32)
+    if divisor is None:
+        divisor = float(weights.sum()) or 1.0
+    # cv.filter2D correlates: flip the kernel for a true convolution
+    result = cv.filter2D(tile, cv.CV_32F, cv.flip(weights / divisor, -1), borderType=_BORDER)
+    if offset:
+        result[..., :3] += offset * result[..., 3:4] / 255.0
+    return result
+
+
+# =========================================================================
+# Tiled evaluation
+# =========================================================================
+
+def premultiply(pixels: np.ndarray) -> np.ndarray:
+    """Straight RGBA uint8 to premultiplied float32 (0-255)."""
+    weights = cv.cvtColor(np.ascontiguousarray(pixels[..., 3]), cv.COLOR_GRAY2BGRA)
+    weights[..., 3] = 255
+    return cv.multiply(pixels, weights, scale=1.0 / 255.0, dtype=cv.CV_32F)
+
+
+def unpremultiply(premultiplied: np.ndarray) -> np.ndarray:
+    """
+    Premultiplied float32 to straight RGBA uint8.
+
+    Out of range values produced by a filter are clamped first: alpha to
+    0-255 and colors to 0-alpha.
+    """
+    alpha = cv.min(cv.max(np.ascontiguousarray(premultiplied[..., 3]), 0.0), 255.0)
+    alphas = cv.cvtColor(alpha, cv.COLOR_GRAY2BGRA)
+    clamped = cv.min(cv.max(premultiplied, 0.0), alphas)
+    # Division by a zero alpha yields 0, i.e. transparent black
+    result = cv.divide(clamped, alphas, scale=255.0, dtype=cv.CV_8U)
+    result[..., 3] = np.rint(alpha)
+    return result
+
+
+def apply_filter(
+    pixels: np.ndarray,
+    name: str,
+    params: Optional[Dict[str, Any]] = None,
+    bounds: Optional[Tuple[int, int, int, int]] = None,
+    mask: Optional[np.ndarray] = None,
+    tile_size: int = TILE_SIZE
+) -> np.ndarray:
+    """
+    Run a filter over part of an image, tile by tile on the shared thread pool.
+
+    Each tile is read with a halo of neighbouring pixels (mirrored at the image
+    borders), filtered premultiplied so transparent pixels never bleed color,
+    then cropped back, so the result does not depend on the tiling.
+
+    Args:
+        pixels (np.ndarray): (H, W, 4) straight RGBA uint8 source; not modified.
+        name (str): A registered filter.
+        params (Optional[Dict[str, Any]]): Keyword arguments of the filter.
+        bounds (Optional[Tuple[int, int, int, int]]): (y0, y1, x0, x1) region to
+            filter, typically the selection bounding box. Defaults to the whole image.
+        mask (Optional[np.ndarray]): (y1 - y0, x1 - x0) uint8 weights of the
+            filtered result (255 = filtered, 0 = unchanged), e.g. an elliptical
+            or feathered selection.
+        tile_size (int): Edge length of the tiles processed by each task.
+
+    Returns:
+        np.ndarray: The filtered region, shaped like bounds.
+
+    Raises:
+        ValueError: If the filter is not registered.
+    """
+    kernel, halo_function = get_filter(name)
+    params = params or {}
+    halo = int(halo_function(**params))
+    height, width = pixels.shape[:2]
+    y0, y1, x0, x1 = bounds if bounds is not None else (0, height, 0, width)
+    out = np.empty((y1 - y0, x1 - x0, 4), dtype=np.uint8)
+
+    def render(tile: Tuple[int, int, int, int]) -> None:
+        ty0, ty1, tx0, tx1 = tile
+        # Source window: the tile plus its halo, clipped to the image
+        sy0, sy1 = max(ty0 - halo, 0), min(ty1 + halo, height)
+        sx0, sx1 = max(tx0 - halo, 0), min(tx1 + halo, width)
+        filtered = kernel(premultiply(pixels[sy0:sy1, sx0:sx1]), **params)
+        filtered = filtered[ty0 - sy0:ty1 - sy0, tx0 - sx0:tx1 - sx0]
+        target = out[ty0 - y0:ty1 - y0, tx0 - x0:tx1 - x0]
+        if mask is None:
+            target[:] = unpremultiply(filtered)
+            return
+        tile_mask = mask[ty0 - y0:ty1 - y0, tx0 - x0:tx1 - x0, np.newaxis]
+        original = pixels[ty0:ty1, tx0:tx1]
+        # Partially selected pixels are mixed premultiplied; unselected ones are copied
+        # as is, since a premultiplied round trip is lossy for translucent pixels
+        premultiplied = premultiply(original)
+        blended = premultiplied + (filtered - premultiplied) * (tile_mask * np.float32(1.0 / 255.0))
+        target[:] = unpremultiply(blended)
+        np.copyto(target, original, where=tile_mask == 0)
+
+    # list() re-raises worker exceptions here
+    list(get_executor().map(render, iter_tiles_in((y0, y1, x0, x1), tile_size)))
+    return out
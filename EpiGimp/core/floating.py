@@ -0,0 +1,164 @@
+from typing import Tuple
+
+import numpy as np
+
+from .layer import Layer
+from .layer_mask import LayerMask
+from .selection import SelectionMask, clear_masked
+
+
+class FloatingSelection:
+    """
+    Pixels lifted out of a layer, moved around until they are anchored.
+
+    Lifting copies the selected pixels once, cropped to the selection bounding
+    box, into a small layer the compositor stacks right above the source
+    layer (see :meth:`Canva.render_stack`). Dragging then only changes that
+    layer's position: no pixels are copied, and a redraw only needs the area
+    the floating pixels left and the area they entered (:meth:`move_to`
+    returns both). Anchoring blends them into the source layer at their final
+    place.
+
+    The preview matches anchoring: the floating layer is blended normally at
+    full opacity, and its mask clips it to where anchoring keeps pixels, the
+    source layer's bounds, shaped by the source layer's mask if it has one.
+    """
+
+    def __init__(self, layer: Layer, selection: SelectionMask) -> None:
+        """
+        Lift the pixels of layer under selection, leaving them transparent.
+
+        Args:
+            layer (Layer): Layer to lift pixels from.
+            selection (SelectionMask): Selection in canvas coordinates; must
+                overlap the layer.
+
+        Raises:
+            ValueError: If the selection misses the layer.
+        """
+        left, top = int(layer.position[0]), int(layer.position[1])
+        clipped = selection.translated(-left, -top).clip(*layer.pixels.shape[:2])
+        if clipped is None:
+            raise ValueError("The selection does not overlap the layer")
+        (y0, y1, x0, x1), mask = clipped
+
+        self.layer = layer
+        self.selection = selection
+        self._mask = mask
+        self._binary = selection.is_binary
+        self._source_bounds = (y0, y1, x0, x1)
+        region = layer.pixels[y0:y1, x0:x1]
+
+        lifted = region.copy()
+        if self._binary:
+            lifted[mask == 0] = 0
+            self._original = None
+        else:
+            # Partially selected pixels are shared: lift part of their alpha,
+            # and keep the originals to put them back on cancel
+            self._original = lifted.copy()
+            lifted[..., 3] = (lifted[..., 3].astype(np.uint16) * mask // 255).astype(np.uint8)
+        clear_masked(region, mask, self._binary)
+        layer.mark_dirty((x0, y0, x1 - x0, y1 - y0))
+
+        self.origin = (left + x0, top + y0)
+        self.pixels_layer = Layer(pixels=lifted, name=f"Floating ({layer.name})")
+        self.pixels_layer.position = self.origin
+        self._update_clip()
+
+    @property
+    def offset(self) -> Tuple[int, int]:
+        """(dx, dy) from where the pixels were lifted."""
+        x, y = self.pixels_layer.position
+        return (int(x) - self.origin[0], int(y) - self.origin[1])
+
+    @property
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """Current (x, y, width, height) of the floating pixels on the canvas."""
+        x, y = self.pixels_layer.position
+        height, width = self.pixels_layer.pixels.shape[:2]
+        return (int(x), int(y), width, height)
+
+    def move_to(self, dx: int, dy: int) -> Tuple[Tuple[int, int, int, int], Tuple[int, int, int, int]]:
+        """
+        Place the pixels at (dx, dy) from where they were lifted.
+
+        Only the clip mask, of the size of the floating pixels, is refreshed.
+
+        Returns:
+            Tuple[Tuple[int, int, int, int], Tuple[int, int, int, int]]: The
+            (x, y, width, height) canvas areas before and after the move, the
+            only ones that need redrawing.
+        """
+        before = self.bounds
+        self.pixels_layer.position = (self.origin[0] + int(dx), self.origin[1] + int(dy))
+        self._update_clip()
+        return before, self.bounds
+
+    def _overlap(self) -> Tuple[int, int, int, int, int, int]:
+        """
+        Where the floating pixels land in the source layer.
+
+        Returns:
+            Tuple[int, int, int, int, int, int]: (y0, y1, x0, x1) bounds in layer
+            coordinates, empty when the pixels miss the layer, and the (left,
+            top) of the floating pixels in layer coordinates.
+        """
+        layer = self.layer
+        height, width = layer.pixels.shape[:2]
+        x, y, w, h = self.bounds
+        left, top = x - int(layer.position[0]), y - int(layer.position[1])
+        y0, y1 = max(top, 0), min(top + h, height)
+        x0, x1 = max(left, 0), min(left + w, width)
+        return y0, max(y1, y0), x0, max(x1, x0), left, top
+
+    def _update_clip(self) -> None:
+        """Mask the floating pixels like anchoring would: to the source layer and its mask."""
+        y0, y1, x0, x1, left, top = self._overlap()
+        _, _, w, h = self.bounds
+        clip = np.zeros((h, w), dtype=np.uint8)
+        source_mask = self.layer.mask
+        clip[y0 - top:y1 - top, x0 - left:x1 - left] = 255 if source_mask is None else source_mask.pixels[y0:y1, x0:x1]
+        if self.pixels_layer.mask is None:
+            self.pixels_layer.mask = LayerMask(self.pixels_layer, clip)
+        else:
+            self.pixels_layer.mask.set_pixels(clip)
+
+    def anchor(self) -> SelectionMask:
+        """
+        Blend the floating pixels over the source layer where they are.
+
+        Pixels falling outside the layer are dropped.
+
+        Returns:
+            SelectionMask: The selection, moved along with the pixels.
+        """
+        dx, dy = self.offset
+        y0, y1, x0, x1, left, top = self._overlap()
+        if y0 < y1 and x0 < x1:
+            lifted = self.pixels_layer.pixels
+            _blend_over(self.layer.pixels[y0:y1, x0:x1], lifted[y0 - top:y1 - top, x0 - left:x1 - left])
+            self.layer.mark_dirty((x0, y0, x1 - x0, y1 - y0))
+        return self.selection.translated(dx, dy)
+
+    def cancel(self) -> None:
+        """Put the pixels back where they were lifted from."""
+        y0, y1, x0, x1 = self._source_bounds
+        region = self.layer.pixels[y0:y1, x0:x1]
+        if self._original is not None:
+            region[:] = self._original
+        else:
+            np.copyto(region, self.pixels_layer.pixels, where=self._mask[..., np.newaxis] != 0)
+        self.layer.mark_dirty((x0, y0, x1 - x0, y1 - y0))
+
+
+def _blend_over(dst: np.ndarray, src: np.ndarray) -> None:
+    """Composite straight RGBA src over dst, in place."""
+    src_alpha = src[..., 3:].astype(np.float32) * np.float32(1.0 / 255.0)
+    dst_alpha = dst[..., 3:].astype(np.float32) * np.float32(1.0 / 255.0)
+    alpha = src_alpha + dst_alpha * (1.0 - src_alpha)
+    color = src[..., :3] * src_alpha + dst[..., :3] * (dst_alpha * (1.0 - src_alpha))
+    np.divide(color, alpha, out=color, where=alpha > 0)
+    dst[..., :3] = np.clip(np.rint(color), 0, 255)
+    dst[..., 3:] = np.clip(np.rint(alpha * 255.0), 0, 255)
+
@@ -0,0 +1,57 @@
+from typing import Tuple
+
+import cv2 as cv
+import numpy as np
+
+from .selection import SelectionMask
+
+#: Default tolerance of the color region tools, as in GIMP.
+DEFAULT_TOLERANCE = 15
+
+# Value floodFill paints the connected region with; the in-range mask only holds 0 and 255
+_REACHED = 128
+
+
+def color_region(
+    pixels: np.ndarray, seed: Tuple[int, int], tolerance: int = DEFAULT_TOLERANCE, contiguous: bool = True
+) -> SelectionMask:
+    """
+    Select the pixels whose color is close to the color at seed.
+
+    A pixel matches when none of its RGBA channels differs from the seed by
+    more than tolerance. Matching is one cv.inRange pass; the contiguous mode
+    then keeps the 4-connected area around the seed with a cv.floodFill over
+    that binary mask, so a 50 MP image takes a few hundred milliseconds.
+
+    Args:
+        pixels (np.ndarray): (H, W, 4) RGBA uint8 image.
+        seed (Tuple[int, int]): (x, y) pixel whose color is matched.
+        tolerance (int): Largest channel difference still selected, 0-255.
+        contiguous (bool): Only select the area connected to the seed,
+            otherwise every matching pixel of the image.
+
+    Returns:
+        SelectionMask: The region in pixel coordinates of pixels; empty if
+        seed is outside the image.
+    """
+    height, width = pixels.shape[:2]
+    x, y = int(seed[0]), int(seed[1])
+    if not (0 <= x < width and 0 <= y < height):
+        return SelectionMask(np.zeros((0, 0), dtype=np.uint8))
+
+    color = pixels[y, x].astype(np.int32)
+    tolerance = int(np.clip(tolerance, 0, 255))
+    lower = tuple(int(v) for v in np.clip(color - tolerance, 0, 255))
+    upper = tuple(int(v) for v in np.clip(color + tolerance, 0, 255))
+    mask = cv.inRange(pixels, lower, upper)
+
+    if contiguous:
+        cv.floodFill(mask, None, (x, y), _REACHED, 0, 0, flags=4)
+        mask = cv.compare(mask, _REACHED, cv.CMP_EQ)
+
+    left, top, region_width, region_height = cv.boundingRect(mask)
+    trimmed = mask[top:top + region_height, left:left + region_width]
+    if (region_width, region_height) != (width, height):
+        # Don't keep the full size mask alive through a view
+        trimmed = trimmed.copy()
+    return SelectionMask(trimmed, left, top, binary=True)
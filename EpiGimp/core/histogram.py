@@ -0,0 +1,255 @@
+import weakref
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import cv2 as cv
+import numpy as np
+
+from .tiles import TILE_SIZE, grid_shape, iter_tiles_in, rect_to_bounds, tile_span
+
+_VALUES = np.arange(256, dtype=np.float64)
+
+
+class ImageStatistics(NamedTuple):
+    """
+    Per-channel histograms of an RGBA image and the statistics derived from them.
+
+    Everything is computed from the histogram, so statistics of several tiles
+    are obtained by summing their histograms.
+    """
+    #: (4, 256) pixel counts per channel (R, G, B, A) and value
+    histogram: np.ndarray
+
+    @property
+    def count(self) -> int:
+        """Number of pixels."""
+        return int(self.histogram[0].sum())
+
+    @property
+    def minimum(self) -> np.ndarray:
+        """(4,) smallest value of each channel (0 for an empty image)."""
+        present = self.histogram > 0
+        return np.where(present.any(axis=1), present.argmax(axis=1), 0)
+
+    @property
+    def maximum(self) -> np.ndarray:
+        """(4,) largest value of each channel (0 for an empty image)."""
+        present = self.histogram[:, ::-1] > 0
+        return np.where(present.any(axis=1), 255 - present.argmax(axis=1), 0)
+
+    @property
+    def mean(self) -> np.ndarray:
+        """(4,) mean value of each channel."""
+        return self.histogram @ _VALUES / max(self.count, 1)
+
+    @property
+    def coverage(self) -> float:
+        """Fraction of the pixels that are not fully transparent."""
+        return 1.0 - self.histogram[3, 0] / max(self.count, 1)
+
+    def mapped(self, lut: np.ndarray) -> 'ImageStatistics':
+        """
+        Statistics of the image after a point operation, without touching pixels.
+
+        Args:
+            lut (np.ndarray): (256, 4) uint8 table, as built by :mod:`point_ops`.
+
+        Returns:
+            ImageStatistics: Each bin moved to its mapped value.
+        """
+        histogram = np.stack([
+            np.bincount(lut[:, channel], weights=self.histogram[channel], minlength=256)
+            for channel in range(4)
+        ]).astype(np.int64)
+        return ImageStatistics(histogram)
+
+
+def compute_histogram(pixels: np.ndarray) -> np.ndarray:
+    """
+    Per-channel histograms of RGBA uint8 pixels.
+
+    Returns:
+        np.ndarray: (4, 256) int64 counts.
+    """
+    if pixels.size == 0:
+        return np.zeros((4, 256), dtype=np.int64)
+    pixels = np.ascontiguousarray(pixels)
+    return np.stack([
+        cv.calcHist([pixels], [channel], None, [256], [0, 256]).ravel()
+        for channel in range(4)
+    ]).astype(np.int64)
+
+
+class _TileHistograms:
+    """Cached histogram of every tile of one image, with the version it was computed at."""
+
+    def __init__(self, grid: Tuple[int, int]) -> None:
+        self.histograms = np.zeros(grid + (4, 256), dtype=np.int64)
+        # -1: never computed
+        self.versions = np.full(grid, -1, dtype=np.int64)
+
+
+class Statistics:
+    """
+    Histogram and statistics service for layers and composites.
+
+    Histograms are cached per tile together with the version of the tile they
+    were computed from (``Layer.tile_versions``), so after an edit only the
+    dirty tiles are read again: the cost of a query is proportional to the
+    modified area, plus the border tiles of a partial rect.
+    """
+
+    def __init__(self, compositor=None, tile_size: int = TILE_SIZE) -> None:
+        """
+        Initialize the service.
+
+        Args:
+            compositor: The :class:`Compositor` used to render composites; only
+                needed by :meth:`composite_stats`.
+            tile_size (int): Must match the grid of ``Layer.tile_versions``.
+        """
+        self.compositor = compositor
+        self.tile_size = tile_size
+        self._layers: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+        # Composite tiles are keyed by the stack signature instead of a version
+        self._composite: Optional[Tuple[Tuple[int, int], np.ndarray, Dict[Tuple[int, int], tuple]]] = None
+
+    # -------------------------------------------------------------------------
+    # Layers
+    # -------------------------------------------------------------------------
+
+    def layer_stats(self, layer, rect=None) -> ImageStatistics:
+        """
+        Statistics of a layer's pixels.
+
+        Args:
+            layer: A pixel :class:`Layer`.
+            rect: Optional QRect or (x, y, width, height) in layer coordinates
+                restricting the area; None for the whole layer.
+
+        Returns:
+            ImageStatistics: Histograms of the area.
+        """
+        height, width = layer.pixels.shape[:2]
+        grid = grid_shape(height, width, self.tile_size)
+        cached = self._layers.get(layer)
+        if cached is None or cached.versions.shape != grid:
+            cached = self._layers[layer] = _TileHistograms(grid)
+        tile_versions = layer.tile_versions
+        if tile_versions is None or tile_versions.shape != grid:
+            # Only the whole layer version is known
+            tile_versions = np.full(grid, layer.version, dtype=np.int64)
+
+        whole, partial = self._split(self._bounds(rect, height, width), height, width)
+        total = np.zeros((4, 256), dtype=np.int64)
+        for y0, y1, x0, x1 in whole:
+            row, col = y0 // self.tile_size, x0 // self.tile_size
+            if cached.versions[row, col] != tile_versions[row, col]:
+                cached.histograms[row, col] = compute_histogram(layer.pixels[y0:y1, x0:x1])
+                cached.versions[row, col] = tile_versions[row, col]
+            total += cached.histograms[row, col]
+        for y0, y1, x0, x1 in partial:
+            total += compute_histogram(layer.pixels[y0:y1, x0:x1])
+        return ImageStatistics(total)
+
+    # -------------------------------------------------------------------------
+    # Composite
+    # -------------------------------------------------------------------------
+
+    def composite_stats(self, layers: Sequence, shape: Tuple[int, int], rect=None) -> ImageStatistics:
+        """
+        Statistics of the flattened image, over a transparent base.
+
+        A composite tile is rendered again only if a tile of a layer overlapping
+        it changed, or the stack itself changed (order, visibility, opacity,
+        blend mode, position, adjustment parameters). Everything that needs
+        rendering is rendered in one compositor call.
+
+        Args:
+            layers (Sequence): The layer stack, bottom first.
+            shape (Tuple[int, int]): (height, width) of the canvas.
+            rect: Optional QRect or (x, y, width, height) restricting the area.
+
+        Returns:
+            ImageStatistics: Histograms of the area.
+        """
+        height, width = shape
+        # Groups are read through their flattened pixels: bring them up to date first
+        self.compositor.update_groups(layers, shape)
+        grid = grid_shape(height, width, self.tile_size)
+        if self._composite is None or self._composite[0] != grid:
+            self._composite = (grid, np.zeros(grid + (4, 256), dtype=np.int64), {})
+        _, histograms, keys = self._composite
+
+        stack = tuple(
+            (id(layer), layer.visibility, layer.opacity, layer.blend_mode, tuple(layer.position),
+             layer.version if layer.is_adjustment else None)
+            for layer in layers
+        )
+        whole, partial = self._split(self._bounds(rect, height, width), height, width)
+        dirty = []
+        for tile in whole:
+            key = (stack, tuple(self._layer_tile_version(layer, tile) for layer in layers))
+            cell = (tile[0] // self.tile_size, tile[2] // self.tile_size)
+            if keys.get(cell) != key:
+                dirty.append((tile, cell, key))
+
+        total = np.zeros((4, 256), dtype=np.int64)
+        needed = [tile for tile, _, _ in dirty] + partial
+        if needed:
+            ry0, ry1 = min(b[0] for b in needed), max(b[1] for b in needed)
+            rx0, rx1 = min(b[2] for b in needed), max(b[3] for b in needed)
+            rendered = self.compositor.composite(layers, shape, rect=(rx0, ry0, rx1 - rx0, ry1 - ry0))
+            for (y0, y1, x0, x1), cell, key in dirty:
+                histograms[cell] = compute_histogram(rendered[y0 - ry0:y1 - ry0, x0 - rx0:x1 - rx0])
+                keys[cell] = key
+            for y0, y1, x0, x1 in partial:
+                total += compute_histogram(rendered[y0 - ry0:y1 - ry0, x0 - rx0:x1 - rx0])
+        for y0, _, x0, _ in whole:
+            total += histograms[y0 // self.tile_size, x0 // self.tile_size]
+        return ImageStatistics(total)
+
+    def _layer_tile_version(self, layer, bounds: Tuple[int, int, int, int]) -> Optional[int]:
+        """Latest version of the tiles of a layer under canvas bounds, None if it does not overlap."""
+        if layer.is_adjustment:
+            return None
+        left, top = layer.position
+        height, width = layer.pixels.shape[:2]
+        y0, y1, x0, x1 = bounds
+        local = (max(y0 - top, 0), min(y1 - top, height), max(x0 - left, 0), min(x1 - left, width))
+        if local[0] >= local[1] or local[2] >= local[3]:
+            return None
+        if layer.tile_versions is None or layer.tile_versions.shape != grid_shape(height, width, self.tile_size):
+            return layer.version
+        rows, cols = tile_span(local, self.tile_size)
+        return int(layer.tile_versions[rows, cols].max())
+
+    # -------------------------------------------------------------------------
+    # Helpers
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _bounds(rect, height: int, width: int) -> Tuple[int, int, int, int]:
+        """(y0, y1, x0, x1) of rect clipped to the image, or the whole image."""
+        if rect is None:
+            return (0, height, 0, width)
+        y, y_end, x, x_end = rect_to_bounds(rect)
+        y0, x0 = min(max(y, 0), height), min(max(x, 0), width)
+        return (y0, max(min(y_end, height), y0), x0, max(min(x_end, width), x0))
+
+    def _split(self, bounds: Tuple[int, int, int, int], height: int, width: int) -> Tuple[List, List]:
+        """
+        Split the tiles covering bounds into whole grid tiles, which are cached,
+        and tiles cut by the bounds, which are read directly.
+        """
+        whole, partial = [], []
+        if bounds[0] >= bounds[1] or bounds[2] >= bounds[3]:
+            return whole, partial
+        size = self.tile_size
+        for tile in iter_tiles_in(bounds, size):
+            y0, y1, x0, x1 = tile
+            is_whole = (
+                y0 % size == 0 and x0 % size == 0
+                and y1 == min(y0 + size, height) and x1 == min(x0 + size, width)
+            )
+            (whole if is_whole else partial).append(tile)
+        return whole, partial
@@ -4,6 +4,12 @@ from PIL import Image
 from PySide6.QtGui import QImage, QPainter
 from typing import Tuple, Optional, Union, Dict, Any
 
+from .blend_modes import get_blend_mode
+from .layer_mask import LayerMask
+from .point_ops import PointPipeline, apply_lut, color_temperature_lut, kelvin_to_rgb
+from .selection import SelectionMask, clear_masked, fill_masked
+from .tiles import grid_shape, rect_to_bounds, tile_span
+
 class Layer:
     """
     Represents a single image layer containing pixel data and metadata.
@@ -12,6 +18,10 @@ class Layer:
     automatically synchronizes it with a QImage for rendering.
     """
 
+    # Pixel layer, as opposed to an AdjustmentLayer or a LayerGroup
+    is_adjustment = False
+    is_group = False
+
     def __init__(
         self, 
         shape: Tuple[int, int] = (600, 400), 
@@ -30,6 +40,22 @@ class Layer:
         """
         self.name: str = name
         self.visibility: bool = True
+
+        # Compositing properties
+        self.opacity: float = 1.0
+        self.blend_mode: str = 'normal'
+        self.position: Tuple[int, int] = (0, 0)  # (x, y) of the top-left corner on the canvas
+
+        # Incremented on every pixel change; used as a cache key by the compositor.
+        # tile_versions holds, per TILE_SIZE tile, the version that last touched it.
+        self.version: int = 0
+        self.tile_versions: Optional[np.ndarray] = None
+
+        # (horizontal, vertical) flips recorded but not yet applied to the buffer
+        self._pending_flip: Tuple[bool, bool] = (False, False)
+
+        # Optional 8-bit mask multiplied into the alpha by the compositor
+        self.mask: Optional[LayerMask] = None
         
         # Initialize Pixel Data
         if pixels is None:
@@ -55,28 +81,67 @@ class Layer:
             self.shape = (self.pixels.shape[0], self.pixels.shape[1])
 
         # Initialize QImage view
-        self.qimage: QImage = QImage()
+        self._qimage: QImage = QImage()
         self._update_qimage()
 
+    @property
+    def pixels(self) -> np.ndarray:
+        """(H, W, 4) RGBA uint8 pixel data; pending flips are applied before it is returned."""
+        if self._pending_flip != (False, False):
+            self._apply_pending_flip()
+        return self._pixels
+
+    @pixels.setter
+    def pixels(self, pixels: np.ndarray) -> None:
+        self._pixels = pixels
+        self._pending_flip = (False, False)
+
+    @property
+    def qimage(self) -> QImage:
+        """QImage sharing the pixel buffer, for painting; pending flips are applied first."""
+        if self._pending_flip != (False, False):
+            self._apply_pending_flip()
+        return self._qimage
+
     def _update_qimage(self) -> None:
         """
         Refresh the QImage object to point to the current self.pixels array.
         
         Must be called whenever self.pixels is reassigned (e.g. after rotation/flip),
-        as those operations often return a new memory buffer.
+        as those operations often return a new memory buffer. Since every pixel
+        operation ends here, this also marks the layer as modified.
         """
         height, width = self.pixels.shape[:2]
         bytes_per_line = width * 4
         
         # QImage references the numpy array data directly. 
         # We must ensure the array stays alive (self.pixels holds the reference).
-        self.qimage = QImage(
+        self._qimage = QImage(
             self.pixels.data, 
             width, 
             height, 
             bytes_per_line, 
             QImage.Format.Format_RGBA8888
         )
+        self.mark_dirty()
+
+    def mark_dirty(self, rect=None) -> None:
+        """
+        Flag the pixel data as modified so cached derivatives are rebuilt.
+
+        Call this after painting on :attr:`qimage` or editing :attr:`pixels` in place.
+
+        Args:
+            rect: Optional QRect or (x, y, width, height) bounding the modified
+                area. None means the whole layer.
+        """
+        self.version += 1
+        grid = grid_shape(*self._pixels.shape[:2])
+        if rect is None or self.tile_versions is None or self.tile_versions.shape != grid:
+            self.tile_versions = np.full(grid, self.version, dtype=np.int64)
+        else:
+            rows, cols = tile_span(rect_to_bounds(rect))
+            self.tile_versions[rows, cols] = self.version
 
     def get_painter(self) -> QPainter:
         """Returns a QPainter active on THIS layer's QImage."""
@@ -126,45 +191,160 @@ class Layer:
     def toggle_visibility(self) -> None:
         self.visibility = not self.visibility
 
+    def set_opacity(self, opacity: float) -> None:
+        """Set the layer opacity, clamped to the 0.0 - 1.0 range."""
+        self.opacity = max(0.0, min(1.0, float(opacity)))
+
+    def set_pixels(self, pixels: np.ndarray, mask: Optional[np.ndarray] = None) -> None:
+        """
+        Replace the pixel buffer, e.g. by a resized or cropped copy.
+
+        Args:
+            pixels (np.ndarray): (H, W, 4) RGBA uint8 array; its size becomes the layer size.
+            mask (Optional[np.ndarray]): (H, W) replacement for the layer mask, if
+                any. By default, a mask is resampled to the new size.
+        """
+        self.pixels = np.ascontiguousarray(pixels)
+        self.shape = (self.pixels.shape[0], self.pixels.shape[1])
+        if self.mask is not None:
+            self.mask.set_pixels(mask if mask is not None else self.mask.resized(self.shape))
+        self._update_qimage()
+
+    # =========================================================================
+    # Mask
+    # =========================================================================
+
+    def add_mask(self, value: int = 255) -> LayerMask:
+        """
+        Give the layer a mask, unless it has one.
+
+        Args:
+            value (int): Fill of a new mask: 255 shows the whole layer, 0 hides it.
+
+        Returns:
+            LayerMask: The layer's mask.
+        """
+        if self.mask is None:
+            self.mask = LayerMask(self, value=value)
+            if value != 255:
+                self.mark_dirty()
+        return self.mask
+
+    def remove_mask(self, apply: bool = False) -> bool:
+        """
+        Drop the layer mask.
+
+        Args:
+            apply (bool): Multiply the mask into the alpha channel first, so the
+                layer keeps looking the same.
+
+        Returns:
+            bool: False if the layer has no mask.
+        """
+        if self.mask is None:
+            return False
+        mask, self.mask = self.mask, None
+        if mask.is_white():
+            return True
+        if apply:
+            alpha = np.ascontiguousarray(self.pixels[..., 3])
+            self.pixels[..., 3] = cv.multiply(alpha, mask.pixels, scale=1.0 / 255.0)
+        self.mark_dirty()
+        return True
+
+    def set_blend_mode(self, mode: str) -> None:
+        """
+        Set how the layer is blended onto the layers below it.
+
+        Args:
+            mode (str): A registered blend mode name (see :mod:`blend_modes`).
+
+        Raises:
+            ValueError: If the mode is not registered.
+        """
+        get_blend_mode(mode)
+        self.blend_mode = mode
+
     # =========================================================================
     # Transformations
     # =========================================================================
 
-    def flip_horizontal(self) -> None:
-        """Flip the layer horizontally."""
-        # cv.flip returns a new array, so we must update qimage
-        self.pixels = cv.flip(self.pixels, 1)
-        self._update_qimage()
+    def flip_horizontal(self, deferred: bool = False) -> None:
+        """
+        Flip the layer horizontally, in place.
+
+        Args:
+            deferred (bool): Only record the flip; it is applied when the pixels
+                are next read, and cancels out with another pending flip.
+        """
+        self._flip(True, False, deferred)
     
-    def flip_vertical(self) -> None:
-        """Flip the layer vertically."""
-        self.pixels = cv.flip(self.pixels, 0)
-        self._update_qimage()
+    def flip_vertical(self, deferred: bool = False) -> None:
+        """Flip the layer vertically, in place. See :meth:`flip_horizontal`."""
+        self._flip(False, True, deferred)
     
     def rotate_90_clockwise(self) -> None:
         """Rotate 90 degrees clockwise."""
-        self.pixels = cv.rotate(self.pixels, cv.ROTATE_90_CLOCKWISE)
-        self.shape = (self.pixels.shape[0], self.pixels.shape[1])
-        self._update_qimage()
+        self._rotate(cv.ROTATE_90_CLOCKWISE)
     
     def rotate_90_counterclockwise(self) -> None:
         """Rotate 90 degrees counter-clockwise."""
-        self.pixels = cv.rotate(self.pixels, cv.ROTATE_90_COUNTERCLOCKWISE)
-        self.shape = (self.pixels.shape[0], self.pixels.shape[1])
-        self._update_qimage()
+        self._rotate(cv.ROTATE_90_COUNTERCLOCKWISE)
     
-    def rotate_180(self) -> None:
-        """Rotate 180 degrees."""
-        self.pixels = cv.rotate(self.pixels, cv.ROTATE_180)
-        self._update_qimage()
+    def rotate_180(self, deferred: bool = False) -> None:
+        """Rotate 180 degrees (both flips), in place. See :meth:`flip_horizontal`."""
+        self._flip(True, True, deferred)
+
+    def _rotate(self, code: int) -> None:
+        """Rotate the pixels, and the mask with them, by a cv.rotate code."""
+        mask = None if self.mask is None else cv.rotate(self.mask.pixels, code)
+        self.set_pixels(cv.rotate(self.pixels, code), mask)
+
+    def _flip(self, horizontal: bool, vertical: bool, deferred: bool) -> None:
+        """
+        Compose a flip with the pending one, then apply it unless deferred.
+
+        A mask is a single channel: it is flipped right away.
+        """
+        if self.mask is not None:
+            self.mask.flip(horizontal, vertical)
+        pending_h, pending_v = self._pending_flip
+        self._pending_flip = (pending_h != horizontal, pending_v != vertical)
+        if not deferred and self._pending_flip != (False, False):
+            self._apply_pending_flip()
+        self.mark_dirty()
+
+    def _apply_pending_flip(self) -> None:
+        """
+        Apply the pending flips to the pixel buffer.
 
-    def transform(self, matrix: Optional[np.ndarray] = None, type: str = "") -> None:
+        cv.flip swaps pixels within the existing buffer, so no second copy of
+        the layer is allocated and the QImage view stays valid.
+        """
+        code = {(True, False): 1, (False, True): 0, (True, True): -1}[self._pending_flip]
+        self._pending_flip = (False, False)
+        if not self._pixels.flags.c_contiguous:
+            self._pixels = np.ascontiguousarray(self._pixels)
+            cv.flip(self._pixels, code, dst=self._pixels)
+            self._update_qimage()
+            return
+        cv.flip(self._pixels, code, dst=self._pixels)
+
+    def transform(self, matrix: Optional[np.ndarray] = None, type: str = "", interpolation: str = 'linear') -> None:
         """
         Apply a geometric transformation.
 
+        A matrix transform resizes the layer to fit the whole result and moves
+        it by the offset of the new top-left corner, so nothing is cropped.
+
         Args:
-            matrix (Optional[np.ndarray]): A 2x3 affine transformation matrix.
+            matrix (Optional[np.ndarray]): A 2x3 affine or 3x3 perspective matrix,
+                in layer pixel coordinates.
             type (str): A string identifier for standard transforms ('flip_horizontal', etc).
+            interpolation (str): Resampling used with matrix, see :data:`transform.INTERPOLATIONS`.
+
+        Raises:
+            ValueError: On an unknown interpolation or a non-invertible matrix.
         """
         if type == "flip_horizontal":
             self.flip_horizontal()
@@ -177,15 +357,12 @@ class Layer:
         elif type == "rotate_180":
             self.rotate_180()
         elif matrix is not None:
-            h, w = self.shape
-            self.pixels = cv.warpAffine(
-                self.pixels, 
-                matrix, 
-                (w, h),
-                borderMode=cv.BORDER_CONSTANT,
-                borderValue=(0, 0, 0, 0)
-            )
-            self._update_qimage()
+            # Imported here: transform depends on filters, which depends on this module
+            from .transform import warp, warp_mask
+            pixels, (dx, dy) = warp(self.pixels, matrix, interpolation)
+            mask = None if self.mask is None else warp_mask(self.mask.pixels, matrix, interpolation)
+            self.set_pixels(pixels, mask)
+            self.position = (self.position[0] + dx, self.position[1] + dy)
 
     # =========================================================================
     # Color Adjustments
@@ -194,51 +371,55 @@ class Layer:
     def kelvin_to_rgb(self, kelvin: float) -> np.ndarray:
         """
         Convert a color temperature (Kelvin) to RGB.
-        Algorithm derived from Tanner Helland's work.
-        
+
+        See :func:`point_ops.kelvin_to_rgb`.
+        """
+        return kelvin_to_rgb(kelvin)
+
+    def apply_lut(self, lut: np.ndarray, source: Optional[np.ndarray] = None) -> None:
+        """
+        Run a point operation, expressed as a lookup table, over the layer in place.
+
         Args:
-            kelvin (float): Temperature in Kelvin (1000 to 40000).
+            lut (np.ndarray): (256, 4) uint8 table, see :mod:`point_ops`.
+            source (Optional[np.ndarray]): Pixels to read from instead of the
+                layer's own, e.g. an untouched copy kept by a preview. Must have
+                the layer's shape. The result is still written to :attr:`pixels`.
+        """
+        apply_lut(self.pixels if source is None else source, lut, out=self.pixels)
+        # Written in place: the QImage view is still valid
+        self.mark_dirty()
 
-        Returns:
-            np.ndarray: RGB values [r, g, b] as floats (0-255).
+    def apply_point_ops(self, pipeline: PointPipeline, source: Optional[np.ndarray] = None) -> None:
         """
-        temp = kelvin / 100.0
-        
-        # Calculate Red
-        if temp <= 66:
-            red = 255.0
-        else:
-            red = temp - 60
-            red = 329.698727446 * (red ** -0.1332047592)
-            red = max(0.0, min(255.0, red))
-        
-        # Calculate Green
-        if temp <= 66:
-            green = temp
-            green = 99.4708025861 * np.log(green) - 161.1195681661
-        else:
-            green = temp - 60
-            green = 288.1221695283 * (green ** -0.0755148492)
-        green = max(0.0, min(255.0, green))
-        
-        # Calculate Blue
-        if temp >= 66:
-            blue = 255.0
-        elif temp <= 19:
-            blue = 0.0
-        else:
-            blue = temp - 10
-            blue = 138.5177312231 * np.log(blue) - 305.0447927307
-            blue = max(0.0, min(255.0, blue))
-        
-        return np.array([red, green, blue], dtype=np.float32)
-    
+        Run a point operation pipeline over the layer in place.
+
+        Consecutive operations are fused by the pipeline, so several adjustments
+        cost about one pass over the pixels.
+
+        Args:
+            pipeline (PointPipeline): Operations to apply.
+            source (Optional[np.ndarray]): Pixels to read from instead of the
+                layer's own, as in :meth:`apply_lut`.
+        """
+        pipeline.apply(self.pixels if source is None else source, out=self.pixels)
+        self.mark_dirty()
+
+    def color_temperature_lut(self, original_temp: float = 6500, target_temp: float = 6500, opacity: float = 1.0) -> np.ndarray:
+        """
+        Build the lookup table of a color temperature adjustment.
+
+        See :func:`point_ops.color_temperature_lut`.
+        """
+        return color_temperature_lut(original_temp, target_temp, opacity)
+
     def adjust_color_temperature(self, original_temp: float = 6500, target_temp: float = 6500, opacity: float = 1.0) -> None:
         """
         Adjust the color temperature of the layer.
 
         This calculates a scaling factor between the original and target temperatures
-        and multiplies the RGB channels of the layer.
+        and multiplies the RGB channels of the layer, through a lookup table so
+        the cost is one pass over the pixels.
 
         Args:
             original_temp (float): The assumed current temperature of the image.
@@ -247,188 +428,119 @@ class Layer:
         """
         if original_temp == target_temp or opacity <= 0:
             return
-        
-        # Normalize to 0-1 for ratio calculation
-        original_rgb = self.kelvin_to_rgb(original_temp) / 255.0
-        target_rgb = self.kelvin_to_rgb(target_temp) / 255.0
-        
-        # Avoid division by zero
-        scale = target_rgb / (original_rgb + 1e-6)
-        
-        # Extract RGB channels (ignore Alpha for calculation)
-        rgb = self.pixels[:, :, :3].astype(np.float32)
-        
-        # Apply scaling: Broadcasting scale [1, 1, 3] over image [H, W, 3]
-        adjusted = rgb * scale[np.newaxis, np.newaxis, :]
-        adjusted = np.clip(adjusted, 0, 255)
-        
-        # Blend based on opacity
-        if opacity < 1.0:
-            result = rgb * (1 - opacity) + adjusted * opacity
-            self.pixels[:, :, :3] = result.astype(np.uint8)
-        else:
-            self.pixels[:, :, :3] = adjusted.astype(np.uint8)
-            
-        # Note: Since this modifies pixels in-place without reallocating, 
-        # the QImage view remains valid, but calling update might be safer if implementation changes.
-        # However, to be consistent with transform methods:
-        self._update_qimage()
+        self.apply_lut(self.color_temperature_lut(original_temp, target_temp, opacity))
 
     # =========================================================================
     # Selection Operations
     # =========================================================================
 
-    def copy_selection(self, rect) -> Optional[np.ndarray]:
+    def _selected(self, selection, selection_type: str) -> Optional[Tuple[Tuple[int, int, int, int], np.ndarray, bool]]:
         """
-        Copy pixels within a rectangular selection.
-
-        Args:
-            rect: QRect defining the selection bounds
+        Resolve a selection argument against the layer.
 
         Returns:
-            np.ndarray: Copied pixel data, or None if invalid
+            Optional[Tuple[Tuple[int, int, int, int], np.ndarray, bool]]: (y0, y1, x0, x1)
+            bounds in the layer, the coverage over them and whether it is binary,
+            or None if nothing of the layer is selected.
         """
-        if rect is None or rect.isEmpty():
+        if selection is None:
             return None
+        if not isinstance(selection, SelectionMask):
+            if selection.isEmpty():
+                return None
+            selection = SelectionMask.from_shape(selection, selection_type)
+        clipped = selection.clip(*self.pixels.shape[:2])
+        if clipped is None:
+            return None
+        return clipped[0], clipped[1], selection.is_binary
 
-        x, y = rect.x(), rect.y()
-        w, h = rect.width(), rect.height()
+    def copy_selection(self, rect, selection_type: str = 'rectangle') -> Optional[np.ndarray]:
+        """
+        Copy the selected pixels, cropped to the selection bounding box.
 
-        # Ensure bounds are within image
-        h_img, w_img = self.pixels.shape[:2]
-        x = max(0, min(x, w_img - 1))
-        y = max(0, min(y, h_img - 1))
-        w = min(w, w_img - x)
-        h = min(h, h_img - y)
+        Unselected pixels of the box are copied transparent, and partially
+        selected ones keep part of their alpha.
 
-        if w <= 0 or h <= 0:
-            return None
+        Args:
+            rect: QRect or SelectionMask, in layer coordinates.
+            selection_type: 'rectangle' or 'ellipse', when rect is a QRect.
 
-        # Copy the selected region
-        return self.pixels[y:y+h, x:x+w].copy()
+        Returns:
+            np.ndarray: Copied pixel data, or None if invalid
+        """
+        selected = self._selected(rect, selection_type)
+        if selected is None:
+            return None
+        (y0, y1, x0, x1), mask, binary = selected
+        copied = self.pixels[y0:y1, x0:x1].copy()
+        if not (binary and mask.all()):
+            copied[..., 3] = cv.multiply(np.ascontiguousarray(copied[..., 3]), np.ascontiguousarray(mask), scale=1.0 / 255.0)
+        return copied
 
     def delete_selection(self, rect, selection_type='rectangle') -> None:
         """
         Delete pixels within a selection (make transparent).
 
         Args:
-            rect: QRect defining the selection bounds
-            selection_type: 'rectangle' or 'ellipse'
+            rect: QRect or SelectionMask, in layer coordinates.
+            selection_type: 'rectangle' or 'ellipse', when rect is a QRect.
         """
-        if rect is None or rect.isEmpty():
+        selected = self._selected(rect, selection_type)
+        if selected is None:
             return
-
-        x, y = rect.x(), rect.y()
-        w, h = rect.width(), rect.height()
-
-        # Ensure bounds are within image
-        h_img, w_img = self.pixels.shape[:2]
-        x = max(0, min(x, w_img - 1))
-        y = max(0, min(y, h_img - 1))
-        w = min(w, w_img - x)
-        h = min(h, h_img - y)
-
-        if w <= 0 or h <= 0:
-            return
-
-        if selection_type == 'ellipse':
-            # Create elliptical mask
-            cy, cx = h / 2, w / 2
-            yy, xx = np.ogrid[:h, :w]
-            mask = ((xx - cx) ** 2) / (cx ** 2) + ((yy - cy) ** 2) / (cy ** 2) <= 1
-            # Apply mask: set alpha to 0 where mask is True
-            self.pixels[y:y+h, x:x+w][mask] = [0, 0, 0, 0]
-        else:
-            # Rectangle: just clear the region
-            self.pixels[y:y+h, x:x+w] = [0, 0, 0, 0]
-
-        self._update_qimage()
+        (y0, y1, x0, x1), mask, binary = selected
+        clear_masked(self.pixels[y0:y1, x0:x1], mask, binary)
+        self.mark_dirty((x0, y0, x1 - x0, y1 - y0))
 
     def fill_selection(self, rect, color: Tuple[int, int, int, int], selection_type='rectangle') -> None:
         """
         Fill pixels within a selection with a color.
 
         Args:
-            rect: QRect defining the selection bounds
+            rect: QRect or SelectionMask, in layer coordinates.
             color: RGBA color tuple (0-255)
-            selection_type: 'rectangle' or 'ellipse'
+            selection_type: 'rectangle' or 'ellipse', when rect is a QRect.
         """
-        if rect is None or rect.isEmpty():
-            return
-
-        x, y = rect.x(), rect.y()
-        w, h = rect.width(), rect.height()
-
-        # Ensure bounds are within image
-        h_img, w_img = self.pixels.shape[:2]
-        x = max(0, min(x, w_img - 1))
-        y = max(0, min(y, h_img - 1))
-        w = min(w, w_img - x)
-        h = min(h, h_img - y)
-
-        if w <= 0 or h <= 0:
+        selected = self._selected(rect, selection_type)
+        if selected is None:
             return
-
-        if selection_type == 'ellipse':
-            # Create elliptical mask
-            cy, cx = h / 2, w / 2
-            yy, xx = np.ogrid[:h, :w]
-            mask = ((xx - cx) ** 2) / (cx ** 2) + ((yy - cy) ** 2) / (cy ** 2) <= 1
-            # Apply color where mask is True
-            self.pixels[y:y+h, x:x+w][mask] = color
-        else:
-            # Rectangle: fill the region
-            self.pixels[y:y+h, x:x+w] = color
-
-        self._update_qimage()
+        (y0, y1, x0, x1), mask, binary = selected
+        fill_masked(self.pixels[y0:y1, x0:x1], mask, color, binary)
+        self.mark_dirty((x0, y0, x1 - x0, y1 - y0))
 
     def move_selection(self, source_rect, dest_point, selection_type='rectangle', clear_source=True) -> None:
         """
-        Move pixels from source rectangle to destination point.
+        Move the selected pixels so the selection's top-left corner lands on dest_point.
 
         Args:
-            source_rect: QRect defining the source selection bounds
+            source_rect: QRect or SelectionMask, in layer coordinates.
             dest_point: QPoint for the destination (top-left corner)
-            selection_type: 'rectangle' or 'ellipse'
+            selection_type: 'rectangle' or 'ellipse', when source_rect is a QRect.
             clear_source: Whether to clear the source area after copying
         """
-        if source_rect is None or source_rect.isEmpty():
+        if source_rect is None:
             return
-
-        # Copy the source selection
-        copied_data = self.copy_selection(source_rect)
-        if copied_data is None:
+        selection = source_rect
+        if not isinstance(selection, SelectionMask):
+            if selection.isEmpty():
+                return
+            selection = SelectionMask.from_shape(selection, selection_type)
+        selected = self._selected(selection, selection_type)
+        if selected is None:
             return
-
-        # Clear source if requested
+        (y0, y1, x0, x1), mask, binary = selected
+        lifted = self.pixels[y0:y1, x0:x1].copy()
         if clear_source:
-            self.delete_selection(source_rect, selection_type)
-
-        # Paste at destination
-        dest_x, dest_y = dest_point.x(), dest_point.y()
-        h, w = copied_data.shape[:2]
-        
-        # Ensure destination is within bounds
-        h_img, w_img = self.pixels.shape[:2]
-        dest_x = max(0, min(dest_x, w_img - 1))
-        dest_y = max(0, min(dest_y, h_img - 1))
-        
-        # Adjust size if goes beyond bounds
-        paste_w = min(w, w_img - dest_x)
-        paste_h = min(h, h_img - dest_y)
-        
-        if paste_w <= 0 or paste_h <= 0:
+            clear_masked(self.pixels[y0:y1, x0:x1], mask, binary)
+            self.mark_dirty((x0, y0, x1 - x0, y1 - y0))
+
+        # The lifted part, as a selection of its own at the destination
+        dx, dy = dest_point.x() - selection.x, dest_point.y() - selection.y
+        target = SelectionMask(mask, x0 + dx, y0 + dy, selection.shape)
+        clipped = target.clip(*self.pixels.shape[:2])
+        if clipped is None:
             return
-
-        if selection_type == 'ellipse':
-            # Create elliptical mask for pasting
-            cy, cx = paste_h / 2, paste_w / 2
-            yy, xx = np.ogrid[:paste_h, :paste_w]
-            mask = ((xx - cx) ** 2) / (cx ** 2) + ((yy - cy) ** 2) / (cy ** 2) <= 1
-            # Paste only where mask is True
-            self.pixels[dest_y:dest_y+paste_h, dest_x:dest_x+paste_w][mask] = copied_data[:paste_h, :paste_w][mask]
-        else:
-            # Rectangle: paste the entire region
-            self.pixels[dest_y:dest_y+paste_h, dest_x:dest_x+paste_w] = copied_data[:paste_h, :paste_w]
-
-        self._update_qimage()
+        (ty0, ty1, tx0, tx1), target_mask = clipped
+        source = lifted[ty0 - target.y:ty1 - target.y, tx0 - target.x:tx1 - target.x]
+        fill_masked(self.pixels[ty0:ty1, tx0:tx1], target_mask, source, binary)
+        self.mark_dirty((tx0, ty0, tx1 - tx0, ty1 - ty0))
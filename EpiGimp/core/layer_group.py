@@ -0,0 +1,190 @@
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .blend_modes import get_blend_mode
+from .tiles import TILE_SIZE, grid_shape, rect_to_bounds, tile_span
+
+
+def iter_layers(layers: Sequence, visible_only: bool = False) -> Iterator:
+    """
+    Every layer of a stack, entering groups, bottom first. Groups themselves are not yielded.
+
+    Args:
+        layers (Sequence): Layer stack, bottom first.
+        visible_only (bool): Skip hidden layers and the content of hidden groups.
+    """
+    for layer in layers:
+        if visible_only and not layer.visibility:
+            continue
+        if layer.is_group:
+            yield from iter_layers(layer.layers, visible_only)
+        else:
+            yield layer
+
+
+class LayerGroup:
+    """
+    A nested stack of layers, blended into its parent stack as a single layer.
+
+    The children are flattened over transparency (an isolated group) into a
+    cached buffer covering their extent on the canvas, and the compositor
+    blends that buffer like the pixels of a layer instead of every child.
+    :meth:`update` keeps it current: when children are painted on, only the
+    tiles they touched are flattened again, while any other change (order,
+    visibility, opacity, blend mode, position, adjustment parameters)
+    flattens the whole group. Hidden groups are never flattened.
+
+    It exposes the stacking properties of :class:`Layer` (name, visibility,
+    opacity, blend mode) and, read-only, its pixel attributes (pixels,
+    position, version, tile_versions); code editing pixels should check
+    :attr:`is_group` first.
+    """
+
+    is_adjustment = False
+    is_group = True
+    # Groups are not masked; see Layer.mask
+    mask = None
+
+    def __init__(self, layers: Optional[Sequence] = None, name: str = "Group") -> None:
+        """
+        Initialize a LayerGroup.
+
+        Args:
+            layers (Optional[Sequence]): Children, bottom first; may include groups.
+            name (str): The display name of the group.
+        """
+        self.name: str = name
+        self.visibility: bool = True
+        self.opacity: float = 1.0
+        self.blend_mode: str = 'normal'
+        self.layers: List = list(layers or [])
+
+        # Flattened children, placed at position on the canvas; version and
+        # tile_versions follow the Layer conventions so caches keyed on them work
+        self.pixels: np.ndarray = np.zeros((0, 0, 4), dtype=np.uint8)
+        self.position: Tuple[int, int] = (0, 0)
+        self.version: int = 0
+        self.tile_versions: Optional[np.ndarray] = None
+
+        # State of the children when last flattened
+        self._signature: Optional[tuple] = None
+        self._child_versions: Dict[int, int] = {}
+
+    def set_visibility(self, state: bool) -> None:
+        self.visibility = state
+
+    def set_name(self, name: str) -> None:
+        self.name = name
+
+    def toggle_visibility(self) -> None:
+        self.visibility = not self.visibility
+
+    def set_opacity(self, opacity: float) -> None:
+        """Set the group opacity, clamped to the 0.0 - 1.0 range."""
+        self.opacity = max(0.0, min(1.0, float(opacity)))
+
+    def set_blend_mode(self, mode: str) -> None:
+        """
+        Set how the flattened group is blended onto the layers below it.
+
+        Raises:
+            ValueError: If the mode is not registered.
+        """
+        get_blend_mode(mode)
+        self.blend_mode = mode
+
+    def mark_dirty(self, rect=None) -> None:
+        """Flag the flattened pixels as modified; see :meth:`Layer.mark_dirty`."""
+        self.version += 1
+        grid = grid_shape(*self.pixels.shape[:2])
+        if rect is None or self.tile_versions is None or self.tile_versions.shape != grid:
+            self.tile_versions = np.full(grid, self.version, dtype=np.int64)
+        else:
+            rows, cols = tile_span(rect_to_bounds(rect))
+            self.tile_versions[rows, cols] = self.version
+
+    # =========================================================================
+    # Flattening
+    # =========================================================================
+
+    def update(self, compositor, shape: Tuple[int, int]) -> None:
+        """
+        Flatten the children again where they changed since the last call.
+
+        Must run on the thread calling the compositor, never in a tile worker.
+
+        Args:
+            compositor (Compositor): Compositor used to flatten the children.
+            shape (Tuple[int, int]): (height, width) of the canvas; the
+                flattened pixels are clipped to it.
+        """
+        children = [layer for layer in self.layers if layer.visibility and layer.opacity > 0]
+        # Nested groups first: their flattened pixels are part of the signature
+        compositor.update_groups(children, shape)
+
+        signature = (tuple(shape), compositor.fixed_point, tuple(
+            (id(layer), layer.version, layer.opacity) if layer.is_adjustment
+            else (id(layer), id(layer.pixels), layer.pixels.shape, layer.opacity, layer.blend_mode, tuple(layer.position))
+            for layer in children
+        ))
+        versions = {id(layer): layer.version for layer in children if not layer.is_adjustment}
+
+        if signature != self._signature:
+            self._flatten_all(children, compositor, shape)
+        else:
+            for layer in children:
+                previous = self._child_versions.get(id(layer))
+                if not layer.is_adjustment and layer.version != previous:
+                    self._flatten(children, compositor, shape, self._changed_rect(layer, previous))
+        self._signature = signature
+        self._child_versions = versions
+
+    def _flatten_all(self, children: List, compositor, shape: Tuple[int, int]) -> None:
+        """Flatten the children over their whole extent."""
+        height, width = shape
+        extents = [
+            (int(layer.position[0]), int(layer.position[1]), layer.pixels.shape[1], layer.pixels.shape[0])
+            for layer in children if not layer.is_adjustment
+        ]
+        x0 = max(min((x for x, _, _, _ in extents), default=0), 0)
+        y0 = max(min((y for _, y, _, _ in extents), default=0), 0)
+        x1 = min(max((x + w for x, _, w, _ in extents), default=0), width)
+        y1 = min(max((y + h for _, y, _, h in extents), default=0), height)
+        if x0 >= x1 or y0 >= y1:
+            # Nothing visible on the canvas (or only adjustments, over nothing)
+            self.pixels = np.zeros((0, 0, 4), dtype=np.uint8)
+            self.position = (0, 0)
+        else:
+            self.pixels = compositor.composite(children, shape, rect=(x0, y0, x1 - x0, y1 - y0))
+            self.position = (x0, y0)
+        self.mark_dirty()
+
+    def _flatten(self, children: List, compositor, shape: Tuple[int, int], rect: Tuple[int, int, int, int]) -> None:
+        """Flatten the children again over a (x, y, width, height) canvas area."""
+        left, top = self.position
+        height, width = self.pixels.shape[:2]
+        x, y, w, h = rect
+        x0, y0 = max(x, left), max(y, top)
+        x1, y1 = min(x + w, left + width), min(y + h, top + height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        self.pixels[y0 - top:y1 - top, x0 - left:x1 - left] = compositor.composite(
+            children, shape, rect=(x0, y0, x1 - x0, y1 - y0)
+        )
+        self.mark_dirty((x0 - left, y0 - top, x1 - x0, y1 - y0))
+
+    @staticmethod
+    def _changed_rect(layer, since: Optional[int]) -> Tuple[int, int, int, int]:
+        """(x, y, width, height) canvas area of the tiles of layer modified after version since."""
+        left, top = int(layer.position[0]), int(layer.position[1])
+        height, width = layer.pixels.shape[:2]
+        versions = layer.tile_versions
+        if since is None or versions is None or versions.shape != grid_shape(height, width):
+            return (left, top, width, height)
+        rows, cols = np.nonzero(versions > since)
+        if not len(rows):
+            return (left, top, 0, 0)
+        y0, y1 = int(rows.min()) * TILE_SIZE, min((int(rows.max()) + 1) * TILE_SIZE, height)
+        x0, x1 = int(cols.min()) * TILE_SIZE, min((int(cols.max()) + 1) * TILE_SIZE, width)
+        return (left + x0, top + y0, x1 - x0, y1 - y0)
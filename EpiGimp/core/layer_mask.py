@@ -0,0 +1,174 @@
+import weakref
+import zlib
+from typing import Optional, Tuple
+
+import cv2 as cv
+import numpy as np
+from PySide6.QtGui import QImage
+
+from .tiles import TILE_SIZE, grid_shape, rect_to_bounds, tile_span
+
+# zlib level of masks saved in project files: masks are mostly flat, so a
+# higher level costs little time
+_LEVEL = 6
+
+
+class LayerMask:
+    """
+    8-bit mask of a layer: 255 shows the layer, 0 hides it.
+
+    The mask has the size of the layer's pixels and is multiplied into the
+    layer's alpha by the compositor, tile by tile; the pixels are left
+    untouched. It follows the :class:`Layer` painting conventions (a
+    Grayscale8 :attr:`qimage` sharing :attr:`pixels`, :meth:`mark_dirty`), so
+    the painting tools work on it as they do on a layer: black hides, white
+    reveals, and the eraser hides.
+
+    Editing the mask also marks its layer dirty, so every cache keyed on
+    :attr:`Layer.version` sees the change.
+    """
+
+    def __init__(self, layer, pixels: Optional[np.ndarray] = None, value: int = 255) -> None:
+        """
+        Initialize a mask.
+
+        Args:
+            layer (Layer): The masked layer.
+            pixels (Optional[np.ndarray]): (H, W) uint8 mask of the layer's size.
+                Defaults to one filled with value.
+            value (int): Initial fill, 255 (show all) by default.
+        """
+        self._layer = weakref.ref(layer)
+        if pixels is None:
+            pixels = np.full(layer.pixels.shape[:2], value, dtype=np.uint8)
+        self.pixels: np.ndarray = np.ascontiguousarray(pixels, dtype=np.uint8)
+
+        # Same conventions as Layer.version / Layer.tile_versions
+        self.version: int = 0
+        self.tile_versions: Optional[np.ndarray] = None
+        # Per tile: whether it is all white, as of the version in _checked
+        self._white: Optional[np.ndarray] = None
+        self._checked: Optional[np.ndarray] = None
+
+        self._qimage: QImage = QImage()
+        self._update_qimage()
+
+    @property
+    def layer(self):
+        return self._layer()
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return (self.pixels.shape[0], self.pixels.shape[1])
+
+    @property
+    def qimage(self) -> QImage:
+        """Grayscale QImage sharing the mask buffer, for painting."""
+        return self._qimage
+
+    def _update_qimage(self) -> None:
+        """Point :attr:`qimage` at the current buffer; called whenever :attr:`pixels` is reassigned."""
+        height, width = self.pixels.shape
+        self._qimage = QImage(self.pixels.data, width, height, width, QImage.Format.Format_Grayscale8)
+        self._touch()
+
+    def _touch(self, rect=None) -> None:
+        """Bump the mask's own versions, without marking the layer."""
+        self.version += 1
+        grid = grid_shape(*self.pixels.shape)
+        if rect is None or self.tile_versions is None or self.tile_versions.shape != grid:
+            self.tile_versions = np.full(grid, self.version, dtype=np.int64)
+        else:
+            rows, cols = tile_span(rect_to_bounds(rect))
+            self.tile_versions[rows, cols] = self.version
+
+    def mark_dirty(self, rect=None) -> None:
+        """
+        Flag the mask as modified, and its layer with it.
+
+        Args:
+            rect: Optional QRect or (x, y, width, height) bounding the modified
+                area. None means the whole mask.
+        """
+        self._touch(rect)
+        layer = self.layer
+        if layer is not None:
+            layer.mark_dirty(rect)
+
+    def set_pixels(self, pixels: np.ndarray) -> None:
+        """Replace the mask buffer, e.g. by a transformed copy matching new layer pixels."""
+        self.pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+        self._update_qimage()
+
+    def flip(self, horizontal: bool, vertical: bool) -> None:
+        """Flip the mask in place; the layer is marked by its own flip."""
+        code = {(True, False): 1, (False, True): 0, (True, True): -1}[(horizontal, vertical)]
+        cv.flip(self.pixels, code, dst=self.pixels)
+        self._touch()
+
+    # =========================================================================
+    # Queries
+    # =========================================================================
+
+    def white_tiles(self) -> np.ndarray:
+        """
+        Which TILE_SIZE tiles of the mask are all white (leave the layer as is).
+
+        Only tiles modified since the previous call are scanned again.
+
+        Returns:
+            np.ndarray: Boolean grid of the tiles of the mask.
+        """
+        grid = grid_shape(*self.pixels.shape)
+        if self.tile_versions is None or self.tile_versions.shape != grid:
+            self._touch()
+        if self._white is None or self._white.shape != grid:
+            self._white = np.zeros(grid, dtype=bool)
+            self._checked = np.full(grid, -1, dtype=np.int64)
+
+        for row, col in np.argwhere(self._checked != self.tile_versions):
+            tile = self.pixels[row * TILE_SIZE:(row + 1) * TILE_SIZE, col * TILE_SIZE:(col + 1) * TILE_SIZE]
+            self._white[row, col] = cv.minMaxLoc(tile)[0] == 255
+        self._checked[:] = self.tile_versions
+        return self._white
+
+    def is_white(self) -> bool:
+        """True when the mask hides nothing; the compositor then ignores it."""
+        return bool(self.white_tiles().all())
+
+    def resized(self, shape: Tuple[int, int]) -> np.ndarray:
+        """The mask resampled to a (height, width) shape, area averaged when shrinking."""
+        if shape == self.shape:
+            return self.pixels.copy()
+        shrinking = shape[0] < self.shape[0] and shape[1] < self.shape[1]
+        interpolation = cv.INTER_AREA if shrinking else cv.INTER_LINEAR
+        return cv.resize(self.pixels, (shape[1], shape[0]), interpolation=interpolation)
+
+    # =========================================================================
+    # Serialization
+    # =========================================================================
+
+    def to_bytes(self) -> bytes:
+        """Compress the mask, stored as differences between horizontal neighbours (PNG's Sub filter)."""
+        delta = self.pixels.copy()
+        delta[:, 1:] -= self.pixels[:, :-1]  # uint8 arithmetic wraps around
+        return zlib.compress(delta.tobytes(), _LEVEL)
+
+    @classmethod
+    def from_bytes(cls, layer, data: bytes) -> 'LayerMask':
+        """
+        Rebuild a mask written by :meth:`to_bytes`.
+
+        Args:
+            layer (Layer): The masked layer; the mask has the size of its pixels.
+            data (bytes): Compressed mask.
+
+        Raises:
+            ValueError: If the data does not match the layer size.
+        """
+        shape = layer.pixels.shape[:2]
+        delta = np.frombuffer(zlib.decompress(data), dtype=np.uint8)
+        if delta.size != shape[0] * shape[1]:
+            raise ValueError(f"Mask of {delta.size} pixels does not fit a layer of shape {shape}")
+        pixels = np.cumsum(delta.reshape(shape), axis=1, dtype=np.uint8)
+        return cls(layer, pixels)
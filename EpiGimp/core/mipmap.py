@@ -0,0 +1,140 @@
+import math
+from typing import Dict, Optional, Tuple
+
+import cv2 as cv
+import numpy as np
+
+from .layer import Layer
+from .tiles import TILE_SIZE, tile_span
+
+#: Deepest pyramid level (1 / 2**MAX_LEVEL of the original size).
+MAX_LEVEL = 8
+
+
+def level_for_zoom(zoom: float, max_level: int = MAX_LEVEL) -> int:
+    """
+    Pick the pyramid level to read from when displaying at a given zoom.
+
+    Uses the smallest level that still has at least one source pixel per
+    screen pixel, so downscaling for display never skips source data.
+
+    Args:
+        zoom (float): Screen pixels per image pixel.
+        max_level (int): Deepest level available.
+
+    Returns:
+        int: 0 for zoom >= 1, otherwise floor(log2(1 / zoom)) capped at max_level.
+    """
+    if zoom >= 1.0:
+        return 0
+    return min(int(math.floor(math.log2(1.0 / zoom) + 1e-9)), max_level)
+
+
+def level_shape(shape: Tuple[int, int], level: int) -> Tuple[int, int]:
+    """(height, width) of an image of the given shape at a pyramid level (rounded up)."""
+    step = 1 << level
+    return (-(-shape[0] // step), -(-shape[1] // step))
+
+
+class MipmapPyramid:
+    """
+    Lazily built, progressively halved copies of a layer.
+
+    Level 0 is the layer itself and level k is 1 / 2**k of its width and height.
+    Each level is rebuilt tile by tile from the level above it: the pyramid
+    remembers, for every level-0 tile, which :attr:`Layer.tile_versions` entry
+    each level was built from. After a brush stroke only the touched tiles are
+    downscaled again, and only when a frame actually reads them.
+
+    A :class:`LayerMask` has the same attributes and gets its own pyramid.
+    """
+
+    def __init__(self, layer: Layer, tile_size: int = TILE_SIZE, max_level: int = MAX_LEVEL) -> None:
+        """
+        Initialize an empty pyramid for a layer.
+
+        Args:
+            layer (Layer): Source layer (or layer mask).
+            tile_size (int): Level-0 tile size; must be divisible by 2**max_level.
+            max_level (int): Deepest level that can be requested.
+        """
+        self.layer = layer
+        self.tile_size = tile_size
+        self.max_level = max_level
+        self._shape: Optional[Tuple[int, int]] = None
+        self._levels: Dict[int, np.ndarray] = {}
+        self._built: Dict[int, np.ndarray] = {}
+
+    def level(self, level: int, bounds: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """
+        Get a pyramid level, refreshing the stale tiles that intersect bounds.
+
+        Args:
+            level (int): Pyramid level, 0 to max_level.
+            bounds (Optional[Tuple[int, int, int, int]]): (y0, y1, x0, x1) region of
+                interest in level coordinates. None refreshes the whole level.
+
+        Returns:
+            np.ndarray: The (H_k, W_k, 4) uint8 level. Only the requested region
+            is guaranteed up to date.
+        """
+        if not 0 <= level <= self.max_level:
+            raise ValueError(f"Mipmap level must be between 0 and {self.max_level}, got {level}")
+        if level == 0:
+            return self.layer.pixels
+
+        shape = self.layer.pixels.shape[:2]
+        if shape != self._shape:
+            self._shape = shape
+            self._levels.clear()
+            self._built.clear()
+        if self.layer.tile_versions is None or self.layer.tile_versions.shape != self._grid_shape():
+            self.layer.mark_dirty()
+
+        if bounds is None:
+            bounds = (0, shape[0], 0, shape[1])
+        else:
+            # Back to level-0 coordinates to find the tiles involved
+            y0, y1, x0, x1 = bounds
+            bounds = (y0 << level, y1 << level, x0 << level, x1 << level)
+        rows, cols = tile_span(bounds, self.tile_size)
+        self._refresh(level, rows, cols)
+        return self._levels[level]
+
+    # =========================================================================
+    # Internals
+    # =========================================================================
+
+    def _grid_shape(self) -> Tuple[int, int]:
+        return (-(-self._shape[0] // self.tile_size), -(-self._shape[1] // self.tile_size))
+
+    def _refresh(self, level: int, rows: slice, cols: slice) -> None:
+        """Rebuild the stale tiles of a level within a span of the tile grid."""
+        versions = self.layer.tile_versions[rows, cols]
+        if level not in self._levels:
+            height, width = level_shape(self._shape, level)
+            channels = self.layer.pixels.shape[2:]
+            self._levels[level] = np.zeros((height, width) + channels, dtype=np.uint8)
+            self._built[level] = np.full(self._grid_shape(), -1, dtype=np.int64)
+        built = self._built[level][rows, cols]
+
+        stale = np.argwhere(built != versions)
+        if not len(stale):
+            return
+        if level > 1:
+            self._refresh(level - 1, rows, cols)
+
+        src = self._levels[level - 1] if level > 1 else self.layer.pixels
+        dst = self._levels[level]
+        size = self.tile_size
+        for r, c in stale:
+            ty, tx = rows.start + r, cols.start + c
+            y0, y1 = (ty * size) >> level, min(((ty + 1) * size) >> level, dst.shape[0])
+            x0, x1 = (tx * size) >> level, min(((tx + 1) * size) >> level, dst.shape[1])
+            sy0, sy1 = (ty * size) >> (level - 1), min(((ty + 1) * size) >> (level - 1), src.shape[0])
+            sx0, sx1 = (tx * size) >> (level - 1), min(((tx + 1) * size) >> (level - 1), src.shape[1])
+            cv.resize(
+                src[sy0:sy1, sx0:sx1], (x1 - x0, y1 - y0),
+                dst=dst[y0:y1, x0:x1], interpolation=cv.INTER_AREA
+            )
+        built[stale[:, 0], stale[:, 1]] = versions[stale[:, 0], stale[:, 1]]
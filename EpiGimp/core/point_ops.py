@@ -0,0 +1,457 @@
+import functools
+import math
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import cv2 as cv
+import numpy as np
+
+# A point operation maps every 8-bit channel value independently, so any of
+# them reduces to a lookup table: a (256, 4) uint8 array holding the output
+# value of each input value for the R, G, B and A channels. Applying a table is
+# a single memory-bound pass (cv.LUT), whatever the cost of the math used to
+# build it, and building it only evaluates the math on 256 values.
+
+#: Input values 0-255 as float32, the domain every table is built from.
+LUT_DOMAIN = np.arange(256, dtype=np.float32)
+
+
+#: Range and step (Kelvin) of the precomputed white point table.
+KELVIN_MIN = 1000
+KELVIN_MAX = 40000
+KELVIN_STEP = 10
+
+
+def _kelvin_formula(kelvin: np.ndarray) -> np.ndarray:
+    """
+    Tanner Helland's color temperature approximation, over an array of temperatures.
+
+    Args:
+        kelvin (np.ndarray): Temperatures in Kelvin.
+
+    Returns:
+        np.ndarray: (..., 3) float32 RGB values (0-255).
+    """
+    temp = np.asarray(kelvin, dtype=np.float64) / 100.0
+    warm = temp <= 66
+    # Each branch is evaluated on a clamped input where it is not selected, so
+    # no invalid value is computed
+    red = np.where(warm, 255.0, 329.698727446 * np.maximum(temp - 60, 1.0) ** -0.1332047592)
+    green = np.where(
+        warm,
+        99.4708025861 * np.log(np.maximum(temp, 1e-6)) - 161.1195681661,
+        288.1221695283 * np.maximum(temp - 60, 1.0) ** -0.0755148492,
+    )
+    blue = np.where(
+        temp >= 66, 255.0,
+        np.where(temp <= 19, 0.0, 138.5177312231 * np.log(np.maximum(temp - 10, 1e-6)) - 305.0447927307),
+    )
+    return np.clip(np.stack([red, green, blue], axis=-1), 0.0, 255.0).astype(np.float32)
+
+
+@functools.lru_cache(maxsize=None)
+def kelvin_table() -> Tuple[np.ndarray, np.ndarray]:
+    """
+    White points of all temperatures from KELVIN_MIN to KELVIN_MAX, every KELVIN_STEP.
+
+    Computed once; :func:`kelvin_to_rgb` interpolates in it, and code comparing
+    colors against many temperatures can work on it directly.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (N,) float32 temperatures and (N, 3)
+        float32 RGB values (0-255). Both are read-only.
+    """
+    temperatures = np.arange(KELVIN_MIN, KELVIN_MAX + 1, KELVIN_STEP, dtype=np.float32)
+    rgb = _kelvin_formula(temperatures)
+    temperatures.flags.writeable = False
+    rgb.flags.writeable = False
+    return temperatures, rgb
+
+
+def kelvin_to_rgb_array(kelvin) -> np.ndarray:
+    """
+    Convert an array of color temperatures to RGB white points.
+
+    Values are linearly interpolated in :func:`kelvin_table`, so the cost is a
+    few vectorized operations whatever the number of temperatures.
+    Temperatures are clamped to KELVIN_MIN - KELVIN_MAX.
+
+    Args:
+        kelvin: Scalar or array of temperatures in Kelvin.
+
+    Returns:
+        np.ndarray: (..., 3) float32 RGB values (0-255), one per temperature.
+    """
+    _, rgb = kelvin_table()
+    position = (np.clip(np.asarray(kelvin, dtype=np.float64), KELVIN_MIN, KELVIN_MAX) - KELVIN_MIN) / KELVIN_STEP
+    index = np.minimum(position.astype(np.intp), len(rgb) - 2)
+    fraction = (position - index)[..., np.newaxis].astype(np.float32)
+    return rgb[index] + (rgb[index + 1] - rgb[index]) * fraction
+
+
+def kelvin_to_rgb(kelvin: float) -> np.ndarray:
+    """
+    Convert a color temperature (Kelvin) to RGB.
+    Algorithm derived from Tanner Helland's work, read from a precomputed table.
+
+    Args:
+        kelvin (float): Temperature in Kelvin (1000 to 40000).
+
+    Returns:
+        np.ndarray: RGB values [r, g, b] as floats (0-255).
+    """
+    return kelvin_to_rgb_array(kelvin)
+
+
+def identity_lut() -> np.ndarray:
+    """A (256, 4) uint8 table mapping every channel value to itself."""
+    return np.repeat(np.arange(256, dtype=np.uint8)[:, np.newaxis], 4, axis=1)
+
+
+def lut_from_function(func: Callable[[np.ndarray], np.ndarray], channels: Sequence[int] = (0, 1, 2)) -> np.ndarray:
+    """
+    Build a table by evaluating a vectorized function on every value.
+
+    Args:
+        func (Callable): Maps a float32 array of values 0-255 to new values. The
+            result is rounded and clipped to 0-255.
+        channels (Sequence[int]): Channels the function applies to; the others
+            are left unchanged. Defaults to RGB.
+
+    Returns:
+        np.ndarray: (256, 4) uint8 table.
+    """
+    lut = identity_lut()
+    values = np.clip(np.rint(func(LUT_DOMAIN)), 0, 255).astype(np.uint8)
+    for channel in channels:
+        lut[:, channel] = values
+    return lut
+
+
+def gain_lut(gains: Sequence[float], opacity: float = 1.0) -> np.ndarray:
+    """
+    Build a table multiplying R, G and B by a per-channel factor.
+
+    The scaled value is clipped to 0-255, then mixed with the original value by
+    opacity, reproducing the float computation value by value.
+
+    Args:
+        gains (Sequence[float]): (r, g, b) multipliers.
+        opacity (float): Blending factor between the original (0.0) and scaled (1.0) value.
+
+    Returns:
+        np.ndarray: (256, 4) uint8 table; alpha is left unchanged.
+    """
+    lut = identity_lut()
+    for channel, gain in enumerate(gains[:3]):
+        adjusted = np.clip(LUT_DOMAIN * np.float32(gain), 0, 255)
+        if opacity < 1.0:
+            adjusted = LUT_DOMAIN * np.float32(1 - opacity) + adjusted * np.float32(opacity)
+        lut[:, channel] = adjusted.astype(np.uint8)
+    return lut
+
+
+def color_temperature_lut(original_temp: float = 6500, target_temp: float = 6500, opacity: float = 1.0) -> np.ndarray:
+    """
+    Build the lookup table of a color temperature adjustment.
+
+    The RGB channels are scaled by the ratio between the target and original
+    white points, then mixed with the original values by opacity.
+
+    Args:
+        original_temp (float): The assumed current temperature of the image.
+        target_temp (float): The desired temperature.
+        opacity (float): Blending factor (0.0 to 1.0).
+
+    Returns:
+        np.ndarray: (256, 4) uint8 table.
+    """
+    if original_temp == target_temp or opacity <= 0:
+        return identity_lut()
+
+    # Normalize to 0-1 for ratio calculation
+    original_rgb = kelvin_to_rgb(original_temp) / 255.0
+    target_rgb = kelvin_to_rgb(target_temp) / 255.0
+
+    # Avoid division by zero
+    scale = target_rgb / (original_rgb + 1e-6)
+    return gain_lut(scale, min(opacity, 1.0))
+
+
+def compose_luts(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """
+    Fuse two tables into one equivalent to applying first, then second.
+
+    Args:
+        first (np.ndarray): (256, 4) table applied first.
+        second (np.ndarray): (256, 4) table applied to the output of first.
+
+    Returns:
+        np.ndarray: (256, 4) uint8 table.
+    """
+    return np.take_along_axis(second, first.astype(np.intp), axis=0)
+
+
+def apply_lut(pixels: np.ndarray, lut: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Map every channel of an RGBA image through a table.
+
+    Args:
+        pixels (np.ndarray): (H, W, 4) uint8 source.
+        lut (np.ndarray): (256, 4) uint8 table.
+        out (Optional[np.ndarray]): (H, W, 4) uint8 destination. May be pixels
+            itself to work in place; None allocates a new array.
+
+    Returns:
+        np.ndarray: The mapped image (out when given).
+    """
+    # cv.LUT takes a 256-entry table with one channel per image channel
+    table = np.ascontiguousarray(lut, dtype=np.uint8).reshape(1, 256, 4)
+    if out is None:
+        return cv.LUT(pixels, table)
+    cv.LUT(pixels, table, dst=out)
+    return out
+
+
+# =========================================================================
+# Adjustments
+# =========================================================================
+
+def brightness_contrast_lut(brightness: float = 0.0, contrast: float = 0.0) -> np.ndarray:
+    """
+    Build the table of a brightness / contrast adjustment (GIMP's formula).
+
+    Args:
+        brightness (float): -1.0 (black) to 1.0 (white).
+        contrast (float): -1.0 (flat gray) to 1.0 (threshold).
+    """
+    def func(values: np.ndarray) -> np.ndarray:
+        v = values / 255.0
+        if brightness < 0:
+            v = v * (1.0 + brightness)
+        else:
+            v = v + (1.0 - v) * brightness
+        slant = math.tan((min(contrast, 0.9999) + 1.0) * math.pi / 4.0)
+        return ((v - 0.5) * slant + 0.5) * 255.0
+    return lut_from_function(func)
+
+
+def levels_lut(
+    in_low: float = 0, in_high: float = 255, gamma: float = 1.0,
+    out_low: float = 0, out_high: float = 255, channels: Sequence[int] = (0, 1, 2)
+) -> np.ndarray:
+    """
+    Build the table of a levels adjustment.
+
+    Input values are stretched from [in_low, in_high] to [0, 1], gamma corrected,
+    then mapped to [out_low, out_high].
+
+    Args:
+        in_low (float): Input black point (0-255).
+        in_high (float): Input white point (0-255).
+        gamma (float): Midtone gamma; above 1 brightens.
+        out_low (float): Output black point (0-255).
+        out_high (float): Output white point (0-255).
+        channels (Sequence[int]): Channels to adjust. Defaults to RGB.
+    """
+    def func(values: np.ndarray) -> np.ndarray:
+        v = np.clip((values - in_low) / max(in_high - in_low, 1e-6), 0.0, 1.0)
+        return out_low + np.power(v, 1.0 / max(gamma, 1e-6)) * (out_high - out_low)
+    return lut_from_function(func, channels)
+
+
+def curves_lut(points: Sequence[Tuple[float, float]], channels: Sequence[int] = (0, 1, 2)) -> np.ndarray:
+    """
+    Build the table of a curves adjustment.
+
+    Args:
+        points (Sequence[Tuple[float, float]]): (input, output) control points in
+            0-255, joined by straight segments. Values outside the first and last
+            points keep the end outputs.
+        channels (Sequence[int]): Channels to adjust. Defaults to RGB.
+    """
+    xs, ys = zip(*sorted(points))
+    return lut_from_function(lambda values: np.interp(values, xs, ys), channels)
+
+
+def invert_lut() -> np.ndarray:
+    """Build the table of a color inversion (alpha is kept)."""
+    return lut_from_function(lambda values: 255.0 - values)
+
+
+# Luminance weights used by the hue and saturation matrices (SVG feColorMatrix)
+_LUMA = np.array([0.213, 0.715, 0.072], dtype=np.float64)
+
+
+def hue_matrix(degrees: float) -> np.ndarray:
+    """3x3 RGB matrix rotating hues around the gray axis by an angle in degrees."""
+    c, s = math.cos(math.radians(degrees)), math.sin(math.radians(degrees))
+    return np.array([
+        [0.213 + c * 0.787 - s * 0.213, 0.715 - c * 0.715 - s * 0.715, 0.072 - c * 0.072 + s * 0.928],
+        [0.213 - c * 0.213 + s * 0.143, 0.715 + c * 0.285 + s * 0.140, 0.072 - c * 0.072 - s * 0.283],
+        [0.213 - c * 0.213 - s * 0.787, 0.715 - c * 0.715 + s * 0.715, 0.072 + c * 0.928 + s * 0.072],
+    ])
+
+
+def saturation_matrix(factor: float) -> np.ndarray:
+    """3x3 RGB matrix scaling saturation (0 is grayscale, 1 is unchanged)."""
+    return np.outer(np.ones(3), _LUMA) * (1.0 - factor) + np.eye(3) * factor
+
+
+# =========================================================================
+# Pipeline
+# =========================================================================
+
+# A compiled pass: ('lut', (256, 4) uint8 table) or ('matrix', (4, 4) float32 matrix)
+Pass = Tuple[str, np.ndarray]
+
+
+class PointPipeline:
+    """
+    A chain of point operations applied in a minimal number of passes.
+
+    Per-channel operations (brightness / contrast, levels, curves, invert,
+    temperature...) are lookup tables, and consecutive tables compose into a
+    single table. Operations mixing channels (hue, saturation) are linear in
+    RGB, so consecutive ones multiply into a single color matrix. Whatever the
+    number of steps, the image is then traversed once per alternation between
+    the two kinds, band by band so intermediate data stays in cache.
+
+    Building methods return the pipeline, so they can be chained::
+
+        PointPipeline().levels(10, 240).hue_saturation(30, 1.2).invert().apply(pixels)
+    """
+
+    #: Rows processed at once when a pipeline needs more than one pass.
+    BAND_ROWS = 64
+
+    def __init__(self) -> None:
+        self._steps: List[Pass] = []
+        self._compiled: Optional[List[Pass]] = None
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    # -------------------------------------------------------------------------
+    # Building
+    # -------------------------------------------------------------------------
+
+    def lut(self, table: np.ndarray) -> 'PointPipeline':
+        """Append a (256, 4) uint8 lookup table."""
+        self._steps.append(('lut', np.asarray(table, dtype=np.uint8)))
+        self._compiled = None
+        return self
+
+    def matrix(self, rgb_matrix: np.ndarray) -> 'PointPipeline':
+        """Append a 3x3 color matrix applied to RGB (alpha is kept)."""
+        full = np.eye(4, dtype=np.float64)
+        full[:3, :3] = rgb_matrix
+        self._steps.append(('matrix', full))
+        self._compiled = None
+        return self
+
+    def brightness_contrast(self, brightness: float = 0.0, contrast: float = 0.0) -> 'PointPipeline':
+        return self.lut(brightness_contrast_lut(brightness, contrast))
+
+    def levels(self, in_low: float = 0, in_high: float = 255, gamma: float = 1.0, out_low: float = 0, out_high: float = 255) -> 'PointPipeline':
+        return self.lut(levels_lut(in_low, in_high, gamma, out_low, out_high))
+
+    def curves(self, points: Sequence[Tuple[float, float]], channels: Sequence[int] = (0, 1, 2)) -> 'PointPipeline':
+        return self.lut(curves_lut(points, channels))
+
+    def invert(self) -> 'PointPipeline':
+        return self.lut(invert_lut())
+
+    def color_temperature(self, original_temp: float = 6500, target_temp: float = 6500) -> 'PointPipeline':
+        return self.lut(color_temperature_lut(original_temp, target_temp))
+
+    def hue_saturation(self, hue: float = 0.0, saturation: float = 1.0, lightness: float = 0.0) -> 'PointPipeline':
+        """
+        Append a hue / saturation / lightness adjustment.
+
+        Args:
+            hue (float): Hue rotation in degrees.
+            saturation (float): Saturation factor (0 is grayscale, 1 is unchanged).
+            lightness (float): -1.0 (black) to 1.0 (white), applied last.
+        """
+        if hue or saturation != 1.0:
+            self.matrix(saturation_matrix(saturation) @ hue_matrix(hue))
+        if lightness:
+            if lightness < 0:
+                self.lut(lut_from_function(lambda values: values * (1.0 + lightness)))
+            else:
+                self.lut(lut_from_function(lambda values: values + (255.0 - values) * lightness))
+        return self
+
+    # -------------------------------------------------------------------------
+    # Evaluation
+    # -------------------------------------------------------------------------
+
+    def compile(self) -> List[Pass]:
+        """
+        Fuse consecutive steps of the same kind.
+
+        Returns:
+            List[Pass]: Passes alternating between tables and matrices.
+        """
+        if self._compiled is None:
+            passes: List[Pass] = []
+            for kind, data in self._steps:
+                if passes and passes[-1][0] == kind:
+                    previous = passes[-1][1]
+                    fused = compose_luts(previous, data) if kind == 'lut' else data @ previous
+                    passes[-1] = (kind, fused)
+                else:
+                    passes.append((kind, data))
+            self._compiled = [
+                (kind, data if kind == 'lut' else data.astype(np.float32))
+                for kind, data in passes
+            ]
+        return self._compiled
+
+    def as_lut(self) -> Optional[np.ndarray]:
+        """The single table equivalent to the pipeline, or None if it mixes channels."""
+        passes = self.compile()
+        if not passes:
+            return identity_lut()
+        if len(passes) == 1 and passes[0][0] == 'lut':
+            return passes[0][1]
+        return None
+
+    def apply(self, pixels: np.ndarray, out: Optional[np.ndarray] = None, opacity: float = 1.0) -> np.ndarray:
+        """
+        Run the pipeline over an RGBA image.
+
+        Args:
+            pixels (np.ndarray): (H, W, 4) uint8 source.
+            out (Optional[np.ndarray]): Destination; may be pixels itself. None
+                allocates a new array.
+            opacity (float): Mix between the source (0.0) and the result (1.0).
+
+        Returns:
+            np.ndarray: The result (out when given).
+        """
+        if out is None:
+            out = np.empty_like(pixels)
+        table = self.as_lut()
+        if table is not None:
+            if opacity < 1.0:
+                # Mixing is per value too: fold it into the table
+                mixed = LUT_DOMAIN[:, np.newaxis] * np.float32(1.0 - opacity) + table * np.float32(opacity)
+                table = np.rint(mixed).astype(np.uint8)
+            return apply_lut(pixels, table, out=out)
+
+        passes = self.compile()
+        for start in range(0, pixels.shape[0], self.BAND_ROWS):
+            src = pixels[start:start + self.BAND_ROWS]
+            dst = out[start:start + self.BAND_ROWS]
+            original = src.copy() if opacity < 1.0 else None
+            current = src
+            for kind, data in passes:
+                if kind == 'lut':
+                    cv.LUT(current, data.reshape(1, 256, 4), dst=dst)
+                else:
+                    cv.transform(current, data, dst=dst)
+                current = dst
+            if original is not None:
+                cv.addWeighted(original, 1.0 - opacity, dst, opacity, 0.0, dst=dst)
+        return out
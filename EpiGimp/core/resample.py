@@ -0,0 +1,205 @@
+import math
+from typing import Dict, Tuple
+
+import cv2 as cv
+import numpy as np
+
+from .compositor import get_executor
+from .filters import premultiply, unpremultiply
+from .mipmap import level_shape
+from .tiles import TILE_SIZE, iter_tiles
+
+#: Resampling methods accepted by :func:`resample`, plus 'auto'.
+METHODS = ('nearest', 'area', 'bilinear', 'bicubic', 'lanczos', 'pyramid')
+
+# OpenCV flag and kernel radius (in source pixels) of the interpolating methods
+_KERNELS: Dict[str, Tuple[int, int]] = {
+    'nearest': (cv.INTER_NEAREST, 0),
+    'bilinear': (cv.INTER_LINEAR, 1),
+    'bicubic': (cv.INTER_CUBIC, 2),
+    'lanczos': (cv.INTER_LANCZOS4, 4),
+}
+
+# cv.remap fixed-point maps: positions have _TAB_BITS fractional bits
+_TAB_BITS = 5
+_TAB_MASK = (1 << _TAB_BITS) - 1
+
+# Smallest tile a pyramid halving task produces
+_MIN_HALVING_TILE = 8
+
+
+def resample(pixels: np.ndarray, shape: Tuple[int, int], method: str = 'auto', tile_size: int = TILE_SIZE) -> np.ndarray:
+    """
+    Resize an RGBA image, tile by tile on the shared thread pool.
+
+    Colors are resampled premultiplied (except with 'nearest'), so transparent
+    pixels never bleed into their neighbours. Work is split so that no task
+    holds more than about a tile of float data, and no full resolution copy of
+    the source is ever made: a 16K to 4K downscale only allocates the output.
+
+    Args:
+        pixels (np.ndarray): (H, W, 4) RGBA uint8 source; not modified.
+        shape (Tuple[int, int]): (height, width) of the result.
+        method (str): One of METHODS, or 'auto' (area when shrinking, bicubic
+            otherwise):
+
+            - 'nearest': copies the closest source pixel.
+            - 'area': averages the source pixels each output pixel covers,
+              weighted by coverage. Falls back to bilinear when enlarging.
+            - 'bilinear', 'bicubic', 'lanczos': interpolating kernels. Large
+              downscales first halve the image until the remaining factor is
+              below 2, which avoids aliasing and keeps the kernels cheap.
+            - 'pyramid': repeated halving, then bilinear for the last step;
+              the fastest good quality downscale.
+        tile_size (int): Approximate edge length of the area each task reads.
+
+    Returns:
+        np.ndarray: (height, width, 4) RGBA uint8 image.
+
+    Raises:
+        ValueError: On an unknown method or an empty shape.
+    """
+    if method != 'auto' and method not in METHODS:
+        raise ValueError(f"Unknown resampling method: {method}")
+    out_h, out_w = int(shape[0]), int(shape[1])
+    if out_h <= 0 or out_w <= 0:
+        raise ValueError(f"Empty resampling size: {shape}")
+    height, width = pixels.shape[:2]
+    if (out_h, out_w) == (height, width):
+        return pixels.copy()
+
+    shrinking = out_h <= height and out_w <= width
+    if method == 'auto':
+        method = 'area' if shrinking else 'bicubic'
+    if method == 'area':
+        if shrinking:
+            return _area(pixels, (out_h, out_w), tile_size)
+        method = 'bilinear'
+
+    if method != 'nearest':
+        # Halve while the remaining factor is at least 2 on both axes
+        levels = int(math.floor(math.log2(min(height / out_h, width / out_w)))) if shrinking else 0
+        if levels > 0:
+            pixels = halve(pixels, levels, tile_size)
+    if method == 'pyramid':
+        method = 'bilinear'
+    return _interpolate(pixels, (out_h, out_w), method, tile_size)
+
+
+def halve(pixels: np.ndarray, levels: int, tile_size: int = TILE_SIZE) -> np.ndarray:
+    """
+    Halve an image levels times, averaging 2x2 blocks (sizes rounded up).
+
+    Every task reads a source window aligned on 2**levels pixels and halves it
+    levels times, so only the last level is allocated in full and the result
+    does not depend on the tiling.
+
+    Args:
+        pixels (np.ndarray): (H, W, 4) RGBA uint8 source.
+        levels (int): Number of halvings.
+        tile_size (int): Approximate edge length of the source window of a task.
+
+    Returns:
+        np.ndarray: The image at 1 / 2**levels of the size.
+    """
+    height, width = level_shape(pixels.shape[:2], levels)
+    out = np.empty((height, width, 4), dtype=np.uint8)
+    tile = max(tile_size >> levels, _MIN_HALVING_TILE)
+
+    def render(bounds: Tuple[int, int, int, int]) -> None:
+        y0, y1, x0, x1 = bounds
+        window = premultiply(pixels[y0 << levels:y1 << levels, x0 << levels:x1 << levels])
+        for _ in range(levels):
+            h, w = window.shape[:2]
+            if h % 2 or w % 2:
+                # Odd edges are repeated, so every output pixel averages exactly 2x2 pixels
+                window = cv.copyMakeBorder(window, 0, h % 2, 0, w % 2, cv.BORDER_REPLICATE)
+            window = cv.resize(window, (-(-w // 2), -(-h // 2)), interpolation=cv.INTER_AREA)
+        out[y0:y1, x0:x1] = unpremultiply(window)
+
+    # list() re-raises worker exceptions here
+    list(get_executor().map(render, iter_tiles(height, width, tile)))
+    return out
+
+
+def _area(pixels: np.ndarray, shape: Tuple[int, int], tile_size: int) -> np.ndarray:
+    """
+    Box filter downscale, in bands of output rows.
+
+    Each band is shrunk horizontally by OpenCV (rows are independent), then
+    vertically by a small matrix of coverage weights, so bands are exact and
+    their memory is bounded by the band height.
+    """
+    height, width = pixels.shape[:2]
+    out_h, out_w = shape
+    out = np.empty((out_h, out_w, 4), dtype=np.uint8)
+    scale = height / out_h
+    # Output rows per task, so that a task reads about 16 tiles of source pixels
+    band = max(1, int(16 * tile_size * tile_size / (width * scale)))
+
+    def render(y0: int) -> None:
+        y1 = min(y0 + band, out_h)
+        # Source rows covered by the band, and the coverage of each by each output row
+        top, bottom = y0 * scale, y1 * scale
+        sy0, sy1 = int(math.floor(top)), min(int(math.ceil(bottom - 1e-9)), height)
+        starts = np.arange(y0, y1, dtype=np.float64)[:, np.newaxis] * scale
+        rows = np.arange(sy0, sy1, dtype=np.float64)[np.newaxis, :]
+        weights = np.clip(np.minimum(starts + scale, rows + 1) - np.maximum(starts, rows), 0, None) / scale
+
+        shrunk = cv.resize(premultiply(pixels[sy0:sy1]), (out_w, sy1 - sy0), interpolation=cv.INTER_AREA)
+        mixed = weights.astype(np.float32) @ shrunk.reshape(sy1 - sy0, -1)
+        out[y0:y1] = unpremultiply(mixed.reshape(y1 - y0, out_w, 4))
+
+    list(get_executor().map(render, range(0, out_h, band)))
+    return out
+
+
+def _interpolate(pixels: np.ndarray, shape: Tuple[int, int], method: str, tile_size: int) -> np.ndarray:
+    """
+    Resize with an interpolating kernel, per output tile.
+
+    Uses the pixel center convention of cv.resize: output pixel i samples the
+    source at (i + 0.5) * scale - 0.5. Positions are quantized once, in image
+    coordinates, and given to cv.remap as fixed-point maps, so a pixel gets the
+    same weights whichever tile computes it.
+    """
+    height, width = pixels.shape[:2]
+    out_h, out_w = shape
+    out = np.empty((out_h, out_w, 4), dtype=np.uint8)
+    if method == 'nearest':
+        rows = np.minimum(((np.arange(out_h) + 0.5) * (height / out_h)).astype(np.intp), height - 1)
+        cols = np.minimum(((np.arange(out_w) + 0.5) * (width / out_w)).astype(np.intp), width - 1)
+    else:
+        rows = _fixed_point_positions(out_h, height)
+        cols = _fixed_point_positions(out_w, width)
+    flag, radius = _KERNELS[method]
+
+    def render(bounds: Tuple[int, int, int, int]) -> None:
+        y0, y1, x0, x1 = bounds
+        if method == 'nearest':
+            out[y0:y1, x0:x1] = pixels[rows[y0:y1, np.newaxis], cols[np.newaxis, x0:x1]]
+            return
+        tile_rows, tile_cols = rows[y0:y1], cols[x0:x1]
+        # Source window: the sampled pixels plus the kernel radius, clipped
+        sy0 = max(int(tile_rows[0] >> _TAB_BITS) - radius, 0)
+        sy1 = min(int(tile_rows[-1] >> _TAB_BITS) + radius + 2, height)
+        sx0 = max(int(tile_cols[0] >> _TAB_BITS) - radius, 0)
+        sx1 = min(int(tile_cols[-1] >> _TAB_BITS) + radius + 2, width)
+        whole = np.empty((y1 - y0, x1 - x0, 2), dtype=np.int16)
+        whole[..., 0] = ((tile_cols >> _TAB_BITS) - sx0)[np.newaxis, :]
+        whole[..., 1] = ((tile_rows >> _TAB_BITS) - sy0)[:, np.newaxis]
+        fraction = ((tile_rows & _TAB_MASK)[:, np.newaxis] << _TAB_BITS) | (tile_cols & _TAB_MASK)[np.newaxis, :]
+        tile = cv.remap(
+            premultiply(pixels[sy0:sy1, sx0:sx1]), whole, fraction.astype(np.uint16),
+            flag, borderMode=cv.BORDER_REPLICATE
+        )
+        out[y0:y1, x0:x1] = unpremultiply(tile)
+
+    list(get_executor().map(render, iter_tiles(out_h, out_w, tile_size)))
+    return out
+
+
+def _fixed_point_positions(count: int, size: int) -> np.ndarray:
+    """Source positions sampled by count output pixels along an axis of size pixels, in 1 / 2**_TAB_BITS units."""
+    positions = (np.arange(count, dtype=np.float64) + 0.5) * (size / count) - 0.5
+    return np.floor(positions * (1 << _TAB_BITS) + 0.5).astype(np.int64)
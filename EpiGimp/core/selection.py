@@ -0,0 +1,302 @@
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple, Union
+
+import cv2 as cv
+import numpy as np
+
+from .tiles import rect_to_bounds
+
+#: Ways a new selection is combined with the current one.
+SELECTION_MODES = ('replace', 'add', 'subtract', 'intersect')
+
+
+@lru_cache(maxsize=32)
+def ellipse_mask(width: int, height: int) -> np.ndarray:
+    """
+    Mask of the ellipse inscribed in a width x height box.
+
+    Masks are cached by size and read-only, so redrawing or reusing an
+    ellipse selection never rebuilds it.
+    """
+    mask = np.zeros((height, width), dtype=np.uint8)
+    if width > 0 and height > 0:
+        # cv.ellipse works in 1/16 pixel units (shift=4) for sub-pixel centers and axes
+        center = (int(round((width - 1) * 8)), int(round((height - 1) * 8)))
+        axes = (int(round(width * 8)), int(round(height * 8)))
+        cv.ellipse(mask, center, axes, 0, 0, 360, 255, thickness=-1, lineType=cv.LINE_8, shift=4)
+    mask.flags.writeable = False
+    return mask
+
+
+class SelectionMask:
+    """
+    A selection: an 8-bit coverage mask (255 = selected) over its bounding box.
+
+    Coordinates are in canvas pixels unless stated otherwise. Only the
+    bounding box is stored, so a small selection on a huge image stays small,
+    and operations only touch the pixels under it. Masks are never modified
+    in place: combining or moving selections returns new objects, which may
+    share their mask array with the original.
+    """
+
+    def __init__(self, mask: np.ndarray, x: int = 0, y: int = 0, shape: str = 'mask', binary: Optional[bool] = None) -> None:
+        """
+        Initialize a selection from a mask.
+
+        Args:
+            mask (np.ndarray): (H, W) uint8 coverage of the bounding box.
+            x (int): Canvas column of the mask's left edge.
+            y (int): Canvas row of the mask's top edge.
+            shape (str): 'rectangle', 'ellipse' or 'mask'; lets the UI draw
+                simple shapes without tracing the mask.
+            binary (Optional[bool]): Whether the mask only holds 0 and 255, if
+                known; saves scanning it.
+        """
+        self.mask = mask
+        self.x = int(x)
+        self.y = int(y)
+        self.shape = shape
+        self._binary = binary
+        self._outline: Optional[List[np.ndarray]] = None
+
+    # =========================================================================
+    # Construction
+    # =========================================================================
+
+    @classmethod
+    def rectangle(cls, rect) -> 'SelectionMask':
+        """Selection of a QRect or (x, y, width, height)."""
+        y0, y1, x0, x1 = rect_to_bounds(rect)
+        # A read-only broadcast: no memory, even when selecting a whole 16K image
+        mask = np.broadcast_to(np.uint8(255), (max(y1 - y0, 0), max(x1 - x0, 0)))
+        return cls(mask, x0, y0, 'rectangle')
+
+    @classmethod
+    def ellipse(cls, rect) -> 'SelectionMask':
+        """Selection of the ellipse inscribed in a QRect or (x, y, width, height)."""
+        y0, y1, x0, x1 = rect_to_bounds(rect)
+        return cls(ellipse_mask(max(x1 - x0, 0), max(y1 - y0, 0)), x0, y0, 'ellipse')
+
+    @classmethod
+    def from_shape(cls, rect, shape: str = 'rectangle') -> 'SelectionMask':
+        """
+        Selection of a rectangle or ellipse.
+
+        Raises:
+            ValueError: If shape is neither 'rectangle' nor 'ellipse'.
+        """
+        if shape == 'rectangle':
+            return cls.rectangle(rect)
+        if shape == 'ellipse':
+            return cls.ellipse(rect)
+        raise ValueError(f"Unknown selection shape: {shape}")
+
+    @classmethod
+    def from_mask(cls, mask: np.ndarray, x: int = 0, y: int = 0, binary: Optional[bool] = None) -> 'SelectionMask':
+        """Selection of the non-zero pixels of a mask placed at (x, y), trimmed to their bounding box."""
+        if mask.size == 0:
+            return cls(np.zeros((0, 0), dtype=np.uint8), x, y)
+        left, top, width, height = cv.boundingRect(np.ascontiguousarray(mask))
+        return cls(mask[top:top + height, left:left + width], x + left, y + top, binary=binary)
+
+    # =========================================================================
+    # Queries
+    # =========================================================================
+
+    @property
+    def width(self) -> int:
+        return self.mask.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.mask.shape[0]
+
+    @property
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """Bounding box as (x, y, width, height)."""
+        return (self.x, self.y, self.width, self.height)
+
+    def is_empty(self) -> bool:
+        if self.mask.size == 0:
+            return True
+        return self.shape != 'rectangle' and not cv.countNonZero(np.ascontiguousarray(self.mask))
+
+    @property
+    def is_binary(self) -> bool:
+        """Whether every pixel is fully selected or not at all (no feathering)."""
+        if self._binary is None:
+            self._binary = self.shape != 'mask' or not np.any((self.mask > 0) & (self.mask < 255))
+        return self._binary
+
+    def contains(self, x: int, y: int) -> bool:
+        """Whether the canvas pixel (x, y) is selected."""
+        col, row = x - self.x, y - self.y
+        return 0 <= row < self.height and 0 <= col < self.width and self.mask[row, col] > 0
+
+    def region(self, x: int, y: int, width: int, height: int) -> np.ndarray:
+        """
+        Coverage of an arbitrary rectangle, zero outside the bounding box.
+
+        Returns:
+            np.ndarray: (height, width) uint8 mask; a view when the rectangle is
+            inside the bounding box.
+        """
+        if x >= self.x and y >= self.y and x + width <= self.x + self.width and y + height <= self.y + self.height:
+            return self.mask[y - self.y:y - self.y + height, x - self.x:x - self.x + width]
+        out = np.zeros((height, width), dtype=np.uint8)
+        x0, y0 = max(x, self.x), max(y, self.y)
+        x1, y1 = min(x + width, self.x + self.width), min(y + height, self.y + self.height)
+        if x0 < x1 and y0 < y1:
+            out[y0 - y:y1 - y, x0 - x:x1 - x] = self.mask[y0 - self.y:y1 - self.y, x0 - self.x:x1 - self.x]
+        return out
+
+    def clip(self, height: int, width: int) -> Optional[Tuple[Tuple[int, int, int, int], np.ndarray]]:
+        """
+        Part of the selection inside an image placed at the origin.
+
+        Args:
+            height (int): Image height.
+            width (int): Image width.
+
+        Returns:
+            Optional[Tuple[Tuple[int, int, int, int], np.ndarray]]: (y0, y1, x0, x1)
+            bounds in the image and a view of the mask over them, or None if
+            the selection misses the image.
+        """
+        x0, y0 = max(self.x, 0), max(self.y, 0)
+        x1, y1 = min(self.x + self.width, width), min(self.y + self.height, height)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return (y0, y1, x0, x1), self.mask[y0 - self.y:y1 - self.y, x0 - self.x:x1 - self.x]
+
+    def outline(self) -> List[np.ndarray]:
+        """Contours of the selected area, as (N, 2) arrays of canvas points; computed once."""
+        if self._outline is None:
+            binary = np.ascontiguousarray(self.mask >= 128, dtype=np.uint8)
+            contours, _ = cv.findContours(binary, cv.RETR_LIST, cv.CHAIN_APPROX_SIMPLE)
+            self._outline = [contour.reshape(-1, 2) + (self.x, self.y) for contour in contours]
+        return self._outline
+
+    # =========================================================================
+    # Operations
+    # =========================================================================
+
+    def translated(self, dx: int, dy: int) -> 'SelectionMask':
+        """The same selection moved by (dx, dy); shares the mask array."""
+        moved = SelectionMask(self.mask, self.x + dx, self.y + dy, self.shape, self._binary)
+        if self._outline is not None:
+            moved._outline = [contour + (dx, dy) for contour in self._outline]
+        return moved
+
+    def _aligned(self, other: 'SelectionMask', union: bool) -> Tuple[np.ndarray, np.ndarray, int, int]:
+        """Both masks over the union (or intersection) of the bounding boxes."""
+        if union:
+            x0, y0 = min(self.x, other.x), min(self.y, other.y)
+            x1 = max(self.x + self.width, other.x + other.width)
+            y1 = max(self.y + self.height, other.y + other.height)
+        else:
+            x0, y0 = max(self.x, other.x), max(self.y, other.y)
+            x1 = max(min(self.x + self.width, other.x + other.width), x0)
+            y1 = max(min(self.y + self.height, other.y + other.height), y0)
+        return self.region(x0, y0, x1 - x0, y1 - y0), other.region(x0, y0, x1 - x0, y1 - y0), x0, y0
+
+    def union(self, other: 'SelectionMask') -> 'SelectionMask':
+        """Pixels selected in either selection."""
+        a, b, x, y = self._aligned(other, union=True)
+        return SelectionMask.from_mask(cv.max(a, b), x, y)
+
+    def subtract(self, other: 'SelectionMask') -> 'SelectionMask':
+        """Pixels of this selection that are not in other."""
+        a, b, x, y = self._aligned(other, union=True)
+        return SelectionMask.from_mask(cv.subtract(a, b), x, y)
+
+    def intersect(self, other: 'SelectionMask') -> 'SelectionMask':
+        """Pixels selected in both selections."""
+        a, b, x, y = self._aligned(other, union=False)
+        return SelectionMask.from_mask(np.minimum(a, b), x, y)
+
+    def combine(self, other: 'SelectionMask', mode: str) -> 'SelectionMask':
+        """
+        Combine with another selection.
+
+        Args:
+            other (SelectionMask): The new selection.
+            mode (str): One of SELECTION_MODES; 'replace' returns other.
+
+        Raises:
+            ValueError: On an unknown mode.
+        """
+        if mode == 'replace':
+            return other
+        if mode == 'add':
+            return self.union(other)
+        if mode == 'subtract':
+            return self.subtract(other)
+        if mode == 'intersect':
+            return self.intersect(other)
+        raise ValueError(f"Unknown selection mode: {mode}")
+
+    def invert(self, height: int, width: int) -> 'SelectionMask':
+        """Everything of a height x width canvas that is not selected."""
+        return SelectionMask.from_mask(cv.bitwise_not(self.region(0, 0, width, height)))
+
+    def feather(self, radius: float) -> 'SelectionMask':
+        """
+        Soften the edges with a gaussian blur of the given radius (pixels).
+
+        The bounding box grows by the radius so the fade is not cut off.
+        """
+        if radius <= 0 or self.is_empty():
+            return self
+        pad = int(np.ceil(radius))
+        padded = cv.copyMakeBorder(self.mask, pad, pad, pad, pad, cv.BORDER_CONSTANT, value=0)
+        # Radius of about 2 sigma, like GIMP's feather
+        blurred = cv.GaussianBlur(padded, (2 * pad + 1, 2 * pad + 1), radius / 2.0)
+        return SelectionMask.from_mask(blurred, self.x - pad, self.y - pad)
+
+
+# =========================================================================
+# Applying a selection to pixels
+# =========================================================================
+
+def fill_masked(pixels: np.ndarray, mask: np.ndarray, color: Union[Sequence[int], np.ndarray], binary: bool = False) -> None:
+    """
+    Paint a color or an image over pixels, weighted by a coverage mask, in place.
+
+    Partially selected pixels are mixed premultiplied, so a half selected
+    transparent pixel becomes the color at half opacity.
+
+    Args:
+        pixels (np.ndarray): (H, W, 4) RGBA uint8 region.
+        mask (np.ndarray): (H, W) uint8 coverage.
+        color (Union[Sequence[int], np.ndarray]): RGBA color, or (H, W, 4) pixels.
+        binary (bool): The mask only holds 0 and 255; skips the blending math.
+    """
+    color = np.asarray(color, dtype=np.uint8)
+    if binary:
+        np.copyto(pixels, color, where=mask[..., np.newaxis] != 0)
+        return
+    weights = mask[..., np.newaxis].astype(np.float32) * np.float32(1.0 / 255.0)
+    current = pixels.astype(np.float32)
+    current[..., :3] *= current[..., 3:]
+    target = np.broadcast_to(color, pixels.shape).astype(np.float32)
+    target[..., :3] *= target[..., 3:]
+    mixed = current + (target - current) * weights
+    alpha = mixed[..., 3:]
+    mixed[..., :3] = np.divide(mixed[..., :3], alpha, out=np.zeros_like(mixed[..., :3]), where=alpha > 0)
+    pixels[:] = np.clip(np.rint(mixed), 0, 255)
+
+
+def clear_masked(pixels: np.ndarray, mask: np.ndarray, binary: bool = False) -> None:
+    """
+    Make pixels transparent, weighted by a coverage mask, in place.
+
+    Partially selected pixels keep part of their alpha; fully selected ones
+    become transparent black.
+    """
+    if binary:
+        np.copyto(pixels, np.uint8(0), where=mask[..., np.newaxis] != 0)
+        return
+    alpha = np.ascontiguousarray(pixels[..., 3])
+    pixels[..., 3] = cv.multiply(alpha, cv.bitwise_not(np.ascontiguousarray(mask)), scale=1.0 / 255.0)
+    pixels[mask == 255] = 0
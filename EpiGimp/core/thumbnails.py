@@ -0,0 +1,104 @@
+import threading
+import weakref
+from typing import Dict, Optional, Tuple
+
+import cv2 as cv
+import numpy as np
+
+from .mipmap import MAX_LEVEL
+from .transform import preview_level
+
+#: Thumbnail edge lengths: 28 px for the layers panel, 64 px on high-DPI screens.
+THUMBNAIL_SIZES = (28, 64)
+
+
+def thumbnail_size(device_pixel_ratio: float) -> int:
+    """The thumbnail size to use on a screen with this device pixel ratio."""
+    return THUMBNAIL_SIZES[1] if device_pixel_ratio > 1.0 else THUMBNAIL_SIZES[0]
+
+
+def thumbnail_level(shape: Tuple[int, int], size: int) -> int:
+    """
+    Mipmap level to build a size x size thumbnail of an image of this shape from.
+
+    The level is the smallest one at most twice the thumbnail, so the final
+    resize still averages every source pixel while never reading the full
+    resolution pixels of a large layer.
+    """
+    return min(preview_level(shape, 2 * size), MAX_LEVEL)
+
+
+def make_thumbnail(pixels: np.ndarray, size: int) -> np.ndarray:
+    """
+    Downscale pixels to fit in a size x size square, centered on transparency.
+
+    Colors are premultiplied before averaging, so transparent pixels don't
+    bleed into their neighbours; the result is premultiplied as well. Give it
+    a reduced mipmap level of large layers (see :func:`thumbnail_level`).
+
+    Args:
+        pixels (np.ndarray): (H, W, 4) straight RGBA uint8.
+        size (int): Edge of the thumbnail, in pixels.
+
+    Returns:
+        np.ndarray: (size, size, 4) premultiplied RGBA uint8.
+    """
+    height, width = pixels.shape[:2]
+    thumb = np.zeros((size, size, 4), dtype=np.uint8)
+    if height == 0 or width == 0:
+        return thumb
+
+    scale = min(size / width, size / height)
+    out_w, out_h = max(1, round(width * scale)), max(1, round(height * scale))
+    premultiplied = cv.cvtColor(np.ascontiguousarray(pixels), cv.COLOR_RGBA2mRGBA)
+    resized = cv.resize(premultiplied, (out_w, out_h), interpolation=cv.INTER_AREA)
+
+    x, y = (size - out_w) // 2, (size - out_h) // 2
+    thumb[y:y + out_h, x:x + out_w] = resized
+    return thumb
+
+
+class ThumbnailCache:
+    """
+    Thumbnails per layer and size, valid while the layer version is unchanged.
+
+    Layers are held weakly: deleting a layer drops its thumbnails. Safe to
+    fill from a worker thread.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: "weakref.WeakKeyDictionary[object, Dict[int, Tuple[int, np.ndarray]]]" = weakref.WeakKeyDictionary()
+
+    def get(self, layer, size: int, current: bool = True) -> Optional[np.ndarray]:
+        """
+        The cached thumbnail of layer.
+
+        Args:
+            layer: The layer.
+            size (int): Thumbnail edge.
+            current (bool): Only return it if it matches the layer version;
+                otherwise an outdated one is fine (still better than nothing).
+
+        Returns:
+            Optional[np.ndarray]: The thumbnail, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(layer, {}).get(size)
+        if entry is None or (current and entry[0] != layer.version):
+            return None
+        return entry[1]
+
+    def put(self, layer, size: int, version: int, thumbnail: np.ndarray) -> None:
+        """Store thumbnail as the one of layer at version."""
+        with self._lock:
+            sizes = self._entries.setdefault(layer, {})
+            if size not in sizes or sizes[size][0] <= version:
+                sizes[size] = (version, thumbnail)
+
+    def is_current(self, layer, size: int) -> bool:
+        return self.get(layer, size) is not None
+
+    def discard(self, layer) -> None:
+        with self._lock:
+            self._entries.pop(layer, None)
@@ -0,0 +1,134 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Tuple
+
+import numpy as np
+
+#: Edge length (in pixels) of the square tiles images are split into.
+#: Tile grids are aligned on multiples of this value in image coordinates.
+TILE_SIZE = 256
+
+
+def iter_tiles(height: int, width: int, tile_size: int = TILE_SIZE) -> List[Tuple[int, int, int, int]]:
+    """
+    Split an image area into a grid of tiles.
+
+    Args:
+        height (int): Image height in pixels.
+        width (int): Image width in pixels.
+        tile_size (int): Edge length of a tile.
+
+    Returns:
+        List[Tuple[int, int, int, int]]: (y0, y1, x0, x1) bounds of each tile, row-major.
+    """
+    return iter_tiles_in((0, height, 0, width), tile_size)
+
+
+def iter_tiles_in(bounds: Tuple[int, int, int, int], tile_size: int = TILE_SIZE) -> List[Tuple[int, int, int, int]]:
+    """
+    Split a region into tiles aligned on the global tile grid.
+
+    Tiles on the region border are clipped, so the result exactly covers the region.
+
+    Args:
+        bounds (Tuple[int, int, int, int]): (y0, y1, x0, x1) region.
+        tile_size (int): Edge length of a tile.
+
+    Returns:
+        List[Tuple[int, int, int, int]]: (y0, y1, x0, x1) bounds of each tile, row-major.
+    """
+    y0, y1, x0, x1 = bounds
+    return [
+        (max(ty, y0), min(ty + tile_size, y1), max(tx, x0), min(tx + tile_size, x1))
+        for ty in range(y0 - y0 % tile_size, y1, tile_size)
+        for tx in range(x0 - x0 % tile_size, x1, tile_size)
+    ]
+
+
+def grid_shape(height: int, width: int, tile_size: int = TILE_SIZE) -> Tuple[int, int]:
+    """Number of (rows, columns) of tiles needed to cover an image."""
+    return (-(-height // tile_size), -(-width // tile_size))
+
+
+def tile_span(bounds: Tuple[int, int, int, int], tile_size: int = TILE_SIZE) -> Tuple[slice, slice]:
+    """
+    Indices of the tiles touched by a region, as slices into a tile grid array.
+
+    Args:
+        bounds (Tuple[int, int, int, int]): (y0, y1, x0, x1) region, end-exclusive.
+        tile_size (int): Edge length of a tile.
+
+    Returns:
+        Tuple[slice, slice]: (rows, columns) of the tile grid; empty when the
+        region lies entirely before the grid.
+    """
+    y0, y1, x0, x1 = bounds
+    # A negative stop would count from the end of the grid
+    return (
+        slice(max(y0, 0) // tile_size, max(-(-y1 // tile_size), 0)),
+        slice(max(x0, 0) // tile_size, max(-(-x1 // tile_size), 0)),
+    )
+
+
+def rect_to_bounds(rect) -> Tuple[int, int, int, int]:
+    """
+    Convert a QRect-like object or an (x, y, width, height) tuple to (y0, y1, x0, x1).
+    """
+    if hasattr(rect, 'x'):
+        x, y, w, h = rect.x(), rect.y(), rect.width(), rect.height()
+    else:
+        x, y, w, h = rect
+    return (y, y + h, x, x + w)
+
+
+class TileCache:
+    """
+    Thread-safe least-recently-used store of per-tile arrays, bounded in bytes.
+
+    Keys must identify everything the cached data depends on (tile bounds,
+    source versions, parameters): entries are never invalidated explicitly,
+    stale ones simply stop being requested and age out.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_bytes (int): Memory budget; the oldest entries are evicted past it.
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: 'OrderedDict[Hashable, np.ndarray]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[np.ndarray]:
+        """Return the array stored under key, or None. The array must not be modified."""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key: Hashable, data: np.ndarray) -> None:
+        """Store an array (not copied) under key, evicting old entries if needed."""
+        if data.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous.nbytes
+            self._entries[key] = data
+            self.nbytes += data.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
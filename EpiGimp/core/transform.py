@@ -0,0 +1,249 @@
+import math
+from typing import Dict, Sequence, Tuple
+
+import cv2 as cv
+import numpy as np
+
+from .filters import premultiply, unpremultiply
+
+#: Interpolations accepted when committing a transform, by name.
+INTERPOLATIONS: Dict[str, int] = {
+    'nearest': cv.INTER_NEAREST,
+    'linear': cv.INTER_LINEAR,
+    'cubic': cv.INTER_CUBIC,
+    'lanczos': cv.INTER_LANCZOS4,
+}
+
+#: Longest side of the proxy warped while a transform is being dragged.
+PREVIEW_SIZE = 1024
+
+# Below this, the perspective row of a matrix is considered (0, 0, 1)
+_AFFINE_TOLERANCE = 1e-9
+
+# (x0, y0, x1, y1) bounding box, in the output coordinates of a matrix
+Box = Tuple[float, float, float, float]
+
+
+def get_interpolation(name: str) -> int:
+    """
+    Look up an interpolation flag by name.
+
+    Raises:
+        ValueError: If the name is not in INTERPOLATIONS.
+    """
+    try:
+        return INTERPOLATIONS[name]
+    except KeyError:
+        raise ValueError(f"Unknown interpolation: {name}") from None
+
+
+# =========================================================================
+# Matrices
+# =========================================================================
+
+def as_homography(matrix: np.ndarray) -> np.ndarray:
+    """Promote a 2x3 affine matrix to 3x3; a 3x3 matrix is returned as float64."""
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if matrix.shape == (2, 3):
+        return np.vstack([matrix, [0.0, 0.0, 1.0]])
+    if matrix.shape != (3, 3):
+        raise ValueError(f"Expected a 2x3 or 3x3 matrix, got {matrix.shape}")
+    return matrix
+
+
+def is_affine(matrix: np.ndarray) -> bool:
+    """Whether a 3x3 matrix has no perspective component."""
+    return (
+        abs(matrix[2, 0]) < _AFFINE_TOLERANCE and abs(matrix[2, 1]) < _AFFINE_TOLERANCE
+        and abs(matrix[2, 2] - 1.0) < _AFFINE_TOLERANCE
+    )
+
+
+def affine_matrix(
+    scale: Tuple[float, float] = (1.0, 1.0),
+    angle: float = 0.0,
+    skew: Tuple[float, float] = (0.0, 0.0),
+    translate: Tuple[float, float] = (0.0, 0.0),
+    center: Tuple[float, float] = (0.0, 0.0)
+) -> np.ndarray:
+    """
+    Compose a scale, skew and rotation around a center, then a translation.
+
+    Args:
+        scale (Tuple[float, float]): Horizontal and vertical factors.
+        angle (float): Clockwise rotation in degrees (y points down).
+        skew (Tuple[float, float]): Horizontal and vertical shear factors.
+        translate (Tuple[float, float]): Offset applied last.
+        center (Tuple[float, float]): Fixed point of the scale, skew and rotation.
+
+    Returns:
+        np.ndarray: 3x3 float64 matrix.
+    """
+    cx, cy = center
+    radians = math.radians(angle)
+    cos, sin = math.cos(radians), math.sin(radians)
+    rotation = np.array([[cos, -sin, 0.0], [sin, cos, 0.0], [0.0, 0.0, 1.0]])
+    shear = np.array([[1.0, skew[0], 0.0], [skew[1], 1.0, 0.0], [0.0, 0.0, 1.0]])
+    scaling = np.diag([scale[0], scale[1], 1.0])
+    to_origin = np.array([[1.0, 0.0, -cx], [0.0, 1.0, -cy], [0.0, 0.0, 1.0]])
+    back = np.array([[1.0, 0.0, cx + translate[0]], [0.0, 1.0, cy + translate[1]], [0.0, 0.0, 1.0]])
+    return back @ rotation @ shear @ scaling @ to_origin
+
+
+def quad_matrix(shape: Tuple[int, int], quad: Sequence[Tuple[float, float]]) -> np.ndarray:
+    """
+    Matrix mapping the corners of an image to a quadrilateral.
+
+    Args:
+        shape (Tuple[int, int]): (height, width) of the source image.
+        quad (Sequence[Tuple[float, float]]): Destination of the top-left,
+            top-right, bottom-right and bottom-left corners.
+
+    Returns:
+        np.ndarray: 3x3 float64 matrix; affine when quad is a parallelogram.
+    """
+    height, width = shape
+    src = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+    return cv.getPerspectiveTransform(src, np.float32(quad)).astype(np.float64)
+
+
+def map_points(matrix: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Apply a 3x3 matrix to (N, 2) points."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 1, 2)
+    return cv.perspectiveTransform(points, as_homography(matrix)).reshape(-1, 2)
+
+
+def transformed_bounds(matrix: np.ndarray, shape: Tuple[int, int]) -> Tuple[int, int, int, int]:
+    """
+    Integer bounding box of an image of the given shape after a transform.
+
+    Returns:
+        Tuple[int, int, int, int]: (x0, y0, x1, y1), rounded outwards.
+    """
+    height, width = shape
+    corners = map_points(matrix, [[0, 0], [width, 0], [width, height], [0, height]])
+    x0, y0 = np.floor(corners.min(axis=0) + 1e-6)
+    x1, y1 = np.ceil(corners.max(axis=0) - 1e-6)
+    return int(x0), int(y0), int(x1), int(y1)
+
+
+# =========================================================================
+# Warping
+# =========================================================================
+
+def _warp(pixels: np.ndarray, matrix: np.ndarray, size: Tuple[int, int], interpolation: int) -> np.ndarray:
+    """Warp premultiplied, with warpAffine whenever the matrix allows it."""
+    source = premultiply(pixels) if interpolation != cv.INTER_NEAREST else pixels
+    if is_affine(matrix):
+        warped = cv.warpAffine(source, matrix[:2], size, flags=interpolation, borderMode=cv.BORDER_CONSTANT, borderValue=0)
+    else:
+        warped = cv.warpPerspective(source, matrix, size, flags=interpolation, borderMode=cv.BORDER_CONSTANT, borderValue=0)
+    return unpremultiply(warped) if interpolation != cv.INTER_NEAREST else warped
+
+
+def warp(pixels: np.ndarray, matrix: np.ndarray, interpolation: str = 'linear') -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    Transform an image into an output just large enough to hold it.
+
+    Colors are interpolated premultiplied, so transparent pixels around the
+    image do not darken its edges.
+
+    Args:
+        pixels (np.ndarray): (H, W, 4) RGBA uint8 image.
+        matrix (np.ndarray): 2x3 or 3x3 matrix from source to output pixel coordinates.
+        interpolation (str): A name of INTERPOLATIONS.
+
+    Returns:
+        Tuple[np.ndarray, Tuple[int, int]]: The transformed image and the (x, y)
+        position of its top-left corner in the output coordinates.
+
+    Raises:
+        ValueError: On an unknown interpolation or a degenerate matrix.
+    """
+    flag = get_interpolation(interpolation)
+    matrix = as_homography(matrix)
+    if abs(np.linalg.det(matrix)) < 1e-12:
+        raise ValueError("Transform matrix is not invertible")
+    x0, y0, x1, y1 = transformed_bounds(matrix, pixels.shape[:2])
+    shift = np.array([[1.0, 0.0, -x0], [0.0, 1.0, -y0], [0.0, 0.0, 1.0]])
+    return _warp(pixels, shift @ matrix, (max(x1 - x0, 1), max(y1 - y0, 1)), flag), (x0, y0)
+
+
+def warp_mask(mask: np.ndarray, matrix: np.ndarray, interpolation: str = 'linear') -> np.ndarray:
+    """
+    Transform a layer mask the way :func:`warp` transforms its layer.
+
+    Edges are extended rather than faded to 0: the layer's own alpha already
+    fades out there.
+
+    Args:
+        mask (np.ndarray): (H, W) uint8 mask.
+        matrix (np.ndarray): The matrix given to :func:`warp`.
+        interpolation (str): A name of INTERPOLATIONS.
+
+    Returns:
+        np.ndarray: The mask, of the size of the image returned by :func:`warp`.
+    """
+    flag = get_interpolation(interpolation)
+    matrix = as_homography(matrix)
+    x0, y0, x1, y1 = transformed_bounds(matrix, mask.shape[:2])
+    shift = np.array([[1.0, 0.0, -x0], [0.0, 1.0, -y0], [0.0, 0.0, 1.0]]) @ matrix
+    size = (max(x1 - x0, 1), max(y1 - y0, 1))
+    if is_affine(shift):
+        return cv.warpAffine(mask, shift[:2], size, flags=flag, borderMode=cv.BORDER_REPLICATE)
+    return cv.warpPerspective(mask, shift, size, flags=flag, borderMode=cv.BORDER_REPLICATE)
+
+
+class TransformPreview:
+    """
+    Fast preview of a transform being edited, from a downsampled proxy.
+
+    The proxy is warped instead of the full image, so each mouse move costs
+    about PREVIEW_SIZE² pixels whatever the layer size. The full resolution
+    warp happens once, when the transform is committed.
+    """
+
+    def __init__(self, proxy: np.ndarray, scale: float) -> None:
+        """
+        Initialize the preview.
+
+        Args:
+            proxy (np.ndarray): Downsampled RGBA uint8 copy of the image, e.g. a
+                mipmap level.
+            scale (float): Proxy pixels per image pixel.
+        """
+        self.proxy = proxy
+        self.scale = scale
+
+    def render(self, matrix: np.ndarray) -> Tuple[np.ndarray, Box]:
+        """
+        Warp the proxy with a full resolution transform.
+
+        Args:
+            matrix (np.ndarray): 2x3 or 3x3 matrix in image pixel coordinates.
+
+        Returns:
+            Tuple[np.ndarray, Box]: The warped proxy and the (x0, y0, x1, y1)
+            area it covers, in the output coordinates of matrix.
+        """
+        scale = self.scale
+        to_proxy = np.diag([scale, scale, 1.0])
+        proxy_matrix = to_proxy @ as_homography(matrix) @ np.linalg.inv(to_proxy)
+        x0, y0, x1, y1 = transformed_bounds(proxy_matrix, self.proxy.shape[:2])
+        shift = np.array([[1.0, 0.0, -x0], [0.0, 1.0, -y0], [0.0, 0.0, 1.0]])
+        size = (max(x1 - x0, 1), max(y1 - y0, 1))
+        warped = _warp(self.proxy, shift @ proxy_matrix, size, cv.INTER_LINEAR)
+        return warped, (x0 / scale, y0 / scale, (x0 + size[0]) / scale, (y0 + size[1]) / scale)
+
+
+def preview_level(shape: Tuple[int, int], max_size: int = PREVIEW_SIZE) -> int:
+    """Mipmap level whose longest side is at most max_size."""
+    longest = max(shape)
+    return max(0, math.ceil(math.log2(longest / max_size))) if longest > max_size else 0
+
+
+def corners(shape: Tuple[int, int], position: Tuple[int, int] = (0, 0)) -> np.ndarray:
+    """(4, 2) top-left, top-right, bottom-right, bottom-left corners of an image placed at position."""
+    height, width = shape
+    x, y = position
+    return np.array([[x, y], [x + width, y], [x + width, y + height], [x, y + height]], dtype=np.float64)
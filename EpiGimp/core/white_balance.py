@@ -0,0 +1,86 @@
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .point_ops import kelvin_table, kelvin_to_rgb
+
+#: Default number of pixels read by the estimator, whatever the image size.
+DEFAULT_SAMPLES = 65536
+
+# Channel values outside this range are clipped or too dark to carry the
+# color of the light, and are ignored
+_USABLE = (8, 247)
+
+
+def sample_pixels(pixels: np.ndarray, max_samples: int = DEFAULT_SAMPLES, bounds: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+    """
+    Take a regular strided subsample of an image.
+
+    Only the sampled pixels are read, so the cost depends on max_samples
+    rather than on the image size.
+
+    Args:
+        pixels (np.ndarray): (H, W, 4) RGBA uint8 image.
+        max_samples (int): Upper bound on the number of returned pixels.
+        bounds (Optional[Tuple[int, int, int, int]]): (y0, y1, x0, x1) region to
+            sample, e.g. the selection. Defaults to the whole image.
+
+    Returns:
+        np.ndarray: (N, 4) uint8 pixels, N <= max_samples.
+    """
+    if bounds is not None:
+        y0, y1, x0, x1 = bounds
+        pixels = pixels[max(y0, 0):max(y1, 0), max(x0, 0):max(x1, 0)]
+    height, width = pixels.shape[:2]
+    if height == 0 or width == 0:
+        return np.empty((0, 4), dtype=np.uint8)
+    stride = max(1, math.ceil(math.sqrt(height * width / max(max_samples, 1))))
+    # Start half a stride in so the grid is centred on the region
+    return pixels[stride // 2::stride, stride // 2::stride].reshape(-1, 4)[:max_samples]
+
+
+def estimate_temperature(
+    pixels: np.ndarray,
+    bounds: Optional[Tuple[int, int, int, int]] = None,
+    max_samples: int = DEFAULT_SAMPLES,
+    reference: float = 6500
+) -> Optional[float]:
+    """
+    Estimate the color temperature of the light an image was taken under.
+
+    The average color of the usable samples (opaque, neither clipped nor too
+    dark) is assumed to be neutral gray (gray world assumption). The estimate is
+    the temperature whose correction to reference, as done by
+    :func:`point_ops.color_temperature_lut`, turns that average gray. Every
+    candidate of :func:`point_ops.kelvin_table` is scored at once by comparing
+    log chromaticities.
+
+    Args:
+        pixels (np.ndarray): (H, W, 4) RGBA uint8 image.
+        bounds (Optional[Tuple[int, int, int, int]]): (y0, y1, x0, x1) region to
+            analyse, e.g. the selection bounding box.
+        max_samples (int): Pixels read at most; bounds the run time.
+        reference (float): Temperature the image is meant to be corrected to.
+
+    Returns:
+        Optional[float]: Original temperature in Kelvin to use with target
+        reference, or None if no pixel is usable.
+    """
+    samples = sample_pixels(pixels, max_samples, bounds)
+    rgb = samples[:, :3]
+    usable = (samples[:, 3] >= 128) & (rgb.min(axis=1) >= _USABLE[0]) & (rgb.max(axis=1) <= _USABLE[1])
+    if not np.any(usable):
+        return None
+    average = rgb[usable].mean(axis=0, dtype=np.float64)
+
+    # Correcting T to reference multiplies by k(reference) / k(T): the average
+    # becomes gray when k(T) is proportional to average * k(reference)
+    temperatures, white_points = kelvin_table()
+    wanted = np.log(average * kelvin_to_rgb(reference) + 1e-3)
+    candidates = np.log(white_points.astype(np.float64) + 1e-3)
+    # Log chromaticity: brightness cancels out when subtracting green
+    wanted = wanted[[0, 2]] - wanted[1]
+    candidates = candidates[:, [0, 2]] - candidates[:, 1:2]
+    distances = np.square(candidates - wanted).sum(axis=1)
+    return float(temperatures[np.argmin(distances)])
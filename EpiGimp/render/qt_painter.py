@@ -6,3 +6,9 @@ def numpy_to_qimage(arr: np.ndarray) -> QImage:
     h, w, c = arr.shape
     assert c == 4
     return QImage(arr.data, w, h, 4 * w, QImage.Format_RGBA8888).copy()
+
+def qimage_to_numpy(image: QImage) -> np.ndarray:
+    image = image.convertToFormat(QImage.Format_RGBA8888)
+    h, w = image.height(), image.width()
+    arr = np.frombuffer(image.constBits(), dtype=np.uint8).reshape(h, image.bytesPerLine())
+    return arr[:, :w * 4].reshape(h, w, 4).copy()
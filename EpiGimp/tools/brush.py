@@ -36,4 +36,6 @@ class Brush(BaseTool):
                              self.size, self.size)
         painter.drawPixmap(rect.toRect(), self.sprite)
         painter.end() # Important: Save the painting
-        return rect.toRect().adjusted(-2, -2, 2, 2)
+        dirty = rect.toRect().adjusted(-2, -2, 2, 2)
+        layer.mark_dirty(dirty)
+        return dirty
@@ -29,6 +29,8 @@ class Eraser(BaseTool):
     #     return pixmap
 
     def apply(self, pos: QPoint, layer):
+        # On a layer mask (Grayscale8), transparent is written as black: the
+        # area is hidden rather than erased, and painting white brings it back
         painter = QPainter(layer.qimage)
         painter.setCompositionMode(QPainter.CompositionMode_Source)
         painter.setBrush(Qt.transparent)
@@ -39,4 +41,6 @@ class Eraser(BaseTool):
         painter.drawEllipse(rect)
         painter.end()
         # Pass to update to only update surface
-        return rect.toRect().adjusted(-2, -2, 2, 2)
+        dirty = rect.toRect().adjusted(-2, -2, 2, 2)
+        layer.mark_dirty(dirty)
+        return dirty
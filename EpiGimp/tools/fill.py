@@ -0,0 +1,69 @@
+from abc import abstractmethod
+from typing import Tuple
+
+from PySide6.QtCore import QPoint
+
+from EpiGimp.core.canva import Canva
+from EpiGimp.core.flood_fill import DEFAULT_TOLERANCE
+from EpiGimp.core.layer import Layer
+from EpiGimp.tools.base_tool import BaseTool
+
+
+class ColorRegionTool(BaseTool):
+    """
+    Base of the tools acting on the area of similar colors around a click.
+
+    They need the whole canvas (to sample the composite and read the
+    selection), so the canvas widget calls :meth:`click` instead of
+    :meth:`apply`.
+    """
+
+    def __init__(self, name: str, tooltip: str):
+        super().__init__(name, tooltip)
+        self.tolerance = DEFAULT_TOLERANCE
+        self.contiguous = True
+        self.sample_merged = False
+
+    @abstractmethod
+    def click(self, canva: Canva, pos: QPoint, mode: str = 'replace') -> bool:
+        """
+        Act on the region around pos.
+
+        Args:
+            canva (Canva): The canvas clicked.
+            pos (QPoint): Click position in canvas coordinates.
+            mode (str): Selection mode from the keyboard modifiers.
+
+        Returns:
+            bool: True if the canvas changed.
+        """
+        raise NotImplementedError
+
+    def apply(self, pos: QPoint, layer: Layer):
+        """Color region tools act through :meth:`click`."""
+        return None
+
+
+class FuzzySelect(ColorRegionTool):
+    """Magic wand: select the area of colors similar to the clicked one."""
+
+    def __init__(self):
+        super().__init__("Fuzzy Select", "Select areas of similar color")
+
+    def click(self, canva, pos, mode='replace'):
+        return canva.select_by_color(
+            pos.x(), pos.y(), self.tolerance, self.contiguous, self.sample_merged, mode
+        )
+
+
+class BucketFill(ColorRegionTool):
+    """Fill the area of colors similar to the clicked one, within the selection."""
+
+    def __init__(self, color: Tuple[int, int, int, int] = (0, 0, 0, 255)):
+        super().__init__("Bucket Fill", "Fill areas of similar color")
+        self.color = color
+
+    def click(self, canva, pos, mode='replace'):
+        return canva.bucket_fill(
+            pos.x(), pos.y(), self.color, self.tolerance, self.contiguous, self.sample_merged
+        )
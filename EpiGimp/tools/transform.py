@@ -0,0 +1,192 @@
+import math
+from abc import abstractmethod
+from typing import Optional
+
+import cv2 as cv
+import numpy as np
+from PySide6.QtCore import QPoint
+
+from EpiGimp.core.layer import Layer
+from EpiGimp.core.transform import corners, quad_matrix
+from EpiGimp.tools.base_tool import BaseTool
+
+
+class TransformTool(BaseTool):
+    """
+    Base of the interactive transform tools.
+
+    The transform is edited as the quadrilateral the layer's corners are
+    mapped to (the handles), in canvas coordinates. Dragging a corner handle
+    changes it according to the tool; dragging inside moves it. The canvas
+    widget previews it from a low resolution proxy and commits it with
+    :meth:`matrix` once the user validates.
+    """
+
+    #: Default resampling used on commit, see :data:`transform.INTERPOLATIONS`
+    interpolation = 'linear'
+
+    def __init__(self, name: str, tooltip: str):
+        super().__init__(name, tooltip)
+        self.layer: Optional[Layer] = None
+        self.quad: Optional[np.ndarray] = None
+        # Handle grab distance in canvas pixels; the widget sets it from its zoom
+        self.handle_radius = 6.0
+        self._grab: Optional[int] = None  # corner index, or -1 to move
+        self._start: Optional[np.ndarray] = None
+        self._start_quad: Optional[np.ndarray] = None
+
+    # =========================================================================
+    # Session
+    # =========================================================================
+
+    def begin(self, layer: Layer) -> None:
+        """Start editing a transform of layer, from the identity."""
+        self.layer = layer
+        self.quad = corners(layer.pixels.shape[:2], layer.position)
+
+    def reset(self) -> None:
+        """Drop the transform being edited."""
+        self.layer = None
+        self.quad = None
+        self._grab = None
+        self.is_drawing = False
+
+    @property
+    def active(self) -> bool:
+        return self.layer is not None
+
+    def matrix(self) -> np.ndarray:
+        """3x3 matrix of the edited transform, in layer pixel coordinates."""
+        return quad_matrix(self.layer.pixels.shape[:2], self.quad - np.asarray(self.layer.position, dtype=np.float64))
+
+    def canvas_matrix(self) -> np.ndarray:
+        """3x3 matrix from layer pixels to the canvas, as shown by the handles."""
+        return quad_matrix(self.layer.pixels.shape[:2], self.quad)
+
+    def handle_at(self, pos: QPoint) -> Optional[int]:
+        """Index of the corner handle under pos, -1 inside the quad, None elsewhere."""
+        point = np.array([pos.x(), pos.y()], dtype=np.float64)
+        distances = np.hypot(*(self.quad - point).T)
+        if distances.min() <= self.handle_radius:
+            return int(distances.argmin())
+        inside = cv.pointPolygonTest(self.quad.astype(np.float32), (float(point[0]), float(point[1])), False)
+        return -1 if inside >= 0 else None
+
+    # =========================================================================
+    # Mouse
+    # =========================================================================
+
+    def mouse_press(self, pos: QPoint):
+        super().mouse_press(pos)
+        if not self.active:
+            return
+        self._grab = self.handle_at(pos)
+        self._start = np.array([pos.x(), pos.y()], dtype=np.float64)
+        self._start_quad = self.quad.copy()
+
+    def mouse_move(self, pos: QPoint, layer: Layer = None):
+        if not self.is_drawing or self._grab is None or not self.active:
+            return
+        point = np.array([pos.x(), pos.y()], dtype=np.float64)
+        if self._grab == -1:
+            self.quad = self._start_quad + (point - self._start)
+        else:
+            self.quad = self.drag_corner(self._start_quad, self._grab, self._start, point)
+
+    def mouse_release(self, pos: QPoint):
+        super().mouse_release(pos)
+        self._grab = None
+
+    @abstractmethod
+    def drag_corner(self, quad: np.ndarray, index: int, start: np.ndarray, point: np.ndarray) -> np.ndarray:
+        """
+        New quad when corner index is dragged from start to point.
+
+        Args:
+            quad (np.ndarray): (4, 2) quad when the drag started.
+            index (int): Grabbed corner (top-left, top-right, bottom-right, bottom-left).
+            start (np.ndarray): Pointer position when the drag started.
+            point (np.ndarray): Current pointer position.
+        """
+        raise NotImplementedError
+
+    def apply(self, pos: QPoint, layer: Layer):
+        """Transforms are committed by the canvas widget, see :meth:`matrix`."""
+        return None
+
+
+class ScaleTool(TransformTool):
+    """Scale: the grabbed corner follows the pointer, the opposite one stays in place."""
+
+    def __init__(self):
+        super().__init__("Scale", "Scale the layer")
+
+    def drag_corner(self, quad, index, start, point):
+        anchor = quad[(index + 2) % 4]
+        # Scale along the quad's own edges, so a rotated layer keeps its angles
+        basis = np.column_stack([quad[1] - quad[0], quad[3] - quad[0]])
+        if abs(np.linalg.det(basis)) < 1e-9:
+            return quad
+        local_from = np.linalg.solve(basis, quad[index] - anchor)
+        local_to = np.linalg.solve(basis, point - anchor)
+        factors = np.divide(local_to, local_from, out=np.ones(2), where=np.abs(local_from) > 1e-9)
+        mapping = basis @ np.diag(factors) @ np.linalg.inv(basis)
+        return anchor + (quad - anchor) @ mapping.T
+
+
+class RotateTool(TransformTool):
+    """Rotate around the center of the quad; dragging anywhere rotates."""
+
+    def __init__(self):
+        super().__init__("Rotate", "Rotate the layer")
+
+    def handle_at(self, pos: QPoint) -> Optional[int]:
+        # Every grab rotates: report a corner so mouse_move calls drag_corner
+        return 0
+
+    def drag_corner(self, quad, index, start, point):
+        center = quad.mean(axis=0)
+        angle = (
+            math.atan2(point[1] - center[1], point[0] - center[0])
+            - math.atan2(start[1] - center[1], start[0] - center[0])
+        )
+        cos, sin = math.cos(angle), math.sin(angle)
+        return center + (quad - center) @ np.array([[cos, sin], [-sin, cos]])
+
+
+class SkewTool(TransformTool):
+    """
+    Skew: the edges meeting at the grabbed corner slide along themselves.
+
+    The horizontal edge moves along its direction and the vertical edge along
+    its own, so the quad stays a parallelogram.
+    """
+
+    def __init__(self):
+        super().__init__("Skew", "Skew the layer")
+
+    def drag_corner(self, quad, index, start, point):
+        delta = point - start
+        horizontal = quad[1] - quad[0]
+        vertical = quad[3] - quad[0]
+        result = quad.copy()
+        # Corners sharing the grabbed corner's top / bottom edge and left / right edge
+        row = (0, 1) if index in (0, 1) else (2, 3)
+        column = (0, 3) if index in (0, 3) else (1, 2)
+        for edge, corners_on_edge in ((horizontal, row), (vertical, column)):
+            length = np.dot(edge, edge)
+            if length > 1e-9:
+                result[list(corners_on_edge)] += edge * (np.dot(delta, edge) / length)
+        return result
+
+
+class PerspectiveTool(TransformTool):
+    """Perspective: each corner handle moves freely."""
+
+    def __init__(self):
+        super().__init__("Perspective", "Change the perspective of the layer")
+
+    def drag_corner(self, quad, index, start, point):
+        result = quad.copy()
+        result[index] += point - start
+        return result
@@ -5,6 +5,10 @@ from PySide6.QtCore import Qt, Signal, QTimer
 from PySide6.QtGui import QPixmap, QImage
 import numpy as np
 
+from EpiGimp.core.layer_group import iter_layers
+from EpiGimp.core.point_ops import apply_lut, color_temperature_lut
+from EpiGimp.ui.widgets.histogram_widget import HistogramWidget
+
 
 class ColorTemperatureDialog(QDialog):
     temperature_changed = Signal(float, float, float)
@@ -14,23 +18,40 @@ class ColorTemperatureDialog(QDialog):
         self.canva_widget = canva_widget
         self.original_temp = 6500.0
         self.target_temp = 6500.0
-        self.original_pixels = None
         
+        # The preview is drawn by the canvas widget on the displayed pixels only;
+        # layers are left untouched until the dialog is accepted
         self.update_timer = QTimer(self)
         self.update_timer.setSingleShot(True)
         self.update_timer.timeout.connect(self._do_update_preview)
         
+        # When the active layer is a color temperature adjustment layer, its
+        # parameters are edited live instead (saved here for cancel)
+        self.adjustment_layer = None
+        self.saved_adjustment = None
         if self.canva_widget:
-            canva = self.canva_widget.canva
-            active_layer = canva.active_layer
-            if active_layer:
-                self.original_pixels = active_layer.pixels.copy()
+            active_layer = self.canva_widget.canva.active_layer
+            if active_layer is not None and active_layer.is_adjustment and active_layer.kind == 'color_temperature':
+                self.adjustment_layer = active_layer
+                self.saved_adjustment = (dict(active_layer.params), active_layer.opacity)
         
         self.setWindowTitle("Température de couleur")
         self.setModal(True)
         self.setMinimumSize(500, 400)
         
         self.init_ui()
+        
+        if self.adjustment_layer is not None:
+            params, opacity = self.saved_adjustment
+            self.original_spinbox.setValue(params.get('original_temp', 6500.0))
+            self.target_spinbox.setValue(params.get('target_temp', 6500.0))
+            self.opacity_spinbox.setValue(opacity * 100.0)
+            self.merge_checkbox.setVisible(False)
+            self.adjustment_checkbox.setVisible(False)
+            self.split_view_checkbox.setVisible(False)
+            self.auto_btn.setEnabled(False)
+        
+        self._update_histogram()
     
     def init_ui(self):
         layout = QVBoxLayout(self)
@@ -61,6 +82,10 @@ class ColorTemperatureDialog(QDialog):
         
         layout.addLayout(header_layout)
         
+        # Histogram of the pixels being adjusted, as they would be after the adjustment
+        self.histogram_widget = HistogramWidget(self)
+        layout.addWidget(self.histogram_widget)
+        
         presets_layout = QHBoxLayout()
         presets_label = QLabel("Préréglages :", self)
         self.presets_combo = QComboBox(self)
@@ -107,8 +132,13 @@ class ColorTemperatureDialog(QDialog):
         original_slider.valueChanged.connect(self.original_spinbox.setValue)
         self.original_spinbox.valueChanged.connect(original_slider.setValue)
         
+        self.auto_btn = QPushButton("Auto", self)
+        self.auto_btn.setToolTip("Estimer la température à partir du calque actif ou de la sélection")
+        self.auto_btn.clicked.connect(self._on_auto)
+        
         original_layout.addWidget(self.original_spinbox)
         original_layout.addWidget(original_slider, 1)
+        original_layout.addWidget(self.auto_btn)
         
         info_label = QLabel("Température en Kelvins estimée de la source de lumière lors de la prise de vue.", self)
         info_label.setStyleSheet("color: #888; font-size: 10px; padding: 5px;")
@@ -183,11 +213,18 @@ class ColorTemperatureDialog(QDialog):
         self.preview_checkbox.stateChanged.connect(self._on_preview_toggled)
         
         self.merge_checkbox = QCheckBox("Merge filter", self)
+        self.merge_checkbox.setToolTip("Appliquer à toutes les couches")
+        self.merge_checkbox.stateChanged.connect(self.update_preview)
         self.split_view_checkbox = QCheckBox("Diviser la vue", self)
+        self.split_view_checkbox.stateChanged.connect(self.update_preview)
+        self.adjustment_checkbox = QCheckBox("Calque de réglage", self)
+        self.adjustment_checkbox.setToolTip("Ajouter un calque de réglage non destructif au lieu de modifier les pixels")
+        self.adjustment_checkbox.stateChanged.connect(self.update_preview)
         
         preview_layout.addWidget(self.preview_checkbox)
         preview_layout.addWidget(self.merge_checkbox)
         preview_layout.addWidget(self.split_view_checkbox)
+        preview_layout.addWidget(self.adjustment_checkbox)
         preview_layout.addStretch()
         
         layout.addLayout(preview_layout)
@@ -226,6 +263,13 @@ class ColorTemperatureDialog(QDialog):
         if index in presets and presets[index] is not None:
             self.target_spinbox.setValue(presets[index])
     
+    def _on_auto(self):
+        if not self.canva_widget:
+            return
+        estimate = self.canva_widget.canva.estimate_temperature(self.target_temp)
+        if estimate is not None:
+            self.original_spinbox.setValue(estimate)
+    
     def _on_original_changed(self, value):
         self.original_temp = value
         self.update_preview()
@@ -253,41 +297,73 @@ class ColorTemperatureDialog(QDialog):
     def _on_accept(self):
         self.update_timer.stop()
         
-        if self.canva_widget and self.original_pixels is not None:
+        if self.canva_widget:
+            self.canva_widget.clear_preview()
             canva = self.canva_widget.canva
-            active_layer = canva.active_layer
+            opacity = self.opacity_spinbox.value() / 100.0
+            params = {'original_temp': self.original_temp, 'target_temp': self.target_temp}
+            
+            if self.adjustment_layer is not None:
+                # Already applied live
+                self._apply_to_adjustment_layer(opacity)
+            elif self.adjustment_checkbox.isChecked():
+                adjustment = canva.add_adjustment_layer('color_temperature', params)
+                adjustment.set_opacity(opacity)
+                self.canva_widget.layer_changed.emit(canva)
+            elif self.merge_checkbox.isChecked():
+                # Full resolution is only processed once, here
+                canva.adjust_color_temperature(self.original_temp, self.target_temp, opacity)
+            elif canva.pixel_layer:
+                canva.pixel_layer.adjust_color_temperature(self.original_temp, self.target_temp, opacity)
+            
+            self.canva_widget.set_temperature_settings(
+                self.original_temp,
+                self.target_temp
+            )
             
-            if active_layer:
-                opacity = self.opacity_spinbox.value() / 100.0
-                
-                active_layer.pixels = self.original_pixels.copy()
-                active_layer.adjust_color_temperature(
-                    self.original_temp, 
-                    self.target_temp, 
-                    opacity
-                )
-                
-                self.canva_widget.set_temperature_settings(
-                    self.original_temp,
-                    self.target_temp
-                )
-                
-                self.canva_widget.draw_canva()
+            self.canva_widget.draw_canva()
         
         self.accept()
     
     def _on_cancel(self):
+        self.reject()
+    
+    def reject(self):
+        # Also reached through Escape and the close button
         self.update_timer.stop()
         self._restore_original()
-        self.reject()
+        super().reject()
     
     def _restore_original(self):
-        if self.canva_widget and self.original_pixels is not None:
-            canva = self.canva_widget.canva
-            active_layer = canva.active_layer
-            if active_layer:
-                active_layer.pixels = self.original_pixels.copy()
-                self.canva_widget.draw_canva()
+        if self.canva_widget:
+            if self.adjustment_layer is not None:
+                params, opacity = self.saved_adjustment
+                self.adjustment_layer.set_params(**params)
+                self.adjustment_layer.set_opacity(opacity)
+            self.canva_widget.clear_preview()
+            self.canva_widget.draw_canva()
+            self._update_histogram()
+    
+    def _source_statistics(self):
+        """Statistics of the pixels the adjustment applies to (cached per tile by the canva)."""
+        canva = self.canva_widget.canva
+        if self.adjustment_layer is not None:
+            below = canva.layers[:canva.layers.index(self.adjustment_layer)]
+            return canva.statistics.composite_stats(below, canva.shape)
+        merged = self.merge_checkbox.isChecked() or self.adjustment_checkbox.isChecked()
+        if merged or not canva.pixel_layer:
+            return canva.image_statistics()
+        return canva.image_statistics(canva.pixel_layer)
+    
+    def _update_histogram(self, lut=None):
+        if not self.canva_widget:
+            return
+        statistics = self._source_statistics()
+        self.histogram_widget.set_statistics(statistics if lut is None else statistics.mapped(lut))
+    
+    def _apply_to_adjustment_layer(self, opacity):
+        self.adjustment_layer.set_params(original_temp=self.original_temp, target_temp=self.target_temp)
+        self.adjustment_layer.set_opacity(opacity)
     
     def _on_help(self):
         from PySide6.QtWidgets import QMessageBox
@@ -320,21 +396,40 @@ class ColorTemperatureDialog(QDialog):
         
         opacity = self.opacity_spinbox.value() / 100.0
         
+        if self.adjustment_layer is not None:
+            # The compositor restarts from the cached tiles below the layer:
+            # a parameter change costs one lookup table pass
+            self._apply_to_adjustment_layer(opacity)
+            self.canva_widget.draw_canva()
+            self._update_histogram(color_temperature_lut(self.original_temp, self.target_temp, opacity))
+            return
+        
         canva = self.canva_widget.canva
-        active_layer = canva.active_layer
+        pixel_layer = canva.pixel_layer
+        adjustment = self.adjustment_checkbox.isChecked()
+        all_layers = self.merge_checkbox.isChecked() and not adjustment
         
-        if not active_layer:
+        if not pixel_layer and not (adjustment or all_layers):
             return
         
-        active_layer.pixels = self.original_pixels.copy()
-        
-        active_layer.adjust_color_temperature(
-            self.original_temp, 
-            self.target_temp, 
-            opacity
+        if adjustment:
+            # The adjustment layer goes on top: it filters the flattened image
+            layers = None
+        elif all_layers:
+            # Accepting edits every pixel layer, below any adjustment layer and
+            # inside groups, so each is filtered before blending
+            layers = [layer for layer in iter_layers(canva.layers) if not layer.is_adjustment]
+        else:
+            layers = [pixel_layer]
+        
+        # Rendered on the visible, display-resolution pixels only
+        lut = color_temperature_lut(self.original_temp, self.target_temp, opacity)
+        self.canva_widget.set_preview(
+            lambda pixels: apply_lut(pixels, lut),
+            layers=layers,
+            split=self.split_view_checkbox.isChecked()
         )
-        
-        self.canva_widget.draw_canva()
+        self._update_histogram(lut)
     
     def get_settings(self):
         return {
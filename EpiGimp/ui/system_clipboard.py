@@ -0,0 +1,108 @@
+from typing import Optional
+
+import cv2 as cv
+from PySide6.QtCore import QByteArray, QMimeData
+from PySide6.QtGui import QClipboard, QGuiApplication
+
+from EpiGimp.core.clipboard import Clipboard
+from EpiGimp.render.qt_painter import numpy_to_qimage, qimage_to_numpy
+
+PNG_MIME = 'image/png'
+QT_IMAGE_MIME = 'application/x-qt-image'
+# Tags our own content, since ownsClipboard() is not reliable on every platform
+OWN_MIME = 'application/x-epigimp-clipboard'
+
+
+class _LazyImageData(QMimeData):
+    """
+    Clipboard content announced to the system without being encoded.
+
+    The PNG (or QImage) is only produced if another application asks for it,
+    so copying inside the app costs nothing extra.
+    """
+
+    def __init__(self, clipboard: Clipboard) -> None:
+        super().__init__()
+        self._clipboard = clipboard
+        self._serial = clipboard.serial
+
+    def formats(self):
+        return [PNG_MIME, QT_IMAGE_MIME, OWN_MIME]
+
+    def hasFormat(self, mime_type: str) -> bool:
+        return mime_type in self.formats()
+
+    def retrieveData(self, mime_type: str, preferred_type):
+        if mime_type == OWN_MIME:
+            return QByteArray(str(self._serial).encode())
+        pixels = self._clipboard.pixels() if self._clipboard.serial == self._serial else None
+        if pixels is None:
+            return None
+        if mime_type == QT_IMAGE_MIME:
+            return numpy_to_qimage(pixels)
+        if mime_type == PNG_MIME:
+            ok, encoded = cv.imencode('.png', cv.cvtColor(pixels, cv.COLOR_RGBA2BGRA))
+            return QByteArray(encoded.tobytes()) if ok else None
+        return None
+
+
+class SystemClipboard:
+    """
+    Keeps the app clipboard and the system clipboard in sync, lazily.
+
+    Copies are published as a promise (see :class:`_LazyImageData`); images
+    copied by other applications are only converted when pasted, by
+    :meth:`import_foreign`.
+    """
+
+    def __init__(self, clipboard: Clipboard) -> None:
+        """
+        Start publishing every change of clipboard.
+
+        Args:
+            clipboard (Clipboard): The application clipboard.
+        """
+        self.clipboard = clipboard
+        self._importing = False
+        clipboard.subscribe(self.publish)
+
+    def _system(self) -> Optional[QClipboard]:
+        return QGuiApplication.clipboard() if QGuiApplication.instance() is not None else None
+
+    def publish(self) -> None:
+        """Announce the app clipboard content to the system clipboard."""
+        system = self._system()
+        if system is None or self._importing:
+            return
+        if self.clipboard.is_empty():
+            if system.ownsClipboard():
+                system.clear()
+            return
+        system.setMimeData(_LazyImageData(self.clipboard))
+
+    def import_foreign(self) -> bool:
+        """
+        Take an image copied by another application into the app clipboard.
+
+        Returns:
+            bool: True if the app clipboard content was replaced.
+        """
+        system = self._system()
+        if system is None or system.ownsClipboard():
+            return False
+        mime = system.mimeData()
+        if mime is None or mime.hasFormat(OWN_MIME) or not mime.hasImage():
+            return False
+        image = system.image()
+        if image.isNull():
+            return False
+        self._importing = True
+        try:
+            self.clipboard.set_pixels(qimage_to_numpy(image))
+        finally:
+            self._importing = False
+        return True
+
+    def close(self) -> None:
+        """Stop publishing changes."""
+        self.clipboard.unsubscribe(self.publish)
@@ -0,0 +1,96 @@
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+from PySide6.QtCore import QCoreApplication, QObject, Signal, Slot
+from PySide6.QtGui import QImage, QPixmap
+
+from EpiGimp.core.thumbnails import ThumbnailCache, make_thumbnail
+
+
+class ThumbnailService(QObject):
+    """
+    Renders layer thumbnails on a worker thread and caches them per layer version.
+
+    :meth:`thumbnail` never blocks: it returns the cached thumbnail (possibly
+    outdated) and queues a render if it is not current. :attr:`ready` is
+    emitted on the GUI thread once a render is done. The worker is a single
+    thread of its own, so a panel full of layers never holds up the
+    compositor's pool.
+
+    :attr:`source` reads the pixels a thumbnail is rendered from, typically
+    :meth:`Canva.thumbnail_source`, a reduced mipmap level. Without one, the
+    full resolution pixels are used.
+    """
+
+    # Emitted with the layer whose thumbnail was rendered
+    ready = Signal(object)
+    # Emitted from the worker: layer, size, version, thumbnail
+    _rendered = Signal(object, int, int, object)
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.cache = ThumbnailCache()
+        # Called on the GUI thread with a layer and a size
+        self.source: Optional[Callable[[object, int], np.ndarray]] = None
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnails")
+        # Per layer, the sizes being rendered
+        self._pending: "weakref.WeakKeyDictionary[object, set]" = weakref.WeakKeyDictionary()
+        self._rendered.connect(self._on_rendered)
+        # Drop queued renders with the service or the app (the interpreter
+        # would wait for them on exit); the one running completes
+        worker = self._worker
+        shutdown = lambda: worker.shutdown(wait=False, cancel_futures=True)  # noqa: E731
+        self.destroyed.connect(shutdown)
+        if QCoreApplication.instance() is not None:
+            QCoreApplication.instance().aboutToQuit.connect(shutdown)
+
+    def thumbnail(self, layer, size: int) -> Optional[QPixmap]:
+        """
+        The thumbnail of layer, rendering it in the background if outdated.
+
+        Args:
+            layer: Layer to preview. Adjustment layers have none.
+            size (int): Thumbnail edge.
+
+        Returns:
+            Optional[QPixmap]: The latest thumbnail rendered, or None if there
+            is none yet.
+        """
+        if getattr(layer, 'is_adjustment', False):
+            return None
+        if not self.cache.is_current(layer, size):
+            self.request(layer, size)
+        thumbnail = self.cache.get(layer, size, current=False)
+        return None if thumbnail is None else _to_pixmap(thumbnail)
+
+    def request(self, layer, size: int) -> None:
+        """Queue a render of the thumbnail of layer, unless one is already queued."""
+        pending = self._pending.setdefault(layer, set())
+        if size in pending:
+            return
+        pending.add(size)
+        # Read on the GUI thread: accessing pixels may apply a pending flip,
+        # and mipmap levels are refreshed in place
+        version = layer.version
+        pixels = layer.pixels if self.source is None else self.source(layer, size)
+        self._worker.submit(self._render, layer, size, version, pixels)
+
+    def _render(self, layer, size: int, version: int, pixels: np.ndarray) -> None:
+        self._rendered.emit(layer, size, version, make_thumbnail(pixels, size))
+
+    @Slot(object, int, int, object)
+    def _on_rendered(self, layer, size: int, version: int, thumbnail: np.ndarray) -> None:
+        self._pending.get(layer, set()).discard(size)
+        self.cache.put(layer, size, version, thumbnail)
+        if layer.version != version:
+            # Edited while rendering: the result is already outdated
+            self.request(layer, size)
+        self.ready.emit(layer)
+
+
+def _to_pixmap(thumbnail: np.ndarray) -> QPixmap:
+    height, width = thumbnail.shape[:2]
+    image = QImage(thumbnail.data, width, height, 4 * width, QImage.Format.Format_RGBA8888_Premultiplied)
+    return QPixmap.fromImage(image)
@@ -1,18 +1,41 @@
 from __future__ import annotations
 import typing
-from typing import Optional, Dict
+import math
+from typing import Optional, Dict, Sequence, Tuple
 
-from PySide6.QtCore import Qt, QPoint, Signal, Slot
+import numpy as np
+from PySide6.QtCore import Qt, QPoint, QPointF, QRect, QRectF, Signal, Slot
 from PySide6.QtWidgets import QTabWidget, QWidget
-from PySide6.QtGui import QPainter, QPixmap, QMouseEvent, QPaintEvent, QImage, QPen
+from PySide6.QtGui import QPainter, QPainterPath, QMouseEvent, QPaintEvent, QImage, QPen, QPolygonF, QWheelEvent, QResizeEvent, QKeyEvent
 
 from EpiGimp.core.fileio.loader_png import LoaderPng
 from EpiGimp.core.canva import Canva
+from EpiGimp.core.compositor import PixelFilter
+from EpiGimp.core.mipmap import level_for_zoom
+from EpiGimp.core.selection import SelectionMask
+from EpiGimp.core.transform import TransformPreview
+from EpiGimp.render.qt_painter import numpy_to_qimage
+from EpiGimp.ui.system_clipboard import SystemClipboard
+from EpiGimp.tools.fill import ColorRegionTool
+from EpiGimp.tools.transform import TransformTool
 
 if typing.TYPE_CHECKING:
     from EpiGimp.core.layer import Layer
 
 
+def selection_mode(modifiers: Qt.KeyboardModifier) -> str:
+    """How a new selection combines with the current one: Shift adds, Ctrl subtracts, both intersect."""
+    shift = bool(modifiers & Qt.KeyboardModifier.ShiftModifier)
+    ctrl = bool(modifiers & Qt.KeyboardModifier.ControlModifier)
+    if shift and ctrl:
+        return 'intersect'
+    if shift:
+        return 'add'
+    if ctrl:
+        return 'subtract'
+    return 'replace'
+
+
 class CanvasWidget(QTabWidget):
     """
     A container widget (Tabbed Interface) that holds multiple CanvaWidget instances.
@@ -31,6 +54,9 @@ class CanvasWidget(QTabWidget):
         """
         super().__init__(parent)
         self.setMouseTracking(True) # Ensure mouse move events are captured
+        # Every tab copies to and pastes from the same clipboard, mirrored to the system one
+        self.system_clipboard = SystemClipboard(Canva.clipboard)
+        self.destroyed.connect(self.system_clipboard.close)
 
     @Slot(Canva)
     def add_canva(self, canva: Canva) -> None:
@@ -79,12 +105,21 @@ class CanvaWidget(QWidget):
     """
     The visual representation of a single image project (Canva).
     
-    Handles rendering the internal Layer stack to a QPixmap and 
+    Handles rendering the internal Layer stack to a QImage and 
     displaying it via QPainter.
+
+    The view can be zoomed and panned. Only the part of the canvas visible in
+    the widget is composited, and when zoomed out it is read from the layers'
+    mipmap pyramids, so the cost of a frame follows the widget size rather
+    than the image size.
     """
     
     layer_changed = Signal(Canva)
 
+    MIN_ZOOM = 1.0 / 256.0
+    MAX_ZOOM = 64.0
+    ZOOM_STEP = 1.25
+
     def __init__(self, canva: Canva, parent: Optional[QWidget] = None) -> None:
         """
         Initialize the widget with a Canva object.
@@ -96,10 +131,18 @@ class CanvaWidget(QWidget):
         super().__init__(parent)
         self.canva: Canva = canva
         
-        # Determine initial shape (Width, Height)
-        # Note: Canva shape is usually (H, W), QPixmap takes (W, H)
-        shape_wh = (canva.shape[1], canva.shape[0])
-        self.canvas_buffer = QPixmap(*shape_wh)
+        # Rendered part of the canvas and the canvas area (in image pixels) it covers
+        self.canvas_buffer = QImage()
+        self.buffer_rect = QRect()
+
+        # View state: screen pixels per image pixel, and widget position of the image origin
+        self.zoom: float = 1.0
+        self.pan = QPointF(0, 0)
+        self._pan_start: Optional[QPointF] = None
+
+        # Live preview of a filter: (filter, layer or None for the merged image, split view)
+        self._preview: Optional[Tuple[PixelFilter, Optional[Tuple[Layer, ...]], bool]] = None
+        self._split_x: Optional[int] = None
         
         self.setMinimumSize(400, 300)
         self.setMouseTracking(True)
@@ -115,6 +158,16 @@ class CanvaWidget(QWidget):
         self.moving_selection = False
         self.move_start_point = None
         self._temp_selection_offset = QPoint(0, 0)
+        # Mode of the selection being drawn, and the outline of the last selection drawn
+        self._selection_mode = 'replace'
+        self._outline: Optional[Tuple[SelectionMask, QPainterPath]] = None
+
+        # Transform being edited: proxy of the layer, its warped image and area,
+        # and the layer visibility to restore (the layer is hidden meanwhile)
+        self._transform_preview: Optional[TransformPreview] = None
+        self._transform_image: Optional[Tuple[QImage, QRectF]] = None
+        self._transform_visibility = True
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
         
         # Signals
         self.layer_changed.connect(self.draw_canva)
@@ -170,6 +223,47 @@ class CanvaWidget(QWidget):
         self.canva.swap_layer(fst, snd)
         self.layer_changed.emit(self.canva)
 
+    def group_layer(self, idx: int) -> None:
+        """
+        Group a layer with the one below it.
+
+        Args:
+            idx (int): Index of the upper layer.
+        """
+        if self.canva.group_layers(max(idx - 1, 0), idx + 1) is not None:
+            self.layer_changed.emit(self.canva)
+
+    def ungroup_layer(self, idx: int) -> None:
+        """
+        Replace a layer group by its children.
+
+        Args:
+            idx (int): Index of the group.
+        """
+        if self.canva.ungroup_layer(idx):
+            self.layer_changed.emit(self.canva)
+
+    def add_layer_mask(self) -> None:
+        """Give the active layer a white mask and start painting on it."""
+        if self.canva.add_layer_mask() is not None:
+            self.canva.editing_mask = True
+            self.layer_changed.emit(self.canva)
+
+    def set_editing_mask(self, state: bool) -> None:
+        """Paint on the mask of the active layer (if it has one) instead of its pixels."""
+        self.canva.editing_mask = state
+
+    def remove_layer_mask(self, apply: bool = False) -> None:
+        """
+        Drop the mask of the active layer.
+
+        Args:
+            apply (bool): Keep its effect by multiplying it into the layer's alpha.
+        """
+        if self.canva.remove_layer_mask(apply=apply):
+            self.draw_canva()
+            self.layer_changed.emit(self.canva)
+
     # =========================================================================
     # Drawing & Rendering
     # =========================================================================
@@ -179,7 +273,21 @@ class CanvaWidget(QWidget):
         Qt Paint Event. Draws the internal buffer to the screen.
         """
         painter = QPainter(self)
-        painter.drawPixmap(0, 0, self.canvas_buffer)
+        painter.fillRect(self.rect(), Qt.GlobalColor.darkGray)
+
+        # Everything below is drawn in image coordinates
+        painter.translate(self.pan)
+        painter.scale(self.zoom, self.zoom)
+        canvas_rect = QRectF(0, 0, self.canva.shape[1], self.canva.shape[0])
+        painter.fillRect(canvas_rect, Qt.GlobalColor.white)
+        if not self.canvas_buffer.isNull():
+            # Reduced levels may round past the canvas edge by a fraction of a level pixel
+            painter.setClipRect(canvas_rect)
+            painter.drawImage(QRectF(self.buffer_rect), self.canvas_buffer)
+            painter.setClipping(False)
+
+        if self._transform_image is not None:
+            self._paint_transform(painter)
         
         # Draw selection overlay if there's an active selection
         if self.canva.has_selection():
@@ -190,21 +298,33 @@ class CanvaWidget(QWidget):
                 if self.moving_selection and not self._temp_selection_offset.isNull():
                     display_rect = selection_rect.translated(self._temp_selection_offset)
                 
-                # Draw selection with dashed line
+                # Draw selection with dashed line, 1 screen pixel wide at any zoom
                 pen = QPen(Qt.GlobalColor.black, 1, Qt.PenStyle.DashLine)
+                pen.setCosmetic(True)
                 painter.setPen(pen)
                 painter.setBrush(Qt.BrushStyle.NoBrush)
                 
                 if selection_type == 'ellipse':
                     painter.drawEllipse(display_rect)
+                elif selection_type == 'mask':
+                    offset = display_rect.topLeft() - selection_rect.topLeft()
+                    painter.drawPath(self._selection_outline().translated(QPointF(offset)))
                 else:  # rectangle
                     painter.drawRect(display_rect)
         
+        # Split view: filtered on the left, original on the right
+        if self._split_x is not None:
+            pen = QPen(Qt.GlobalColor.red, 1, Qt.PenStyle.DashLine)
+            pen.setCosmetic(True)
+            painter.setPen(pen)
+            painter.drawLine(QPointF(self._split_x, 0), QPointF(self._split_x, self.canva.shape[0]))
+
         # Draw current selection being created (if using selection tool)
         if self.current_tool and hasattr(self.current_tool, 'get_selection') and not self.moving_selection:
             temp_selection = self.current_tool.get_selection()
             if temp_selection and not temp_selection.isEmpty():
                 pen = QPen(Qt.GlobalColor.white, 1, Qt.PenStyle.DashLine)
+                pen.setCosmetic(True)
                 painter.setPen(pen)
                 painter.setBrush(Qt.BrushStyle.NoBrush)
                 
@@ -218,39 +338,143 @@ class CanvaWidget(QWidget):
     @Slot()
     def draw_canva(self) -> None:
         """
-        Render the Core Canva object into the GUI QPixmap buffer.
+        Render the visible part of the Core Canva object into the GUI buffer.
         
-        This composites all layers in the Canva object and updates the UI.
+        Only the tiles under the viewport are composited, from the mipmap level
+        matching the current zoom, then the screen update is scheduled. While a
+        preview is set, its filter is applied to those pixels only.
         """
-        # 
-        
-        # Check if buffer needs resizing (if canvas shape changed)
-        # current_w, current_h = self.canva.shape[1], self.canva.shape[0]
-        # if (self.canvas_buffer.width(), self.canvas_buffer.height()) != (current_w, current_h):
-        #      self.canvas_buffer = QPixmap(current_w, current_h)
-
-        # Begin painting on the off-screen buffer
-        painter = QPainter(self.canvas_buffer)
-        
-        # 1. Clear background
-        self.canvas_buffer.fill(Qt.GlobalColor.white)
-        
-        # 2. Get composited image from Core
-        # Assumption: get_img() returns a Layer object which has a .qimage property
-        layer: Layer = self.get_img()
-        
-        # 3. Draw to buffer
-        if hasattr(layer, 'qimage'):
-            qimg: QImage = layer.qimage.copy()
-            painter.drawImage(0, 0, qimg)
+        visible = self.visible_canvas_rect()
+        self._split_x = None
+        if visible.isEmpty():
+            self.canvas_buffer = QImage()
+            self.buffer_rect = QRect()
         else:
-            print("Warning: Rendered layer has no 'qimage' property.")
+            level = level_for_zoom(self.zoom)
+            step = 1 << level
+            x, y, w, h = visible.x(), visible.y(), visible.width(), visible.height()
+            if self._preview is not None and self._preview[2] and w >= 2 * step:
+                # Split on a level pixel boundary so both halves line up
+                split = ((x + w // 2) // step) * step
+                pixels = np.hstack([
+                    self._render_region((x, y, split - x, h), level, filtered=True),
+                    self._render_region((split, y, x + w - split, h), level, filtered=False),
+                ])
+                self._split_x = split
+            else:
+                pixels = self._render_region((x, y, w, h), level, filtered=True)
+            self.canvas_buffer = numpy_to_qimage(pixels)
+            # The level region is rounded outwards to whole level pixels
+            self.buffer_rect = QRect(
+                (x // step) * step, (y // step) * step,
+                pixels.shape[1] * step, pixels.shape[0] * step
+            )
+        self.update()
+
+    def redraw_region(self, rect: Tuple[int, int, int, int]) -> None:
+        """
+        Re-composite part of the displayed buffer, after a change confined to rect.
 
+        Args:
+            rect (Tuple[int, int, int, int]): (x, y, width, height) in canvas pixels.
+        """
+        if self.canvas_buffer.isNull() or self._preview is not None:
+            self.draw_canva()
+            return
+        step = self.buffer_rect.width() // self.canvas_buffer.width()
+        # Whole level pixels, inside the buffer
+        area = QRect(*rect).intersected(self.buffer_rect)
+        if area.isEmpty():
+            return
+        x0, y0 = (area.left() // step) * step, (area.top() // step) * step
+        x1, y1 = -(-(area.right() + 1) // step) * step, -(-(area.bottom() + 1) // step) * step
+        pixels = self.canva.composite_region((x0, y0, x1 - x0, y1 - y0), step.bit_length() - 1)
+        painter = QPainter(self.canvas_buffer)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+        painter.drawImage(
+            QPoint((x0 - self.buffer_rect.x()) // step, (y0 - self.buffer_rect.y()) // step),
+            numpy_to_qimage(pixels)
+        )
         painter.end()
-        
-        # 4. Schedule screen update
         self.update()
 
+    def _end_selection_move(self, area: Tuple[int, int, int, int]) -> None:
+        """Leave selection moving mode, redrawing the area where the pixels landed."""
+        self.moving_selection = False
+        self.move_start_point = None
+        self._temp_selection_offset = QPoint(0, 0)
+        self.redraw_region(area)
+
+    def _selection_outline(self) -> QPainterPath:
+        """Outline of the canvas selection, traced once per selection."""
+        selection = self.canva.selection
+        if self._outline is None or self._outline[0] is not selection:
+            path = QPainterPath()
+            for contour in selection.outline():
+                # Contours run through pixel centers of the border pixels; draw around them
+                path.addPolygon(QPolygonF([QPointF(x + 0.5, y + 0.5) for x, y in contour]))
+                path.closeSubpath()
+            self._outline = (selection, path)
+        return self._outline[1]
+
+    def _paint_transform(self, painter: QPainter) -> None:
+        """Draw the transform preview and its handles, in image coordinates."""
+        image, area = self._transform_image
+        painter.setOpacity(self.current_tool.layer.opacity)
+        painter.drawImage(area, image)
+        painter.setOpacity(1.0)
+
+        pen = QPen(Qt.GlobalColor.cyan, 1)
+        pen.setCosmetic(True)
+        painter.setPen(pen)
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        corners = [QPointF(x, y) for x, y in self.current_tool.quad]
+        painter.drawPolygon(QPolygonF(corners))
+        size = 8.0 / self.zoom
+        for corner in corners:
+            painter.drawRect(QRectF(corner.x() - size / 2, corner.y() - size / 2, size, size))
+
+    def _render_region(self, rect: Tuple[int, int, int, int], level: int, filtered: bool) -> np.ndarray:
+        """Composite part of the canvas, with the preview filter when filtered is set."""
+        if not filtered or self._preview is None:
+            return self.canva.composite_region(rect, level)
+        pixel_filter, layers, _ = self._preview
+        if layers is None:
+            # Merged preview: filter the flattened image
+            return pixel_filter(self.canva.composite_region(rect, level))
+        return self.canva.composite_region(rect, level, filters={layer: pixel_filter for layer in layers})
+
+    def set_preview(
+        self,
+        pixel_filter: PixelFilter,
+        layer: Optional[Layer] = None,
+        split: bool = False,
+        layers: Optional[Sequence[Layer]] = None
+    ) -> None:
+        """
+        Show a filter applied to the displayed pixels, without modifying any layer.
+
+        The filter only runs on the visible region at the display resolution,
+        which keeps slider previews interactive on large images.
+
+        Args:
+            pixel_filter (PixelFilter): Function mapping RGBA uint8 pixels to new pixels.
+            layer (Optional[Layer]): Layer to filter. None filters the merged image.
+            split (bool): Only filter the left half of the view, for comparison.
+            layers (Optional[Sequence[Layer]]): Several layers to filter, each
+                before blending, like an edit applied to each of them. Overrides layer.
+        """
+        if layers is None and layer is not None:
+            layers = [layer]
+        self._preview = (pixel_filter, None if layers is None else tuple(layers), split)
+        self.draw_canva()
+
+    def clear_preview(self) -> None:
+        """Remove the preview set by :meth:`set_preview`."""
+        if self._preview is not None:
+            self._preview = None
+            self.draw_canva()
+
     def get_img(self) -> Layer:
         """
         Proxy method to get the composited image from the core Canva.
@@ -260,6 +484,102 @@ class CanvaWidget(QWidget):
         """
         return self.canva.get_img()
 
+    # =========================================================================
+    # View (Zoom & Pan)
+    # =========================================================================
+
+    def map_to_canvas(self, pos: QPointF) -> QPoint:
+        """
+        Convert a widget position to image pixel coordinates.
+
+        Args:
+            pos (QPointF): Position in widget coordinates.
+
+        Returns:
+            QPoint: The image pixel under pos (may be outside of the canvas).
+        """
+        return QPoint(
+            math.floor((pos.x() - self.pan.x()) / self.zoom),
+            math.floor((pos.y() - self.pan.y()) / self.zoom)
+        )
+
+    def visible_canvas_rect(self) -> QRect:
+        """Area of the canvas (in image pixels) currently shown in the widget."""
+        top_left = self.map_to_canvas(QPointF(0, 0))
+        bottom_right = self.map_to_canvas(QPointF(self.width(), self.height()))
+        view = QRect(top_left, bottom_right).adjusted(0, 0, 1, 1)
+        return view.intersected(QRect(0, 0, self.canva.shape[1], self.canva.shape[0]))
+
+    def set_zoom(self, zoom: float, anchor: Optional[QPointF] = None) -> None:
+        """
+        Change the zoom factor, keeping the image point under anchor in place.
+
+        Args:
+            zoom (float): Screen pixels per image pixel.
+            anchor (Optional[QPointF]): Widget position to zoom around. Defaults
+                to the widget center.
+        """
+        zoom = min(max(zoom, self.MIN_ZOOM), self.MAX_ZOOM)
+        if anchor is None:
+            anchor = QPointF(self.width() / 2, self.height() / 2)
+        # Image point under the anchor, kept fixed on screen
+        image_x = (anchor.x() - self.pan.x()) / self.zoom
+        image_y = (anchor.y() - self.pan.y()) / self.zoom
+        self.zoom = zoom
+        self.pan = QPointF(anchor.x() - image_x * zoom, anchor.y() - image_y * zoom)
+        self.draw_canva()
+
+    def zoom_in(self) -> None:
+        """Zoom in by one step around the widget center."""
+        self.set_zoom(self.zoom * self.ZOOM_STEP)
+
+    def zoom_out(self) -> None:
+        """Zoom out by one step around the widget center."""
+        self.set_zoom(self.zoom / self.ZOOM_STEP)
+
+    def reset_zoom(self) -> None:
+        """Show the image at 100%, anchored at the top-left corner."""
+        self.zoom = 1.0
+        self.pan = QPointF(0, 0)
+        self.draw_canva()
+
+    def fit_to_window(self) -> None:
+        """Scale and center the image so that it fits entirely in the widget."""
+        height, width = self.canva.shape[0], self.canva.shape[1]
+        self.zoom = min(max(min(self.width() / width, self.height() / height), self.MIN_ZOOM), self.MAX_ZOOM)
+        self.pan = QPointF((self.width() - width * self.zoom) / 2, (self.height() - height * self.zoom) / 2)
+        self.draw_canva()
+
+    def pan_by(self, dx: float, dy: float) -> None:
+        """
+        Scroll the view.
+
+        Args:
+            dx (float): Horizontal offset in screen pixels.
+            dy (float): Vertical offset in screen pixels.
+        """
+        self.pan += QPointF(dx, dy)
+        self.draw_canva()
+
+    def wheelEvent(self, event: QWheelEvent) -> None:
+        """Ctrl + wheel zooms around the cursor, wheel scrolls (Shift for horizontal)."""
+        delta = event.angleDelta()
+        modifiers = event.modifiers()
+        if modifiers & Qt.KeyboardModifier.ControlModifier:
+            if delta.y():
+                factor = self.ZOOM_STEP ** (delta.y() / 120.0)
+                self.set_zoom(self.zoom * factor, event.position())
+        elif modifiers & Qt.KeyboardModifier.ShiftModifier:
+            self.pan_by(delta.y() or delta.x(), 0)
+        else:
+            self.pan_by(delta.x(), delta.y())
+        event.accept()
+
+    def resizeEvent(self, event: QResizeEvent) -> None:
+        """Re-render when more or less of the canvas becomes visible."""
+        super().resizeEvent(event)
+        self.draw_canva()
+
     # =========================================================================
     # Transformations & Adjustments
     # =========================================================================
@@ -283,6 +603,80 @@ class CanvaWidget(QWidget):
             func()
             self.draw_canva()
 
+    def transform_image(self, operation: str, **params) -> None:
+        """
+        Transform the whole image (all layers and the canvas size) and redraw.
+
+        Args:
+            operation (str): See :meth:`Canva.transform_image`.
+            **params: Parameters of the operation.
+        """
+        self.canva.transform_image(operation, **params)
+        self.draw_canva()
+
+    def _begin_transform(self) -> bool:
+        """Start editing a transform of the active layer with the current transform tool."""
+        preview = self.canva.transform_preview()
+        if preview is None:
+            return False
+        layer = self.canva.pixel_layer
+        self.current_tool.begin(layer)
+        self._transform_preview = preview
+        # The proxy is drawn instead of the layer until the transform ends
+        self._transform_visibility = layer.visibility
+        layer.visibility = False
+        self._update_transform_preview()
+        self.draw_canva()
+        return True
+
+    def _update_transform_preview(self) -> None:
+        """Warp the proxy with the transform being edited."""
+        pixels, (x0, y0, x1, y1) = self._transform_preview.render(self.current_tool.canvas_matrix())
+        self._transform_image = (numpy_to_qimage(pixels), QRectF(x0, y0, x1 - x0, y1 - y0))
+        self.update()
+
+    def _end_transform(self) -> None:
+        """Leave transform editing and show the layer again."""
+        tool = self.current_tool
+        tool.layer.visibility = self._transform_visibility
+        tool.reset()
+        self._transform_preview = None
+        self._transform_image = None
+
+    def commit_transform(self) -> None:
+        """Apply the transform being edited to its layer at full resolution."""
+        tool = self.current_tool
+        if not isinstance(tool, TransformTool) or not tool.active:
+            return
+        layer, matrix = tool.layer, tool.matrix()
+        self._end_transform()
+        try:
+            self.canva.transform_layer(matrix, tool.interpolation, layer)
+        except ValueError as e:
+            print(f"Error transforming layer: {e}")
+        self.layer_changed.emit(self.canva)
+
+    def cancel_transform(self) -> None:
+        """Drop the transform being edited, leaving the layer untouched."""
+        if isinstance(self.current_tool, TransformTool) and self.current_tool.active:
+            self._end_transform()
+            self.draw_canva()
+
+    def keyPressEvent(self, event: QKeyEvent) -> None:
+        """Enter commits the transform being edited; Escape cancels it, or the selection move."""
+        if event.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter):
+            self.commit_transform()
+        elif event.key() == Qt.Key.Key_Escape:
+            if self.moving_selection:
+                floating = self.canva.floating
+                self.canva.cancel_floating()
+                moved, restored = floating.move_to(0, 0)
+                self.redraw_region(moved)
+                self._end_selection_move(restored)
+            self.cancel_transform()
+        else:
+            super().keyPressEvent(event)
+
     def adjust_color_temperature(self, original_temp: float = 6500, target_temp: float = 6500, opacity: float = 1.0) -> None:
         """
         Apply color temperature adjustment.
@@ -340,18 +734,42 @@ class CanvaWidget(QWidget):
         Args:
             tool: The tool instance to use
         """
+        if tool is not self.current_tool:
+            self.cancel_transform()
         self.current_tool = tool
 
     def mousePressEvent(self, event: QMouseEvent) -> None:
         """Handle mouse press events for tools"""
+        if event.button() == Qt.MouseButton.MiddleButton:
+            # Middle-drag pans the view
+            self._pan_start = event.position()
+            return
+
         if event.button() == Qt.MouseButton.LeftButton:
-            pos = event.position().toPoint()
+            pos = self.map_to_canvas(event.position())
+
+            if isinstance(self.current_tool, TransformTool):
+                # The tools are shared by the tabs: finish a transform started in another one first
+                if self.current_tool.active and self._transform_preview is None:
+                    return
+                if self.current_tool.active or self._begin_transform():
+                    self.current_tool.handle_radius = 6.0 / self.zoom
+                    self.current_tool.mouse_press(pos)
+                return
             
+            # Shift / Ctrl combine a new selection with the current one instead
+            self._selection_mode = selection_mode(event.modifiers())
+
+            if isinstance(self.current_tool, ColorRegionTool):
+                if self.current_tool.click(self.canva, pos, self._selection_mode):
+                    self.draw_canva()
+                return
+
             # Check if clicking inside an active selection (for moving it)
-            if self.canva.has_selection():
-                selection_rect, selection_type = self.canva.get_selection()
-                if selection_rect and selection_rect.contains(pos):
-                    # Start moving the selection
+            if self.canva.has_selection() and self._selection_mode == 'replace':
+                if self.canva.selection.contains(pos.x(), pos.y()) and self.canva.float_selection():
+                    # The lifted pixels follow the pointer until release
+                    self.redraw_region(self.canva.floating.bounds)
                     self.moving_selection = True
                     self.move_start_point = QPoint(pos)
                     self._temp_selection_offset = QPoint(0, 0)
@@ -362,70 +780,75 @@ class CanvaWidget(QWidget):
                 self.current_tool.mouse_press(pos)
                 
                 # For drawing tools (not selection), apply immediately on press
-                if self.canva.active_layer and not hasattr(self.current_tool, 'get_selection'):
-                    self.current_tool.apply(pos, self.canva.active_layer)
-                    self.draw_canva()
+                if self.canva.pixel_layer and not hasattr(self.current_tool, 'get_selection'):
+                    self._paint(pos)
                 
                 self.update()
 
+    def _paint(self, pos: QPoint) -> None:
+        """Apply the current painting tool at a canvas position, redrawing the area it touched."""
+        dirty = self.canva.apply_tool(self.current_tool, pos)
+        if dirty is None:
+            self.draw_canva()
+        else:
+            self.redraw_region((dirty.x(), dirty.y(), dirty.width(), dirty.height()))
+
     def mouseMoveEvent(self, event: QMouseEvent) -> None:
         """Handle mouse move events for tools"""
-        pos = event.position().toPoint()
+        if self._pan_start is not None:
+            delta = event.position() - self._pan_start
+            self._pan_start = event.position()
+            self.pan_by(delta.x(), delta.y())
+            return
+
+        pos = self.map_to_canvas(event.position())
+
+        if isinstance(self.current_tool, TransformTool):
+            if self.current_tool.is_drawing and self._transform_preview is not None:
+                self.current_tool.mouse_move(pos)
+                self._update_transform_preview()
+            return
         
         # Handle moving selection
         if self.moving_selection and self.move_start_point:
             self._temp_selection_offset = pos - self.move_start_point
-            self.update()  # Redraw with temporary offset
+            # Only the area the pixels leave and the one they enter change
+            for area in self.canva.floating.move_to(self._temp_selection_offset.x(), self._temp_selection_offset.y()):
+                self.redraw_region(area)
             return
         
         # Otherwise, use the current tool
         if self.current_tool:
             # Call mouse_move to update tool state
-            if self.canva.active_layer:
-                self.current_tool.mouse_move(pos, self.canva.active_layer)
+            if self.canva.pixel_layer:
+                self.current_tool.mouse_move(pos, self.canva.pixel_layer)
             
             # For drawing tools, apply the tool during mouse move when drawing
-            if self.current_tool.is_drawing and self.canva.active_layer and not hasattr(self.current_tool, 'get_selection'):
-                self.current_tool.apply(pos, self.canva.active_layer)
-                self.draw_canva()
+            if self.current_tool.is_drawing and self.canva.pixel_layer and not hasattr(self.current_tool, 'get_selection'):
+                self._paint(pos)
             
             self.update()
 
     def mouseReleaseEvent(self, event: QMouseEvent) -> None:
         """Handle mouse release events for tools"""
+        if event.button() == Qt.MouseButton.MiddleButton:
+            self._pan_start = None
+            return
+
         if event.button() == Qt.MouseButton.LeftButton:
-            pos = event.position().toPoint()
+            pos = self.map_to_canvas(event.position())
+
+            if isinstance(self.current_tool, TransformTool):
+                self.current_tool.mouse_release(pos)
+                return
             
             # Handle selection move completion
             if self.moving_selection and self.move_start_point:
                 offset = pos - self.move_start_point
-                
-                # Only move if there's actual movement
-                if not offset.isNull() and self.canva.active_layer:
-                    selection_rect, selection_type = self.canva.get_selection()
-                    if selection_rect:
-                        # Calculate new top-left position
-                        new_top_left = QPoint(selection_rect.x() + offset.x(), 
-                                             selection_rect.y() + offset.y())
-                        
-                        # Move the selection content
-                        self.canva.active_layer.move_selection(
-                            selection_rect, 
-                            new_top_left, 
-                            selection_type, 
-                            clear_source=True
-                        )
-                        
-                        # Update selection rectangle to new position
-                        new_rect = selection_rect.translated(offset)
-                        self.canva.set_selection(new_rect, selection_type)
-                        
-                        self.draw_canva()
-                
-                self.moving_selection = False
-                self.move_start_point = None
-                self._temp_selection_offset = QPoint(0, 0)
-                self.update()
+                floating = self.canva.floating
+                floating.move_to(offset.x(), offset.y())
+                self.canva.anchor_selection()
+                self._end_selection_move(floating.bounds)
                 return
             
             # Otherwise, handle tool release
@@ -437,6 +860,6 @@ class CanvaWidget(QWidget):
                     selection = self.current_tool.get_selection()
                     if selection and not selection.isEmpty():
                         selection_type = 'ellipse' if 'Ellipse' in self.current_tool.name else 'rectangle'
-                        self.canva.set_selection(selection, selection_type)
+                        self.canva.set_selection(selection, selection_type, self._selection_mode)
                 
                 self.update()
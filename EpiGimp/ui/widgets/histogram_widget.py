@@ -0,0 +1,54 @@
+from typing import Optional
+
+import numpy as np
+from PySide6.QtCore import QPointF, Qt
+from PySide6.QtGui import QColor, QPainter, QPolygonF
+from PySide6.QtWidgets import QWidget
+
+from EpiGimp.core.histogram import ImageStatistics
+
+
+class HistogramWidget(QWidget):
+    """
+    Draws the red, green and blue histograms of an :class:`ImageStatistics`.
+
+    Fully transparent pixels are not counted, so empty areas of a layer do not
+    flatten the curves into a spike at 0.
+    """
+
+    COLORS = (QColor(255, 60, 60, 110), QColor(60, 220, 60, 110), QColor(70, 110, 255, 110))
+
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self.statistics: Optional[ImageStatistics] = None
+        self.setMinimumSize(256, 80)
+        self.setStyleSheet("background-color: #222;")
+
+    def set_statistics(self, statistics: Optional[ImageStatistics]) -> None:
+        """Show new statistics; None clears the widget."""
+        self.statistics = statistics
+        self.update()
+
+    def paintEvent(self, event) -> None:
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(34, 34, 34))
+        if self.statistics is None or self.statistics.count == 0:
+            return
+
+        histogram = self.statistics.histogram[:3].astype(np.float64)
+        # Transparent pixels are black in most layers: drop them from the counts
+        transparent = self.statistics.histogram[3, 0]
+        histogram[:, 0] = np.maximum(histogram[:, 0] - transparent, 0)
+        peak = histogram.max()
+        if peak <= 0:
+            return
+
+        width, height = self.width(), self.height()
+        xs = np.linspace(0, width, 256)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        for channel, color in enumerate(self.COLORS):
+            ys = height - histogram[channel] / peak * height
+            points = [QPointF(0, height)] + [QPointF(x, y) for x, y in zip(xs, ys)] + [QPointF(width, height)]
+            painter.setBrush(color)
+            painter.drawPolygon(QPolygonF(points))
@@ -21,7 +21,8 @@ class LayerItemWidget(QWidget):
         layout = QHBoxLayout(self)
         layout.setContentsMargins(4, 2, 4, 2)
         layout.setSpacing(6)
-        self.visibilityToggled.connect(lambda state: layer.set_visibility(state))
+        # Edits are only emitted: the owner applies them through the Canva,
+        # which notifies every view of the layer stack
 
         # 1. Visibility Button (Eye Icon)
         self.btn_visible = QPushButton("👁")
@@ -43,16 +44,21 @@ class LayerItemWidget(QWidget):
         if thumbnail:
             self.lbl_thumb.setPixmap(thumbnail)
         else:
-            # Placeholder for empty layer
-            self.lbl_thumb.setText("░")
+            # Placeholder for empty layer; adjustment layers have no pixels to show
+            if getattr(layer, 'is_adjustment', False):
+                self.lbl_thumb.setText("◐")
+            else:
+                self.lbl_thumb.setText("▤" if getattr(layer, 'is_group', False) else "░")
             self.lbl_thumb.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
         # 3. Layer Name (with double-click to edit)
         self.name_stack = QStackedWidget()
         
         self.lbl_name = QLabel(layer.name)
+        if getattr(layer, 'is_group', False):
+            # Groups are shown collapsed: their children get no rows
+            self.setToolTip(f"Group of {len(layer.layers)} layers")
         self.edit_name = QLineEdit(layer.name)
-        self.edit_name.textChanged.connect(lambda name: self.layer.set_name(name))
         
         self.name_stack.addWidget(self.lbl_name)
         self.name_stack.addWidget(self.edit_name)
@@ -89,6 +95,8 @@ class LayerItemWidget(QWidget):
             self.edit_name.selectAll()
 
     def _finish_renaming(self):
+        if self.name_stack.currentIndex() == 0:
+            return  # Both returnPressed and editingFinished end an edit
         new_name = self.edit_name.text()
         self.lbl_name.setText(new_name)
         self.name_stack.setCurrentIndex(0)
@@ -96,4 +104,19 @@ class LayerItemWidget(QWidget):
 
     def update_thumbnail(self, pixmap: QPixmap):
         """Call this whenever the Canvas changes to update the layer icon"""
-        self.lbl_thumb.setPixmap(pixmap.scaled(28, 28, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        ratio = self.devicePixelRatioF()
+        scaled = pixmap.scaled(self.lbl_thumb.size() * ratio, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+        scaled.setDevicePixelRatio(ratio)
+        self.lbl_thumb.setPixmap(scaled)
+
+    def sync(self):
+        """Show the current name and visibility of the layer, without emitting signals"""
+        if self.name_stack.currentIndex() == 0 and self.lbl_name.text() != self.layer.name:
+            self.lbl_name.setText(self.layer.name)
+            self.edit_name.blockSignals(True)
+            self.edit_name.setText(self.layer.name)
+            self.edit_name.blockSignals(False)
+        if self.btn_visible.isChecked() != self.layer.visibility:
+            self.btn_visible.blockSignals(True)
+            self.btn_visible.setChecked(self.layer.visibility)
+            self.btn_visible.blockSignals(False)
@@ -1,9 +1,16 @@
+from typing import Optional
+
 from PySide6.QtWidgets import (QVBoxLayout, QHBoxLayout, 
                              QListWidget, QListWidgetItem, QPushButton, QFrame)
-from PySide6.QtCore import Signal
+from PySide6.QtCore import Signal, QTimer
 from EpiGimp.core.layer import Layer
+from EpiGimp.core.thumbnails import thumbnail_size
+from EpiGimp.ui.thumbnail_service import ThumbnailService
 from EpiGimp.ui.widgets.layer_item_widget import LayerItemWidget
-from EpiGimp.core.canva import Canva
+from EpiGimp.core.canva import Canva, LayerEvent
+
+# How often (ms) thumbnails are checked against the layer versions
+THUMBNAIL_REFRESH_INTERVAL = 300
 
 class LayersWidget(QFrame):
     layer_selcted = Signal(int) # Emits index of selected layer
@@ -12,7 +19,7 @@ class LayersWidget(QFrame):
 
     def __init__(self, canva=None, parent=None):
         super().__init__(parent)
-        self.canva: None | Canva = canva
+        self.canva: None | Canva = None
         self.setFrameStyle(QFrame.Shape.StyledPanel | QFrame.Shadow.Plain)
         
         self.main_layout = QVBoxLayout(self)
@@ -44,21 +51,162 @@ class LayersWidget(QFrame):
         # self.btn_del.clicked.connect(self.remove_current_layer)
         self.list_widget.currentRowChanged.connect(self.layer_selcted.emit)
 
-    def set_canva(self, canva: Canva):
+        # Thumbnails are rendered in the background; edits made without a
+        # layer_changed (brush strokes, filters) are caught by polling versions
+        self.thumbnails = ThumbnailService(self)
+        self.thumbnails.ready.connect(self._on_thumbnail_ready)
+        self.thumbnail_timer = QTimer(self)
+        self.thumbnail_timer.setInterval(THUMBNAIL_REFRESH_INTERVAL)
+        self.thumbnail_timer.timeout.connect(self.refresh_thumbnails)
+        self.thumbnail_timer.start()
+
+        if canva is not None:
+            self.set_canva(canva)
+
+    def set_canva(self, canva: Optional[Canva]):
+        """Show the layers of canva and follow its layer events."""
+        if canva is self.canva:
+            return
+        if self.canva is not None:
+            self.canva.unsubscribe(self._on_layer_event)
         self.canva = canva
+        self.thumbnails.source = None if canva is None else canva.thumbnail_source
+        if canva is None:
+            self.list_widget.clear()
+            return
+        canva.subscribe(self._on_layer_event)
+        self._sync_rows()
 
     def update_layer_from_canva(self, canva: Canva):
-        active_layer = canva.active_layer
-        self.list_widget.clear()
-        for layer in canva.layers:
-            item = QListWidgetItem(self.list_widget)
-            custom_widget = LayerItemWidget(layer)
-            custom_widget.visibilityToggled.connect(lambda: self.render.emit())
-            item.setSizeHint(custom_widget.sizeHint())
-            self.list_widget.insertItem(0, item)
-            self.list_widget.setItemWidget(item, custom_widget)
-            if layer == active_layer:
-                self.list_widget.setCurrentItem(item)
+        """
+        Show the layers of canva.
+
+        Rows follow the layer events of the canvas shown (see
+        :meth:`_on_layer_event`), so this only rebuilds anything when the
+        canvas changes; otherwise it just selects the active layer.
+        """
+        if canva is not self.canva:
+            self.set_canva(canva)
+        else:
+            self._select_active(announce=False)
+
+    def _on_layer_event(self, event: LayerEvent) -> None:
+        """Apply a change of the layer stack to the one row it concerns."""
+        self.list_widget.blockSignals(True)
+        try:
+            if event.kind == 'inserted':
+                self._insert_row(event.index, event.layer)
+            elif event.kind == 'removed':
+                self.list_widget.takeItem(event.index)
+            elif event.kind == 'moved':
+                self.list_widget.takeItem(event.previous_index)
+                self._insert_row(event.index, event.layer)
+            else:
+                self.item_widget(event.index).sync()
+        finally:
+            self.list_widget.blockSignals(False)
+        if event.kind != 'renamed' and event.kind != 'visibility':
+            # The canvas already knows its active layer: only move the highlight
+            self._select_active(announce=False)
+
+    def _sync_rows(self) -> None:
+        """
+        Diff the rows against the canvas layers, one row per layer index.
+
+        Rows of layers still in the stack are kept and only refreshed.
+        """
+        layers = self.canva.layers
+        wanted = {id(layer) for layer in layers}
+
+        self.list_widget.blockSignals(True)
+        try:
+            for row in reversed(range(self.list_widget.count())):
+                if id(self.layer_at(row)) not in wanted:
+                    self.list_widget.takeItem(row)
+
+            for row, layer in enumerate(layers):
+                if self.layer_at(row) is layer:
+                    self.item_widget(row).sync()
+                    continue
+                # New or moved layer: the following rows shift
+                for other in range(row + 1, self.list_widget.count()):
+                    if self.layer_at(other) is layer:
+                        self.list_widget.takeItem(other)
+                        break
+                self._insert_row(row, layer)
+
+            while self.list_widget.count() > len(layers):
+                self.list_widget.takeItem(self.list_widget.count() - 1)
+        finally:
+            self.list_widget.blockSignals(False)
+        self._select_active(announce=True)
+
+    def _select_active(self, announce: bool) -> None:
+        """
+        Make the row of the active layer current.
+
+        Args:
+            announce (bool): Emit the selection signals, as listeners bind to
+                the canvas shown (e.g. on tab switches).
+        """
+        active = self.canva.active_layer if self.canva is not None else None
+        active_row = next((row for row in range(self.list_widget.count()) if self.layer_at(row) is active), -1)
+        self.list_widget.blockSignals(True)
+        if announce:
+            self.list_widget.setCurrentRow(-1)
+            self.list_widget.blockSignals(False)
+        self.list_widget.setCurrentRow(active_row)
+        self.list_widget.blockSignals(False)
+
+    def layer_at(self, row: int):
+        """The layer shown at row, or None."""
+        widget = self.item_widget(row)
+        return widget.layer if widget is not None else None
+
+    def item_widget(self, row: int):
+        item = self.list_widget.item(row)
+        return self.list_widget.itemWidget(item) if item is not None else None
+
+    def _insert_row(self, row: int, layer) -> None:
+        item = QListWidgetItem()
+        custom_widget = LayerItemWidget(layer)
+        custom_widget.visibilityToggled.connect(lambda state: self._set_visibility(layer, state))
+        custom_widget.nameChanged.connect(lambda name: self.canva.rename_layer(layer, name))
+        item.setSizeHint(custom_widget.sizeHint())
+        self.list_widget.insertItem(row, item)
+        self.list_widget.setItemWidget(item, custom_widget)
+        self._show_thumbnail(custom_widget)
+
+    def _set_visibility(self, layer, visible: bool) -> None:
+        self.canva.set_layer_visibility(layer, visible)
+        self.render.emit()
+
+    # =========================================================================
+    # Thumbnails
+    # =========================================================================
+
+    def _show_thumbnail(self, widget: LayerItemWidget) -> None:
+        pixmap = self.thumbnails.thumbnail(widget.layer, thumbnail_size(self.devicePixelRatioF()))
+        if pixmap is not None:
+            widget.update_thumbnail(pixmap)
+
+    def refresh_thumbnails(self) -> None:
+        """Queue a render for every thumbnail older than its layer."""
+        if not self.isVisible():
+            return
+        size = thumbnail_size(self.devicePixelRatioF())
+        for row in range(self.list_widget.count()):
+            layer = self.layer_at(row)
+            if layer is not None and not getattr(layer, 'is_adjustment', False) \
+                    and not self.thumbnails.cache.is_current(layer, size):
+                self.thumbnails.request(layer, size)
+
+    def _on_thumbnail_ready(self, layer) -> None:
+        for row in range(self.list_widget.count()):
+            widget = self.item_widget(row)
+            if widget is not None and widget.layer is layer:
+                self._show_thumbnail(widget)
+                return
 
 
     def add_layer(self, name, thumbnail=None):
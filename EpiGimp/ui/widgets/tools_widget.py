@@ -5,8 +5,10 @@ from PySide6.QtCore import Qt, Signal
 from EpiGimp.tools.base_tool import ToolNotImplemented
 from EpiGimp.tools.brush import Brush
 from EpiGimp.tools.eraser import Eraser
+from EpiGimp.tools.fill import BucketFill, FuzzySelect
 from EpiGimp.tools.selection import RectangleSelection, EllipseSelection
 from EpiGimp.tools.move import Move
+from EpiGimp.tools.transform import ScaleTool, RotateTool, SkewTool, PerspectiveTool
 
 class ToolsWidget(QWidget):
     """
@@ -39,6 +41,14 @@ class ToolsWidget(QWidget):
         self.rect_select = RectangleSelection()
         self.ellipse_select = EllipseSelection()
         self.move = Move()
+        self.scale = ScaleTool()
+        self.rotate = RotateTool()
+        self.skew = SkewTool()
+        self.perspective = PerspectiveTool()
+        self.transform_tools = [self.scale, self.rotate, self.skew, self.perspective]
+        self.fuzzy_select = FuzzySelect()
+        self.bucket_fill = BucketFill()
+        self.color_region_tools = [self.fuzzy_select, self.bucket_fill]
         
         tools_config = [
             (self.rect_select, 0, 0),
@@ -46,9 +56,13 @@ class ToolsWidget(QWidget):
             (self.move, 1, 0),
             (self.brush, 1, 1),
             (self.eraser, 2, 0),
-            (ToolNotImplemented(), 2, 1),
-            (ToolNotImplemented(), 3, 0),
-            (ToolNotImplemented(), 3, 1),
+            (self.rotate, 2, 1),
+            (self.scale, 3, 0),
+            (self.skew, 3, 1),
+            (self.perspective, 4, 0),
+            (self.fuzzy_select, 4, 1),
+            (self.bucket_fill, 5, 0),
+            (ToolNotImplemented(), 5, 1),
         ]
 
             # ("move",    "Move Tool",      0, 0),
@@ -2,9 +2,9 @@ import typing
 from typing import Optional
 
 from PySide6.QtCore import Qt, Signal, Slot, QPoint
-from PySide6.QtGui import QAction, QKeySequence, QResizeEvent, QCloseEvent
+from PySide6.QtGui import QAction, QActionGroup, QKeySequence, QResizeEvent, QCloseEvent
 from PySide6.QtWidgets import (
-    QDockWidget, QFileDialog, QMainWindow, QWidget, QStatusBar, QMessageBox
+    QDockWidget, QFileDialog, QInputDialog, QMainWindow, QWidget, QStatusBar, QMessageBox
 )
 
 from EpiGimp.ui.widgets.canvas_widget import CanvasWidget, CanvaWidget
@@ -16,6 +16,8 @@ from EpiGimp.core.canva import Canva
 from EpiGimp.ui.dialogs.metadata_dialog import MetadataDialog, EditableMetadataDialog
 from EpiGimp.ui.widgets.tools_widget import ToolsWidget
 from EpiGimp.ui.dialogs.color_adjustment_dialog import ColorTemperatureDialog
+from EpiGimp.core.resample import METHODS as RESAMPLING_METHODS
+from EpiGimp.core.transform import INTERPOLATIONS
 
 if typing.TYPE_CHECKING:
     pass
@@ -164,6 +166,7 @@ class MainWindow(QMainWindow):
         current_row = self.layers_widget.list_widget.currentRow()
         if current_row >= 0:
             self.current_canva().set_active_layer(current_row)
+        self._sync_mask_actions()
 
     @Slot(QPoint)
     def drawing(self, pos: QPoint) -> None:
@@ -180,9 +183,9 @@ class MainWindow(QMainWindow):
             return
             
         tool = self.tools_panel.get_current_tool()
-        if tool:
+        if tool and canva.pixel_layer:
             # apply returns a rect that was modified, logic can be used for partial updates
-            _ = tool.apply(pos, canva.active_layer)
+            _ = tool.apply(pos, canva.paint_target)
             cw.draw_canva()
 
     @Slot()
@@ -220,6 +223,7 @@ class MainWindow(QMainWindow):
             except RuntimeError:
                 pass
             cw.layer_changed.connect(self.layers_widget.update_layer_from_canva)
+            self._sync_mask_actions()
 
     def swap_layer(self, fst: int, snd: int) -> None:
         """
@@ -250,6 +254,53 @@ class MainWindow(QMainWindow):
             return
         self.current_canva_widget().del_layer(idx)
 
+    def group_layer(self) -> None:
+        """Group the selected layer with the one below it."""
+        if self.canvas_widget.count() == 0:
+            return
+        self.current_canva_widget().group_layer(self.layers_widget.list_widget.currentRow())
+
+    def ungroup_layer(self) -> None:
+        """Replace the selected layer group by its children."""
+        if self.canvas_widget.count() == 0:
+            return
+        self.current_canva_widget().ungroup_layer(self.layers_widget.list_widget.currentRow())
+
+    def add_layer_mask(self) -> None:
+        """Give the active layer a mask and start painting on it."""
+        if self.canvas_widget.count() == 0:
+            return
+        self.current_canva_widget().add_layer_mask()
+        self._sync_mask_actions()
+
+    def edit_layer_mask(self, state: bool) -> None:
+        """Switch the painting tools between the active layer and its mask."""
+        if self.canvas_widget.count() == 0:
+            return
+        self.current_canva_widget().set_editing_mask(state)
+
+    def remove_layer_mask(self, apply: bool = False) -> None:
+        """
+        Drop the mask of the active layer.
+
+        Args:
+            apply (bool): Keep its effect by multiplying it into the layer's alpha.
+        """
+        if self.canvas_widget.count() == 0:
+            return
+        self.current_canva_widget().remove_layer_mask(apply)
+        self._sync_mask_actions()
+
+    def _sync_mask_actions(self) -> None:
+        """Enable the mask actions that apply to the active layer, and check Edit Layer Mask as needed."""
+        canva = self.current_canva()
+        layer = canva.pixel_layer if canva is not None else None
+        has_mask = layer is not None and layer.mask is not None
+        self.add_layer_mask_act.setEnabled(layer is not None and not has_mask)
+        for action in (self.edit_layer_mask_act, self.apply_layer_mask_act, self.delete_layer_mask_act):
+            action.setEnabled(has_mask)
+        self.edit_layer_mask_act.setChecked(has_mask and canva.editing_mask)
+
     # =========================================================================
     # Selection Operations
     # =========================================================================
@@ -273,6 +324,28 @@ class MainWindow(QMainWindow):
             canva.clear_selection()
             cw.update()
 
+    def invert_selection(self) -> None:
+        """Select everything that is not selected."""
+        canva = self.current_canva()
+        cw = self.current_canva_widget()
+        if canva and cw:
+            canva.invert_selection()
+            cw.update()
+
+    def feather_selection(self) -> None:
+        """Ask for a radius and soften the selection edges."""
+        canva = self.current_canva()
+        cw = self.current_canva_widget()
+        if not canva or not cw:
+            return
+        if not canva.has_selection():
+            self.statusBar().showMessage("Select an area first", 2000)
+            return
+        radius, ok = QInputDialog.getDouble(self, "Feather Selection", "Radius (px)", 5.0, 0.0, 500.0, 1)
+        if ok:
+            canva.feather_selection(radius)
+            cw.update()
+
     # =========================================================================
     # Edit Operations
     # =========================================================================
@@ -302,6 +375,8 @@ class MainWindow(QMainWindow):
         canva = self.current_canva()
         cw = self.current_canva_widget()
         if canva and cw:
+            # An image copied in another application takes precedence
+            self.canvas_widget.system_clipboard.import_foreign()
             if canva.paste_selection():
                 # Update layers widget
                 self.layers_widget.update_layer_from_canva(canva)
@@ -384,6 +459,22 @@ class MainWindow(QMainWindow):
         self.fullscreen_act.setShortcut(QKeySequence('F11'))
         self.fullscreen_act.triggered.connect(self.toggle_fullscreen)
 
+        self.zoom_in_act = QAction('Zoom In', self)
+        self.zoom_in_act.setShortcuts([QKeySequence('Ctrl++'), QKeySequence('Ctrl+=')])
+        self.zoom_in_act.triggered.connect(lambda: self._safe_view('zoom_in'))
+
+        self.zoom_out_act = QAction('Zoom Out', self)
+        self.zoom_out_act.setShortcut(QKeySequence('Ctrl+-'))
+        self.zoom_out_act.triggered.connect(lambda: self._safe_view('zoom_out'))
+
+        self.zoom_reset_act = QAction('Actual Size (100%)', self)
+        self.zoom_reset_act.setShortcut(QKeySequence('Ctrl+1'))
+        self.zoom_reset_act.triggered.connect(lambda: self._safe_view('reset_zoom'))
+
+        self.zoom_fit_act = QAction('Fit Image in Window', self)
+        self.zoom_fit_act.setShortcut(QKeySequence('Ctrl+0'))
+        self.zoom_fit_act.triggered.connect(lambda: self._safe_view('fit_to_window'))
+
         # Image/Transform Actions
         self.metadata_act = QAction('See Metadata...', self)
         self.metadata_act.triggered.connect(self.show_metadata_dialog)
@@ -406,10 +497,79 @@ class MainWindow(QMainWindow):
         self._rotate_180_act = QAction('Rotate 180°', self)
         self._rotate_180_act.triggered.connect(lambda: self._safe_transform('rotate_180'))
 
+        # Resampling used when the transform tools commit
+        self._interpolation_group = QActionGroup(self)
+        for name in INTERPOLATIONS:
+            action = QAction(name.capitalize(), self)
+            action.setCheckable(True)
+            action.setChecked(name == 'linear')
+            action.triggered.connect(lambda _=False, interpolation=name: self.set_transform_interpolation(interpolation))
+            self._interpolation_group.addAction(action)
+
+        # Whole image: every layer and the canvas size
+        self._image_transform_acts = []
+        for label, operation in (
+            ('Flip Horizontal', 'flip_horizontal'),
+            ('Flip Vertical', 'flip_vertical'),
+            ('Rotate 90° Clockwise', 'rotate_90_clockwise'),
+            ('Rotate 90° Counterclockwise', 'rotate_90_counterclockwise'),
+            ('Rotate 180°', 'rotate_180'),
+        ):
+            action = QAction(label, self)
+            action.triggered.connect(lambda _=False, op=operation: self._safe_image_transform(op))
+            self._image_transform_acts.append(action)
+
+        self.crop_to_selection_act = QAction('Crop to Selection', self)
+        self.crop_to_selection_act.triggered.connect(self.crop_to_selection)
+
+        self.scale_image_act = QAction('Scale Image...', self)
+        self.scale_image_act.triggered.connect(self.scale_image)
+
+        self.scale_layer_act = QAction('Scale Layer...', self)
+        self.scale_layer_act.triggered.connect(self.scale_layer)
+
         # Color Actions
         self._temp_adjust_act = QAction('Adjust Color Temperature...', self)
         self._temp_adjust_act.triggered.connect(self.adjust_temp_color)
 
+        # Filter Actions: (menu label, filter name, parameter asked for, default, min, max)
+        self._filter_acts = []
+        for label, name, param, default, minimum, maximum in (
+            ('Gaussian Blur...', 'gaussian_blur', 'sigma', 2.0, 0.1, 100.0),
+            ('Box Blur...', 'box_blur', 'radius', 2, 1, 100),
+            ('Unsharp Mask...', 'unsharp_mask', 'amount', 0.5, 0.0, 10.0),
+            ('Median...', 'median', 'radius', 2, 1, 50),
+            ('Edge Detect', 'edge_detect', None, None, None, None),
+        ):
+            action = QAction(label, self)
+            action.triggered.connect(
+                lambda _=False, args=(label.rstrip('.'), name, param, default, minimum, maximum): self.run_filter(*args)
+            )
+            self._filter_acts.append(action)
+
+        # Layer Actions
+        self.group_layer_act = QAction('Group with Layer Below', self)
+        self.group_layer_act.setShortcut(QKeySequence('Ctrl+G'))
+        self.group_layer_act.triggered.connect(self.group_layer)
+
+        self.ungroup_layer_act = QAction('Ungroup', self)
+        self.ungroup_layer_act.setShortcut(QKeySequence('Ctrl+Shift+G'))
+        self.ungroup_layer_act.triggered.connect(self.ungroup_layer)
+
+        self.add_layer_mask_act = QAction('Add Layer Mask', self)
+        self.add_layer_mask_act.triggered.connect(self.add_layer_mask)
+
+        self.edit_layer_mask_act = QAction('Edit Layer Mask', self)
+        self.edit_layer_mask_act.setCheckable(True)
+        self.edit_layer_mask_act.setShortcut(QKeySequence('Ctrl+M'))
+        self.edit_layer_mask_act.toggled.connect(self.edit_layer_mask)
+
+        self.apply_layer_mask_act = QAction('Apply Layer Mask', self)
+        self.apply_layer_mask_act.triggered.connect(lambda: self.remove_layer_mask(apply=True))
+
+        self.delete_layer_mask_act = QAction('Delete Layer Mask', self)
+        self.delete_layer_mask_act.triggered.connect(lambda: self.remove_layer_mask(apply=False))
+
         # Selection Actions
         self.select_all_act = QAction('Select All', self)
         self.select_all_act.setShortcut(QKeySequence('Ctrl+A'))
@@ -419,6 +579,30 @@ class MainWindow(QMainWindow):
         self.deselect_act.setShortcut(QKeySequence('Ctrl+Shift+A'))
         self.deselect_act.triggered.connect(self.deselect)
 
+        self.invert_selection_act = QAction('Invert', self)
+        self.invert_selection_act.setShortcut(QKeySequence('Ctrl+I'))
+        self.invert_selection_act.triggered.connect(self.invert_selection)
+
+        self.feather_selection_act = QAction('Feather...', self)
+        self.feather_selection_act.triggered.connect(self.feather_selection)
+
+        # Options of the fuzzy select and bucket fill tools
+        self.color_tolerance_act = QAction('Tolerance...', self)
+        self.color_tolerance_act.triggered.connect(self.set_color_tolerance)
+
+        self.color_contiguous_act = QAction('Contiguous', self)
+        self.color_contiguous_act.setCheckable(True)
+        self.color_contiguous_act.setChecked(True)
+        self.color_contiguous_act.toggled.connect(
+            lambda checked: self._set_color_region_option('contiguous', checked)
+        )
+
+        self.color_sample_merged_act = QAction('Sample Merged', self)
+        self.color_sample_merged_act.setCheckable(True)
+        self.color_sample_merged_act.toggled.connect(
+            lambda checked: self._set_color_region_option('sample_merged', checked)
+        )
+
         # Edit Actions
         self.copy_act = QAction('Copy', self)
         self.copy_act.setShortcut(QKeySequence('Ctrl+C'))
@@ -446,6 +630,18 @@ class MainWindow(QMainWindow):
         if cw:
             cw.transform(method_name)
 
+    def _safe_image_transform(self, operation: str, **params) -> None:
+        """Helper to transform the whole image of the current widget, if any."""
+        cw = self.current_canva_widget()
+        if cw:
+            cw.transform_image(operation, **params)
+
+    def _safe_view(self, method_name: str) -> None:
+        """Helper to change the zoom of the current widget, if any."""
+        cw = self.current_canva_widget()
+        if cw:
+            getattr(cw, method_name)()
+
     def _create_menus(self) -> None:
         """Assemble the menu bar."""
         menu_bar = self.menuBar()
@@ -474,6 +670,11 @@ class MainWindow(QMainWindow):
         # Display Menu
         display_menu = menu_bar.addMenu('Display')
         display_menu.addAction(self.fullscreen_act)
+        display_menu.addSeparator()
+        display_menu.addAction(self.zoom_in_act)
+        display_menu.addAction(self.zoom_out_act)
+        display_menu.addAction(self.zoom_reset_act)
+        display_menu.addAction(self.zoom_fit_act)
 
         # Image Menu
         image_menu = menu_bar.addMenu('Image')
@@ -486,16 +687,53 @@ class MainWindow(QMainWindow):
         transform_menu.addAction(self.rotate_act)
         transform_menu.addAction(self._rotate_ccw_act)
         transform_menu.addAction(self._rotate_180_act)
+        transform_menu.addAction(self.scale_layer_act)
+
+        interpolation_menu = transform_menu.addMenu('Interpolation')
+        for action in self._interpolation_group.actions():
+            interpolation_menu.addAction(action)
+
+        canvas_menu = image_menu.addMenu('Canvas')
+        for action in self._image_transform_acts:
+            canvas_menu.addAction(action)
+        canvas_menu.addSeparator()
+        canvas_menu.addAction(self.crop_to_selection_act)
+        canvas_menu.addAction(self.scale_image_act)
+
+        # Layer Menu
+        layer_menu = menu_bar.addMenu('Layer')
+        layer_menu.addAction(self.group_layer_act)
+        layer_menu.addAction(self.ungroup_layer_act)
+        layer_menu.addSeparator()
+        layer_menu.addAction(self.add_layer_mask_act)
+        layer_menu.addAction(self.edit_layer_mask_act)
+        layer_menu.addAction(self.apply_layer_mask_act)
+        layer_menu.addAction(self.delete_layer_mask_act)
+        # The active layer changes from the layers panel too
+        layer_menu.aboutToShow.connect(self._sync_mask_actions)
 
         # Select Menu
         select_menu = menu_bar.addMenu('Select')
         select_menu.addAction(self.select_all_act)
         select_menu.addAction(self.deselect_act)
+        select_menu.addAction(self.invert_selection_act)
+        select_menu.addSeparator()
+        select_menu.addAction(self.feather_selection_act)
+
+        color_region_menu = select_menu.addMenu('By Color')
+        color_region_menu.addAction(self.color_tolerance_act)
+        color_region_menu.addAction(self.color_contiguous_act)
+        color_region_menu.addAction(self.color_sample_merged_act)
 
         # Color Menu
         color_menu = menu_bar.addMenu('Color')
         color_menu.addAction(self._temp_adjust_act)
 
+        # Filters Menu
+        filters_menu = menu_bar.addMenu('Filters')
+        for action in self._filter_acts:
+            filters_menu.addAction(action)
+
     # =========================================================================
     # Dialogs & Features
     # =========================================================================
@@ -534,6 +772,104 @@ class MainWindow(QMainWindow):
         temp_adjust_widget = ColorTemperatureDialog(parent=self, canva_widget=canva_widget)
         temp_adjust_widget.exec()
     
+    def run_filter(self, title: str, name: str, param: Optional[str] = None, default=None, minimum=None, maximum=None) -> None:
+        """
+        Apply a filter to the active layer, within the selection if any.
+
+        Args:
+            title (str): Dialog title.
+            name (str): Registered filter name.
+            param (Optional[str]): Parameter asked to the user, if any; an int
+                default asks for an integer.
+            default, minimum, maximum: Initial value and range of the parameter.
+        """
+        canva = self.current_canva()
+        cw = self.current_canva_widget()
+        if canva is None or cw is None:
+            QMessageBox.warning(self, "No Image", "No image is currently loaded.")
+            return
+
+        params = {}
+        if param is not None:
+            if isinstance(default, int):
+                value, ok = QInputDialog.getInt(self, title, param.capitalize(), default, minimum, maximum)
+            else:
+                value, ok = QInputDialog.getDouble(self, title, param.capitalize(), default, minimum, maximum, 1)
+            if not ok:
+                return
+            params[param] = value
+
+        if canva.apply_filter(name, **params):
+            cw.draw_canva()
+            self.statusBar().showMessage(f"{title} applied", 2000)
+        else:
+            self.statusBar().showMessage("Select a pixel layer first", 2000)
+
+    def _set_color_region_option(self, option: str, value) -> None:
+        """Set an option of the fuzzy select and bucket fill tools."""
+        for tool in self.tools_panel.color_region_tools:
+            setattr(tool, option, value)
+
+    def set_color_tolerance(self) -> None:
+        """Ask for the tolerance of the fuzzy select and bucket fill tools."""
+        current = self.tools_panel.fuzzy_select.tolerance
+        tolerance, ok = QInputDialog.getInt(self, "Color Tolerance", "Tolerance (0-255)", current, 0, 255)
+        if ok:
+            self._set_color_region_option('tolerance', tolerance)
+
+    def set_transform_interpolation(self, interpolation: str) -> None:
+        """Choose the resampling the transform tools use when committing."""
+        for tool in self.tools_panel.transform_tools:
+            tool.interpolation = interpolation
+
+    def crop_to_selection(self) -> None:
+        """Crop the whole image to the selection bounding box."""
+        canva = self.current_canva()
+        if canva is None or not canva.has_selection():
+            self.statusBar().showMessage("Select an area first", 2000)
+            return
+        self._safe_image_transform('crop', rect=canva.selection_rect)
+
+    def _ask_scale(self, title: str, shape) -> Optional[tuple]:
+        """
+        Ask for a scale percentage and a resampling method.
+
+        Returns:
+            Optional[tuple]: (new (height, width), method), or None if cancelled
+            or unchanged.
+        """
+        percent, ok = QInputDialog.getDouble(self, title, "Scale (%)", 100.0, 1.0, 1000.0, 1)
+        if not ok or percent == 100.0:
+            return None
+        methods = ['auto', *RESAMPLING_METHODS]
+        method, ok = QInputDialog.getItem(self, title, "Resampling", methods, 0, False)
+        if not ok:
+            return None
+        height, width = shape
+        return (max(1, round(height * percent / 100.0)), max(1, round(width * percent / 100.0))), method
+
+    def scale_image(self) -> None:
+        """Ask for a percentage and resample every layer and the canvas by it."""
+        canva = self.current_canva()
+        if canva is None:
+            QMessageBox.warning(self, "No Image", "No image is currently loaded.")
+            return
+        answer = self._ask_scale("Scale Image", canva.shape)
+        if answer is not None:
+            shape, method = answer
+            self._safe_image_transform('resize', shape=shape, method=method)
+
+    def scale_layer(self) -> None:
+        """Ask for a percentage and resample the active layer by it."""
+        canva = self.current_canva()
+        cw = self.current_canva_widget()
+        if canva is None or cw is None or canva.pixel_layer is None:
+            self.statusBar().showMessage("Select a pixel layer first", 2000)
+            return
+        answer = self._ask_scale("Scale Layer", canva.pixel_layer.pixels.shape[:2])
+        if answer is not None and canva.scale_layer(*answer):
+            cw.draw_canva()
+
     def create_new_image(self) -> None:
         """Open dialog to create a new empty image project."""
         dialog = NewImageDialog(self)
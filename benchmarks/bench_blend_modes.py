@@ -0,0 +1,56 @@
+"""
+Microbenchmark of each blend mode kernel through the tiled compositor.
+
+Usage:
+    python benchmarks/bench_blend_modes.py [--width 3840] [--height 2160] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from EpiGimp.core.blend_modes import blend_mode_names  # noqa: E402
+from EpiGimp.core.compositor import Compositor  # noqa: E402
+from EpiGimp.core.layer import Layer  # noqa: E402
+
+
+def bench(compositor: Compositor, layers, shape, repeat: int) -> float:
+    compositor.composite(layers, shape)  # warm-up (fills caches)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        compositor.composite(layers, shape)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--width', type=int, default=3840)
+    parser.add_argument('--height', type=int, default=2160)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    shape = (args.height, args.width)
+    rng = np.random.default_rng(0)
+    bottom = Layer(pixels=rng.integers(0, 256, (shape[0], shape[1], 4), dtype=np.uint8))
+    top = Layer(pixels=rng.integers(0, 256, (shape[0], shape[1], 4), dtype=np.uint8))
+    megapixels = shape[0] * shape[1] / 1e6
+
+    print(f"{args.width}x{args.height}, 2 layers")
+    print(f"{'mode':<12}{'float ms':>10}{'fixed ms':>10}{'MP/s':>10}")
+    for mode in blend_mode_names():
+        top.set_blend_mode(mode)
+        timings = [
+            bench(Compositor(fixed_point=fixed), [bottom, top], shape, args.repeat)
+            for fixed in (False, True)
+        ]
+        print(f"{mode:<12}{timings[0] * 1000:10.1f}{timings[1] * 1000:10.1f}{megapixels / min(timings):10.1f}")
+
+
+if __name__ == '__main__':
+    main()
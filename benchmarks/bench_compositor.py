@@ -0,0 +1,62 @@
+"""
+Benchmark the tiled compositor on an 8K canvas with 1..N worker threads.
+
+Usage:
+    python benchmarks/bench_compositor.py [--layers 4] [--repeat 3] [--fixed-point]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from EpiGimp.core.compositor import Compositor  # noqa: E402
+from EpiGimp.core.layer import Layer  # noqa: E402
+
+SHAPE_8K = (4320, 7680)
+
+
+def make_layers(count: int, shape):
+    rng = np.random.default_rng(0)
+    layers = [Layer(shape=shape, color=(255, 255, 255, 255), name="Background")]
+    for i in range(count - 1):
+        layers.append(Layer(pixels=rng.integers(0, 256, (shape[0], shape[1], 4), dtype=np.uint8), name=f"Layer {i}"))
+    return layers
+
+
+def bench(compositor: Compositor, layers, shape, repeat: int) -> float:
+    compositor.composite(layers, shape)  # warm-up
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        compositor.composite(layers, shape)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--layers', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--fixed-point', action='store_true', help="use the uint16 fixed point path")
+    args = parser.parse_args()
+
+    layers = make_layers(args.layers, SHAPE_8K)
+    path = "fixed point" if args.fixed_point else "float"
+    print(f"8K canvas {SHAPE_8K[1]}x{SHAPE_8K[0]}, {args.layers} layers, {path} path")
+
+    baseline = None
+    workers = 1
+    while workers <= args.max_workers:
+        elapsed = bench(Compositor(max_workers=workers, fixed_point=args.fixed_point), layers, SHAPE_8K, args.repeat)
+        baseline = baseline or elapsed
+        print(f"{workers:3d} thread(s): {elapsed * 1000:8.1f} ms  speedup x{baseline / elapsed:.2f}")
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
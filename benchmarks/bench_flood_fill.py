@@ -0,0 +1,52 @@
+"""
+Time of a color region (magic wand / bucket fill) on a large image, contiguous and global.
+
+The image holds a big rectangle crossed by a band of another color, so the
+contiguous region stops at the band while the global one does not.
+
+Usage:
+    python benchmarks/bench_flood_fill.py [--megapixels 50] [--tolerance 15] [--repeat 3]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from EpiGimp.core.flood_fill import color_region  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--megapixels', type=float, default=50.0, help="Image size, 4:3")
+    parser.add_argument('--tolerance', type=int, default=15)
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per mode; the best is reported")
+    args = parser.parse_args()
+
+    width = int(math.sqrt(args.megapixels * 1e6 * 4 / 3))
+    height = int(args.megapixels * 1e6 / width)
+    pixels = np.zeros((height, width, 4), dtype=np.uint8)
+    pixels[..., 3] = 255
+    pixels[height // 8:height * 7 // 8, width // 8:width * 7 // 8] = (200, 10, 10, 255)
+    pixels[height // 2:height // 2 + 16] = (0, 0, 0, 255)
+    # Some noise inside the tolerance
+    pixels[height // 4, ::3, 0] = 205
+    seed = (width // 4, height // 4)
+    print(f"{width}x{height} ({width * height / 1e6:.1f} MP), {os.cpu_count()} core(s)")
+
+    for contiguous in (True, False):
+        best = math.inf
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            region = color_region(pixels, seed, args.tolerance, contiguous)
+            best = min(best, time.perf_counter() - start)
+        mode = 'contiguous' if contiguous else 'global'
+        print(f"  {mode:<12}{best * 1000:9.1f} ms   bounds {region.bounds}")
+
+
+if __name__ == '__main__':
+    main()
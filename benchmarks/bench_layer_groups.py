@@ -0,0 +1,69 @@
+"""
+Frame time of a many-layer document, flat versus organized in layer groups.
+
+Each group gathers layers around one spot of the canvas; a frame repaints one
+dab on a layer of the last group, as while painting. Flat, every layer is blended for every frame;
+grouped, the compositor blends the cached group buffers and only the
+painted group is flattened again, over the tile it touched.
+
+Usage:
+    python benchmarks/bench_layer_groups.py [--size 2048] [--layers 200] [--groups 10] [--repeat 5]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from EpiGimp.core.compositor import Compositor  # noqa: E402
+from EpiGimp.core.layer import Layer  # noqa: E402
+from EpiGimp.core.layer_group import LayerGroup  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=2048, help="Canvas edge, in pixels")
+    parser.add_argument('--layers', type=int, default=200)
+    parser.add_argument('--groups', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5, help="Frames per mode; the best is reported")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    shape = (args.size, args.size)
+    per_group = math.ceil(args.layers / args.groups)
+    layers, groups = [], []
+    for start in range(0, args.layers, per_group):
+        # Each group is an object of the picture: partly transparent layers
+        # around the same spot
+        center = rng.integers(args.size // 4, args.size * 3 // 4, 2)
+        children = []
+        for _ in range(min(per_group, args.layers - start)):
+            edge = args.size // 4
+            layer = Layer(shape=(edge, edge), color=tuple(int(c) for c in rng.integers(0, 256, 3)) + (160,))
+            x, y = center + rng.integers(-edge // 2, edge // 2, 2) - edge // 2
+            layer.position = (int(x), int(y))
+            children.append(layer)
+        layers.extend(children)
+        groups.append(LayerGroup(children))
+    painted = layers[-1]
+    print(f"{args.size}x{args.size}, {args.layers} layers in {len(groups)} groups, {os.cpu_count()} core(s)")
+
+    for name, stack in (('flat', layers), ('grouped', groups)):
+        compositor = Compositor()
+        compositor.composite(stack, shape)  # Warm up caches
+        best = math.inf
+        for _ in range(args.repeat):
+            painted.pixels[:16, :16, 0] += 1
+            painted.mark_dirty((0, 0, 16, 16))
+            start = time.perf_counter()
+            compositor.composite(stack, shape)
+            best = min(best, time.perf_counter() - start)
+        print(f"  {name:<10}{best * 1000:9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmarks of point operations: the color temperature adjustment as float math
+versus a lookup table, five adjustments applied one by one versus fused in a
+PointPipeline, and per-call versus batched Kelvin to RGB conversion.
+
+Usage:
+    python benchmarks/bench_point_ops.py [--megapixels 50] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from EpiGimp.core.layer import Layer  # noqa: E402
+from EpiGimp.core.point_ops import PointPipeline, kelvin_to_rgb, kelvin_to_rgb_array  # noqa: E402
+
+
+def float_temperature(layer: Layer, source: np.ndarray, original_temp: float, target_temp: float, opacity: float) -> None:
+    """The per-pixel float32 computation the lookup table replaces."""
+    scale = (layer.kelvin_to_rgb(target_temp) / 255.0) / (layer.kelvin_to_rgb(original_temp) / 255.0 + 1e-6)
+    rgb = source[:, :, :3].astype(np.float32)
+    adjusted = np.clip(rgb * scale, 0, 255)
+    layer.pixels[:, :, :3] = (rgb * (1 - opacity) + adjusted * opacity).astype(np.uint8)
+
+
+def lut_temperature(layer: Layer, source: np.ndarray, original_temp: float, target_temp: float, opacity: float) -> None:
+    layer.apply_lut(layer.color_temperature_lut(original_temp, target_temp, opacity), source=source)
+
+
+# Five adjustments as (PointPipeline method, arguments)
+ADJUSTMENTS = [
+    ('brightness_contrast', (0.1, 0.2)),
+    ('levels', (10, 240, 1.1)),
+    ('curves', ([(0, 10), (128, 140), (255, 245)],)),
+    ('hue_saturation', (20, 1.2)),
+    ('invert', ()),
+]
+
+
+def separate_pipelines(layer: Layer, source: np.ndarray, *_) -> None:
+    layer.pixels[:] = source
+    for method, args in ADJUSTMENTS:
+        layer.apply_point_ops(getattr(PointPipeline(), method)(*args))
+
+
+def fused_pipeline(layer: Layer, source: np.ndarray, *_) -> None:
+    pipeline = PointPipeline()
+    for method, args in ADJUSTMENTS:
+        getattr(pipeline, method)(*args)
+    layer.apply_point_ops(pipeline, source=source)
+
+
+def bench(func, layer: Layer, source: np.ndarray, repeat: int) -> float:
+    best = float('inf')
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(layer, source, 6500, 3200 + 100 * i, 0.8)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--megapixels', type=float, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    side = int((args.megapixels * 1e6) ** 0.5)
+    rng = np.random.default_rng(0)
+    source = rng.integers(0, 256, (side, side, 4), dtype=np.uint8)
+    layer = Layer(pixels=source.copy())
+
+    print(f"{side}x{side} ({side * side / 1e6:.0f} MP), one slider tick")
+    for name, func in (('float', float_temperature), ('lut', lut_temperature)):
+        print(f"{name:<10}{bench(func, layer, source, args.repeat) * 1000:10.1f} ms")
+    print("five adjustments")
+    for name, func in (('separate', separate_pipelines), ('fused', fused_pipeline)):
+        print(f"{name:<10}{bench(func, layer, source, args.repeat) * 1000:10.1f} ms")
+
+    kelvins = rng.uniform(1000, 40000, 100000)
+    print(f"kelvin to rgb, {len(kelvins)} temperatures")
+    start = time.perf_counter()
+    for kelvin in kelvins:
+        kelvin_to_rgb(kelvin)
+    print(f"{'per call':<10}{(time.perf_counter() - start) * 1000:10.1f} ms")
+    start = time.perf_counter()
+    kelvin_to_rgb_array(kelvins)
+    print(f"{'batched':<10}{(time.perf_counter() - start) * 1000:10.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Time and peak memory of each resampling method, e.g. for a 16K to 4K downscale.
+
+Peak memory is the largest amount allocated on top of the source image, as
+seen by tracemalloc (NumPy and OpenCV arrays are both counted).
+
+Usage:
+    python benchmarks/bench_resample.py [--source 16384] [--target 4096] [--methods area pyramid] [--untiled]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2 as cv
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from EpiGimp.core.filters import premultiply  # noqa: E402
+from EpiGimp.core.resample import METHODS, resample  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--source', type=int, default=16384, help="Edge of the square source image")
+    parser.add_argument('--target', type=int, default=4096, help="Edge of the square result")
+    parser.add_argument('--methods', nargs='+', choices=METHODS, default=list(METHODS))
+    parser.add_argument('--untiled', action='store_true',
+                        help="Also time one cv.resize on a premultiplied float copy (4 GB at 16K)")
+    args = parser.parse_args()
+
+    pixels = np.empty((args.source, args.source, 4), dtype=np.uint8)
+    # Cheap deterministic content: random rows, so the image is not constant
+    row = np.random.default_rng(0).integers(0, 256, (args.source, 4), dtype=np.uint8)
+    pixels[:] = row[np.newaxis, :, :]
+    shape = (args.target, args.target)
+    output_mb = args.target * args.target * 4 / 2**20
+    print(f"{args.source}x{args.source} -> {args.target}x{args.target} "
+          f"(output {output_mb:.0f} MB), {os.cpu_count()} core(s)")
+
+    for method in args.methods:
+        tracemalloc.start()
+        start = time.perf_counter()
+        resample(pixels, shape, method)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {method:<10}{elapsed * 1000:9.1f} ms   peak {peak / 2**20:8.1f} MB")
+
+    if not args.untiled:
+        return
+    # Reference: a single cv.resize call on a premultiplied float copy
+    tracemalloc.start()
+    start = time.perf_counter()
+    cv.resize(premultiply(pixels), shape[::-1], interpolation=cv.INTER_AREA)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {'untiled':<10}{elapsed * 1000:9.1f} ms   peak {peak / 2**20:8.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
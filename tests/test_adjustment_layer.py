@@ -0,0 +1,168 @@
+import gc
+
+import numpy as np
+import pytest
+from EpiGimp.core.adjustment_layer import AdjustmentLayer, adjustment_kinds, get_adjustment
+from EpiGimp.core.canva import Canva
+from EpiGimp.core.compositor import Compositor
+from EpiGimp.core.layer import Layer
+from EpiGimp.core.layer_group import iter_layers
+from EpiGimp.core.point_ops import apply_lut, color_temperature_lut, identity_lut
+
+WARM = {'original_temp': 6500, 'target_temp': 3200}
+
+
+@pytest.fixture
+def layers():
+    rng = np.random.default_rng(0)
+    bottom = Layer(pixels=rng.integers(0, 256, (300, 400, 4), dtype=np.uint8))
+    bottom.pixels[..., 3] = 255
+    return [bottom, Layer(pixels=rng.integers(0, 256, (300, 400, 4), dtype=np.uint8))]
+
+
+class TestAdjustmentLayer:
+    def test_registry(self):
+        assert 'color_temperature' in adjustment_kinds()
+        with pytest.raises(ValueError):
+            get_adjustment('nope')
+        with pytest.raises(ValueError):
+            AdjustmentLayer('nope')
+
+    def test_pipeline_follows_params(self):
+        layer = AdjustmentLayer(params=WARM)
+        assert np.array_equal(layer.pipeline().as_lut(), color_temperature_lut(6500, 3200))
+        version = layer.version
+        layer.set_params(target_temp=6500)
+        assert layer.version > version
+        assert np.array_equal(layer.pipeline().as_lut(), identity_lut())
+
+    def test_apply_honors_opacity(self):
+        pixels = np.full((4, 4, 4), 200, dtype=np.uint8)
+        layer = AdjustmentLayer('invert')
+        layer.set_opacity(0.25)
+        layer.apply(pixels)
+        assert np.all(pixels[..., :3] == round(200 * 0.75 + 55 * 0.25))
+        assert np.all(pixels[..., 3] == 200)
+
+    def test_dict_roundtrip(self):
+        layer = AdjustmentLayer.from_dict(AdjustmentLayer(params=WARM).to_dict())
+        assert layer.kind == 'color_temperature' and layer.params == WARM
+
+
+class TestCompositing:
+    @pytest.mark.parametrize("fixed_point", [False, True])
+    def test_applies_to_layers_below(self, layers, fixed_point):
+        compositor = Compositor(tile_size=128, fixed_point=fixed_point)
+        below = compositor.composite(layers, (300, 400))
+        result = compositor.composite(layers + [AdjustmentLayer(params=WARM)], (300, 400))
+        expected = apply_lut(below, color_temperature_lut(6500, 3200))
+        assert np.abs(result.astype(np.int32) - expected.astype(np.int32)).max() <= 1
+
+    @pytest.mark.parametrize("fixed_point", [False, True])
+    def test_channel_mixing_adjustment(self, layers, fixed_point):
+        compositor = Compositor(tile_size=128, fixed_point=fixed_point)
+        below = compositor.composite(layers, (300, 400))
+        adjustment = AdjustmentLayer('hue_saturation', {'hue': 90, 'saturation': 0.5})
+        result = compositor.composite(layers + [adjustment], (300, 400))
+        expected = adjustment.pipeline().apply(below)
+        assert np.abs(result.astype(np.int32) - expected.astype(np.int32)).max() <= 1
+
+    def test_layers_above_are_not_adjusted(self, layers):
+        top = Layer(shape=(300, 400), color=(128, 128, 128, 255))
+        result = Compositor().composite(layers + [AdjustmentLayer(params=WARM), top], (300, 400))
+        assert np.all(result == [128, 128, 128, 255])
+
+    def test_hidden_adjustment_is_skipped(self, layers):
+        adjustment = AdjustmentLayer(params=WARM)
+        adjustment.set_visibility(False)
+        compositor = Compositor()
+        assert np.array_equal(compositor.composite(layers + [adjustment], (300, 400)), compositor.composite(layers, (300, 400)))
+
+    @pytest.mark.parametrize("fixed_point", [False, True])
+    def test_tweaking_reuses_cached_tiles_below(self, layers, fixed_point):
+        compositor = Compositor(tile_size=128, fixed_point=fixed_point)
+        adjustment = AdjustmentLayer(params=WARM)
+        stack = layers + [adjustment]
+        expected = compositor.composite(stack, (300, 400))
+        assert len(compositor._tile_cache) == 12
+
+        # Layers below are not read again: an unflagged edit goes unnoticed
+        layers[0].pixels[:] = 0
+        layers[1].pixels[:] = 0
+        adjustment.set_params(target_temp=4000)
+        compositor.composite(stack, (300, 400))
+        adjustment.set_params(target_temp=3200)
+        assert np.array_equal(compositor.composite(stack, (300, 400)), expected)
+
+    def test_edit_below_invalidates_cache(self, layers):
+        compositor = Compositor(tile_size=128)
+        stack = layers + [AdjustmentLayer(params=WARM)]
+        compositor.composite(stack, (300, 400))
+        layers[1].pixels[:] = (0, 0, 0, 255)
+        layers[1].mark_dirty()
+        result = compositor.composite(stack, (300, 400))
+        assert np.all(result[..., :3] == 0)
+
+    def test_replaced_layer_below_is_not_mistaken_for_the_old_one(self):
+        compositor = Compositor(tile_size=128)
+        adjustment = AdjustmentLayer('invert')
+        for index in range(20):
+            # Same size and version as the deleted layer; often the same id too
+            layer = Layer(shape=(100, 100), color=(index * 10, 0, 0, 255))
+            result = compositor.composite([layer, adjustment], (100, 100))
+            assert result[50, 50].tolist() == [255 - index * 10, 255, 255, 255]
+            del layer, result
+            gc.collect()
+
+
+class TestCanvaAdjustments:
+    def test_add_adjustment_layer(self):
+        canva = Canva((50, 60))
+        adjustment = canva.add_adjustment_layer(params=WARM)
+        assert canva.layers[-1] is adjustment
+        assert canva.active_layer is adjustment
+        assert canva.pixel_layer is None
+        # Pixel operations ignore the adjustment layer
+        canva.flip_horizontal()
+        canva.adjust_color_temperature(6500, 3200)
+
+    def test_project_roundtrip(self, tmp_path):
+        canva = Canva((50, 60), background=(100, 150, 200, 255))
+        canva.add_adjustment_layer(params=WARM).set_opacity(0.5)
+        path = str(tmp_path / "adjusted.epigimp")
+        canva.save_project(path)
+
+        loaded = Canva.from_project(path)
+        adjustment = loaded.layers[-1]
+        assert adjustment.is_adjustment
+        assert adjustment.params == WARM and adjustment.opacity == 0.5
+        assert np.array_equal(loaded.get_img().pixels, canva.get_img().pixels)
+
+    def test_all_layers_preview_matches_edit(self):
+        canva = Canva((50, 60), background=(100, 150, 200, 255))
+        canva.add_adjustment_layer('invert').set_opacity(0.5)
+        canva.add_layer()
+        canva.layers[-1].pixels[10:30, 10:40] = (200, 120, 40, 160)
+        lut = color_temperature_lut(6500, 3200)
+        filters = {layer: (lambda pixels: apply_lut(pixels, lut)) for layer in canva.layers if not layer.is_adjustment}
+        preview = canva.composite_region((0, 0, 60, 50), filters=filters)
+        canva.adjust_color_temperature(6500, 3200)
+        assert np.abs(preview.astype(int) - canva.composite_region((0, 0, 60, 50))).max() <= 1
+
+    @pytest.mark.parametrize("level", [0, 1])
+    def test_preview_inside_a_group_matches_edit(self, level):
+        canva = Canva((64, 80), background=(100, 150, 200, 255))
+        first, second = canva.add_layer(), canva.add_layer()
+        first.pixels[8:40, 8:60] = (200, 120, 40, 255)
+        second.pixels[20:56, 30:70] = (90, 200, 160, 200)
+        second.set_blend_mode('multiply')
+        second.set_opacity(0.7)
+        canva.group_layers(1, 3)
+        lut = color_temperature_lut(6500, 3200)
+        filters = {layer: (lambda pixels: apply_lut(pixels, lut)) for layer in iter_layers(canva.layers)}
+        before = canva.composite_region((0, 0, 80, 64), level)
+        preview = canva.composite_region((0, 0, 80, 64), level, filters=filters)
+        # The group's cache is left as it was
+        assert np.array_equal(canva.composite_region((0, 0, 80, 64), level), before)
+        canva.adjust_color_temperature(6500, 3200)
+        assert np.abs(preview.astype(int) - canva.composite_region((0, 0, 80, 64), level)).max() <= 1
@@ -0,0 +1,79 @@
+import pytest
+import numpy as np
+from EpiGimp.core.blend_modes import BLEND_MODES, get_blend_mode, blend_mode_names, register_blend_mode
+from EpiGimp.core.compositor import Compositor
+from EpiGimp.core.layer import Layer
+
+
+EXPECTED_MODES = ['normal', 'multiply', 'screen', 'overlay', 'darken', 'lighten', 'add', 'difference']
+
+
+class TestRegistry:
+    def test_builtin_modes_registered(self):
+        for name in EXPECTED_MODES:
+            assert name in blend_mode_names()
+
+    def test_unknown_mode_raises(self):
+        with pytest.raises(ValueError):
+            get_blend_mode('does-not-exist')
+
+    def test_register_custom_mode(self):
+        @register_blend_mode('test-exclusion')
+        def exclusion(backdrop, source):
+            return backdrop + source - 2 * backdrop * source
+        try:
+            assert get_blend_mode('test-exclusion') is exclusion
+        finally:
+            del BLEND_MODES['test-exclusion']
+
+
+class TestKernels:
+    @pytest.mark.parametrize("mode, expected", [
+        ('normal', 0.25),
+        ('multiply', 0.125),
+        ('screen', 0.625),
+        ('overlay', 0.25),
+        ('darken', 0.25),
+        ('lighten', 0.5),
+        ('add', 0.75),
+        ('difference', 0.25),
+    ])
+    def test_kernel_values(self, mode, expected):
+        backdrop = np.full((2, 2, 3), 0.5, dtype=np.float32)
+        source = np.full((2, 2, 3), 0.25, dtype=np.float32)
+        result = get_blend_mode(mode)(backdrop, source)
+        assert np.allclose(result, expected)
+
+
+class TestCompositing:
+    def make_stack(self, mode, opacity=1.0):
+        bottom = Layer(shape=(4, 4), color=(128, 64, 255, 255))
+        top = Layer(shape=(4, 4), color=(255, 128, 0, 255))
+        top.set_blend_mode(mode)
+        top.set_opacity(opacity)
+        return [bottom, top]
+
+    @pytest.mark.parametrize("fixed_point", [False, True])
+    def test_multiply_opaque(self, fixed_point):
+        result = Compositor(fixed_point=fixed_point).composite(self.make_stack('multiply'), (4, 4))
+        assert np.allclose(result[0, 0], [128, 32, 0, 255], atol=1)
+
+    @pytest.mark.parametrize("fixed_point", [False, True])
+    def test_opacity(self, fixed_point):
+        result = Compositor(fixed_point=fixed_point).composite(self.make_stack('normal', 0.5), (4, 4))
+        assert np.allclose(result[0, 0], [191.5, 96, 127.5, 255], atol=1)
+
+    @pytest.mark.parametrize("mode", EXPECTED_MODES)
+    def test_fixed_point_matches_float(self, mode):
+        rng = np.random.default_rng(3)
+        layers = [Layer(pixels=rng.integers(0, 256, (40, 60, 4), dtype=np.uint8)) for _ in range(3)]
+        layers[1].set_blend_mode(mode)
+        layers[2].set_opacity(0.6)
+        expected = Compositor().composite(layers, (40, 60), (255, 255, 255, 255))
+        result = Compositor(fixed_point=True).composite(layers, (40, 60), (255, 255, 255, 255))
+        assert np.abs(result.astype(np.int32) - expected.astype(np.int32)).max() <= 1
+
+    def test_zero_opacity_layer_is_skipped(self):
+        layers = self.make_stack('difference', 0.0)
+        result = Compositor().composite(layers, (4, 4))
+        assert np.array_equal(result[0, 0], [128, 64, 255, 255])
@@ -1,9 +1,11 @@
 import pytest
 import numpy as np
 from PIL import Image
-from EpiGimp.core.canva import Canva
+from PySide6.QtCore import QPoint
+from EpiGimp.core.canva import Canva, LayerEvent
 from EpiGimp.core.layer import Layer
 from EpiGimp.core.fileio.loader_png import LoaderPng
+from EpiGimp.tools.eraser import Eraser
 from datetime import datetime
 import os
 
@@ -118,6 +120,52 @@ class TestLayerManagement:
         assert canva.layers == original_order
 
 
+class TestLayerEvents:
+    def _replay(self, mirror, event):
+        """Apply an event to a copy of the stack, as a view would."""
+        if event.kind == 'inserted':
+            mirror.insert(event.index, event.layer)
+        elif event.kind == 'removed':
+            assert mirror.pop(event.index) is event.layer
+        elif event.kind == 'moved':
+            assert mirror.pop(event.previous_index) is event.layer
+            mirror.insert(event.index, event.layer)
+
+    def test_events_keep_a_mirror_in_sync(self):
+        canva = Canva()
+        mirror = list(canva.layers)
+        events = []
+        canva.subscribe(events.append)
+        canva.subscribe(lambda event: self._replay(mirror, event))
+        for i in range(5):
+            canva.add_layer(name=f"Layer {i}")
+        canva.add_adjustment_layer()
+        canva.swap_layer(1, 2)
+        canva.swap_layer(5, 0)
+        canva.del_layer(3)
+        assert mirror == canva.layers
+        assert [event.kind for event in events[:6]] == ['inserted'] * 6
+
+    def test_rename_and_visibility(self):
+        canva = Canva()
+        layer = canva.add_layer(name="Layer")
+        events = []
+        canva.subscribe(events.append)
+        canva.rename_layer(layer, "Renamed")
+        canva.rename_layer(layer, "Renamed")
+        canva.set_layer_visibility(layer, False)
+        assert events == [LayerEvent('renamed', layer, 1), LayerEvent('visibility', layer, 1)]
+        assert layer.name == "Renamed" and not layer.visibility
+
+    def test_unsubscribe(self):
+        canva = Canva()
+        events = []
+        canva.subscribe(events.append)
+        canva.unsubscribe(events.append)
+        canva.add_layer()
+        assert events == []
+
+
 class TestCompositing:
     def test_get_img_single_layer(self):
         canva = Canva(shape=(100, 100))
@@ -139,6 +187,16 @@ class TestCompositing:
         assert result.shape == (100, 100, 4)
         assert result.dtype == np.uint8
     
+    def test_get_img_honors_layer_position(self):
+        canva = Canva(shape=(100, 100), background=(0, 0, 255, 255))
+        sprite = Layer(shape=(10, 10), color=(255, 0, 0, 255))
+        sprite.position = (50, 20)
+        canva.add_layer_from_layer(sprite)
+        result = canva.get_img()
+        assert result.shape == (100, 100)
+        assert np.array_equal(result.pixels[25, 55], [255, 0, 0, 255])
+        assert np.array_equal(result.pixels[5, 5], [0, 0, 255, 255])
+
     def test_composite_alpha_blending(self):
         canva = Canva(shape=(100, 100), background=(0, 0, 255, 255))
         layer = canva.add_layer(name="Red", color=(255, 0, 0, 128))
@@ -169,6 +227,111 @@ class TestTransformations:
         assert np.array_equal(canva.layers[0].pixels[-1, -1, :3], [255, 0, 0])
 
 
+class TestPainting:
+    def _canva_with_offset_layer(self):
+        canva = Canva(shape=(200, 200), background=(255, 255, 255, 255))
+        layer = Layer(shape=(50, 80), color=(255, 0, 0, 255))
+        layer.position = (100, 60)
+        canva.add_layer_from_layer(layer)
+        return canva, canva.pixel_layer
+
+    def test_paints_under_the_pointer(self):
+        canva, layer = self._canva_with_offset_layer()
+        dirty = canva.apply_tool(Eraser(size=10), QPoint(120, 80))
+        # (120, 80) on the canvas is (20, 20) in the layer
+        assert layer.pixels[20, 20, 3] == 0 and layer.pixels[5, 5, 3] == 255
+        assert dirty.contains(QPoint(120, 80)) and not dirty.contains(QPoint(20, 20))
+        assert canva.composite()[80, 120].tolist() == [255, 255, 255, 255]
+
+    def test_paints_the_mask_under_the_pointer(self):
+        canva, layer = self._canva_with_offset_layer()
+        mask = canva.add_layer_mask()
+        canva.editing_mask = True
+        canva.apply_tool(Eraser(size=10), QPoint(120, 80))
+        assert mask.pixels[20, 20] == 0 and mask.pixels[5, 5] == 255
+        assert layer.pixels[20, 20, 3] == 255
+
+    def test_no_pixel_layer(self):
+        canva = Canva(shape=(10, 10))
+        canva.add_adjustment_layer()
+        assert canva.apply_tool(Eraser(size=4), QPoint(5, 5)) is None
+
+
+class TestImageTransforms:
+    def _canva_with_sprite(self):
+        canva = Canva(shape=(40, 60), background=(0, 0, 255, 255))
+        sprite = Layer(shape=(10, 20), color=(255, 0, 0, 255))
+        sprite.position = (5, 3)
+        canva.add_layer_from_layer(sprite)
+        return canva
+
+    @pytest.mark.parametrize("operation, rotate", [
+        ('flip_horizontal', lambda a: a[:, ::-1]),
+        ('flip_vertical', lambda a: a[::-1]),
+        ('rotate_180', lambda a: a[::-1, ::-1]),
+        ('rotate_90_clockwise', lambda a: np.rot90(a, -1)),
+        ('rotate_90_counterclockwise', lambda a: np.rot90(a, 1)),
+    ])
+    def test_matches_transformed_composite(self, operation, rotate):
+        canva = self._canva_with_sprite()
+        expected = rotate(canva.composite())
+        canva.transform_image(operation)
+        assert canva.shape == expected.shape[:2]
+        assert np.array_equal(canva.composite(), expected)
+
+    def test_flips_do_not_modify_layers_in_place(self):
+        canva = self._canva_with_sprite()
+        sprite = canva.layers[1]
+        sprite.pixels[0, 0] = (0, 255, 0, 255)
+        before = sprite.pixels
+        snapshot = before.copy()
+        canva.transform_image('rotate_180')
+        # New buffers are swapped in once every layer is done
+        assert sprite.pixels is not before and np.array_equal(before, snapshot)
+        assert np.array_equal(sprite.pixels[-1, -1], [0, 255, 0, 255])
+
+    def test_flip_after_deferred_flip(self):
+        canva = self._canva_with_sprite()
+        canva.layers[1].pixels[0, 0] = (0, 255, 0, 255)
+        canva.layers[1].flip_horizontal(deferred=True)
+        canva.transform_image('flip_horizontal')
+        assert np.array_equal(canva.layers[1].pixels[0, 0], [0, 255, 0, 255])
+        assert tuple(canva.layers[1].position) == (35, 3)
+
+    def test_rotate_updates_metadata(self):
+        canva = self._canva_with_sprite()
+        canva.transform_image('rotate_90_clockwise')
+        assert canva.shape == (60, 40)
+        assert (canva.metadata['width'], canva.metadata['height']) == (40, 60)
+
+    def test_crop(self):
+        canva = self._canva_with_sprite()
+        expected = canva.composite()[2:22, 10:40]
+        canva.transform_image('crop', rect=(10, 2, 30, 20))
+        assert canva.shape == (20, 30)
+        assert canva.layers[0].pixels.shape[:2] == (20, 30)
+        assert canva.layers[1].pixels.shape[:2] == (10, 15)
+        assert np.array_equal(canva.composite(), expected)
+
+    def test_crop_is_clipped_to_the_canvas(self):
+        canva = self._canva_with_sprite()
+        canva.transform_image('crop', rect=(50, -5, 30, 20))
+        assert canva.shape == (15, 10)
+
+    def test_resize(self):
+        canva = self._canva_with_sprite()
+        canva.transform_image('resize', shape=(20, 30))
+        assert canva.shape == (20, 30)
+        assert canva.layers[1].pixels.shape[:2] == (5, 10)
+        assert tuple(canva.layers[1].position) == (2, 2)
+        assert np.array_equal(canva.composite()[3, 4], [255, 0, 0, 255])
+
+    def test_unknown_operation(self):
+        canva = Canva(shape=(10, 10))
+        with pytest.raises(ValueError):
+            canva.transform_image('shear')
+
+
 class TestColorTemperature:
     def test_adjust_color_temperature_single_layer(self):
         canva = Canva(shape=(10, 10))
@@ -0,0 +1,76 @@
+import numpy as np
+from PySide6.QtCore import QRect
+
+from EpiGimp.core.canva import Canva
+from EpiGimp.core.clipboard import Clipboard
+
+
+def _pixels(height=300, width=200):
+    pixels = np.zeros((height, width, 4), dtype=np.uint8)
+    pixels[..., 0] = np.arange(width, dtype=np.uint8)[np.newaxis, :]
+    pixels[..., 3] = 255
+    return pixels
+
+
+class TestClipboard:
+    def test_small_payloads_are_kept_raw(self):
+        clipboard = Clipboard()
+        pixels = _pixels()
+        clipboard.set_pixels(pixels, (3, 4))
+        assert not clipboard.is_compressed
+        pasted = clipboard.pixels()
+        assert np.array_equal(pasted, pixels) and pasted is not pixels
+        assert clipboard.position == (3, 4)
+
+    def test_large_payloads_are_compressed(self):
+        clipboard = Clipboard(compress_threshold=1024, band_rows=64)
+        pixels = _pixels(301, 200)
+        clipboard.set_pixels(pixels.copy())
+        assert clipboard.is_compressed
+        assert clipboard.stored_bytes < pixels.nbytes // 10
+        assert np.array_equal(clipboard.pixels(), pixels)
+
+    def test_noise_is_kept_raw(self):
+        clipboard = Clipboard(compress_threshold=1024, band_rows=64)
+        pixels = np.random.default_rng(0).integers(0, 256, (200, 200, 4), dtype=np.uint8)
+        clipboard.set_pixels(pixels)
+        assert not clipboard.is_compressed
+        assert np.array_equal(clipboard.pixels(), pixels)
+
+    def test_listeners_and_clear(self):
+        clipboard = Clipboard()
+        calls = []
+        clipboard.subscribe(lambda: calls.append(clipboard.serial))
+        clipboard.set_pixels(_pixels(2, 2))
+        clipboard.clear()
+        assert calls == [1, 2]
+        assert clipboard.is_empty() and clipboard.pixels() is None
+
+
+class TestCanvaClipboard:
+    def test_shared_by_every_canvas(self):
+        source = Canva(shape=(100, 100), background=(255, 0, 0, 255))
+        target = Canva(shape=(100, 100))
+        source.set_selection(QRect(60, 50, 20, 10))
+        assert source.copy_selection()
+        assert target.paste_selection()
+        pasted = target.active_layer
+        assert pasted.pixels.shape == (10, 20, 4)
+        assert tuple(pasted.position) == (60, 50)
+        assert np.array_equal(target.composite_region((60, 50, 1, 1))[0, 0], [255, 0, 0, 255])
+
+    def test_paste_outside_is_centered(self):
+        source = Canva(shape=(400, 400))
+        source.set_selection(QRect(300, 300, 20, 10))
+        source.copy_selection()
+        target = Canva(shape=(100, 100))
+        target.paste_selection()
+        assert tuple(target.active_layer.position) == (40, 45)
+
+    def test_position_of_offset_layer(self):
+        canva = Canva(shape=(100, 100))
+        canva.pixel_layer.position = (10, 10)
+        canva.set_selection(QRect(0, 0, 30, 30))
+        canva.copy_selection()
+        assert canva.clipboard.position == (10, 10)
+        assert canva.clipboard.shape == (20, 20, 4)
@@ -0,0 +1,257 @@
+import pytest
+import cv2 as cv
+import numpy as np
+from EpiGimp.core.compositor import Compositor, iter_tiles, scratch_buffer
+from EpiGimp.core.layer import Layer
+
+
+def reference_over(layers, shape, background):
+    """Straightforward full-frame float implementation used as an oracle."""
+    out = np.zeros((shape[0], shape[1], 4), dtype=np.float64)
+    out[:] = np.asarray(background, dtype=np.float64) / 255.0
+    out[..., :3] *= out[..., 3:4]
+    for layer in layers:
+        if not layer.visibility:
+            continue
+        src = layer.pixels.astype(np.float64) / 255.0
+        a = src[..., 3:4]
+        out = out * (1 - a)
+        out[..., :3] += src[..., :3] * a
+        out[..., 3:4] += a
+    alpha = out[..., 3:4]
+    rgb = np.divide(out[..., :3], alpha, out=np.zeros_like(out[..., :3]), where=alpha > 0)
+    return np.concatenate([rgb, alpha], axis=2) * 255.0
+
+
+class TestTiling:
+    def test_iter_tiles_covers_image(self):
+        tiles = iter_tiles(600, 1000, 256)
+        covered = np.zeros((600, 1000), dtype=np.int32)
+        for y0, y1, x0, x1 in tiles:
+            covered[y0:y1, x0:x1] += 1
+        assert np.all(covered == 1)
+
+    def test_iter_tiles_clamps_edges(self):
+        tiles = iter_tiles(10, 10, 256)
+        assert tiles == [(0, 10, 0, 10)]
+
+    def test_scratch_buffer_is_reused(self):
+        a = scratch_buffer('test', (4, 4, 4))
+        b = scratch_buffer('test', (2, 2, 4))
+        assert np.shares_memory(a, b)
+
+
+class TestCompositor:
+    @pytest.fixture
+    def layers(self):
+        rng = np.random.default_rng(0)
+        return [
+            Layer(shape=(300, 520), color=(10, 20, 30, 255)),
+            Layer(pixels=rng.integers(0, 256, (300, 520, 4), dtype=np.uint8)),
+            Layer(pixels=rng.integers(0, 256, (300, 520, 4), dtype=np.uint8)),
+        ]
+
+    @pytest.mark.parametrize("workers", [1, 4, None])
+    def test_matches_reference(self, layers, workers):
+        compositor = Compositor(tile_size=128, max_workers=workers)
+        result = compositor.composite(layers, (300, 520), background=(0, 0, 0, 255))
+        expected = reference_over(layers, (300, 520), (0, 0, 0, 255))
+        assert np.abs(result.astype(np.float64) - expected).max() <= 1.0
+
+    def test_thread_count_does_not_change_result(self, layers):
+        single = Compositor(tile_size=64, max_workers=1).composite(layers, (300, 520))
+        multi = Compositor(tile_size=64, max_workers=4).composite(layers, (300, 520))
+        assert np.array_equal(single, multi)
+
+    def test_hidden_layers_are_skipped(self, layers):
+        layers[2].set_visibility(False)
+        result = Compositor().composite(layers, (300, 520))
+        expected = reference_over(layers[:2], (300, 520), (0, 0, 0, 0))
+        assert np.abs(result.astype(np.float64) - expected).max() <= 1.0
+
+    @pytest.mark.parametrize("background", [None, (0, 0, 0, 255), (10, 200, 30, 128)])
+    def test_fixed_point_matches_float(self, layers, background):
+        layers[0].pixels[..., 3] = 90
+        expected = Compositor().composite(layers, (300, 520), background)
+        result = Compositor(fixed_point=True).composite(layers, (300, 520), background)
+        assert np.abs(result.astype(np.int32) - expected.astype(np.int32)).max() <= 1
+
+    def test_premultiplied_tiles_follow_tile_versions(self, layers, monkeypatch):
+        compositor = Compositor(tile_size=128, fixed_point=True)
+        compositor.composite(layers, (300, 520))
+        calls = []
+        premultiply = Compositor._premultiply
+        monkeypatch.setattr(Compositor, '_premultiply', staticmethod(lambda pixels: calls.append(pixels.shape) or premultiply(pixels)))
+        compositor.composite(layers, (300, 520))
+        assert calls == []
+        # A dab inside one 256 px layer tile only refreshes the output tiles over it
+        layers[1].pixels[10:20, 10:20] = (255, 0, 0, 255)
+        layers[1].mark_dirty((10, 10, 10, 10))
+        result = compositor.composite(layers, (300, 520))
+        assert len(calls) == 4
+        assert np.array_equal(result, Compositor(fixed_point=True).composite(layers, (300, 520)))
+
+    def test_premultiplied_values(self):
+        layer = Layer(shape=(2, 2), color=(200, 100, 0, 128))
+        premultiplied = Compositor._premultiply(layer.pixels)
+        assert premultiplied.dtype == np.uint16
+        assert premultiplied[0, 0, 3] == 128 * 257
+        assert abs(int(premultiplied[0, 0, 0]) - round(200 * 128 / 255 * 257)) <= 1
+
+    def test_transparent_background(self):
+        layer = Layer(shape=(8, 8), color=(255, 0, 0, 0))
+        result = Compositor().composite([layer], (8, 8))
+        assert np.all(result[..., 3] == 0)
+
+
+class TestLayerPosition:
+    def test_offset_layer_is_placed_not_resized(self):
+        background = Layer(shape=(600, 600), color=(0, 0, 255, 255))
+        sprite = Layer(shape=(10, 20), color=(255, 0, 0, 255))
+        sprite.position = (300, 290)
+        result = Compositor(tile_size=256).composite([background, sprite], (600, 600))
+        assert np.array_equal(result[290, 300], [255, 0, 0, 255])
+        assert np.array_equal(result[299, 319], [255, 0, 0, 255])
+        assert np.array_equal(result[300, 300], [0, 0, 255, 255])
+        assert np.array_equal(result[290, 320], [0, 0, 255, 255])
+        assert np.array_equal(result[289, 300], [0, 0, 255, 255])
+
+    @pytest.mark.parametrize("fixed_point", [False, True])
+    def test_layer_crossing_tiles_and_edges(self, fixed_point):
+        sprite = Layer(shape=(100, 100), color=(0, 255, 0, 255))
+        sprite.position = (-50, 220)
+        result = Compositor(tile_size=64, fixed_point=fixed_point).composite([sprite], (300, 300))
+        expected = np.zeros((300, 300, 4), dtype=np.uint8)
+        expected[220:300, 0:50] = [0, 255, 0, 255]
+        assert np.array_equal(result, expected)
+
+    def test_layer_outside_canvas_is_ignored(self):
+        sprite = Layer(shape=(10, 10), color=(0, 255, 0, 255))
+        sprite.position = (1000, 1000)
+        result = Compositor().composite([sprite], (50, 50))
+        assert np.all(result == 0)
+
+
+class TestRegionRendering:
+    @pytest.fixture
+    def layers(self):
+        rng = np.random.default_rng(1)
+        sprite = Layer(pixels=rng.integers(0, 256, (120, 90, 4), dtype=np.uint8))
+        sprite.position = (200, 150)
+        return [Layer(pixels=rng.integers(0, 256, (400, 500, 4), dtype=np.uint8)), sprite]
+
+    @pytest.mark.parametrize("fixed_point", [False, True])
+    def test_region_matches_full_render(self, layers, fixed_point):
+        compositor = Compositor(tile_size=64, fixed_point=fixed_point)
+        full = compositor.composite(layers, (400, 500))
+        region = compositor.composite(layers, (400, 500), rect=(170, 90, 200, 150))
+        assert np.array_equal(region, full[90:240, 170:370])
+
+    def test_region_is_clipped_to_canvas(self, layers):
+        region = Compositor().composite(layers, (400, 500), rect=(450, -20, 100, 50))
+        assert region.shape == (30, 50, 4)
+
+    @pytest.mark.parametrize("fixed_point", [False, True])
+    def test_reduced_level_is_close_to_downscaled_render(self, fixed_point):
+        rng = np.random.default_rng(2)
+        base = Layer(pixels=rng.integers(0, 256, (256, 256, 4), dtype=np.uint8))
+        base.pixels[..., 3] = 255
+        sprite = Layer(shape=(64, 64), color=(255, 0, 0, 255))
+        sprite.position = (32, 96)
+        compositor = Compositor(fixed_point=fixed_point)
+        reduced = compositor.composite([base, sprite], (256, 256), level=2)
+        expected = cv.resize(compositor.composite([base, sprite], (256, 256)), (64, 64), interpolation=cv.INTER_AREA)
+        assert reduced.shape == (64, 64, 4)
+        assert np.abs(reduced.astype(np.int32) - expected.astype(np.int32)).max() <= 2
+        assert np.array_equal(reduced[30, 10], [255, 0, 0, 255])
+
+    @pytest.mark.parametrize("fixed_point", [False, True])
+    def test_reduced_level_follows_edits(self, fixed_point):
+        layer = Layer(shape=(512, 512), color=(0, 0, 255, 255))
+        compositor = Compositor(fixed_point=fixed_point)
+        compositor.composite([layer], (512, 512), level=1)
+        layer.pixels[0:256, 0:256] = (0, 255, 0, 255)
+        layer.mark_dirty((0, 0, 256, 256))
+        result = compositor.composite([layer], (512, 512), level=1)
+        assert np.array_equal(result[0, 0], [0, 255, 0, 255])
+        assert np.array_equal(result[200, 200], [0, 0, 255, 255])
+
+    @pytest.mark.parametrize("level", [0, 1])
+    def test_viewport_frame_only_premultiplies_visible_tiles(self, level, monkeypatch):
+        layer = Layer(shape=(2048, 2048), color=(0, 0, 255, 128))
+        compositor = Compositor(tile_size=256, fixed_point=True)
+        viewport = (0, 0, 512, 512)
+        compositor.composite([layer], (2048, 2048), rect=viewport, level=level)
+        calls = []
+        premultiply = Compositor._premultiply
+        monkeypatch.setattr(Compositor, '_premultiply', staticmethod(lambda pixels: calls.append(pixels.shape) or premultiply(pixels)))
+        # Painting outside the viewport costs the next frame nothing
+        layer.mark_dirty((1500, 1500, 10, 10))
+        compositor.composite([layer], (2048, 2048), rect=viewport, level=level)
+        assert calls == []
+        layer.mark_dirty((10, 10, 10, 10))
+        compositor.composite([layer], (2048, 2048), rect=viewport, level=level)
+        assert len(calls) == 1
+
+    @pytest.mark.parametrize("fixed_point", [False, True])
+    def test_layer_outside_the_viewport_is_not_reduced(self, fixed_point):
+        layer = Layer(shape=(4096, 4096), color=(0, 0, 255, 255))
+        layer.position = (0, 3000)
+        compositor = Compositor(fixed_point=fixed_point)
+        out = compositor.composite([layer], (8000, 4096), rect=(0, 0, 1000, 500), level=1)
+        assert not out[..., 3].any()
+        assert np.all(compositor.pyramid(layer)._built[1] == -1)
+
+    @pytest.mark.parametrize("level", [0, 1])
+    def test_scrolling_reuses_premultiplied_tiles(self, level, monkeypatch):
+        layer = Layer(shape=(2048, 2048), color=(0, 0, 255, 128))
+        compositor = Compositor(tile_size=256, fixed_point=True)
+        expected = compositor.composite([layer], (2048, 2048), rect=(0, 0, 1024, 1024), level=level)
+        calls = []
+        premultiply = Compositor._premultiply
+        monkeypatch.setattr(Compositor, '_premultiply', staticmethod(lambda pixels: calls.append(pixels.shape) or premultiply(pixels)))
+        # Unaligned viewports inside the area already shown
+        for x, y in [(10, 30), (100, 7), (333, 333)]:
+            result = compositor.composite([layer], (2048, 2048), rect=(x, y, 500, 400), level=level)
+            step = 1 << level
+            assert np.array_equal(result, expected[y // step:y // step + result.shape[0], x // step:x // step + result.shape[1]])
+        assert calls == []
+
+
+class TestFilters:
+    @pytest.fixture
+    def layers(self):
+        rng = np.random.default_rng(3)
+        top = Layer(pixels=rng.integers(0, 256, (200, 150, 4), dtype=np.uint8))
+        top.position = (40, 30)
+        return [Layer(shape=(300, 300), color=(20, 40, 60, 255)), top]
+
+    @staticmethod
+    def invert(pixels):
+        out = pixels.copy()
+        out[..., :3] = 255 - out[..., :3]
+        return out
+
+    @pytest.mark.parametrize("fixed_point", [False, True])
+    def test_filter_matches_filtered_layer(self, layers, fixed_point):
+        compositor = Compositor(tile_size=64, fixed_point=fixed_point)
+        original = layers[1].pixels.copy()
+        preview = compositor.composite(layers, (300, 300), rect=(100, 50, 120, 90), filters={layers[1]: self.invert})
+        assert np.array_equal(layers[1].pixels, original)
+
+        layers[1].pixels = self.invert(original)
+        layers[1].mark_dirty()
+        expected = compositor.composite(layers, (300, 300))[50:140, 100:220]
+        assert np.array_equal(preview, expected)
+
+    def test_filter_on_reduced_level(self, layers):
+        compositor = Compositor()
+        seen = []
+
+        def record(pixels):
+            seen.append(pixels.shape)
+            return pixels
+
+        compositor.composite(layers, (300, 300), rect=(0, 0, 100, 100), level=1, filters={layers[1]: record})
+        # Only the part of the reduced layer inside the region is filtered
+        assert seen == [(35, 30, 4)]
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+from PySide6.QtCore import QRect
+from EpiGimp.core.canva import Canva
+from EpiGimp.core.filters import apply_filter, filter_names, get_filter, premultiply, unpremultiply
+
+FILTER_PARAMS = {
+    'gaussian_blur': {'sigma': 3.0},
+    'box_blur': {'radius': 4},
+    'unsharp_mask': {'sigma': 1.5, 'amount': 1.0, 'threshold': 3},
+    'median': {'radius': 3},
+    'edge_detect': {'method': 'laplacian'},
+    'convolve': {'kernel': [[1, 2, 1], [2, 4, 2], [1, 2, 1]]},
+}
+
+
+@pytest.fixture
+def pixels():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (300, 340, 4), dtype=np.uint8)
+
+
+class TestRegistry:
+    def test_builtin_filters(self):
+        assert set(FILTER_PARAMS) <= set(filter_names())
+
+    def test_unknown_filter(self, pixels):
+        with pytest.raises(ValueError):
+            get_filter('nope')
+        with pytest.raises(ValueError):
+            apply_filter(pixels, 'nope')
+
+
+class TestApplyFilter:
+    @pytest.mark.parametrize("name", sorted(FILTER_PARAMS))
+    def test_tiling_does_not_change_the_result(self, pixels, name):
+        tiled = apply_filter(pixels, name, FILTER_PARAMS[name], tile_size=64)
+        whole = apply_filter(pixels, name, FILTER_PARAMS[name], tile_size=1024)
+        assert np.abs(tiled.astype(np.int32) - whole.astype(np.int32)).max() <= 1
+
+    def test_premultiply_roundtrip(self, pixels):
+        result = unpremultiply(premultiply(pixels))
+        opaque = pixels[..., 3] == 255
+        assert np.array_equal(result[opaque], pixels[opaque])
+        assert np.array_equal(result[..., 3], pixels[..., 3])
+
+    @pytest.mark.parametrize("name", ['gaussian_blur', 'box_blur', 'median'])
+    def test_uniform_image_is_unchanged(self, name):
+        pixels = np.full((100, 120, 4), (30, 140, 220, 255), dtype=np.uint8)
+        assert np.array_equal(apply_filter(pixels, name, tile_size=32), pixels)
+
+    def test_transparent_pixels_do_not_bleed(self):
+        pixels = np.zeros((40, 40, 4), dtype=np.uint8)
+        pixels[:, :20] = (255, 0, 0, 255)
+        pixels[:, 20:] = (0, 255, 0, 0)
+        result = apply_filter(pixels, 'gaussian_blur', {'sigma': 3.0})
+        visible = result[..., 3] > 0
+        assert np.all(result[visible][:, 0] == 255)
+        assert np.all(result[visible][:, 1] == 0)
+
+    def test_bounds_and_mask(self, pixels):
+        mask = np.zeros((50, 60), dtype=np.uint8)
+        mask[:, 30:] = 255
+        region = apply_filter(pixels, 'box_blur', {'radius': 2}, bounds=(100, 150, 40, 100), mask=mask)
+        assert region.shape == (50, 60, 4)
+        assert np.array_equal(region[:, :30], pixels[100:150, 40:70])
+        full = apply_filter(pixels, 'box_blur', {'radius': 2})
+        assert np.array_equal(region[:, 30:], full[100:150, 70:100])
+
+    def test_identity_kernel(self, pixels):
+        pixels[..., 3] = 255
+        result = apply_filter(pixels, 'convolve', {'kernel': [[0, 0, 0], [0, 1, 0], [0, 0, 0]]})
+        assert np.array_equal(result, pixels)
+
+    def test_edge_detect_flat_image_is_black(self):
+        pixels = np.full((30, 30, 4), (90, 90, 90, 255), dtype=np.uint8)
+        result = apply_filter(pixels, 'edge_detect')
+        assert np.all(result[..., :3] == 0)
+        assert np.all(result[..., 3] == 255)
+
+
+class TestCanvaFilter:
+    def test_filter_inside_selection_only(self, pixels):
+        canva = Canva(shape=pixels.shape[:2])
+        layer = canva.pixel_layer
+        layer.pixels[:] = pixels
+        version = layer.version
+        canva.set_selection(QRect(20, 30, 100, 80))
+        assert canva.apply_filter('gaussian_blur', sigma=2.0)
+        assert layer.version > version
+        outside = np.ones(pixels.shape[:2], dtype=bool)
+        outside[30:110, 20:120] = False
+        assert np.array_equal(layer.pixels[outside], pixels[outside])
+        assert not np.array_equal(layer.pixels[30:110, 20:120], pixels[30:110, 20:120])
+
+    def test_ellipse_selection_keeps_corners(self, pixels):
+        canva = Canva(shape=pixels.shape[:2])
+        canva.pixel_layer.pixels[:] = pixels
+        canva.set_selection(QRect(0, 0, 100, 100), 'ellipse')
+        canva.apply_filter('median', radius=2)
+        assert np.array_equal(canva.pixel_layer.pixels[:5, :5], pixels[:5, :5])
+
+    def test_selection_outside_layer(self):
+        canva = Canva(shape=(50, 50))
+        canva.set_selection(QRect(100, 100, 10, 10))
+        assert not canva.apply_filter('box_blur')
@@ -0,0 +1,103 @@
+import numpy as np
+from PySide6.QtCore import QRect
+
+from EpiGimp.core.canva import Canva
+from EpiGimp.core.floating import FloatingSelection
+from EpiGimp.core.selection import SelectionMask
+
+
+def _canva():
+    """Transparent layer with a red square at (10, 10), size 10."""
+    canva = Canva(shape=(60, 80), background=(0, 0, 0, 0))
+    canva.pixel_layer.pixels[10:20, 10:20] = (255, 0, 0, 255)
+    canva.set_selection(QRect(10, 10, 10, 10))
+    return canva
+
+
+class TestFloatingSelection:
+    def test_lift_clears_the_source(self):
+        canva = _canva()
+        floating = FloatingSelection(canva.pixel_layer, canva.selection)
+        assert canva.pixel_layer.pixels[15, 15, 3] == 0
+        assert floating.pixels_layer.pixels.shape == (10, 10, 4)
+        assert floating.bounds == (10, 10, 10, 10)
+
+    def test_move_copies_nothing(self):
+        canva = _canva()
+        floating = FloatingSelection(canva.pixel_layer, canva.selection)
+        lifted = floating.pixels_layer.pixels
+        before, after = floating.move_to(30, 5)
+        assert floating.pixels_layer.pixels is lifted
+        assert before == (10, 10, 10, 10) and after == (40, 15, 10, 10)
+
+    def test_composite_shows_the_floating_pixels(self):
+        canva = _canva()
+        assert canva.float_selection()
+        canva.floating.move_to(30, 5)
+        image = canva.composite_region((0, 0, 80, 60))
+        assert image[20, 45].tolist() == [255, 0, 0, 255]
+        assert image[15, 15, 3] == 0
+        assert len(canva.render_stack()) == 2 and len(canva.layers) == 1
+
+    def test_anchor(self):
+        canva = _canva()
+        canva.float_selection()
+        canva.floating.move_to(30, 5)
+        assert canva.anchor_selection()
+        assert canva.floating is None
+        assert canva.pixel_layer.pixels[20, 45].tolist() == [255, 0, 0, 255]
+        assert canva.selection_rect == QRect(40, 15, 10, 10)
+
+    def test_anchor_blends_over(self):
+        canva = _canva()
+        canva.pixel_layer.pixels[10:20, 30:40] = (0, 0, 255, 255)
+        canva.set_selection(QRect(10, 10, 10, 10), 'ellipse')
+        canva.float_selection()
+        canva.floating.move_to(20, 0)
+        canva.anchor_selection()
+        pixels = canva.pixel_layer.pixels
+        # Outside the ellipse the lifted pixels are transparent: blue stays
+        assert pixels[10, 30].tolist() == [0, 0, 255, 255]
+        assert pixels[15, 35].tolist() == [255, 0, 0, 255]
+
+    def test_preview_matches_anchor(self):
+        canva = Canva(shape=(60, 80), background=(255, 255, 255, 255))
+        layer = canva.add_layer()
+        layer.pixels[10:20, 10:20] = (255, 0, 0, 255)
+        mask = layer.add_mask()
+        mask.pixels[:, 40:] = 0
+        mask.mark_dirty()
+        canva.set_selection(QRect(10, 10, 10, 10))
+        canva.float_selection()
+        # Half under the hidden part of the mask
+        canva.floating.move_to(25, 0)
+        preview = canva.composite_region((0, 0, 80, 60))
+        canva.anchor_selection()
+        assert np.array_equal(preview, canva.composite_region((0, 0, 80, 60)))
+        assert preview[15, 38].tolist() == [255, 0, 0, 255]
+        assert preview[15, 42].tolist() == [255, 255, 255, 255]
+
+    def test_preview_is_clipped_to_the_layer(self):
+        canva = _canva()
+        canva.pixel_layer.set_pixels(canva.pixel_layer.pixels[:, :30].copy())
+        canva.float_selection()
+        canva.floating.move_to(15, 0)
+        assert canva.floating.pixels_layer.mask.pixels[:, 5:].max() == 0
+        image = canva.composite_region((0, 0, 80, 60))
+        assert image[15, 28].tolist() == [255, 0, 0, 255] and image[15, 32, 3] == 0
+
+    def test_cancel_restores(self):
+        canva = _canva()
+        original = canva.pixel_layer.pixels.copy()
+        canva.set_selection_mask(SelectionMask.rectangle((5, 5, 20, 20)).feather(3))
+        canva.float_selection()
+        canva.floating.move_to(10, 10)
+        assert canva.cancel_floating()
+        assert np.array_equal(canva.pixel_layer.pixels, original)
+
+    def test_nothing_to_lift(self):
+        canva = _canva()
+        canva.set_selection(QRect(200, 200, 5, 5))
+        assert not canva.float_selection()
+        canva.clear_selection()
+        assert not canva.float_selection()
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+from PySide6.QtCore import QPoint, QRect
+
+from EpiGimp.core.canva import Canva
+from EpiGimp.core.flood_fill import color_region
+from EpiGimp.core.layer import Layer
+from EpiGimp.tools.fill import BucketFill, ColorRegionTool, FuzzySelect
+
+
+def _two_squares():
+    """Black image with two red squares, split by a black column."""
+    pixels = np.zeros((50, 100, 4), dtype=np.uint8)
+    pixels[..., 3] = 255
+    pixels[10:40, 10:40] = (200, 0, 0, 255)
+    pixels[10:40, 60:90] = (210, 0, 0, 255)
+    return pixels
+
+
+class TestColorRegion:
+    def test_contiguous_stops_at_other_colors(self):
+        region = color_region(_two_squares(), (20, 20), tolerance=15)
+        assert region.bounds == (10, 10, 30, 30)
+        assert region.is_binary
+
+    def test_global_selects_every_match(self):
+        region = color_region(_two_squares(), (20, 20), tolerance=15, contiguous=False)
+        assert region.bounds == (10, 10, 80, 30)
+        assert not region.contains(50, 20)
+
+    def test_tolerance(self):
+        assert color_region(_two_squares(), (20, 20), tolerance=5, contiguous=False).bounds == (10, 10, 30, 30)
+
+    def test_alpha_is_compared(self):
+        pixels = _two_squares()
+        pixels[10:40, 25:40, 3] = 0
+        assert color_region(pixels, (20, 20), tolerance=15).bounds == (10, 10, 15, 30)
+
+    def test_seed_outside(self):
+        assert color_region(_two_squares(), (100, 0)).is_empty()
+
+
+class TestCanvaColorRegion:
+    def _canva(self):
+        canva = Canva(shape=(50, 100))
+        canva.pixel_layer.pixels[:] = _two_squares()
+        return canva
+
+    def test_select_by_color_combines(self):
+        canva = self._canva()
+        assert canva.select_by_color(20, 20)
+        canva.select_by_color(70, 20, mode='add')
+        assert canva.selection_rect == QRect(10, 10, 80, 30)
+
+    def test_layer_offset(self):
+        canva = Canva(shape=(100, 100))
+        canva.add_layer_from_layer(Layer(pixels=_two_squares()))
+        canva.pixel_layer.position = (5, 5)
+        canva.select_by_color(25, 25)
+        assert canva.selection_rect == QRect(15, 15, 30, 30)
+
+    def test_sample_merged(self):
+        canva = self._canva()
+        canva.add_layer_from_layer(Layer(shape=(50, 100), color=(0, 0, 0, 0)))
+        # The empty top layer is one transparent region
+        assert canva.select_by_color(20, 20)
+        assert canva.selection_rect == QRect(0, 0, 100, 50)
+        assert canva.select_by_color(20, 20, sample_merged=True)
+        assert canva.selection_rect == QRect(10, 10, 30, 30)
+
+    def test_bucket_fill_stays_in_selection(self):
+        canva = self._canva()
+        canva.set_selection(QRect(0, 0, 25, 50))
+        assert canva.bucket_fill(20, 20, (0, 255, 0, 255))
+        pixels = canva.pixel_layer.pixels
+        assert pixels[20, 20].tolist() == [0, 255, 0, 255]
+        assert pixels[20, 30].tolist() == [200, 0, 0, 255]
+        assert pixels[5, 5].tolist() == [0, 0, 0, 255]
+
+
+class TestTools:
+    def test_base_tool_is_abstract(self):
+        with pytest.raises(TypeError):
+            ColorRegionTool("Region", "Act on a region")
+
+    def test_fuzzy_select(self):
+        canva = Canva(shape=(50, 100))
+        canva.pixel_layer.pixels[:] = _two_squares()
+        tool = FuzzySelect()
+        tool.contiguous = False
+        assert tool.click(canva, QPoint(20, 20))
+        assert canva.selection_rect == QRect(10, 10, 80, 30)
+
+    def test_bucket_fill(self):
+        canva = Canva(shape=(50, 100))
+        canva.pixel_layer.pixels[:] = _two_squares()
+        tool = BucketFill(color=(0, 0, 255, 255))
+        assert tool.click(canva, QPoint(70, 20))
+        assert canva.pixel_layer.pixels[20, 70].tolist() == [0, 0, 255, 255]
+        assert canva.pixel_layer.pixels[20, 20].tolist() == [200, 0, 0, 255]
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from EpiGimp.core.canva import Canva
+from EpiGimp.core.compositor import Compositor
+from EpiGimp.core.histogram import ImageStatistics, Statistics, compute_histogram
+from EpiGimp.core.layer import Layer
+from EpiGimp.core.point_ops import invert_lut
+
+
+@pytest.fixture
+def layer():
+    rng = np.random.default_rng(0)
+    return Layer(pixels=rng.integers(0, 256, (300, 400, 4), dtype=np.uint8))
+
+
+class TestImageStatistics:
+    def test_derived_values(self):
+        pixels = np.zeros((2, 2, 4), dtype=np.uint8)
+        pixels[..., 0] = [[10, 20], [30, 40]]
+        pixels[0, 0, 3] = 255
+        stats = ImageStatistics(compute_histogram(pixels))
+        assert stats.count == 4
+        assert stats.minimum[0] == 10 and stats.maximum[0] == 40
+        assert stats.mean[0] == pytest.approx(25.0)
+        assert stats.coverage == pytest.approx(0.25)
+
+    def test_mapped_matches_adjusted_pixels(self, layer):
+        stats = ImageStatistics(compute_histogram(layer.pixels))
+        inverted = layer.pixels.copy()
+        inverted[..., :3] = 255 - inverted[..., :3]
+        assert np.array_equal(stats.mapped(invert_lut()).histogram, compute_histogram(inverted))
+
+
+class TestLayerStatistics:
+    def test_matches_direct_computation(self, layer):
+        statistics = Statistics(tile_size=128)
+        assert np.array_equal(statistics.layer_stats(layer).histogram, compute_histogram(layer.pixels))
+        partial = statistics.layer_stats(layer, (10, 20, 200, 150)).histogram
+        assert np.array_equal(partial, compute_histogram(layer.pixels[20:170, 10:210]))
+
+    def test_only_dirty_tiles_are_recomputed(self, layer):
+        statistics = Statistics()
+        statistics.layer_stats(layer)
+        # Edited without marking dirty: the cached histogram is kept
+        layer.pixels[:, :] = 0
+        assert statistics.layer_stats(layer).histogram[0, 0] < layer.pixels.shape[0] * layer.pixels.shape[1]
+        layer.mark_dirty((0, 0, 10, 10))
+        histogram = statistics.layer_stats(layer).histogram
+        # The first tile is re-read, the others are still cached
+        assert histogram[0, 0] >= 256 * 256
+        assert histogram[0, 0] < 300 * 400
+        layer.mark_dirty()
+        assert statistics.layer_stats(layer).histogram[0, 0] == 300 * 400
+
+
+class TestCompositeStatistics:
+    def test_matches_composite(self, layer):
+        rng = np.random.default_rng(1)
+        top = Layer(pixels=rng.integers(0, 256, (100, 120, 4), dtype=np.uint8))
+        top.position = (150, 60)
+        compositor = Compositor(fixed_point=True)
+        statistics = Statistics(compositor)
+        layers = [layer, top]
+        flat = compositor.composite(layers, (300, 400))
+        assert np.array_equal(statistics.composite_stats(layers, (300, 400)).histogram, compute_histogram(flat))
+
+        top.pixels[:] = (255, 255, 255, 255)
+        top.mark_dirty()
+        flat = compositor.composite(layers, (300, 400))
+        assert np.array_equal(statistics.composite_stats(layers, (300, 400)).histogram, compute_histogram(flat))
+
+        top.set_opacity(0.5)
+        flat = compositor.composite(layers, (300, 400))
+        region = statistics.composite_stats(layers, (300, 400), (30, 40, 250, 200)).histogram
+        assert np.array_equal(region, compute_histogram(flat[40:240, 30:280]))
+
+    def test_canva_statistics(self, layer):
+        canva = Canva(shape=(300, 400))
+        canva.layers[0].pixels[:] = layer.pixels
+        canva.layers[0].mark_dirty()
+        stats = canva.image_statistics(canva.layers[0], (0, 0, 100, 100))
+        assert np.array_equal(stats.histogram, compute_histogram(layer.pixels[:100, :100]))
+        assert canva.image_statistics().count == 300 * 400
@@ -84,6 +84,27 @@ class TestLayerProperties:
         layer.set_name("New Name")
         assert layer.name == "New Name"
 
+    def test_mark_dirty_bumps_version(self):
+        layer = Layer(shape=(10, 10))
+        version = layer.version
+        layer.mark_dirty()
+        assert layer.version > version
+
+    def test_pixel_operations_bump_version(self):
+        layer = Layer(shape=(10, 10))
+        version = layer.version
+        layer.flip_horizontal()
+        assert layer.version > version
+
+    def test_mark_dirty_rect_only_touches_its_tiles(self):
+        layer = Layer(shape=(600, 600))
+        layer.mark_dirty()
+        before = layer.tile_versions.copy()
+        layer.mark_dirty((300, 10, 20, 20))
+        assert layer.tile_versions.shape == (3, 3)
+        assert layer.tile_versions[0, 1] == layer.version
+        assert np.count_nonzero(layer.tile_versions != before) == 1
+
 
 class TestLayerTransformations:
     def test_flip_horizontal(self):
@@ -119,6 +140,33 @@ class TestLayerTransformations:
         assert layer.shape == (10, 20)
         assert np.array_equal(layer.pixels[-1, -1, :3], [255, 0, 0])
     
+    @pytest.mark.parametrize("method", ["flip_horizontal", "flip_vertical", "rotate_180"])
+    def test_flips_reuse_the_buffer(self, method):
+        layer = Layer(shape=(10, 20))
+        buffer = layer.pixels
+        getattr(layer, method)()
+        assert layer.pixels is buffer
+        # The QImage still shares the buffer
+        layer.qimage.setPixel(0, 0, 0xFFFF0000)
+        assert layer.pixels[0, 0, 3] == 255
+
+    def test_deferred_flips(self):
+        pixels = np.random.randint(0, 255, (10, 20, 4), dtype=np.uint8)
+        layer = Layer(pixels=pixels.copy())
+        version = layer.version
+        layer.flip_horizontal(deferred=True)
+        layer.flip_vertical(deferred=True)
+        assert layer.version > version
+        assert np.array_equal(layer.pixels, pixels[::-1, ::-1])
+
+    def test_deferred_flips_cancel_out(self):
+        pixels = np.random.randint(0, 255, (10, 20, 4), dtype=np.uint8)
+        layer = Layer(pixels=pixels.copy())
+        layer.rotate_180(deferred=True)
+        layer.flip_horizontal(deferred=True)
+        layer.flip_vertical(deferred=True)
+        assert np.array_equal(layer.pixels, pixels)
+
     def test_transform_flip_horizontal(self):
         layer = Layer(shape=(10, 10))
         layer.pixels[0, 0] = [255, 0, 0, 255]
@@ -0,0 +1,147 @@
+import numpy as np
+import pytest
+
+from EpiGimp.core.canva import Canva
+from EpiGimp.core.compositor import Compositor
+from EpiGimp.core.layer import Layer
+from EpiGimp.core.layer_group import LayerGroup, iter_layers
+
+
+def _layer(shape, color, position=(0, 0)):
+    layer = Layer(shape=shape, color=color)
+    layer.position = position
+    return layer
+
+
+def _stack():
+    background = _layer((600, 600), (255, 255, 255, 255))
+    red = _layer((300, 300), (255, 0, 0, 128), (100, 100))
+    blue = _layer((300, 300), (0, 0, 255, 200), (250, 200))
+    return background, red, blue
+
+
+class TestLayerGroup:
+    @pytest.mark.parametrize("fixed_point", [False, True])
+    def test_matches_flat_stack(self, fixed_point):
+        compositor = Compositor(fixed_point=fixed_point)
+        background, red, blue = _stack()
+        flat = compositor.composite([background, red, blue], (600, 600))
+        grouped = compositor.composite([background, LayerGroup([red, blue])], (600, 600))
+        assert np.abs(flat.astype(int) - grouped.astype(int)).max() <= 1
+
+    def test_extent_and_cache(self):
+        compositor = Compositor()
+        background, red, blue = _stack()
+        group = LayerGroup([red, blue])
+        compositor.composite([background, group], (600, 600))
+        assert group.position == (100, 100) and group.pixels.shape == (400, 450, 4)
+        version, pixels = group.version, group.pixels
+        compositor.composite([background, group], (600, 600))
+        assert group.version == version and group.pixels is pixels
+
+    def test_painting_a_child_refreshes_its_tiles_only(self):
+        compositor = Compositor()
+        background, red, blue = _stack()
+        group = LayerGroup([red, blue])
+        compositor.composite([background, group], (600, 600))
+        before = group.tile_versions.copy()
+        red.pixels[0:10, 0:10] = (0, 255, 0, 255)
+        red.mark_dirty((0, 0, 10, 10))
+        out = compositor.composite([background, group], (600, 600))
+        assert out[105, 105].tolist() == [0, 255, 0, 255]
+        changed = group.tile_versions != before
+        assert changed[0, 0] and changed.sum() == 1
+
+    def test_painting_a_child_premultiplies_its_tiles_only(self, monkeypatch):
+        compositor = Compositor(fixed_point=True)
+        background, red, blue = _stack()
+        group = LayerGroup([red, blue])
+        compositor.composite([background, group], (600, 600))
+        calls = []
+        premultiply = Compositor._premultiply
+        monkeypatch.setattr(Compositor, '_premultiply', staticmethod(lambda pixels: calls.append(pixels.shape) or premultiply(pixels)))
+        red.pixels[0:10, 0:10] = (0, 255, 0, 255)
+        red.mark_dirty((0, 0, 10, 10))
+        compositor.composite([background, group], (600, 600))
+        # One tile of red to flatten the group again, one tile of the group to blend it
+        assert len(calls) == 2
+
+    def test_structural_change_flattens_again(self):
+        compositor = Compositor()
+        background, red, blue = _stack()
+        group = LayerGroup([red, blue])
+        compositor.composite([background, group], (600, 600))
+        blue.set_visibility(False)
+        out = compositor.composite([background, group], (600, 600))
+        assert group.pixels.shape == (300, 300, 4)
+        assert out[450, 500].tolist() == [255, 255, 255, 255]
+
+    def test_hidden_group_is_never_flattened(self):
+        compositor = Compositor()
+        background, red, blue = _stack()
+        group = LayerGroup([red, blue])
+        group.set_visibility(False)
+        out = compositor.composite([background, group], (600, 600))
+        assert group.version == 0 and group.pixels.size == 0
+        assert out[150, 150].tolist() == [255, 255, 255, 255]
+
+    def test_nested_and_opacity(self):
+        compositor = Compositor()
+        background, red, blue = _stack()
+        inner = LayerGroup([blue])
+        outer = LayerGroup([red, inner])
+        outer.set_opacity(0.0)
+        assert compositor.composite([background, outer], (600, 600))[300, 300].tolist() == [255, 255, 255, 255]
+        outer.set_opacity(1.0)
+        flat = compositor.composite([background, red, blue], (600, 600))
+        grouped = compositor.composite([background, outer], (600, 600))
+        assert np.abs(flat.astype(int) - grouped.astype(int)).max() <= 1
+        assert list(iter_layers([background, outer])) == [background, red, blue]
+
+    def test_clipped_to_canvas(self):
+        compositor = Compositor()
+        group = LayerGroup([_layer((100, 100), (255, 0, 0, 255), (-50, 550))])
+        compositor.composite([group], (600, 600))
+        assert group.position == (0, 550) and group.pixels.shape == (50, 50, 4)
+
+
+class TestCanvaGroups:
+    def test_group_and_ungroup(self):
+        canva = Canva(shape=(100, 100))
+        first, second = canva.add_layer(), canva.add_layer()
+        mirror, events = list(canva.layers), []
+        canva.subscribe(events.append)
+        group = canva.group_layers(1, 3, name="Group")
+        assert canva.layers == [canva.layers[0], group] and group.layers == [first, second]
+        assert canva.active_layer is group and canva.pixel_layer is None
+        assert canva.ungroup_layer(1)
+        assert canva.layers[1:] == [first, second] and canva.active_layer is second
+        for event in events:
+            if event.kind == 'inserted':
+                mirror.insert(event.index, event.layer)
+            else:
+                assert mirror.pop(event.index) is event.layer
+        assert mirror == canva.layers
+        assert not canva.ungroup_layer(1)
+
+    def test_project_roundtrip(self, tmp_path):
+        canva = Canva(shape=(50, 50))
+        canva.add_layer(color=(255, 0, 0, 255))
+        canva.add_adjustment_layer('invert')
+        canva.add_layer()
+        group = canva.group_layers(1, 3, name="Inner")
+        group.set_opacity(0.5)
+        outer = canva.group_layers(1, 3, name="Outer")
+        outer.set_visibility(False)
+        path = str(tmp_path / "groups.epigimp")
+        canva.save_project(path)
+
+        loaded = Canva.from_project(path)
+        assert [layer.name for layer in loaded.layers] == ['Background', 'Outer']
+        outer = loaded.layers[1]
+        assert outer.is_group and not outer.visibility
+        inner = outer.layers[0]
+        assert inner.is_group and inner.name == 'Inner' and inner.opacity == 0.5
+        assert inner.layers[1].is_adjustment and inner.layers[0].pixels[0, 0].tolist() == [255, 0, 0, 255]
+        assert outer.layers[1].is_group is False
+        assert np.array_equal(loaded.composite(), canva.composite())
@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+from PySide6.QtCore import QPoint
+
+from EpiGimp.core.canva import Canva
+from EpiGimp.core.compositor import Compositor
+from EpiGimp.core.layer import Layer
+from EpiGimp.core.layer_group import LayerGroup
+from EpiGimp.core.layer_mask import LayerMask
+from EpiGimp.tools.eraser import Eraser
+
+
+def _stack():
+    background = Layer(shape=(600, 600), color=(255, 255, 255, 255))
+    red = Layer(shape=(400, 400), color=(255, 0, 0, 255))
+    red.position = (100, 100)
+    return background, red
+
+
+class TestLayerMask:
+    @pytest.mark.parametrize("fixed_point", [False, True])
+    def test_white_mask_is_skipped(self, fixed_point):
+        compositor = Compositor(fixed_point=fixed_point)
+        background, red = _stack()
+        expected = compositor.composite([background, red], (600, 600))
+        red.add_mask()
+        assert compositor._source(red).mask is None
+        assert np.array_equal(compositor.composite([background, red], (600, 600)), expected)
+
+    @pytest.mark.parametrize("fixed_point", [False, True])
+    @pytest.mark.parametrize("blend_mode", ['normal', 'multiply'])
+    def test_mask_multiplies_alpha(self, fixed_point, blend_mode):
+        compositor = Compositor(fixed_point=fixed_point)
+        background, red = _stack()
+        red.set_blend_mode(blend_mode)
+        mask = red.add_mask()
+        mask.pixels[:, :200] = 0
+        mask.pixels[:, 200:300] = 128
+        mask.mark_dirty()
+        out = compositor.composite([background, red], (600, 600)).astype(int)
+        assert np.array_equal(out[150, 150], [255, 255, 255, 255])
+        if blend_mode == 'normal':
+            assert np.abs(out[150, 350] - [255, 127, 127, 255]).max() <= 1
+        assert np.array_equal(out[150, 450], [255, 0, 0, 255])
+
+    def test_reduced_level(self):
+        compositor = Compositor()
+        background, red = _stack()
+        mask = red.add_mask()
+        mask.pixels[:200] = 0
+        mask.mark_dirty()
+        out = compositor.composite([background, red], (600, 600), level=1)
+        assert out.shape == (300, 300, 4)
+        assert np.array_equal(out[75, 150], [255, 255, 255, 255])
+        assert np.array_equal(out[200, 150], [255, 0, 0, 255])
+
+    def test_painting_marks_the_layer(self):
+        layer = Layer(shape=(600, 600), color=(255, 0, 0, 255))
+        mask = layer.add_mask()
+        version = layer.version
+        assert mask.is_white()
+        Eraser(size=20).apply(QPoint(300, 300), mask)
+        assert layer.version > version
+        assert mask.pixels[300, 300] == 0 and not mask.is_white()
+        # Only the touched tile is dirty; the layer pixels are untouched
+        assert np.count_nonzero(mask.white_tiles()) == mask.white_tiles().size - 1
+        assert np.array_equal(layer.pixels[300, 300], [255, 0, 0, 255])
+
+    def test_geometry_follows_the_layer(self):
+        layer = Layer(shape=(100, 200), color=(255, 0, 0, 255))
+        mask = layer.add_mask()
+        mask.pixels[:, :10] = 0
+        layer.flip_horizontal(deferred=True)
+        assert np.all(mask.pixels[:, -10:] == 0)
+        layer.rotate_90_clockwise()
+        assert mask.shape == (200, 100) and np.all(mask.pixels[-10:] == 0)
+        layer.set_pixels(np.zeros((50, 20, 4), dtype=np.uint8))
+        assert mask.shape == (50, 20)
+        layer.transform(np.array([[2.0, 0.0, 0.0], [0.0, 1.0, 0.0]]))
+        assert mask.shape == layer.pixels.shape[:2]
+
+    def test_remove_mask(self):
+        layer = Layer(shape=(10, 10), color=(255, 0, 0, 255))
+        mask = layer.add_mask()
+        mask.pixels[:5] = 0
+        mask.mark_dirty()
+        assert layer.remove_mask(apply=True)
+        assert layer.mask is None and not layer.remove_mask()
+        assert np.all(layer.pixels[:5, :, 3] == 0) and np.all(layer.pixels[5:, :, 3] == 255)
+
+    def test_compression(self):
+        layer = Layer(shape=(512, 512))
+        mask = layer.add_mask()
+        mask.pixels[:] = np.arange(512, dtype=np.uint16)[np.newaxis, :] // 2
+        data = mask.to_bytes()
+        assert len(data) < mask.pixels.nbytes // 50
+        assert np.array_equal(LayerMask.from_bytes(layer, data).pixels, mask.pixels)
+        with pytest.raises(ValueError):
+            LayerMask.from_bytes(Layer(shape=(10, 10)), data)
+
+    def test_group_refreshes_on_mask_edits(self):
+        compositor = Compositor()
+        background, red = _stack()
+        group = LayerGroup([red])
+        compositor.composite([background, group], (600, 600))
+        mask = red.add_mask()
+        Eraser(size=20).apply(QPoint(200, 200), mask)
+        out = compositor.composite([background, group], (600, 600))
+        # The mask is in layer coordinates: (200, 200) is (300, 300) on the canvas
+        assert np.array_equal(out[300, 300], [255, 255, 255, 255])
+
+
+class TestCanvaLayerMask:
+    def test_paint_target(self):
+        canva = Canva(shape=(100, 100))
+        assert canva.paint_target is canva.pixel_layer
+        mask = canva.add_layer_mask()
+        canva.editing_mask = True
+        assert canva.paint_target is mask
+        assert canva.remove_layer_mask()
+        assert not canva.editing_mask and canva.paint_target is canva.pixel_layer
+
+    def test_transform_image(self):
+        canva = Canva(shape=(100, 200))
+        mask = canva.add_layer_mask()
+        mask.pixels[:, :50] = 0
+        canva.transform_image('rotate_90_clockwise')
+        assert mask.shape == (200, 100) and np.all(mask.pixels[:50] == 0)
+        canva.transform_image('crop', rect=(0, 0, 100, 60))
+        assert mask.shape == (60, 100) and np.all(mask.pixels[:50] == 0)
+        canva.transform_image('resize', shape=(30, 50))
+        assert mask.shape == (30, 50)
+
+    def test_save_and_load(self, tmp_path):
+        canva = Canva(shape=(100, 100), background=(255, 0, 0, 255))
+        mask = canva.add_layer_mask()
+        mask.pixels[:50] = 0
+        canva.add_layer()
+        path = str(tmp_path / "masked.epigimp")
+        canva.save_project(path)
+        loaded = Canva.from_project(path)
+        assert loaded.layers[1].mask is None
+        assert np.array_equal(loaded.layers[0].mask.pixels, mask.pixels)
+        assert np.array_equal(loaded.composite(), canva.composite())
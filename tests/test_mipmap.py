@@ -0,0 +1,68 @@
+import cv2 as cv
+import numpy as np
+import pytest
+from EpiGimp.core.layer import Layer
+from EpiGimp.core.mipmap import MipmapPyramid, level_for_zoom, level_shape
+
+
+class TestLevels:
+    @pytest.mark.parametrize("zoom, level", [(4.0, 0), (1.0, 0), (0.75, 0), (0.5, 1), (0.3, 1), (0.25, 2), (0.001, 8)])
+    def test_level_for_zoom(self, zoom, level):
+        assert level_for_zoom(zoom) == level
+
+    def test_level_shape_rounds_up(self):
+        assert level_shape((1000, 1500), 0) == (1000, 1500)
+        assert level_shape((1000, 1500), 3) == (125, 188)
+
+    def test_invalid_level(self):
+        with pytest.raises(ValueError):
+            MipmapPyramid(Layer(shape=(10, 10))).level(9)
+
+
+class TestMipmapPyramid:
+    @pytest.fixture
+    def layer(self):
+        rng = np.random.default_rng(0)
+        return Layer(pixels=rng.integers(0, 256, (600, 700, 4), dtype=np.uint8))
+
+    def test_level_zero_is_layer(self, layer):
+        assert MipmapPyramid(layer).level(0) is layer.pixels
+
+    def test_first_level_matches_area_resize(self, layer):
+        level = MipmapPyramid(layer).level(1)
+        expected = cv.resize(layer.pixels, (350, 300), interpolation=cv.INTER_AREA)
+        assert level.shape == (300, 350, 4)
+        assert np.array_equal(level, expected)
+
+    def test_deep_level_shape(self, layer):
+        assert MipmapPyramid(layer).level(3).shape == (75, 88, 4)
+
+    def test_only_dirty_tiles_are_rebuilt(self, layer):
+        pyramid = MipmapPyramid(layer)
+        before = pyramid.level(1).copy()
+
+        layer.pixels[0:10, 0:10] = 0
+        layer.pixels[500:520, 600:620] = 255
+        layer.mark_dirty((0, 0, 10, 10))
+        after = pyramid.level(1)
+
+        # The tile at (500, 600) changed but was not marked: it keeps its old data
+        assert np.array_equal(after[250:260, 300:310], before[250:260, 300:310])
+        assert np.all(after[0:5, 0:5] == 0)
+        assert np.array_equal(after[128:, :], before[128:, :])
+
+    def test_region_refresh_is_lazy(self, layer):
+        pyramid = MipmapPyramid(layer)
+        pyramid.level(1)
+        layer.pixels[:] = 0
+        layer.mark_dirty()
+        level = pyramid.level(1, (0, 64, 0, 64))
+        assert np.all(level[0:128, 0:128] == 0)
+        assert np.any(level[200:, 200:] != 0)
+
+    def test_resized_layer_resets(self, layer):
+        pyramid = MipmapPyramid(layer)
+        pyramid.level(2)
+        layer.pixels = np.zeros((40, 40, 4), dtype=np.uint8)
+        layer.mark_dirty()
+        assert pyramid.level(2).shape == (10, 10, 4)
@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+from EpiGimp.core.layer import Layer
+from EpiGimp.core.point_ops import (
+    PointPipeline, _kelvin_formula, apply_lut, compose_luts, curves_lut, gain_lut, identity_lut, invert_lut,
+    kelvin_table, kelvin_to_rgb, kelvin_to_rgb_array, levels_lut, lut_from_function,
+)
+
+
+@pytest.fixture
+def pixels():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (64, 80, 4), dtype=np.uint8)
+
+
+class TestLuts:
+    def test_identity(self, pixels):
+        assert np.array_equal(apply_lut(pixels, identity_lut()), pixels)
+
+    def test_apply_in_place(self, pixels):
+        original = pixels.copy()
+        lut = lut_from_function(lambda v: 255 - v)
+        result = apply_lut(pixels, lut, out=pixels)
+        assert result is pixels
+        assert np.array_equal(pixels[..., :3], 255 - original[..., :3])
+        assert np.array_equal(pixels[..., 3], original[..., 3])
+
+    @pytest.mark.parametrize("opacity", [1.0, 0.5, 0.2])
+    def test_gain_matches_float_math(self, pixels, opacity):
+        gains = np.array([1.3, 0.9, 0.6], dtype=np.float32)
+        rgb = pixels[..., :3].astype(np.float32)
+        adjusted = np.clip(rgb * gains, 0, 255)
+        if opacity < 1.0:
+            adjusted = rgb * (1 - opacity) + adjusted * opacity
+        result = apply_lut(pixels, gain_lut(gains, opacity))
+        assert np.array_equal(result[..., :3], adjusted.astype(np.uint8))
+
+    def test_compose(self, pixels):
+        first = lut_from_function(lambda v: v * 2)
+        second = lut_from_function(lambda v: v - 40)
+        fused = apply_lut(pixels, compose_luts(first, second))
+        assert np.array_equal(fused, apply_lut(apply_lut(pixels, first), second))
+
+
+class TestLayerLut:
+    def test_apply_lut_from_source(self, pixels):
+        layer = Layer(pixels=np.zeros_like(pixels))
+        version = layer.version
+        layer.apply_lut(identity_lut(), source=pixels)
+        assert np.array_equal(layer.pixels, pixels)
+        assert layer.version > version
+
+    def test_temperature_lut_is_identity_when_unchanged(self):
+        assert np.array_equal(Layer(shape=(1, 1)).color_temperature_lut(5000, 5000), identity_lut())
+
+
+class TestKelvin:
+    def test_table_points_are_exact(self):
+        temperatures, rgb = kelvin_table()
+        assert np.array_equal(kelvin_to_rgb_array(temperatures), rgb)
+        assert np.array_equal(kelvin_to_rgb(6500), _kelvin_formula(6500.0))
+
+    def test_interpolation_error(self):
+        kelvins = np.random.default_rng(0).uniform(1000, 40000, 5000)
+        # The formula jumps at 6600 K, which the table smooths over one step on each side
+        kelvins = kelvins[np.abs(kelvins - 6600) >= 10]
+        assert np.abs(kelvin_to_rgb_array(kelvins) - _kelvin_formula(kelvins)).max() < 0.5
+
+    def test_batched_shapes_and_clamping(self):
+        assert kelvin_to_rgb(3200).shape == (3,)
+        assert kelvin_to_rgb_array(np.full((4, 5), 5000)).shape == (4, 5, 3)
+        assert np.array_equal(kelvin_to_rgb(500), kelvin_to_rgb(1000))
+        assert np.array_equal(kelvin_to_rgb(90000), kelvin_to_rgb(40000))
+
+    def test_batched_matches_scalar(self):
+        kelvins = [1850, 3200, 5500, 6600, 12345.6]
+        batched = kelvin_to_rgb_array(kelvins)
+        for kelvin, rgb in zip(kelvins, batched):
+            assert np.array_equal(kelvin_to_rgb(kelvin), rgb)
+
+
+class TestPointPipeline:
+    def test_consecutive_luts_fuse_into_one(self, pixels):
+        tables = [levels_lut(10, 240, 1.2), invert_lut(), curves_lut([(0, 20), (255, 230)])]
+        pipeline = PointPipeline()
+        for table in tables:
+            pipeline.lut(table)
+        assert [kind for kind, _ in pipeline.compile()] == ['lut']
+        expected = pixels
+        for table in tables:
+            expected = apply_lut(expected, table)
+        assert np.array_equal(pipeline.apply(pixels), expected)
+
+    def test_matrices_fuse_between_luts(self, pixels):
+        pipeline = PointPipeline().invert().hue_saturation(40).hue_saturation(0, 0.5).levels(0, 200)
+        assert [kind for kind, _ in pipeline.compile()] == ['lut', 'matrix', 'lut']
+        single = PointPipeline().invert().hue_saturation(40, 0.5).levels(0, 200)
+        assert np.abs(pipeline.apply(pixels).astype(int) - single.apply(pixels).astype(int)).max() <= 1
+
+    def test_matrix_keeps_alpha_and_gray(self, pixels):
+        pixels[..., 1] = pixels[..., 2] = pixels[..., 0]
+        result = PointPipeline().hue_saturation(120, 1.5).apply(pixels)
+        assert np.array_equal(result[..., 3], pixels[..., 3])
+        assert np.abs(result[..., :3].astype(int) - pixels[..., :3].astype(int)).max() <= 1
+
+    def test_in_place_across_bands(self, pixels):
+        pipeline = PointPipeline().invert().hue_saturation(90).invert()
+        pipeline.BAND_ROWS = 16
+        expected = pipeline.apply(pixels)
+        assert pipeline.apply(pixels, out=pixels) is pixels
+        assert np.array_equal(pixels, expected)
+
+    @pytest.mark.parametrize("pipeline", [PointPipeline().invert(), PointPipeline().invert().hue_saturation(0, 0.0)])
+    def test_opacity(self, pixels, pipeline):
+        result = pipeline.apply(pixels, opacity=0.5)
+        full = pipeline.apply(pixels)
+        expected = (pixels.astype(np.float32) + full) / 2
+        assert np.abs(result - expected).max() <= 1
+
+    def test_empty_pipeline_is_identity(self, pixels):
+        assert np.array_equal(PointPipeline().apply(pixels), pixels)
+
+    def test_lut_builders(self):
+        assert np.array_equal(invert_lut()[:, 0], 255 - np.arange(256))
+        assert np.array_equal(invert_lut()[:, 3], np.arange(256))
+        levels = levels_lut(50, 200)
+        assert levels[50, 0] == 0 and levels[200, 0] == 255 and levels[30, 3] == 30
+        curve = curves_lut([(0, 0), (128, 200), (255, 255)])
+        assert curve[128, 1] == 200 and curve[64, 1] == 100
+
+
+class TestLayerPointOps:
+    def test_apply_point_ops_bumps_version(self, pixels):
+        layer = Layer(pixels=pixels.copy())
+        version = layer.version
+        layer.apply_point_ops(PointPipeline().invert())
+        assert layer.version > version
+        assert np.array_equal(layer.pixels[..., :3], 255 - pixels[..., :3])
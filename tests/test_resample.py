@@ -0,0 +1,91 @@
+import cv2 as cv
+import numpy as np
+import pytest
+
+from EpiGimp.core.canva import Canva
+from EpiGimp.core.layer import Layer
+from EpiGimp.core.resample import METHODS, halve, resample
+
+
+@pytest.fixture
+def image():
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (300, 450, 4), dtype=np.uint8)
+    pixels[..., 3] = 255
+    return pixels
+
+
+class TestResample:
+    @pytest.mark.parametrize("method", METHODS)
+    @pytest.mark.parametrize("shape", [(100, 150), (37, 61), (640, 500)])
+    def test_tiling_does_not_change_the_result(self, image, method, shape):
+        tiled = resample(image, shape, method, tile_size=32)
+        whole = resample(image, shape, method, tile_size=4096)
+        assert tiled.shape == shape + (4,)
+        assert np.abs(tiled.astype(int) - whole).max() <= 1
+
+    def test_area_matches_opencv(self, image):
+        expected = cv.resize(image, (61, 37), interpolation=cv.INTER_AREA)
+        assert np.abs(resample(image, (37, 61), 'area').astype(int) - expected).max() <= 1
+
+    @pytest.mark.parametrize("method, flag", [
+        ('bilinear', cv.INTER_LINEAR), ('bicubic', cv.INTER_CUBIC), ('lanczos', cv.INTER_LANCZOS4),
+    ])
+    def test_upscale_matches_opencv(self, image, method, flag):
+        expected = cv.resize(image, (700, 500), interpolation=flag)
+        assert np.abs(resample(image, (500, 700), method).astype(int) - expected).mean() < 1.5
+
+    def test_nearest_copies_source_pixels(self, image):
+        result = resample(image, (600, 900), 'nearest')
+        assert np.array_equal(result[::2, ::2], image)
+
+    @pytest.mark.parametrize("method", METHODS)
+    def test_transparent_pixels_do_not_bleed(self, method):
+        pixels = np.zeros((64, 64, 4), dtype=np.uint8)
+        pixels[:, :32] = (255, 0, 0, 255)
+        result = resample(pixels, (20, 27), method)
+        visible = result[..., 3] > 0
+        assert result[..., 0][visible].min() >= 254
+
+    def test_large_downscale_uses_the_pyramid(self, image):
+        flat = np.full((1024, 1024, 4), 100, dtype=np.uint8)
+        for method in ('bilinear', 'lanczos', 'pyramid'):
+            assert np.abs(resample(flat, (100, 100), method).astype(int) - 100).max() <= 1
+
+    def test_same_size_is_a_copy(self, image):
+        result = resample(image, image.shape[:2])
+        assert np.array_equal(result, image) and result is not image
+
+    def test_errors(self, image):
+        with pytest.raises(ValueError):
+            resample(image, (10, 10), 'bogus')
+        with pytest.raises(ValueError):
+            resample(image, (0, 10))
+
+
+class TestHalve:
+    def test_averages_2x2_blocks(self, image):
+        expected = image[:296, :448].reshape(74, 4, 112, 4, 4).mean(axis=(1, 3))
+        result = halve(image, 2, tile_size=64)
+        assert result.shape == (75, 113, 4)
+        assert np.abs(result[:74, :112].astype(int) - expected).max() <= 1
+
+    def test_odd_sizes_do_not_depend_on_tiling(self, image):
+        odd = image[:299, :447]
+        assert np.array_equal(halve(odd, 3, tile_size=16), halve(odd, 3, tile_size=4096))
+
+
+class TestCanvaScaling:
+    def test_scale_layer_keeps_position(self):
+        canva = Canva(shape=(100, 100))
+        canva.add_layer_from_layer(Layer(shape=(20, 30), color=(0, 255, 0, 255)))
+        canva.pixel_layer.position = (5, 6)
+        assert canva.scale_layer((40, 15), 'bicubic')
+        assert canva.pixel_layer.pixels.shape[:2] == (40, 15)
+        assert tuple(canva.pixel_layer.position) == (5, 6)
+
+    def test_resize_image_with_method(self):
+        canva = Canva(shape=(64, 64), background=(10, 20, 30, 255))
+        canva.transform_image('resize', shape=(16, 32), method='lanczos')
+        assert canva.shape == (16, 32)
+        assert np.array_equal(canva.composite()[8, 8], [10, 20, 30, 255])
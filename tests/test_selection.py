@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+from PySide6.QtCore import QRect
+
+from EpiGimp.core.canva import Canva
+from EpiGimp.core.layer import Layer
+from EpiGimp.core.selection import SelectionMask, clear_masked, ellipse_mask, fill_masked
+
+
+def _opaque_canva(shape=(100, 100), color=(200, 100, 50, 255)):
+    canva = Canva(shape=shape)
+    canva.pixel_layer.pixels[:] = color
+    return canva
+
+
+class TestSelectionMask:
+    def test_rectangle_stores_no_pixels(self):
+        selection = SelectionMask.rectangle((0, 0, 16384, 16384))
+        assert selection.mask.strides == (0, 0)
+        assert not selection.is_empty() and selection.is_binary
+
+    def test_ellipse_masks_are_cached(self):
+        assert ellipse_mask(40, 20) is ellipse_mask(40, 20)
+        mask = ellipse_mask(40, 20)
+        assert mask[10, 20] == 255 and mask[0, 0] == 0 and mask[10, 0] == 255
+
+    def test_union_and_subtract(self):
+        a = SelectionMask.rectangle((0, 0, 10, 10))
+        b = SelectionMask.rectangle((5, 5, 10, 10))
+        union = a.union(b)
+        assert union.bounds == (0, 0, 15, 15)
+        assert union.contains(12, 12) and not union.contains(12, 2)
+        hole = a.subtract(b)
+        assert hole.bounds == (0, 0, 10, 10)
+        assert not hole.contains(7, 7) and hole.contains(2, 7)
+
+    def test_intersect_of_disjoint_is_empty(self):
+        a = SelectionMask.rectangle((0, 0, 10, 10))
+        assert a.intersect(SelectionMask.rectangle((20, 20, 5, 5))).is_empty()
+        assert a.intersect(SelectionMask.ellipse((5, 0, 10, 10))).bounds[0] == 5
+
+    def test_invert(self):
+        inverted = SelectionMask.rectangle((10, 10, 80, 80)).invert(100, 100)
+        assert inverted.bounds == (0, 0, 100, 100)
+        assert inverted.contains(5, 50) and not inverted.contains(50, 50)
+
+    def test_feather_grows_and_softens(self):
+        feathered = SelectionMask.rectangle((20, 20, 20, 20)).feather(4)
+        assert feathered.bounds[2] > 20
+        assert not feathered.is_binary
+        assert feathered.mask[feathered.height // 2, feathered.width // 2] == 255
+
+    def test_outline_is_in_canvas_coordinates(self):
+        outline = SelectionMask.rectangle((5, 7, 4, 3)).union(SelectionMask.rectangle((30, 30, 2, 2))).outline()
+        assert len(outline) == 2
+        points = np.concatenate(outline)
+        assert points.min(axis=0).tolist() == [5, 7]
+        assert points.max(axis=0).tolist() == [31, 31]
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            SelectionMask.rectangle((0, 0, 2, 2)).combine(SelectionMask.rectangle((0, 0, 2, 2)), 'xor')
+
+
+class TestMaskedPixels:
+    def test_partial_fill_blends(self):
+        pixels = np.zeros((1, 2, 4), dtype=np.uint8)
+        fill_masked(pixels, np.array([[255, 128]], dtype=np.uint8), (200, 100, 0, 255))
+        assert pixels[0, 0].tolist() == [200, 100, 0, 255]
+        assert pixels[0, 1].tolist() == [200, 100, 0, 128]
+
+    def test_partial_clear_keeps_some_alpha(self):
+        pixels = np.full((1, 2, 4), 255, dtype=np.uint8)
+        clear_masked(pixels, np.array([[255, 64]], dtype=np.uint8))
+        assert pixels[0, 0].tolist() == [0, 0, 0, 0]
+        assert pixels[0, 1, 3] == 191
+
+
+class TestCanvaSelection:
+    def test_modes_combine(self):
+        canva = Canva(shape=(100, 100))
+        canva.set_selection(QRect(0, 0, 50, 50))
+        canva.set_selection(QRect(50, 0, 50, 50), mode='add')
+        assert canva.selection_rect == QRect(0, 0, 100, 50)
+        assert canva.selection_type == 'mask'
+        canva.set_selection(QRect(0, 0, 100, 50), mode='subtract')
+        assert not canva.has_selection()
+
+    def test_subtract_without_selection_selects_nothing(self):
+        canva = Canva(shape=(100, 100))
+        canva.set_selection(QRect(0, 0, 10, 10), mode='subtract')
+        assert not canva.has_selection()
+
+    def test_delete_only_touches_the_mask(self):
+        canva = _opaque_canva()
+        canva.set_selection(QRect(0, 0, 40, 40))
+        canva.set_selection(QRect(20, 20, 40, 40), mode='subtract')
+        assert canva.delete_selection()
+        alpha = canva.pixel_layer.pixels[..., 3]
+        assert alpha[10, 10] == 0 and alpha[30, 30] == 255 and alpha[70, 70] == 255
+
+    def test_feathered_fill(self):
+        canva = _opaque_canva(color=(0, 0, 0, 255))
+        canva.set_selection(QRect(20, 20, 60, 60))
+        canva.feather_selection(6)
+        canva.fill_selection((255, 255, 255, 255))
+        row = canva.pixel_layer.pixels[50, :, 0]
+        assert row[50] == 255 and row[5] == 0
+        assert 0 < row[20] < 255
+
+    def test_selection_follows_layer_offset(self):
+        canva = Canva(shape=(100, 100))
+        canva.add_layer_from_layer(Layer(shape=(50, 50), color=(255, 0, 0, 255)))
+        canva.pixel_layer.position = (30, 30)
+        canva.set_selection(QRect(40, 40, 10, 10))
+        assert canva.copy_selection()
+        assert canva.clipboard.pixels().shape == (10, 10, 4)
+        canva.delete_selection()
+        assert canva.pixel_layer.pixels[15, 15, 3] == 0
+        assert canva.pixel_layer.pixels[5, 5, 3] == 255
+
+    def test_copy_of_ellipse_is_transparent_outside(self):
+        canva = _opaque_canva()
+        canva.set_selection(QRect(10, 10, 40, 20), 'ellipse')
+        canva.copy_selection()
+        copied = canva.clipboard.pixels()
+        assert copied[0, 0, 3] == 0 and copied[10, 20, 3] == 255
+
+    def test_move_selection(self):
+        canva = _opaque_canva(color=(0, 0, 0, 0))
+        canva.pixel_layer.pixels[10:20, 10:20] = (255, 0, 0, 255)
+        canva.set_selection(QRect(10, 10, 10, 10))
+        assert canva.move_selection(30, 5)
+        pixels = canva.pixel_layer.pixels
+        assert pixels[15, 15, 3] == 0
+        assert pixels[20, 45].tolist() == [255, 0, 0, 255]
+        assert canva.selection_rect == QRect(40, 15, 10, 10)
+
+    def test_invert_selection(self):
+        canva = Canva(shape=(50, 50))
+        canva.invert_selection()
+        assert canva.selection_rect == QRect(0, 0, 50, 50)
+        canva.invert_selection()
+        assert not canva.has_selection()
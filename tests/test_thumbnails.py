@@ -0,0 +1,83 @@
+import gc
+
+import numpy as np
+
+from EpiGimp.core.canva import Canva
+from EpiGimp.core.layer import Layer
+from EpiGimp.core.thumbnails import ThumbnailCache, make_thumbnail, thumbnail_level, thumbnail_size
+
+
+class TestMakeThumbnail:
+    def test_fits_and_centers(self):
+        pixels = np.zeros((100, 400, 4), dtype=np.uint8)
+        pixels[:] = (0, 255, 0, 255)
+        thumb = make_thumbnail(pixels, 28)
+        assert thumb.shape == (28, 28, 4)
+        # 400x100 scales to 28x7, centered vertically
+        assert thumb[0, 14, 3] == 0 and thumb[27, 14, 3] == 0
+        assert thumb[14, 14].tolist() == [0, 255, 0, 255]
+
+    def test_premultiplied(self):
+        pixels = np.zeros((64, 64, 4), dtype=np.uint8)
+        pixels[:, :32] = (255, 255, 255, 255)
+        pixels[:, 32:] = (255, 0, 0, 0)  # Invisible red must not bleed
+        thumb = make_thumbnail(pixels, 2)
+        assert thumb[0, 1].tolist() == [0, 0, 0, 0]
+        assert thumb[0, 0].tolist() == [255, 255, 255, 255]
+
+    def test_large_image_is_averaged(self):
+        pixels = np.zeros((4096, 4096, 4), dtype=np.uint8)
+        pixels[..., 3] = 255
+        pixels[::2, :, 0] = 255  # Alternate red and black rows
+        thumb = make_thumbnail(pixels, 64)
+        assert abs(int(thumb[32, 32, 0]) - 128) <= 1
+
+    def test_level(self):
+        assert thumbnail_level((40, 50), 28) == 0
+        assert thumbnail_level((4096, 1000), 28) == 7
+        assert thumbnail_level((4096, 1000), 64) == 5
+        assert thumbnail_level((1 << 20, 1), 28) == 8
+
+    def test_from_reduced_level(self):
+        canva = Canva(shape=(2048, 3072), background=(0, 0, 255, 255))
+        layer = canva.layers[0]
+        layer.pixels[:1024] = (255, 0, 0, 255)
+        source = canva.thumbnail_source(layer, 28)
+        assert source.shape == (32, 48, 4)
+        assert np.abs(make_thumbnail(source, 28).astype(int) - make_thumbnail(layer.pixels, 28)).max() <= 1
+        # Edits reach the next thumbnail
+        layer.pixels[1024:] = (0, 255, 0, 255)
+        layer.mark_dirty((0, 1024, 3072, 1024))
+        assert canva.thumbnail_source(layer, 28)[-1, 0].tolist() == [0, 255, 0, 255]
+
+    def test_size_for_screen(self):
+        assert thumbnail_size(1.0) == 28
+        assert thumbnail_size(2.0) == 64
+
+
+class TestThumbnailCache:
+    def test_follows_layer_version(self):
+        cache = ThumbnailCache()
+        layer = Layer(shape=(10, 10))
+        cache.put(layer, 28, layer.version, make_thumbnail(layer.pixels, 28))
+        assert cache.is_current(layer, 28)
+        assert not cache.is_current(layer, 64)
+        layer.mark_dirty()
+        assert cache.get(layer, 28) is None
+        assert cache.get(layer, 28, current=False) is not None
+
+    def test_older_render_does_not_replace_newer(self):
+        cache = ThumbnailCache()
+        layer = Layer(shape=(10, 10))
+        newer = np.ones((28, 28, 4), dtype=np.uint8)
+        cache.put(layer, 28, 5, newer)
+        cache.put(layer, 28, 3, np.zeros((28, 28, 4), dtype=np.uint8))
+        assert cache.get(layer, 28, current=False) is newer
+
+    def test_deleted_layers_are_dropped(self):
+        cache = ThumbnailCache()
+        layer = Layer(shape=(10, 10))
+        cache.put(layer, 28, 0, make_thumbnail(layer.pixels, 28))
+        del layer
+        gc.collect()
+        assert len(cache._entries) == 0
@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+from PySide6.QtCore import QPoint
+
+from EpiGimp.core.canva import Canva
+from EpiGimp.core.layer import Layer
+from EpiGimp.core.transform import (
+    TransformPreview, affine_matrix, is_affine, map_points, quad_matrix, transformed_bounds, warp
+)
+from EpiGimp.tools.transform import PerspectiveTool, RotateTool, ScaleTool, TransformTool
+
+
+def _sprite(height=20, width=40):
+    pixels = np.zeros((height, width, 4), dtype=np.uint8)
+    pixels[:] = (255, 0, 0, 255)
+    return pixels
+
+
+class TestMatrices:
+    def test_affine_matrix_rotates_around_center(self):
+        matrix = affine_matrix(angle=90, center=(10, 10))
+        assert np.allclose(map_points(matrix, [[20, 10]]), [[10, 20]])
+
+    def test_quad_matrix_of_parallelogram_is_affine(self):
+        matrix = quad_matrix((10, 20), [(5, 0), (25, 0), (20, 10), (0, 10)])
+        assert is_affine(matrix)
+        assert not is_affine(quad_matrix((10, 20), [(0, 0), (20, 2), (20, 8), (0, 10)]))
+
+    def test_transformed_bounds(self):
+        matrix = affine_matrix(scale=(2, 3), translate=(-5, 4))
+        assert transformed_bounds(matrix, (10, 20)) == (-5, 4, 35, 34)
+
+
+class TestWarp:
+    def test_output_expands_to_fit(self):
+        pixels, (x, y) = warp(_sprite(), affine_matrix(angle=90, center=(20, 10)))
+        assert pixels.shape[:2] == (40, 20)
+        assert (x, y) == (10, -10)
+        assert np.array_equal(pixels[20, 10], [255, 0, 0, 255])
+
+    def test_edges_do_not_darken(self):
+        pixels, _ = warp(_sprite(), affine_matrix(angle=30, center=(20, 10)), 'cubic')
+        visible = pixels[..., 3] > 0
+        assert pixels[..., 0][visible].min() >= 250
+
+    def test_perspective(self):
+        quad = [(0, 0), (40, 5), (40, 15), (0, 20)]
+        pixels, offset = warp(_sprite(), quad_matrix((20, 40), quad), 'nearest')
+        assert offset == (0, 0)
+        assert pixels.shape[:2] == (20, 40)
+        assert pixels[1, 38, 3] == 0
+        assert pixels[10, 38, 3] == 255
+
+    def test_errors(self):
+        with pytest.raises(ValueError):
+            warp(_sprite(), affine_matrix(), 'bogus')
+        with pytest.raises(ValueError):
+            warp(_sprite(), np.zeros((2, 3)))
+
+
+class TestLayerTransform:
+    def test_position_moves_by_the_offset(self):
+        layer = Layer(pixels=_sprite())
+        layer.position = (100, 50)
+        layer.transform(affine_matrix(scale=(0.5, 2), center=(20, 10)))
+        assert layer.pixels.shape[:2] == (40, 20)
+        assert tuple(layer.position) == (110, 40)
+
+    def test_canva_transform_layer(self):
+        canva = Canva(shape=(100, 100))
+        canva.add_layer_from_layer(Layer(pixels=_sprite()))
+        assert canva.transform_layer(affine_matrix(translate=(3, 4)), 'nearest')
+        assert tuple(canva.pixel_layer.position) == (3, 4)
+        assert np.array_equal(canva.composite()[4, 3], [255, 0, 0, 255])
+
+
+class TestPreview:
+    def test_proxy_is_downsampled(self):
+        canva = Canva(shape=(100, 100))
+        canva.add_layer_from_layer(Layer(pixels=np.full((1000, 3000, 4), 255, dtype=np.uint8)))
+        preview = canva.transform_preview(max_size=500)
+        assert max(preview.proxy.shape[:2]) <= 500
+        assert preview.scale == pytest.approx(preview.proxy.shape[1] / 3000)
+
+    def test_render_covers_the_full_resolution_area(self):
+        preview = TransformPreview(_sprite(10, 20), 0.5)
+        matrix = affine_matrix(scale=(2, 2), translate=(7, 3))
+        pixels, area = preview.render(matrix)
+        # Rounded outwards to whole proxy pixels (2 image pixels)
+        assert area == (6, 2, 88, 44)
+        assert pixels.shape[:2] == (21, 41)
+
+
+class TestTools:
+    def test_base_tool_is_abstract(self):
+        with pytest.raises(TypeError):
+            TransformTool("Transform", "Transform the layer")
+
+    def _tool(self, tool):
+        layer = Layer(pixels=_sprite())
+        layer.position = (10, 10)
+        tool.begin(layer)
+        return tool
+
+    def _drag(self, tool, start, end):
+        tool.mouse_press(QPoint(*start))
+        tool.mouse_move(QPoint(*end))
+        tool.mouse_release(QPoint(*end))
+
+    def test_drag_inside_moves(self):
+        tool = self._tool(ScaleTool())
+        self._drag(tool, (20, 20), (25, 17))
+        assert np.allclose(tool.matrix(), affine_matrix(translate=(5, -3)))
+
+    def test_scale_keeps_the_opposite_corner(self):
+        tool = self._tool(ScaleTool())
+        self._drag(tool, (50, 30), (90, 50))
+        assert np.allclose(tool.quad, [[10, 10], [90, 10], [90, 50], [10, 50]])
+
+    def test_rotate(self):
+        tool = self._tool(RotateTool())
+        # Center is (30, 20): a quarter turn clockwise
+        self._drag(tool, (40, 20), (30, 30))
+        assert np.allclose(tool.quad[0], [40, 0])
+
+    def test_perspective_moves_one_corner(self):
+        tool = self._tool(PerspectiveTool())
+        self._drag(tool, (50, 10), (45, 15))
+        assert np.allclose(tool.quad, [[10, 10], [45, 15], [50, 30], [10, 30]])
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from PySide6.QtCore import QRect
+from EpiGimp.core.canva import Canva
+from EpiGimp.core.point_ops import kelvin_table, kelvin_to_rgb
+from EpiGimp.core.white_balance import estimate_temperature, sample_pixels
+
+
+def tinted(temperature, shape=(400, 600)):
+    """Random gray values as lit by a light of the given temperature."""
+    rng = np.random.default_rng(0)
+    gray = rng.integers(40, 200, shape + (1,)).repeat(3, axis=2)
+    pixels = np.full(shape + (4,), 255, dtype=np.uint8)
+    pixels[..., :3] = np.clip(gray * (kelvin_to_rgb(temperature) / kelvin_to_rgb(6500)), 0, 255)
+    return pixels
+
+
+class TestKelvinTable:
+    def test_matches_kelvin_to_rgb(self):
+        temperatures, rgb = kelvin_table()
+        assert temperatures[0] == 1000 and temperatures[-1] == 40000
+        index = int(np.searchsorted(temperatures, 3200))
+        assert np.allclose(rgb[index], kelvin_to_rgb(3200))
+
+
+class TestSampling:
+    def test_sample_count_is_bounded(self):
+        pixels = np.zeros((1000, 1500, 4), dtype=np.uint8)
+        assert 0 < len(sample_pixels(pixels, max_samples=1000)) <= 1000
+        assert len(sample_pixels(pixels, max_samples=10 ** 7)) == 1000 * 1500
+
+    def test_bounds(self):
+        pixels = np.zeros((100, 100, 4), dtype=np.uint8)
+        pixels[10:20, 30:50] = 200
+        assert np.all(sample_pixels(pixels, bounds=(10, 20, 30, 50)) == 200)
+
+
+class TestEstimateTemperature:
+    @pytest.mark.parametrize("temperature", [2500, 3200, 5000, 6500, 9000])
+    def test_recovers_the_light(self, temperature):
+        estimate = estimate_temperature(tinted(temperature), max_samples=4096)
+        assert estimate == pytest.approx(temperature, rel=0.03)
+
+    def test_no_usable_pixel(self):
+        assert estimate_temperature(np.zeros((50, 50, 4), dtype=np.uint8)) is None
+
+    def test_canva_uses_selection(self):
+        canva = Canva(shape=(400, 600))
+        pixels = tinted(6500)
+        pixels[:, 300:] = tinted(3000)[:, 300:]
+        canva.pixel_layer.pixels[:] = pixels
+        canva.set_selection(QRect(300, 0, 300, 400))
+        assert canva.estimate_temperature() == pytest.approx(3000, rel=0.03)
+        canva.set_selection(QRect(0, 0, 300, 400))
+        assert canva.estimate_temperature() == pytest.approx(6500, rel=0.03)